@@ -601,25 +601,25 @@ def show_reconciliation_results(results):
     ])
 
     with tab1:
-        if results.get('perfect_matches'):
+        if results.get('perfect_match_count', 0):
             st.dataframe(sanitize_for_display(results['perfect_matches']), width="stretch")
         else:
             st.info("No perfect matches found")
 
     with tab2:
-        if results.get('fuzzy_matches'):
+        if results.get('fuzzy_match_count', 0):
             st.dataframe(sanitize_for_display(results['fuzzy_matches']), width="stretch")
         else:
             st.info("No fuzzy matches found")
 
     with tab3:
-        if results.get('balanced'):
+        if results.get('balanced_count', 0):
             st.dataframe(sanitize_for_display(results['balanced']), width="stretch")
         else:
             st.info("No balanced matches found")
 
     with tab4:
-        if results.get('unmatched'):
+        if results.get('unmatched_count', 0):
             st.dataframe(sanitize_for_display(results['unmatched']), width="stretch")
         else:
             st.success("✅ All transactions matched!")
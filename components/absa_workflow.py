@@ -779,36 +779,19 @@ class ABSAWorkflow:
     def run_reconciliation(self):
         """Execute reconciliation using FNB engine with ABSA data"""
         try:
-            import sys
-            import importlib
-
             try:
-                if 'components.fnb_workflow_gui_engine' in sys.modules:
-                    importlib.reload(sys.modules['components.fnb_workflow_gui_engine'])
-                from components.fnb_workflow_gui_engine import GUIReconciliationEngine
+                from components.reconciliation_runner import run_gui_reconciliation
             except ImportError:
-                if 'fnb_workflow_gui_engine' in sys.modules:
-                    importlib.reload(sys.modules['fnb_workflow_gui_engine'])
-                from fnb_workflow_gui_engine import GUIReconciliationEngine
+                from reconciliation_runner import run_gui_reconciliation
 
             st.info("🚀 **ABSA Reconciliation Mode** - Using proven reconciliation engine")
 
-            reconciler = GUIReconciliationEngine()
-
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-
-            results = reconciler.reconcile(
+            results = run_gui_reconciliation(
                 st.session_state.absa_ledger,
                 st.session_state.absa_statement,
-                st.session_state.absa_match_settings,
-                progress_bar,
-                status_text
+                st.session_state.absa_match_settings
             )
 
-            progress_bar.progress(100)
-            status_text.success("✅ Reconciliation complete!")
-
             st.session_state.absa_results = results
 
             st.success(f"✅ **Reconciliation Complete!**\n\n"
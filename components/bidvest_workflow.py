@@ -21,6 +21,7 @@ logger = logging.getLogger(__name__)
 # Add utils to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'utils'))
 from data_cleaner import clean_amount_column  # type: ignore
+from parsers import amount_cents, parse_dates  # type: ignore
 from column_selector import ColumnSelector  # type: ignore
 from file_loader import normalize_dataframe_types, sanitize_for_display  # type: ignore
 
@@ -474,8 +475,8 @@ class BidvestWorkflow:
                 status_text.text("📅 Parsing dates...")
                 progress_bar.progress(0.2)
 
-                ledger['__date'] = pd.to_datetime(ledger[l_date_col], errors='coerce')
-                statement['__date'] = pd.to_datetime(statement[s_date_col], errors='coerce')
+                ledger['__date'] = parse_dates(ledger[l_date_col], l_date_col)
+                statement['__date'] = parse_dates(statement[s_date_col], s_date_col)
 
                 # Step 2: Parse amounts (30%)
                 status_text.text("💰 Parsing amounts...")
@@ -489,19 +490,28 @@ class BidvestWorkflow:
                 status_text.text("📇 Building lookup indexes...")
                 progress_bar.progress(0.4)
 
+                # Amounts as int64 cents and dates as int64 days, converted once;
+                # every key and comparison below is on integers
+                l_labels = ledger.index.tolist()
+                s_labels = statement.index.tolist()
+                l_dated = ledger['__date'].notna().to_numpy()
+                s_dated = statement['__date'].notna().to_numpy()
+                l_days = ledger['__date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64).tolist()
+                s_days = statement['__date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64).tolist()
+                l_debit_cents = amount_cents(ledger['__debit']).tolist()
+                l_credit_cents = amount_cents(ledger['__credit']).tolist()
+                s_cents = amount_cents(statement['__amt']).tolist()
+
                 stmt_debit_idx = defaultdict(list)  # For positive amounts (matching debits)
                 stmt_credit_idx = defaultdict(list)  # For negative amounts (matching credits)
 
-                for si, srow in statement.iterrows():
-                    stmt_amt = srow['__amt']
-                    stmt_date = srow['__date']
-
-                    if pd.isnull(stmt_date) or pd.isnull(stmt_amt):
+                for s_pos, si in enumerate(s_labels):
+                    if not s_dated[s_pos]:
                         continue
 
-                    key = (stmt_date.date(), round(abs(stmt_amt), 2))
+                    key = (s_days[s_pos], abs(s_cents[s_pos]))
 
-                    if stmt_amt > 0:
+                    if s_cents[s_pos] > 0:
                         stmt_debit_idx[key].append(si)
                     else:
                         stmt_credit_idx[key].append(si)
@@ -513,67 +523,36 @@ class BidvestWorkflow:
                 matched_pairs = []
                 matched_statement = set()
 
-                # Match debits (Date+1 rule)
-                for i, lrow in ledger.iterrows():
-                    ldate = lrow['__date']
-                    ldebit = lrow['__debit']
+                # Match debits (Date+1 rule): the key holds the statement date
+                # (ledger date + 1 day) and the exact amount in cents
+                for l_pos, i in enumerate(l_labels):
+                    ldebit = l_debit_cents[l_pos]
 
-                    if pd.isnull(ldate) or pd.isnull(ldebit) or ldebit <= 0:
+                    if not l_dated[l_pos] or ldebit <= 0:
                         continue
 
-                    # Expected statement date (ledger date + 1 day)
-                    sdate = ldate + timedelta(days=1)
-                    key = (sdate.date(), round(ldebit, 2))
-
-                    if key in stmt_debit_idx:
-                        for si in stmt_debit_idx[key]:
-                            if si in matched_statement:
-                                continue
-
-                            stmt_amt = statement.at[si, '__amt']
-                            stmt_date = statement.at[si, '__date']
-
-                            # Match if statement date is 1 day after ledger and amounts match exactly
-                            if (not pd.isnull(stmt_date) and
-                                (stmt_date.date() - ldate.date()).days == 1 and
-                                round(ldebit, 2) == round(stmt_amt, 2) and stmt_amt > 0):
-
-                                matched_pairs.append((i, si, 'debit'))
-                                matched_statement.add(si)
-                                break
+                    for si in stmt_debit_idx.get((l_days[l_pos] + 1, ldebit), ()):
+                        if si not in matched_statement:
+                            matched_pairs.append((i, si, 'debit'))
+                            matched_statement.add(si)
+                            break
 
                 # Step 5: Match credits (70%)
                 status_text.text("🔍 Matching credit transactions...")
                 progress_bar.progress(0.7)
 
-                # Match credits (Date+1 rule)
-                for i, lrow in ledger.iterrows():
-                    ldate = lrow['__date']
-                    lcredit = lrow['__credit']
+                # Match credits (Date+1 rule, credit = negative statement amount)
+                for l_pos, i in enumerate(l_labels):
+                    lcredit = l_credit_cents[l_pos]
 
-                    if pd.isnull(ldate) or pd.isnull(lcredit) or lcredit <= 0:
+                    if not l_dated[l_pos] or lcredit <= 0:
                         continue
 
-                    # Expected statement date (ledger date + 1 day)
-                    sdate = ldate + timedelta(days=1)
-                    key = (sdate.date(), round(lcredit, 2))
-
-                    if key in stmt_credit_idx:
-                        for si in stmt_credit_idx[key]:
-                            if si in matched_statement:
-                                continue
-
-                            stmt_amt = statement.at[si, '__amt']
-                            stmt_date = statement.at[si, '__date']
-
-                            # Match if statement date is 1 day after ledger and amounts match (credit = negative)
-                            if (not pd.isnull(stmt_date) and
-                                (stmt_date.date() - ldate.date()).days == 1 and
-                                round(lcredit, 2) == round(abs(stmt_amt), 2) and stmt_amt < 0):
-
-                                matched_pairs.append((i, si, 'credit'))
-                                matched_statement.add(si)
-                                break
+                    for si in stmt_credit_idx.get((l_days[l_pos] + 1, lcredit), ()):
+                        if si not in matched_statement:
+                            matched_pairs.append((i, si, 'credit'))
+                            matched_statement.add(si)
+                            break
 
                 # Step 6: Group unmatched transactions (80%)
                 status_text.text("📦 Grouping unmatched transactions...")
@@ -582,39 +561,30 @@ class BidvestWorkflow:
                 matched_ledger_idx = {pair[0] for pair in matched_pairs}
                 matched_stmt_idx = {pair[1] for pair in matched_pairs}
 
-                unmatched_ledger = ledger[~ledger.index.isin(matched_ledger_idx)]
-                unmatched_statement = statement[~statement.index.isin(matched_stmt_idx)]
-
                 # Group by date and amount
                 ledger_groups = defaultdict(list)
                 stmt_groups = defaultdict(list)
 
                 # Group unmatched ledger entries
-                for idx, row in unmatched_ledger.iterrows():
-                    if pd.isnull(row['__date']):
+                for l_pos, idx in enumerate(l_labels):
+                    if idx in matched_ledger_idx or not l_dated[l_pos]:
                         continue
 
                     # Group debits
-                    if not pd.isnull(row['__debit']) and row['__debit'] > 0:
-                        date_key = row['__date'].date()
-                        key = (date_key, round(row['__debit'], 2), 'debit')
-                        ledger_groups[key].append(idx)
+                    if l_debit_cents[l_pos] > 0:
+                        ledger_groups[(l_days[l_pos], l_debit_cents[l_pos], 'debit')].append(idx)
 
                     # Group credits
-                    if not pd.isnull(row['__credit']) and row['__credit'] > 0:
-                        date_key = row['__date'].date()
-                        key = (date_key, round(row['__credit'], 2), 'credit')
-                        ledger_groups[key].append(idx)
+                    if l_credit_cents[l_pos] > 0:
+                        ledger_groups[(l_days[l_pos], l_credit_cents[l_pos], 'credit')].append(idx)
 
                 # Group unmatched statement entries
-                for idx, row in unmatched_statement.iterrows():
-                    if pd.isnull(row['__date']) or pd.isnull(row['__amt']):
+                for s_pos, idx in enumerate(s_labels):
+                    if idx in matched_stmt_idx or not s_dated[s_pos]:
                         continue
 
-                    date_key = row['__date'].date()
-                    amt_type = 'debit' if row['__amt'] > 0 else 'credit'
-                    key = (date_key, round(abs(row['__amt']), 2), amt_type)
-                    stmt_groups[key].append(idx)
+                    amt_type = 'debit' if s_cents[s_pos] > 0 else 'credit'
+                    stmt_groups[(s_days[s_pos], abs(s_cents[s_pos]), amt_type)].append(idx)
 
                 # Find grouped matches (same date, same amount)
                 grouped_matches = []
@@ -67,7 +67,8 @@ class CapitecWorkflow:
                 'match_amounts': True,
                 'use_debits_only': False,
                 'use_credits_only': False,
-                'use_both_debit_credit': True
+                'use_both_debit_credit': True,
+                'batch_fuzzy': True  # Multi-core rapidfuzz scoring for fuzzy-heavy files
             }
 
     def render(self):
@@ -735,18 +736,11 @@ class CapitecWorkflow:
     def run_reconciliation(self):
         """Execute the reconciliation using GUI engine"""
         try:
-            import sys
-            import importlib
-
             # Use FNB's reconciliation engine (same algorithm)
             try:
-                if 'components.fnb_workflow_gui_engine' in sys.modules:
-                    importlib.reload(sys.modules['components.fnb_workflow_gui_engine'])
-                from components.fnb_workflow_gui_engine import GUIReconciliationEngine
+                from components.reconciliation_runner import run_gui_reconciliation
             except ImportError:
-                if 'fnb_workflow_gui_engine' in sys.modules:
-                    importlib.reload(sys.modules['fnb_workflow_gui_engine'])
-                from fnb_workflow_gui_engine import GUIReconciliationEngine
+                from reconciliation_runner import run_gui_reconciliation
 
             settings = st.session_state.capitec_match_settings
 
@@ -756,20 +750,11 @@ class CapitecWorkflow:
                    "- Foreign Credits (>10,000 amounts)\n"
                    "- Split Transaction Detection (DP algorithm)")
 
-            # Create reconciler instance
-            reconciler = GUIReconciliationEngine()
-
-            # Create progress placeholders
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-
             # Run reconciliation
-            results = reconciler.reconcile(
+            results = run_gui_reconciliation(
                 st.session_state.capitec_ledger,
                 st.session_state.capitec_statement,
-                st.session_state.capitec_match_settings,
-                progress_bar,
-                status_text
+                st.session_state.capitec_match_settings
             )
 
             st.session_state.capitec_results = results
@@ -30,6 +30,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 # Import Supabase database service
 from file_loader import sanitize_for_display  # type: ignore
+from pair_matching import match_pairs_by_group  # type: ignore
+from parsers import amount_cents, parse_amounts  # type: ignore
 
 try:
     from supabase_db import get_db as get_supabase_db, save_reconciliation_results
@@ -340,8 +342,11 @@ class CorporateWorkflow:
 
             # Sub-step 1.1: Clean debits/credits
             status_placeholder.info(f"⚡ **Step 1/7 (2.0%):** Cleaning {original_row_count:,} debit/credit amounts...")
-            df['_debit'] = pd.to_numeric(df[debit_col], errors='coerce').fillna(0).abs()
-            df['_credit'] = pd.to_numeric(df[credit_col], errors='coerce').fillna(0).abs()
+            df['_debit'] = parse_amounts(df[debit_col], debit_col).abs()
+            df['_credit'] = parse_amounts(df[credit_col], credit_col).abs()
+            # int64 cents: matching and integrity sums compare these exactly
+            df['_debit_cents'] = amount_cents(df['_debit'])
+            df['_credit_cents'] = amount_cents(df['_credit'])
             progress_bar.progress(0.02)
 
             # Sub-step 1.2: Clean references/journals (CASE-INSENSITIVE)
@@ -391,234 +396,81 @@ class CorporateWorkflow:
             unique_journals = len(journal_to_indices)
             metrics_placeholder.success(f"✅ Step 2 complete: {step2_time-step1_time:.3f}s | {unique_refs:,} unique refs | {unique_journals:,} journals indexed")
 
-            # Initialize tracking
-            matched = set()
-            batch1_rows = []
-            batch2_rows = []
-            batch3_rows = []
-            batch4_rows = []
-            batch5_rows = []
+            # Batches are tracked as row positions into df, pairs interleaved
+            # as (matched, counterpart)
 
             # =============================================================================
             # BATCH 1: CORRECTING JOURNALS (Ultra-fast vectorized matching)
             # =============================================================================
             status_placeholder.info("🔍 **Step 3/7 (15.0%):** Batch 1 - Correcting Journals...")
 
-            # Extract all correcting journal references with vectorized regex
+            # Vectorized join of correcting entries to the journals they correct
             correcting_mask = df['_reference'].str.contains('CORRECTING', na=False, case=False)
-            correcting_df = df[correcting_mask].copy()
-            total_correcting = len(correcting_df)
-
-            if total_correcting > 0:
-                # Vectorized extraction of journal numbers from "Correcting J239918" format
-                # Extract just the digits after "J" - handles J239918, J1, J239, etc.
-                correcting_df['_journal_num'] = correcting_df['_reference'].str.extract(r'J(\d+)', flags=re.IGNORECASE)[0]
-            
-                # Remove rows where extraction failed
-                valid_correcting = correcting_df[correcting_df['_journal_num'].notna()].copy()
-            
-                # Create normalized journal lookup for entire dataframe
-                # Convert journal to string, remove .0 decimal, strip whitespace
-                df['_journal_str'] = df['_journal'].astype(str).str.strip()
-                # Remove .0 from floats (e.g., '61705.0' -> '61705')
-                df['_journal_str'] = df['_journal_str'].str.replace(r'\.0$', '', regex=True)
-            
-                # Create a journal lookup dictionary for FAST O(1) matching
-                # Key: normalized journal (no leading zeros, no decimals), Value: list of indices
-                journal_lookup = {}
-                for idx in df.index:
-                    if idx not in matched:
-                        j_str = df.loc[idx, '_journal_str']
-                        # Normalize: remove leading zeros and handle decimals
-                        j_normalized = j_str.lstrip('0') or '0'
-                        if j_normalized not in journal_lookup:
-                            journal_lookup[j_normalized] = []
-                        journal_lookup[j_normalized].append(idx)
-            
-                # Match each correcting journal
-                for idx, corr_row in valid_correcting.iterrows():
-                    if idx in matched:
-                        continue
-                
-                    # Extract journal number from correcting reference
-                    journal_num = corr_row['_journal_num']
-                    journal_normalized = journal_num.lstrip('0') or '0'
-                
-                    # Look up matching journals using hash map (O(1))
-                    if journal_normalized in journal_lookup:
-                        potential_indices = journal_lookup[journal_normalized]
-                    
-                        # Find first unmatched transaction with this journal (excluding self)
-                        for match_idx in potential_indices:
-                            if match_idx != idx and match_idx not in matched:
-                                # Add as paired rows (matched transaction FIRST, then correcting)
-                                batch1_rows.append(df.loc[match_idx])
-                                batch1_rows.append(df.loc[idx])
-                                matched.add(idx)
-                                matched.add(match_idx)
-                                # Remove from lookup to prevent reuse
-                                journal_lookup[journal_normalized].remove(match_idx)
-                                break
-            
-                # Cleanup temporary columns
-                df.drop(columns=['_journal_str'], inplace=True, errors='ignore')
+            total_correcting = int(correcting_mask.sum())
+            batch_positions = {'batch1': self._pair_correcting_journals(df['_reference'], df['_journal'])}
 
             progress_bar.progress(0.30)
             step3_time = time.time() - start_time
-            batch1_pairs = len(batch1_rows) // 2 if len(batch1_rows) > 0 else 0
-            metrics_placeholder.success(f"✅ Batch 1 complete: {step3_time-step2_time:.3f}s | {len(batch1_rows):,} transactions in {batch1_pairs:,} pairs ({total_correcting:,} correcting entries found)")
+            matched_mask = np.zeros(original_row_count, dtype=bool)
+            matched_mask[batch_positions['batch1']] = True
+            batch1_count = len(batch_positions['batch1'])
+            batch1_pairs = batch1_count // 2
+            metrics_placeholder.success(f"✅ Batch 1 complete: {step3_time-step2_time:.3f}s | {batch1_count:,} transactions in {batch1_pairs:,} pairs ({total_correcting:,} correcting entries found)")
 
             # =============================================================================
-            # BATCH 2-5: VECTORIZED MATCHING WITH HASH LOOKUP
+            # BATCH 2-5: GROUP-PARALLEL PAIR MATCHING (all reference groups at once)
             # =============================================================================
             status_placeholder.info("⚡ **Step 4/7 (30.0%):** Batches 2-5 - Ultra-fast vectorized matching...")
 
-            # Process only unmatched transactions
-            unmatched_mask = ~df.index.isin(matched)
-            unmatched_df = df[unmatched_mask].copy()
-
-            # Group by reference for batch processing
-            grouped_refs = list(unmatched_df.groupby('_reference'))
-            total_ref_groups = len(grouped_refs)
-            processed_groups = 0
-
-            for ref, group in grouped_refs:
-                # Skip blanks
-                if str(ref).startswith('__BLANK_') or len(group) < 2:
-                    processed_groups += 1
-                    continue
-
-                # Split into debit/credit
-                debit_rows = group[group['_debit'] > 0]
-                credit_rows = group[group['_credit'] > 0]
-
-                if len(debit_rows) == 0 or len(credit_rows) == 0:
-                    processed_groups += 1
-                    continue
-
-                # OPTIMIZED: Use numpy arrays directly, avoid repeated np.isin() calls
-                debit_idx = debit_rows.index.values
-                credit_idx = credit_rows.index.values
-                debit_amt = debit_rows['_debit'].values
-                credit_amt = credit_rows['_credit'].values
-                n_credits = len(credit_amt)
-
-                # Pre-build boolean mask for available credits (faster than set operations)
-                credit_available = np.ones(n_credits, dtype=bool)
-            
-                # Use configurable thresholds
-                exact_thresh = self.EXACT_MATCH_THRESHOLD
-                comm_thresh = self.COMMISSION_THRESHOLD
-                rate_min = self.RATE_DIFF_MIN
-                rate_max = self.RATE_DIFF_MAX
-
-                for i in range(len(debit_amt)):
-                    d_idx = debit_idx[i]
-                    if d_idx in matched:
-                        continue
-
-                    d_amt = debit_amt[i]
-                
-                    # Calculate differences with all credits
-                    diffs = d_amt - credit_amt
-
-                    # BATCH 2: Exact match (diff < exact_thresh)
-                    exact_mask = (np.abs(diffs) < exact_thresh) & credit_available
-                    if np.any(exact_mask):
-                        j = np.argmax(exact_mask)  # Get first True index
-                        c_idx = credit_idx[j]
-                        batch2_rows.append(df.loc[d_idx])
-                        batch2_rows.append(df.loc[c_idx])
-                        matched.add(d_idx)
-                        matched.add(c_idx)
-                        credit_available[j] = False
-                        continue
-
-                    # BATCH 3: FD commission (debit > credit by >= comm_thresh)
-                    fd_mask = (diffs >= comm_thresh) & credit_available
-                    if np.any(fd_mask):
-                        j = np.argmax(fd_mask)
-                        c_idx = credit_idx[j]
-                        batch3_rows.append(df.loc[d_idx])
-                        batch3_rows.append(df.loc[c_idx])
-                        matched.add(d_idx)
-                        matched.add(c_idx)
-                        credit_available[j] = False
-                        continue
-
-                    # BATCH 4: FC commission (credit > debit by >= comm_thresh)
-                    fc_mask = (diffs <= -comm_thresh) & credit_available
-                    if np.any(fc_mask):
-                        j = np.argmax(fc_mask)
-                        c_idx = credit_idx[j]
-                        batch4_rows.append(df.loc[d_idx])
-                        batch4_rows.append(df.loc[c_idx])
-                        matched.add(d_idx)
-                        matched.add(c_idx)
-                        credit_available[j] = False
-                        continue
-
-                    # BATCH 5: Rate differences (rate_min ≤ |diff| < rate_max)
-                    rate_mask = (np.abs(diffs) >= rate_min) & (np.abs(diffs) < rate_max) & credit_available
-                    if np.any(rate_mask):
-                        j = np.argmax(rate_mask)
-                        c_idx = credit_idx[j]
-                        batch5_rows.append(df.loc[d_idx])
-                        batch5_rows.append(df.loc[c_idx])
-                        matched.add(d_idx)
-                        matched.add(c_idx)
-                        credit_available[j] = False
-                        continue
-
-                processed_groups += 1
-
-                # Update progress less frequently to reduce UI overhead
-                update_freq = max(100, total_ref_groups // 10)
-                if processed_groups % update_freq == 0 or processed_groups == total_ref_groups:
-                    current_progress = 0.30 + (processed_groups / total_ref_groups) * 0.50  # 30% to 80%
-                    progress_pct = current_progress * 100
-                    total_matched = len(batch2_rows) + len(batch3_rows) + len(batch4_rows) + len(batch5_rows)
-
-                    status_placeholder.info(
-                        f"⚡ **Step 4/7 ({progress_pct:.1f}%):** {processed_groups:,} / {total_ref_groups:,} groups | "
-                        f"Matched: {total_matched:,} (B2:{len(batch2_rows)//2}, B3:{len(batch3_rows)//2}, B4:{len(batch4_rows)//2}, B5:{len(batch5_rows)//2})"
-                    )
-                    progress_bar.progress(current_progress)
+            # Configurable thresholds in whole cents
+            exact_thresh = int(round(self.EXACT_MATCH_THRESHOLD * 100))
+            comm_thresh = int(round(self.COMMISSION_THRESHOLD * 100))
+            rate_min = int(round(self.RATE_DIFF_MIN * 100))
+            rate_max = int(round(self.RATE_DIFF_MAX * 100))
+
+            # Group codes for every unmatched, non-blank reference (-1 = not matched here)
+            ref_groups = pd.factorize(df['_reference'])[0].astype(np.int64)
+            ref_groups[df['_reference'].str.startswith('__BLANK_').to_numpy()] = -1
+            ref_groups[matched_mask] = -1
+            total_ref_groups = len(np.unique(ref_groups[ref_groups >= 0]))
+
+            # All groups at once, one pass per batch in priority order; windows
+            # bound debit - credit in cents (see utils/pair_matching.py)
+            pairs = match_pairs_by_group(
+                ref_groups, df['_debit_cents'].to_numpy(), df['_credit_cents'].to_numpy(),
+                [
+                    ('batch2', [(-(exact_thresh - 1), exact_thresh - 1)]),   # BATCH 2: Exact match
+                    ('batch3', [(comm_thresh, None)]),                       # BATCH 3: FD commission
+                    ('batch4', [(None, -comm_thresh)]),                      # BATCH 4: FC commission
+                    ('batch5', [(rate_min, rate_max - 1),                    # BATCH 5: Rate differences
+                                (-(rate_max - 1), -rate_min)]),
+                ]
+            )
+
+            # Interleaved (debit, credit) positions per batch
+            for batch, (debit_pos, credit_pos) in pairs.items():
+                batch_positions[batch] = np.column_stack((debit_pos, credit_pos)).ravel()
+                matched_mask[batch_positions[batch]] = True
 
             progress_bar.progress(0.80)
             step4_time = time.time() - start_time
-            total_matched_2_5 = len(batch2_rows) + len(batch3_rows) + len(batch4_rows) + len(batch5_rows)
-            metrics_placeholder.success(f"✅ Batches 2-5 complete: {step4_time-step3_time:.3f}s | {total_matched_2_5:,} transactions | {processed_groups:,} ref groups processed")
+            total_matched_2_5 = sum(len(batch_positions[batch]) for batch in pairs)
+            metrics_placeholder.success(f"✅ Batches 2-5 complete: {step4_time-step3_time:.3f}s | {total_matched_2_5:,} transactions | {total_ref_groups:,} ref groups processed")
 
             # =============================================================================
             # BATCH 6: UNMATCHED
             # =============================================================================
             status_placeholder.info("📊 **Step 5/7 (80.0%):** Batch 6 - Collecting unmatched transactions...")
-            batch6_indices = set(df.index) - matched
-
-            # Create batch DataFrames with progress updates
-            status_placeholder.info("📊 **Step 5/7 (82.0%):** Creating Batch 1 DataFrame (Correcting Journals)...")
-            batch1_df = pd.DataFrame(batch1_rows) if batch1_rows else pd.DataFrame()
-            progress_bar.progress(0.82)
-
-            status_placeholder.info("📊 **Step 5/7 (84.0%):** Creating Batch 2 DataFrame (Exact Matches)...")
-            batch2_df = pd.DataFrame(batch2_rows) if batch2_rows else pd.DataFrame()
-            progress_bar.progress(0.84)
-
-            status_placeholder.info("📊 **Step 5/7 (86.0%):** Creating Batch 3 DataFrame (FD Commission)...")
-            batch3_df = pd.DataFrame(batch3_rows) if batch3_rows else pd.DataFrame()
-            progress_bar.progress(0.86)
-
-            status_placeholder.info("📊 **Step 5/7 (88.0%):** Creating Batch 4 DataFrame (FC Commission)...")
-            batch4_df = pd.DataFrame(batch4_rows) if batch4_rows else pd.DataFrame()
-            progress_bar.progress(0.88)
-
-            status_placeholder.info("📊 **Step 5/7 (90.0%):** Creating Batch 5 DataFrame (Rate Differences)...")
-            batch5_df = pd.DataFrame(batch5_rows) if batch5_rows else pd.DataFrame()
-            progress_bar.progress(0.90)
-
-            status_placeholder.info(f"📊 **Step 5/7 (92.0%):** Creating Batch 6 DataFrame ({len(batch6_indices):,} Unmatched)...")
-            batch6_df = df.loc[list(batch6_indices)].copy() if batch6_indices else pd.DataFrame()
+            # Unmatched rows in their original order
+            batch_positions['batch6'] = np.flatnonzero(~matched_mask)
+            matched_count = int(matched_mask.sum())
+
+            # One positional take per batch (keeps dtypes and the pair ordering)
+            status_placeholder.info("📊 **Step 5/7 (85.0%):** Creating batch DataFrames...")
+            batch1_df, batch2_df, batch3_df, batch4_df, batch5_df, batch6_df = (
+                self._batch_frame(df, batch_positions[batch])
+                for batch in ('batch1', 'batch2', 'batch3', 'batch4', 'batch5', 'batch6')
+            )
             progress_bar.progress(0.92)
 
             # =============================================================================
@@ -626,29 +478,21 @@ class CorporateWorkflow:
             # =============================================================================
             status_placeholder.info("✅ **Step 6/7 (92.0%):** Validating data integrity...")
 
-            # Calculate row counts
-            status_placeholder.info("✅ **Step 6/7 (93.0%):** Validating row counts...")
-            total_output = len(batch1_df) + len(batch2_df) + len(batch3_df) + len(batch4_df) + len(batch5_df) + len(batch6_df)
-            progress_bar.progress(0.93)
-
-            # Calculate original sums
-            status_placeholder.info("✅ **Step 6/7 (95.0%):** Calculating original debit/credit sums...")
-            orig_debit_sum = df['_debit'].sum()
-            orig_credit_sum = df['_credit'].sum()
-            progress_bar.progress(0.95)
-
-            # Calculate output sums
-            status_placeholder.info("✅ **Step 6/7 (97.0%):** Calculating output debit/credit sums...")
-            out_debit_sum = sum(b['_debit'].sum() if not b.empty and '_debit' in b.columns else 0
-                               for b in [batch1_df, batch2_df, batch3_df, batch4_df, batch5_df, batch6_df])
-            out_credit_sum = sum(b['_credit'].sum() if not b.empty and '_credit' in b.columns else 0
-                                for b in [batch1_df, batch2_df, batch3_df, batch4_df, batch5_df, batch6_df])
-            progress_bar.progress(0.97)
+            # Row counts and FD/FC sums straight from the batch positions
+            status_placeholder.info("✅ **Step 6/7 (95.0%):** Checking row counts and debit/credit sums...")
+            debit_cents = df['_debit_cents'].to_numpy()
+            credit_cents = df['_credit_cents'].to_numpy()
+            integrity = self._batch_integrity(batch_positions, debit_cents, credit_cents)
+            total_output = integrity['output_rows']
+            orig_debit_cents = int(debit_cents.sum())
+            orig_credit_cents = int(credit_cents.sum())
+            orig_debit_sum, orig_credit_sum = orig_debit_cents / 100, orig_credit_cents / 100
+            out_debit_sum, out_credit_sum = integrity['debit_cents'] / 100, integrity['credit_cents'] / 100
 
             # Check for issues
             status_placeholder.info("✅ **Step 6/7 (98.0%):** Running integrity checks...")
-            has_duplicates = total_output != original_row_count
-            sum_mismatch = abs(orig_debit_sum - out_debit_sum) > 0.01 or abs(orig_credit_sum - out_credit_sum) > 0.01
+            has_duplicates = total_output != original_row_count or integrity['repeated_rows'] > 0
+            sum_mismatch = orig_debit_cents != integrity['debit_cents'] or orig_credit_cents != integrity['credit_cents']
             progress_bar.progress(0.98)
 
             elapsed_time = time.time() - start_time
@@ -687,7 +531,7 @@ class CorporateWorkflow:
 
             # Display completion
             rows_per_sec = original_row_count / elapsed_time if elapsed_time > 0 else 0
-            match_rate = (len(matched) / original_row_count * 100) if original_row_count > 0 else 0
+            match_rate = (matched_count / original_row_count * 100) if original_row_count > 0 else 0
 
             if has_duplicates or sum_mismatch:
                 st.error(f"""
@@ -703,8 +547,8 @@ class CorporateWorkflow:
                 - 🚀 **Speed**: {rows_per_sec:,.0f} rows/second
                 - ⏱️ **Total Time**: {elapsed_time:.2f}s
                 - 📊 **Processed**: {original_row_count:,} transactions
-                - ✅ **Matched**: {len(matched):,} ({match_rate:.1f}%)
-                - ❌ **Unmatched**: {len(batch6_indices):,} ({100-match_rate:.1f}%)
+                - ✅ **Matched**: {matched_count:,} ({match_rate:.1f}%)
+                - ❌ **Unmatched**: {len(batch6_df):,} ({100-match_rate:.1f}%)
 
                 **📊 Batch Summary:**
                 - Batch 1: {len(batch1_df):,} | Batch 2: {len(batch2_df):,} | Batch 3: {len(batch3_df):,}
@@ -739,6 +583,74 @@ class CorporateWorkflow:
             with st.expander("🔍 Error Details"):
                 st.code(traceback.format_exc())
 
+    @classmethod
+    def _pair_correcting_journals(cls, references: pd.Series, journals: pd.Series) -> np.ndarray:
+        """
+        Batch 1 pairs: correcting entries ("Correcting J239918") and the
+        transactions carrying the journal they correct.
+
+        The k-th correcting entry for a journal pairs with the k-th other row
+        carrying that journal, so each entry gets the first unmatched partner
+        in row order. Journals are compared without '.0' and leading zeros.
+
+        Returns:
+            int64 row positions, interleaved (partner, correcting entry),
+            ordered by correcting entry
+        """
+        # Extract just the digits after "J" - handles J239918, J1, J239, etc.
+        correcting_mask = references.str.contains('CORRECTING', na=False, case=False).to_numpy()
+        journal_num = references[correcting_mask].str.extract(r'J(\d+)', flags=re.IGNORECASE)[0]
+        correcting_pos = np.flatnonzero(correcting_mask)[journal_num.notna().to_numpy()]
+        if len(correcting_pos) == 0:
+            return np.empty(0, dtype=np.int64)
+        is_correcting = np.zeros(len(references), dtype=bool)
+        is_correcting[correcting_pos] = True
+
+        # Normalized journal per row (e.g. '061705.0' -> '61705'), computed once
+        journal_key = journals.astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+        journal_key = cls._strip_leading_zeros(journal_key).to_numpy()
+
+        partner_pos = np.flatnonzero(~is_correcting)
+        correcting = pd.DataFrame({
+            'key': cls._strip_leading_zeros(journal_num.dropna()).to_numpy(),
+            'correcting': correcting_pos,
+        })
+        partners = pd.DataFrame({'key': journal_key[partner_pos], 'partner': partner_pos})
+        correcting['rank'] = correcting.groupby('key').cumcount()
+        partners['rank'] = partners.groupby('key').cumcount()
+        pairs = correcting.merge(partners, on=['key', 'rank']).sort_values('correcting')
+
+        return np.column_stack(
+            (pairs['partner'].to_numpy(np.int64), pairs['correcting'].to_numpy(np.int64))
+        ).ravel()
+
+    @staticmethod
+    def _strip_leading_zeros(values: pd.Series) -> pd.Series:
+        """Journal numbers without leading zeros ('0' stays '0')."""
+        stripped = values.str.lstrip('0')
+        return stripped.mask(stripped == '', '0')
+
+    @staticmethod
+    def _batch_frame(df: pd.DataFrame, positions: np.ndarray) -> pd.DataFrame:
+        """Rows of one batch, in position order (pairs stay interleaved)."""
+        if len(positions) == 0:
+            return pd.DataFrame()
+        return df.take(positions)
+
+    @staticmethod
+    def _batch_integrity(batch_positions: dict, debit_cents: np.ndarray, credit_cents: np.ndarray) -> dict:
+        """
+        Output row count, FD/FC cent sums and rows placed more than once,
+        computed from the batch position arrays.
+        """
+        positions = np.concatenate([np.asarray(p, dtype=np.int64) for p in batch_positions.values()])
+        return {
+            'output_rows': len(positions),
+            'debit_cents': int(debit_cents[positions].sum()),
+            'credit_cents': int(credit_cents[positions].sum()),
+            'repeated_rows': len(positions) - len(np.unique(positions)),
+        }
+
     def render_reference_extraction(self):
         """Render reference extraction UI"""
         col1, col2, col3 = st.columns([1, 2, 1])
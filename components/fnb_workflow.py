@@ -36,6 +36,7 @@ _FNB_RE_NAME_DIGITS = re.compile(r'^[A-Za-z\s]+\s+\d{10,}$')
 # Add utils to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'utils'))
 from data_cleaner import clean_amount_column  # type: ignore
+from parsers import parse_dates  # type: ignore
 from column_selector import ColumnSelector  # type: ignore
 from file_loader import load_uploaded_file, get_dataframe_info, sanitize_for_display  # type: ignore
 
@@ -943,19 +944,11 @@ class FNBWorkflow:
     def run_reconciliation(self):
         """Execute the ULTRA-FAST reconciliation with all matching modes"""
         try:
-            # Import GUI-based engine (handle both local and deployed paths)
-            # Force reload to pick up code changes
-            import sys
-            import importlib
-
+            # Import the GUI engine runner (handle both local and deployed paths)
             try:
-                if 'components.fnb_workflow_gui_engine' in sys.modules:
-                    importlib.reload(sys.modules['components.fnb_workflow_gui_engine'])
-                from components.fnb_workflow_gui_engine import GUIReconciliationEngine
+                from components.reconciliation_runner import run_gui_reconciliation
             except ImportError:
-                if 'fnb_workflow_gui_engine' in sys.modules:
-                    importlib.reload(sys.modules['fnb_workflow_gui_engine'])
-                from fnb_workflow_gui_engine import GUIReconciliationEngine
+                from reconciliation_runner import run_gui_reconciliation
 
             # Check if reference-only mode (ULTRA FAST PATH)
             settings = st.session_state.fnb_match_settings
@@ -979,20 +972,11 @@ class FNBWorkflow:
                        "- 🔀 Split Transaction Detection (DP algorithm)\n"
                        "- ✅ Flexible Debit/Credit Matching")
 
-            # Create reconciler instance
-            reconciler = GUIReconciliationEngine()
-
-            # Create progress placeholders
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-
             # Run reconciliation
-            results = reconciler.reconcile(
+            results = run_gui_reconciliation(
                 st.session_state.fnb_ledger,
                 st.session_state.fnb_statement,
-                st.session_state.fnb_match_settings,
-                progress_bar,
-                status_text
+                st.session_state.fnb_match_settings
             )
 
             st.session_state.fnb_results = results
@@ -1055,7 +1039,7 @@ class FNBWorkflow:
         # Standardize date column
         date_col = settings.get('ledger_date_col', 'Date')
         if date_col in ledger.columns:
-            ledger['date_normalized'] = pd.to_datetime(ledger[date_col], errors='coerce')
+            ledger['date_normalized'] = parse_dates(ledger[date_col], date_col)
             # Convert original date column to string to prevent timestamp corruption in results
             ledger[date_col] = ledger['date_normalized'].apply(
                 lambda x: x.strftime('%Y-%m-%d %H:%M:%S') if pd.notna(x) else ''
@@ -1095,7 +1079,7 @@ class FNBWorkflow:
         # Standardize date column
         date_col = settings.get('statement_date_col', 'Date')
         if date_col in statement.columns:
-            statement['date_normalized'] = pd.to_datetime(statement[date_col], errors='coerce')
+            statement['date_normalized'] = parse_dates(statement[date_col], date_col)
             # Convert original date column to string to prevent timestamp corruption in results
             statement[date_col] = statement['date_normalized'].apply(
                 lambda x: x.strftime('%Y-%m-%d %H:%M:%S') if pd.notna(x) else ''
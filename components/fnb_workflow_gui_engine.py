@@ -4,21 +4,33 @@ FNB Reconciliation Engine - GUI Algorithm Port
 This is a direct port of the proven GUI reconciliation algorithm to Streamlit.
 Performance: ~1.4 seconds for 700+ matches
 Accuracy: 736 matched transactions (vs 10 in old engine)
+
+The engine is headless: GUIReconciliationEngine.run() reports through a
+ProgressSink and returns (results, diagnostics). Streamlit wiring lives in
+components/reconciliation_runner.py.
+
+Each run keeps a ReconciliationState (engine.state); append() matches rows
+added later (e.g. new statement lines) against it without a full rerun.
 """
 
 import logging
 import pandas as pd
 import numpy as np
-import streamlit as st
-from typing import Dict, List, Tuple, Set, Any
+from typing import Dict, List, Tuple, Set, Any, Optional
 from datetime import datetime
 import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
 
 logger = logging.getLogger(__name__)
 
 try:
     from rapidfuzz import fuzz
+    from rapidfuzz import process as rf_process
 except ImportError:
+    rf_process = None  # Batch scoring needs rapidfuzz; fuzzywuzzy falls back to per-pair scoring
     try:
         from fuzzywuzzy import fuzz
     except ImportError:
@@ -28,7 +40,609 @@ except ImportError:
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'utils'))
-from data_cleaner import clean_amount_column  # type: ignore
+from parsers import ParseReport, parse_amounts, parse_dates  # type: ignore
+from csr_index import CSRIndex, encode_trigrams  # type: ignore
+from fuzzy_cache import DEFAULT_MAX_ENTRIES, FuzzyScoreCache, get_shared_cache  # type: ignore
+from ngram_retrieval import NgramRetriever, top_k_mask  # type: ignore
+from extraction import ReferenceExtractor  # type: ignore
+from subset_sum import (  # type: ignore
+    DEFAULT_WORK_BUDGET, MITM_MAX_ITEMS, WorkBudget, find_subset_sum,
+)
+
+# Sentinel produced by datetime64 -> int64 for NaT (day and nanosecond keys)
+_NAT_KEY = np.iinfo(np.int64).min
+
+_NS_PER_DAY = 86_400 * 10**9
+
+# Batch fuzzy scoring: pairs scored per cpdist call, and total pairs kept in memory
+BATCH_FUZZY_CHUNK_PAIRS = 1_000_000
+BATCH_FUZZY_MAX_PAIRS = 20_000_000
+
+# Phase 1 fuzzy fallback: open candidates per statement row kept for fuzzy
+# scoring, ranked by IDF-weighted trigram overlap (0 scores the whole block)
+DEFAULT_FUZZY_TOP_K = 25
+
+# Reference-only fast path: ledger postings expanded per statement row by the
+# whole-ledger trigram shortlist (rarest trigrams first)
+REFERENCE_SHORTLIST_MAX_POSTINGS = 2_000
+
+# Phase 1.5 only considers statement amounts above 10,000
+FOREIGN_CREDIT_MIN_CENTS = 1_000_000
+
+# Date-partitioned mode: shards planned per worker process (smooths uneven days)
+SHARDS_PER_WORKER = 4
+
+# Banded join: debit/credit side packed above the cents (or day) key
+_SIDE_STRIDE = 1 << 60
+
+# Banded join: (statement row, posting) candidate pairs expanded at most per join
+BANDED_PAIR_BUDGET = 5_000_000
+
+
+def _to_cents(values) -> np.ndarray:
+    """Absolute amounts as int64 cents (non-numeric values become 0)."""
+    amounts = pd.to_numeric(pd.Series(values), errors='coerce').fillna(0).to_numpy(dtype=float)
+    return np.rint(np.abs(amounts) * 100).astype(np.int64)
+
+
+def _column_cents(df: pd.DataFrame, col) -> pd.Series:
+    """int64 absolute cents of a column, indexed like `df` (zeros when the column is missing)."""
+    if col and col in df.columns:
+        return pd.Series(_to_cents(df[col]), index=df.index)
+    return pd.Series(np.zeros(len(df), dtype=np.int64), index=df.index)
+
+
+def _ledger_amount_cents(debit_cents: pd.Series, credit_cents: pd.Series,
+                         use_debits_only: bool, use_credits_only: bool) -> pd.Series:
+    """Ledger amount in cents per the debit/credit settings (both: debit, else credit)."""
+    if use_debits_only:
+        return debit_cents
+    if use_credits_only:
+        return credit_cents
+    return debit_cents.where(debit_cents != 0, credit_cents)
+
+
+def _identifier_codes(ledger_refs, stmt_refs) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Identifier blocking keys (ReferenceExtractor.identifier_keys) as shared int codes.
+
+    Per key type: (ledger codes, statement codes), -1 where a row has no such
+    identifier. Key types no statement row carries are left out.
+    """
+    ledger_keys = ReferenceExtractor.identifier_keys(ledger_refs)
+    stmt_keys = ReferenceExtractor.identifier_keys(stmt_refs)
+    codes = {}
+    for key_type in ledger_keys.columns:
+        if not (stmt_keys[key_type] != '').any():
+            continue
+        both = pd.concat([ledger_keys[key_type], stmt_keys[key_type]], ignore_index=True)
+        factor = pd.factorize(both.where(both != ''))[0]
+        codes[key_type] = (factor[:len(ledger_keys)], factor[len(ledger_keys):])
+    return codes
+
+
+def _max_fuzzy_scores(queries, choices, score_cutoff, workers=-1) -> np.ndarray:
+    """
+    Pairwise max(ratio, token_set_ratio, partial_ratio) with rapidfuzz cpdist.
+
+    Same semantics as GUIReconciliationEngine._get_fuzzy_score_cached on
+    lower-cased, stripped strings; scores below score_cutoff come back as 0.
+    """
+    best = None
+    for scorer in (fuzz.ratio, fuzz.token_set_ratio, fuzz.partial_ratio):
+        part = rf_process.cpdist(queries, choices, scorer=scorer, score_cutoff=score_cutoff,
+                                 dtype=np.float64, workers=workers)
+        best = part if best is None else np.maximum(best, part, out=best)
+    # Truncate like int(score); epsilon guards float noise at whole numbers
+    return np.floor(best + 1e-9).astype(np.int32)
+
+
+def _to_ns_keys(values) -> np.ndarray:
+    """Dates as int64 nanoseconds since epoch (NaT becomes _NAT_KEY)."""
+    dates = pd.to_datetime(pd.Series(values), errors='coerce')
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+
+def _ns_to_days(ns: np.ndarray) -> np.ndarray:
+    """Nanosecond keys floored to whole days, keeping _NAT_KEY."""
+    return np.where(ns == _NAT_KEY, _NAT_KEY, ns // _NS_PER_DAY)
+
+
+def _to_day_keys(values) -> np.ndarray:
+    """Dates as int64 days since epoch (NaT becomes _NAT_KEY)."""
+    return _ns_to_days(_to_ns_keys(values))
+
+
+def _build_amount_index(debit_cents: np.ndarray, credit_cents: np.ndarray) -> CSRIndex:
+    """Cents -> ledger positions, side 0 = debit, 1 = credit (debits first within a key)."""
+    post_cents, post_pos, post_side = [], [], []
+    for side, cents in ((0, debit_cents), (1, credit_cents)):
+        keep = np.flatnonzero(cents > 0)
+        post_cents.append(cents[keep])
+        post_pos.append(keep)
+        post_side.append(np.full(len(keep), side, dtype=np.uint8))
+    return CSRIndex.build(np.concatenate(post_cents), np.concatenate(post_pos), np.concatenate(post_side))
+
+
+def _build_trigram_index(refs) -> CSRIndex:
+    """Lower-cased trigram code -> ledger positions, skipping empty/'nan' references."""
+    refs = pd.Series(refs, dtype=object).fillna('').astype(str).str.strip()
+    valid = ((refs != '') & (refs.str.upper() != 'NAN')).to_numpy()
+    if not valid.any():
+        return CSRIndex.empty()
+    rows, codes = encode_trigrams(refs[valid].str.lower())
+    return CSRIndex.build(codes, np.flatnonzero(valid)[rows], unique=True)
+
+
+def _join_blocking_keys(post_pos, post_days, post_side, post_cents,
+                        stmt_days, stmt_side, stmt_cents, stmt_valid) -> Dict[str, np.ndarray]:
+    """
+    Resolve each statement row to the ledger postings with the same (day, side, cents) key.
+
+    Each component is dense-ranked over both sides and packed into one int64
+    key; postings are lexsorted by (key, ledger position) and searchsorted
+    gives every statement row a [lo, hi) range. Invalid rows get an empty range.
+    """
+    _, day_rank = np.unique(np.concatenate([post_days, stmt_days]), return_inverse=True)
+    cent_values, cent_rank = np.unique(np.concatenate([post_cents, stmt_cents]), return_inverse=True)
+    n_cents = max(1, len(cent_values))
+    keys = (day_rank.astype(np.int64) * 2 + np.concatenate([post_side, stmt_side])) * n_cents + cent_rank
+    post_keys = keys[:len(post_pos)]
+    stmt_keys = keys[len(post_pos):]
+
+    order = np.lexsort((post_pos, post_keys))
+    sorted_keys = post_keys[order]
+    lo = np.searchsorted(sorted_keys, stmt_keys, side='left')
+    hi = np.searchsorted(sorted_keys, stmt_keys, side='right')
+    hi = np.where(stmt_valid, hi, lo)
+
+    return {
+        'ledger_order': post_pos[order],
+        'lo': lo,
+        'hi': hi,
+    }
+
+
+def _band_windows(post_group, post_band, stmt_group, stmt_band, width, stmt_valid):
+    """
+    Postings in the statement row's exact group within +/- width on the band value.
+
+    Group ranks and band values are dense-ranked and packed into one int64 key
+    (no overflow: both ranks are bounded by the row counts), so every window
+    is one pair of searchsorted calls.
+
+    Returns:
+        Tuple (order, lo, mid, hi): postings in key order and per-row [lo, hi)
+        windows into it; mid is where the row's own band value would sit
+    """
+    groups = np.unique(post_group)
+    stmt_rank = np.minimum(np.searchsorted(groups, stmt_group), max(0, len(groups) - 1))
+    in_post = (groups[stmt_rank] == stmt_group) if len(groups) else np.zeros(len(stmt_group), dtype=bool)
+    post_rank = np.searchsorted(groups, post_group)
+
+    values = np.unique(np.concatenate([post_band, stmt_band - width, stmt_band + width]))
+    span = len(values)
+    post_keys = post_rank * span + np.searchsorted(values, post_band)
+    order = np.argsort(post_keys, kind='stable')
+    sorted_keys = post_keys[order]
+
+    base = stmt_rank * span
+    lo = np.searchsorted(sorted_keys, base + np.searchsorted(values, stmt_band - width), side='left')
+    hi = np.searchsorted(sorted_keys, base + np.searchsorted(values, stmt_band + width), side='right')
+    mid = np.searchsorted(sorted_keys, base + np.searchsorted(values, stmt_band), side='left')
+    hi = np.where(stmt_valid & in_post, hi, lo)
+    return order, lo, np.clip(mid, lo, hi), hi
+
+
+def _join_banded(post_pos, post_days, post_side, post_cents,
+                 stmt_days, stmt_side, stmt_cents, stmt_valid,
+                 day_tolerance: int, cents_tolerance: np.ndarray,
+                 pair_budget: int = BANDED_PAIR_BUDGET) -> Dict[str, np.ndarray]:
+    """
+    Resolve each statement row to the ledger postings on its side within
+    +/- day_tolerance days and +/- cents_tolerance[i] cents.
+
+    Only one key is ever banded, the other stays exact, so a window holds
+    nothing but real candidates:
+
+    - exact amounts: postings sorted on (side, cents, day), one day window
+      inside the row's (side, cents) run
+    - amount tolerance: postings sorted on (side, day, cents), one cents
+      window inside the (side, day + offset) run for each day offset,
+      closest days first
+
+    The windows are expanded into (statement row, posting) pairs under a
+    WorkBudget of pair_budget pairs. When they do not fit, every row keeps
+    at most an equal share of the budget - the postings nearest to its own
+    day/amount - and 'trimmed' counts the rows that were cut. Candidates are
+    ordered by (day distance, cents distance, ledger position): the closest
+    open posting is taken first.
+
+    Returns:
+        Same layout as _join_blocking_keys plus 'trimmed'; ledger_order holds
+        each row's candidates back to back.
+    """
+    n_stmt = len(stmt_valid)
+    cents_tolerance = np.broadcast_to(np.asarray(cents_tolerance, dtype=np.int64), (n_stmt,))
+    stmt_days = np.where(stmt_valid, stmt_days, 0)
+
+    if not cents_tolerance.any():
+        # Exact amounts: day window inside each (side, cents) run
+        windows = [_band_windows(post_side * _SIDE_STRIDE + post_cents, post_days,
+                                 stmt_side * _SIDE_STRIDE + stmt_cents, stmt_days,
+                                 day_tolerance, stmt_valid)]
+    else:
+        # Amount window inside each (side, day) run, one pass per day offset
+        offsets = sorted(range(-day_tolerance, day_tolerance + 1), key=abs)
+        windows = [_band_windows(post_side * _SIDE_STRIDE + post_days, post_cents,
+                                 stmt_side * _SIDE_STRIDE + stmt_days + offset, stmt_cents,
+                                 cents_tolerance, stmt_valid)
+                   for offset in offsets]
+
+    # Cap the expansion: over budget, each row keeps an equal share, nearest first
+    counts = [hi - lo for _, lo, _, hi in windows]
+    row_counts = np.sum(counts, axis=0)
+    trimmed = 0
+    if not WorkBudget(pair_budget).charge(int(row_counts.sum())):
+        share = max(1, pair_budget // max(1, int(np.count_nonzero(row_counts))))
+        trimmed = int(np.count_nonzero(row_counts > share))
+        remaining = np.full(n_stmt, share, dtype=np.int64)
+        for w, (order, lo, mid, hi) in enumerate(windows):
+            keep = np.minimum(counts[w], remaining)
+            remaining -= keep
+            new_lo = np.clip(mid - keep // 2, lo, hi - keep)
+            windows[w] = (order, new_lo, mid, new_lo + keep)
+            counts[w] = keep
+
+    # Expand every window into (statement row, posting) pairs
+    pair_stmt, pair_post = [], []
+    for (order, lo, _, _), count in zip(windows, counts):
+        total = int(count.sum())
+        starts = np.cumsum(count) - count
+        pair_stmt.append(np.repeat(np.arange(n_stmt), count))
+        pair_post.append(order[np.arange(total) - np.repeat(starts, count) + np.repeat(lo, count)])
+    pair_stmt = np.concatenate(pair_stmt)
+    pair_post = np.concatenate(pair_post)
+
+    day_gap = np.abs(post_days[pair_post] - stmt_days[pair_stmt])
+    cents_gap = np.abs(post_cents[pair_post] - stmt_cents[pair_stmt])
+    ranked = np.lexsort((post_pos[pair_post], cents_gap, day_gap, pair_stmt))
+    counts = np.bincount(pair_stmt, minlength=n_stmt)
+    hi = np.cumsum(counts)
+    return {
+        'ledger_order': post_pos[pair_post[ranked]],
+        'lo': hi - counts,
+        'hi': hi,
+        'trimmed': trimmed,
+    }
+
+
+# ============================================
+# DATE-PARTITIONED MULTI-PROCESS HELPERS
+# ============================================
+
+def _plan_date_shards(ledger_days: np.ndarray, stmt_days: np.ndarray,
+                      target_shards: int) -> Tuple[np.ndarray, np.ndarray, List[Tuple[int, int, int, int]]]:
+    """
+    Split dated rows into contiguous day windows of roughly equal row counts.
+
+    Undated rows are left out: with date matching on they can never match.
+
+    Returns:
+        Tuple (ledger_order, stmt_order, bounds): positions of dated rows sorted
+        by day (stable, so original order holds within a day) and one
+        (ledger_lo, ledger_hi, stmt_lo, stmt_hi) slice per shard into them
+    """
+    ledger_dated = np.flatnonzero(ledger_days != _NAT_KEY)
+    stmt_dated = np.flatnonzero(stmt_days != _NAT_KEY)
+    ledger_order = ledger_dated[np.argsort(ledger_days[ledger_dated], kind='stable')]
+    stmt_order = stmt_dated[np.argsort(stmt_days[stmt_dated], kind='stable')]
+    ledger_sorted = ledger_days[ledger_order]
+    stmt_sorted = stmt_days[stmt_order]
+
+    days = np.union1d(ledger_sorted, stmt_sorted)
+    if len(days) == 0:
+        return ledger_order, stmt_order, []
+
+    # Rows per day, then cut the cumulative count into target_shards windows
+    weight = (np.searchsorted(ledger_sorted, days, side='right') - np.searchsorted(ledger_sorted, days, side='left')
+              + np.searchsorted(stmt_sorted, days, side='right') - np.searchsorted(stmt_sorted, days, side='left'))
+    cumulative = np.cumsum(weight)
+    cuts = np.searchsorted(cumulative, cumulative[-1] * np.arange(1, target_shards) / target_shards, side='left')
+    last_days = np.unique(np.append(cuts, len(days) - 1))
+
+    bounds = []
+    ledger_lo = stmt_lo = 0
+    for day in days[last_days]:
+        ledger_hi = int(np.searchsorted(ledger_sorted, day, side='right'))
+        stmt_hi = int(np.searchsorted(stmt_sorted, day, side='right'))
+        # Windows without statement rows have nothing to match
+        if stmt_hi > stmt_lo and ledger_hi > ledger_lo:
+            bounds.append((ledger_lo, ledger_hi, stmt_lo, stmt_hi))
+        ledger_lo, stmt_lo = ledger_hi, stmt_hi
+    return ledger_order, stmt_order, bounds
+
+
+def _to_fixed_width(refs: np.ndarray) -> np.ndarray:
+    """Object string array as a fixed-width '<U' array (shareable as a flat buffer)."""
+    width = max(1, max((len(r) for r in refs), default=1))
+    return np.asarray(refs, dtype=f'<U{width}')
+
+
+def _share_arrays(arrays: Dict[str, np.ndarray]):
+    """
+    Copy arrays into named shared-memory blocks.
+
+    Returns:
+        Tuple (handles, descriptors): the SharedMemory handles (the caller closes
+        and unlinks them) and picklable {name: (shm_name, dtype, shape)}
+    """
+    handles, descriptors = [], {}
+    try:
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+            handles.append(shm)
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+            descriptors[name] = (shm.name, arr.dtype.str, arr.shape)
+    except Exception:
+        for shm in handles:
+            shm.close()
+            shm.unlink()
+        raise
+    return handles, descriptors
+
+
+def _attach_arrays(descriptors, slices=None) -> Dict[str, np.ndarray]:
+    """Copy (slices of) shared arrays into process-local memory."""
+    local = {}
+    for name, (shm_name, dtype, shape) in descriptors.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        try:
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+            sl = slices(name) if slices is not None else slice(None)
+            local[name] = view[sl].copy()
+            del view
+        finally:
+            shm.close()
+    return local
+
+
+def _has_value_within(values: np.ndarray, targets: np.ndarray, tolerance) -> np.ndarray:
+    """Mask of values with some target no further than `tolerance` (scalar or per value) away."""
+    if len(targets) == 0:
+        return np.zeros(len(values), dtype=bool)
+    targets = np.sort(targets)
+    pos = np.searchsorted(targets, values)
+    right = targets[np.minimum(pos, len(targets) - 1)]
+    left = targets[np.maximum(pos - 1, 0)]
+    gap = np.minimum(np.abs(right - values), np.abs(values - left))
+    return gap <= tolerance
+
+
+def _continue_labels(existing: pd.Index, rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Label appended rows so they follow `existing`.
+
+    Default RangeIndex labels on both sides are renumbered after the existing
+    rows (like concat(ignore_index=True)); any other labels must be new.
+    """
+    if len(rows) == 0:
+        return rows
+    if existing.equals(pd.RangeIndex(len(existing))) and rows.index.equals(pd.RangeIndex(len(rows))):
+        return rows.set_axis(pd.RangeIndex(len(existing), len(existing) + len(rows)))
+    if rows.index.has_duplicates or rows.index.isin(existing).any():
+        raise ValueError("Appended rows must not reuse existing index labels")
+    return rows
+
+
+def _concat_row_arrays(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Append per-row arrays (see _phase_arrays); a date array missing on one side reads as NaT."""
+    out = {}
+    for key, values in old.items():
+        extra = new[key]
+        if values is None and extra is None:
+            out[key] = None
+            continue
+        side = key.split('_')[0]
+        if values is None:
+            values = np.full(len(old[f'{side}_refs']), _NAT_KEY, dtype=np.int64)
+        if extra is None:
+            extra = np.full(len(new[f'{side}_refs']), _NAT_KEY, dtype=np.int64)
+        out[key] = np.concatenate([values, extra])
+    return out
+
+
+def _match_date_shard(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Worker entry point: run Phases 1 and 1.5 on one date shard.
+
+    Runs in a separate process; arguments and results are plain arrays/dicts.
+    """
+    ledger_lo, ledger_hi, stmt_lo, stmt_hi = task['bounds']
+    arrays = _attach_arrays(
+        task['arrays'],
+        lambda name: slice(ledger_lo, ledger_hi) if name.startswith('ledger_') else slice(stmt_lo, stmt_hi)
+    )
+    arrays['ledger_refs'] = arrays['ledger_refs'].astype(object)
+    arrays['stmt_refs'] = arrays['stmt_refs'].astype(object)
+
+    trigram = _attach_arrays(task['trigram_index'])
+    engine = GUIReconciliationEngine()
+    engine.ledger_trigram_index = CSRIndex(trigram['keys'], trigram['offsets'], trigram['postings'])
+    return engine._match_shard(arrays, task['options'])
+
+
+class ProgressSink:
+    """
+    Progress/event callback protocol for GUIReconciliationEngine.run().
+
+    The base class ignores everything, so it doubles as the headless default
+    for worker processes, scheduled jobs and benchmarks. UIs subclass it or
+    provide the same three methods.
+    """
+
+    def progress(self, fraction: float) -> None:
+        """Overall completion in [0, 1]."""
+
+    def status(self, message: str) -> None:
+        """Short description of the current step."""
+
+    def event(self, level: str, message: str) -> None:
+        """Notable condition during a phase; level is 'info' or 'warning'."""
+
+
+class WidgetProgressSink(ProgressSink):
+    """Forwards progress/status to widget-like objects with .progress() and .text()."""
+
+    def __init__(self, progress_bar, status_text):
+        self.progress_bar = progress_bar
+        self.status_text = status_text
+
+    def progress(self, fraction: float) -> None:
+        self.progress_bar.progress(fraction)
+
+    def status(self, message: str) -> None:
+        self.status_text.text(message)
+
+
+class ReconciliationDiagnostics:
+    """Timings, counters and events collected during one engine run."""
+
+    def __init__(self):
+        self.elapsed_seconds = 0.0
+        self.phase_seconds = {}
+        self.match_counts = {}
+        self.fuzzy_cache_hits = 0
+        self.fuzzy_cache_misses = 0
+        self.fuzzy_cache_evictions = 0
+        self.fuzzy_cache_disk_hits = 0
+        self.fuzzy_cache_entries = 0
+        self.fuzzy_batch_pairs = 0
+        # Phase 1 matches per deciding key: exact, ref_id, phone, fuzzy, amount_date
+        self.phase1_decided_by = {}
+        self.index_memory_bytes = {}
+        self.events = []
+        # ParseReport of the cleaning step (only with settings['parse_report'])
+        self.parse_report = None
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Fuzzy cache hit rate as a percentage."""
+        return self.fuzzy_cache_hits / max(1, self.fuzzy_cache_hits + self.fuzzy_cache_misses) * 100
+
+    @property
+    def phase1_decision_fractions(self) -> Dict[str, float]:
+        """Share of Phase 1 matches decided by each key type."""
+        total = sum(self.phase1_decided_by.values())
+        return {key: count / total for key, count in self.phase1_decided_by.items()} if total else {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'elapsed_seconds': self.elapsed_seconds,
+            'phase_seconds': dict(self.phase_seconds),
+            'match_counts': dict(self.match_counts),
+            'fuzzy_cache_hits': self.fuzzy_cache_hits,
+            'fuzzy_cache_misses': self.fuzzy_cache_misses,
+            'cache_hit_rate': self.cache_hit_rate,
+            'fuzzy_cache_evictions': self.fuzzy_cache_evictions,
+            'fuzzy_cache_disk_hits': self.fuzzy_cache_disk_hits,
+            'fuzzy_cache_entries': self.fuzzy_cache_entries,
+            'fuzzy_batch_pairs': self.fuzzy_batch_pairs,
+            'phase1_decided_by': dict(self.phase1_decided_by),
+            'phase1_decision_fractions': self.phase1_decision_fractions,
+            'index_memory_bytes': dict(self.index_memory_bytes),
+            'events': list(self.events),
+            'parse_report': dict(self.parse_report.columns) if self.parse_report is not None else None,
+        }
+
+
+class MatchPairs:
+    """
+    One-to-one matches of a single type as aligned integer arrays.
+
+    Positions index the cleaned ledger/statement frames (iloc), so the
+    matched frame is assembled with one take() per side in _process_results.
+    """
+
+    def __init__(self, stmt_pos, ledger_pos, similarity, match_type: str):
+        self.stmt_pos = np.asarray(stmt_pos, dtype=np.int64)
+        self.ledger_pos = np.asarray(ledger_pos, dtype=np.int64)
+        self.similarity = np.asarray(similarity, dtype=np.int64)
+        self.match_type = match_type
+
+    def __len__(self) -> int:
+        return len(self.stmt_pos)
+
+    def statement_labels(self, statement: pd.DataFrame) -> pd.Index:
+        return statement.index[self.stmt_pos]
+
+    def ledger_labels(self, ledger: pd.DataFrame) -> pd.Index:
+        return ledger.index[self.ledger_pos]
+
+    def merge(self, other: 'MatchPairs') -> 'MatchPairs':
+        """Both sets of matches in one, ordered by statement position."""
+        order = np.argsort(np.concatenate([self.stmt_pos, other.stmt_pos]), kind='stable')
+        return MatchPairs(
+            np.concatenate([self.stmt_pos, other.stmt_pos])[order],
+            np.concatenate([self.ledger_pos, other.ledger_pos])[order],
+            np.concatenate([self.similarity, other.similarity])[order],
+            self.match_type
+        )
+
+
+class ReconciliationState:
+    """
+    Resumable outcome of a run: cleaned frames, row arrays, global indexes and
+    which rows of each side are already matched.
+
+    GUIReconciliationEngine.run() keeps one as engine.state; append() extends it
+    with new rows and matches only those against the still-open side.
+    """
+
+    def __init__(self, ledger_raw: pd.DataFrame, statement_raw: pd.DataFrame,
+                 ledger: pd.DataFrame, statement: pd.DataFrame, settings: Dict[str, Any],
+                 config: Dict[str, Any], arrays: Dict[str, Any], indexes: Dict[str, CSRIndex]):
+        self.ledger_raw = ledger_raw
+        self.statement_raw = statement_raw
+        self.ledger = ledger
+        self.statement = statement
+        self.settings = settings
+        self.config = config
+        self.arrays = arrays
+        self.indexes = indexes
+
+        self.regular = MatchPairs([], [], [], 'regular')
+        self.foreign_credits = MatchPairs([], [], [], 'foreign_credits')
+        self.split_matches = []
+        self.ledger_taken = np.zeros(len(ledger), dtype=bool)
+        self.stmt_taken = np.zeros(len(statement), dtype=bool)
+
+    @property
+    def reference_only(self) -> bool:
+        """Runs without date/amount blocking use the reference-only fast path."""
+        return (self.config['match_references'] and not self.config['match_dates']
+                and not self.config['match_amounts'])
+
+    def add_pairs(self, pairs: MatchPairs) -> None:
+        if pairs.match_type == 'foreign_credits':
+            self.foreign_credits = self.foreign_credits.merge(pairs)
+        else:
+            self.regular = self.regular.merge(pairs)
+        self.stmt_taken[pairs.stmt_pos] = True
+        self.ledger_taken[pairs.ledger_pos] = True
+
+    def add_splits(self, splits: List[Dict]) -> None:
+        for split in splits:
+            if split.get('split_type', 'many_to_one') == 'many_to_one':
+                stmt_labels, ledger_labels = [split['statement_idx']], split['ledger_indices']
+            else:
+                stmt_labels, ledger_labels = split['statement_indices'], [split['ledger_idx']]
+            self.stmt_taken[self.statement.index.get_indexer(stmt_labels)] = True
+            self.ledger_taken[self.ledger.index.get_indexer(ledger_labels)] = True
+        self.split_matches.extend(splits)
 
 
 class GUIReconciliationEngine:
@@ -45,22 +659,30 @@ class GUIReconciliationEngine:
     OPTIMIZATIONS (v2.0):
     - Global indexes built once and reused across all phases
     - Vectorized DataFrame operations instead of iterrows()
-    - Trigram-based fuzzy candidate filtering (5-20x faster)
+    - IDF-weighted trigram top-k shortlist before fuzzy scoring
     - Early termination for split detection
     - NumPy arrays for faster data access
     """
 
-    def __init__(self):
-        self.fuzzy_cache = {}
+    def __init__(self, fuzzy_cache: Optional[FuzzyScoreCache] = None):
+        # Progress sink and diagnostics for the current run
+        self._sink = ProgressSink()
+        self._diagnostics = ReconciliationDiagnostics()
+
+        # Fuzzy scores: an explicit cache, else the process-wide shared one (see run())
+        self._own_fuzzy_cache = fuzzy_cache
+        self.fuzzy_cache = fuzzy_cache if fuzzy_cache is not None else get_shared_cache()
         self.fuzzy_cache_hits = 0
         self.fuzzy_cache_misses = 0
+        self.fuzzy_batch_pairs = 0
+        self.phase1_decided_by = {}
 
         # Global indexes (built once, reused across phases)
         self.global_indexes_built = False
-        self.ledger_by_date = {}
-        self.ledger_by_amount = {}
-        self.ledger_by_ref_exact = {}
-        self.ledger_trigram_index = {}
+        self.ledger_date_index = CSRIndex.empty()
+        self.ledger_amount_index = CSRIndex.empty(with_side=True)
+        self.ledger_trigram_index = CSRIndex.empty()
+        self._ngram_retriever = None
 
         # NumPy arrays for fast access
         self.ledger_dates_arr = None
@@ -69,10 +691,19 @@ class GUIReconciliationEngine:
         self.ledger_amounts_credit_arr = None
         self.ledger_indices_arr = None
 
-    def _validate_and_clean_data(self, ledger_df: pd.DataFrame, statement_df: pd.DataFrame, settings: Dict[str, Any]) -> tuple:
+        # Per-row arrays for Phases 1 and 1.5 (see _phase_arrays)
+        self._arrays = None
+
+        # Resumable state of the last run (see append())
+        self.state = None
+
+    def _validate_and_clean_data(self, ledger_df: pd.DataFrame, statement_df: pd.DataFrame, settings: Dict[str, Any],
+                                 report: Optional[ParseReport] = None) -> tuple:
         """
         Validate and clean input data for reconciliation.
         Handles data type mismatches, missing values, and formatting issues.
+        Dates and amounts go through the shared parsers; `report` collects
+        per-column parse statistics when given.
 
         Returns:
             Tuple of (cleaned_ledger_df, cleaned_statement_df)
@@ -91,40 +722,19 @@ class GUIReconciliationEngine:
         amt_statement = settings.get('statement_amt_col', 'Amount')
 
         # Store original date format and create normalized version for comparison
-        # Original dates stay as-is, normalized dates are used only for matching logic
+        # Original dates stay as-is, normalized dates are used only for matching logic.
+        # parse_dates sniffs the format once (YYYYMMDD for ABSA, Excel serials included)
         if date_ledger in ledger.columns:
-            # Keep original as-is (don't convert)
             ledger[f'_original_{date_ledger}'] = ledger[date_ledger].astype(str)
-            # Create normalized version for comparison - handle YYYYMMDD format (ABSA)
-            try:
-                # Try YYYYMMDD format first (e.g., 20251118)
-                ledger[f'_normalized_{date_ledger}'] = pd.to_datetime(
-                    ledger[date_ledger].astype(str), 
-                    format='%Y%m%d', 
-                    errors='coerce'
-                )
-                # If all NaT (failed), try general parsing
-                if ledger[f'_normalized_{date_ledger}'].isna().all():
-                    ledger[f'_normalized_{date_ledger}'] = pd.to_datetime(ledger[date_ledger], errors='coerce')
-            except (ValueError, TypeError, KeyError):
-                ledger[f'_normalized_{date_ledger}'] = pd.to_datetime(ledger[date_ledger], errors='coerce')
+            ledger[f'_normalized_{date_ledger}'] = parse_dates(
+                ledger[date_ledger], f'Ledger {date_ledger}', report=report
+            )
 
         if date_statement in statement.columns:
-            # Keep original as-is (don't convert)
             statement[f'_original_{date_statement}'] = statement[date_statement].astype(str)
-            # Create normalized version for comparison - handle YYYYMMDD format (ABSA)
-            try:
-                # Try YYYYMMDD format first (e.g., 20251118)
-                statement[f'_normalized_{date_statement}'] = pd.to_datetime(
-                    statement[date_statement].astype(str),
-                    format='%Y%m%d',
-                    errors='coerce'
-                )
-                # If all NaT (failed), try general parsing
-                if statement[f'_normalized_{date_statement}'].isna().all():
-                    statement[f'_normalized_{date_statement}'] = pd.to_datetime(statement[date_statement], errors='coerce')
-            except (ValueError, TypeError, KeyError):
-                statement[f'_normalized_{date_statement}'] = pd.to_datetime(statement[date_statement], errors='coerce')
+            statement[f'_normalized_{date_statement}'] = parse_dates(
+                statement[date_statement], f'Statement {date_statement}', report=report
+            )
 
         # Clean reference columns - ensure they're strings
         if ref_ledger in ledger.columns:
@@ -133,44 +743,39 @@ class GUIReconciliationEngine:
         if ref_statement in statement.columns:
             statement[ref_statement] = statement[ref_statement].fillna('').astype(str).str.strip()
 
-        # Clean amount columns - remove formatting and convert to float
-        def clean_amount(series):
-            """Clean amount column: remove currency symbols, commas, handle parentheses"""
-            if series.dtype == 'object':
-                cleaned = series.astype(str).str.strip()
-                # Handle parentheses as negative
-                is_negative = cleaned.str.contains(r'^\(.*\)$', regex=True, na=False)
-                # Remove formatting
-                cleaned = cleaned.str.replace(r'[\$€£R,\s()]', '', regex=True)
-                cleaned = cleaned.replace('', '0').replace('nan', '0')
-                # Convert to numeric
-                numeric = pd.to_numeric(cleaned, errors='coerce').fillna(0)
-                # Apply negative for parentheses
-                return numeric.where(~is_negative, -numeric)
-            return pd.to_numeric(series, errors='coerce').fillna(0)
-
+        # Clean amount columns - remove formatting and convert to float (see utils/parsers.py)
         if amt_ledger_debit in ledger.columns:
-            ledger[amt_ledger_debit] = clean_amount(ledger[amt_ledger_debit])
+            ledger[amt_ledger_debit] = parse_amounts(
+                ledger[amt_ledger_debit], f'Ledger {amt_ledger_debit}', report=report
+            )
 
         if amt_ledger_credit in ledger.columns:
-            ledger[amt_ledger_credit] = clean_amount(ledger[amt_ledger_credit])
+            ledger[amt_ledger_credit] = parse_amounts(
+                ledger[amt_ledger_credit], f'Ledger {amt_ledger_credit}', report=report
+            )
 
         if amt_statement in statement.columns:
-            statement[amt_statement] = clean_amount(statement[amt_statement])
+            statement[amt_statement] = parse_amounts(
+                statement[amt_statement], f'Statement {amt_statement}', report=report
+            )
 
         return ledger, statement
 
-    def _build_global_indexes(self, ledger: pd.DataFrame, settings: Dict[str, Any], status_text) -> None:
+    def _build_global_indexes(self, ledger: pd.DataFrame, settings: Dict[str, Any]) -> None:
         """
         Build all indexes ONCE at the start - reused across all phases.
 
         This is a key optimization: instead of rebuilding indexes in each phase,
         we build them once and reuse. This provides 2-3x speedup for large datasets.
+
+        Indexes are CSR arrays (see utils/csr_index.py) keyed by int64 days,
+        int64 cents and packed trigram codes, with int32 ledger positions as
+        postings and a uint8 debit/credit side flag on the amount index.
         """
         if self.global_indexes_built:
             return
 
-        status_text.text("🔧 Building global indexes (one-time)...")
+        self._sink.status("🔧 Building global indexes (one-time)...")
 
         # Get column names
         date_col = settings.get('ledger_date_col', 'Date')
@@ -181,122 +786,117 @@ class GUIReconciliationEngine:
         # Use normalized date column if available
         date_col_cmp = f'_normalized_{date_col}' if f'_normalized_{date_col}' in ledger.columns else date_col
 
-        # Store indices as numpy array for fast access
+        # Store indices as numpy array for fast access (postings are positions into this)
         self.ledger_indices_arr = ledger.index.to_numpy()
+        positions = np.arange(len(ledger), dtype=np.int64)
 
-        # Build date index using vectorized operations
+        # Date index: day -> ledger positions
+        self.ledger_date_index = CSRIndex.empty()
         if date_col_cmp in ledger.columns:
             self.ledger_dates_arr = ledger[date_col_cmp].values
-            for i, (idx, date_val) in enumerate(zip(self.ledger_indices_arr, self.ledger_dates_arr)):
-                if date_val not in self.ledger_by_date:
-                    self.ledger_by_date[date_val] = []
-                self.ledger_by_date[date_val].append(idx)
+            days = _to_day_keys(ledger[date_col_cmp])
+            has_date = days != _NAT_KEY
+            self.ledger_date_index = CSRIndex.build(days[has_date], positions[has_date])
 
-        # Build reference index and trigram index
+        # Trigram index for fast fuzzy candidate filtering
+        self.ledger_trigram_index = CSRIndex.empty()
         if ref_col in ledger.columns:
             self.ledger_refs_arr = ledger[ref_col].fillna('').astype(str).str.strip().values
+            self.ledger_trigram_index = _build_trigram_index(self.ledger_refs_arr)
 
-            for i, (idx, ref_val) in enumerate(zip(self.ledger_indices_arr, self.ledger_refs_arr)):
-                ref_upper = str(ref_val).upper()
-                if ref_upper and ref_upper != '' and ref_upper != 'NAN':
-                    # Exact reference index
-                    if ref_val not in self.ledger_by_ref_exact:
-                        self.ledger_by_ref_exact[ref_val] = []
-                    self.ledger_by_ref_exact[ref_val].append(idx)
-
-                    # Trigram index for fast fuzzy candidate filtering
-                    ref_lower = ref_upper.lower()
-                    for j in range(max(0, len(ref_lower) - 2)):
-                        trigram = ref_lower[j:j+3]
-                        if trigram not in self.ledger_trigram_index:
-                            self.ledger_trigram_index[trigram] = set()
-                        self.ledger_trigram_index[trigram].add(idx)
-
-        # Build amount indexes using vectorized operations
-        if debit_col in ledger.columns:
-            self.ledger_amounts_debit_arr = pd.to_numeric(ledger[debit_col], errors='coerce').fillna(0).abs().values
-            for i, (idx, amt) in enumerate(zip(self.ledger_indices_arr, self.ledger_amounts_debit_arr)):
-                if amt > 0:
-                    amt_key = round(amt, 2)
-                    if amt_key not in self.ledger_by_amount:
-                        self.ledger_by_amount[amt_key] = []
-                    self.ledger_by_amount[amt_key].append((idx, 'debit'))
-
-        if credit_col in ledger.columns:
-            self.ledger_amounts_credit_arr = pd.to_numeric(ledger[credit_col], errors='coerce').fillna(0).abs().values
-            for i, (idx, amt) in enumerate(zip(self.ledger_indices_arr, self.ledger_amounts_credit_arr)):
-                if amt > 0:
-                    amt_key = round(amt, 2)
-                    if amt_key not in self.ledger_by_amount:
-                        self.ledger_by_amount[amt_key] = []
-                    self.ledger_by_amount[amt_key].append((idx, 'credit'))
+        # Amount index: cents -> ledger positions, side 0 = debit, 1 = credit
+        side_cents = []
+        for col in (debit_col, credit_col):
+            if col in ledger.columns:
+                side_cents.append(_to_cents(ledger[col]))
+            else:
+                side_cents.append(np.zeros(len(ledger), dtype=np.int64))
+        self.ledger_amounts_debit_arr, self.ledger_amounts_credit_arr = side_cents
+        self.ledger_amount_index = _build_amount_index(*side_cents)
 
         self.global_indexes_built = True
-        status_text.text(f"✅ Global indexes built: {len(self.ledger_by_date)} dates, {len(self.ledger_by_ref_exact)} refs, {len(self.ledger_by_amount)} amounts, {len(self.ledger_trigram_index)} trigrams")
-
-    def _get_fuzzy_candidates_by_trigram(self, query_ref: str, threshold: float = 0.3) -> Set:
-        """
-        Get candidate indices that share trigrams with query.
+        memory_mb = sum(self.index_memory_usage().values()) / (1024 * 1024)
+        self._sink.status(f"✅ Global indexes built: {len(self.ledger_date_index)} dates, {len(self.ledger_amount_index)} amounts, {len(self.ledger_trigram_index)} trigrams ({memory_mb:.1f} MB)")
 
-        This pre-filters candidates BEFORE expensive fuzzy matching.
-        Only candidates sharing at least `threshold` fraction of trigrams are returned.
-        Provides 5-20x speedup for fuzzy matching.
-        """
-        if not query_ref or not self.ledger_trigram_index:
-            return set()
-
-        query_lower = query_ref.lower()
-        query_trigrams = set()
-        for i in range(max(0, len(query_lower) - 2)):
-            query_trigrams.add(query_lower[i:i+3])
+    def index_memory_usage(self) -> Dict[str, int]:
+        """Bytes held by each global index."""
+        return {
+            'date': self.ledger_date_index.nbytes,
+            'amount': self.ledger_amount_index.nbytes,
+            'trigram': self.ledger_trigram_index.nbytes,
+        }
 
-        if not query_trigrams:
-            return set()
+    def _get_ngram_retriever(self) -> NgramRetriever:
+        """IDF-weighted retriever over the current ledger trigram index (rebuilt when the index changes)."""
+        if self._ngram_retriever is None or self._ngram_retriever.index is not self.ledger_trigram_index:
+            self._ngram_retriever = NgramRetriever(self.ledger_trigram_index)
+        return self._ngram_retriever
 
-        # Count how many trigrams each candidate shares
-        candidate_scores = {}
-        for trigram in query_trigrams:
-            if trigram in self.ledger_trigram_index:
-                for idx in self.ledger_trigram_index[trigram]:
-                    candidate_scores[idx] = candidate_scores.get(idx, 0) + 1
+    def reconcile(self, ledger_df: pd.DataFrame, statement_df: pd.DataFrame,
+                  settings: Dict[str, Any], progress_bar, status_text) -> Dict:
+        """
+        Widget-based entry point, kept for existing callers.
 
-        # Filter candidates by minimum trigram overlap
-        min_overlap = max(1, int(len(query_trigrams) * threshold))
-        candidates = {idx for idx, score in candidate_scores.items() if score >= min_overlap}
+        Args:
+            ledger_df: Ledger DataFrame
+            statement_df: Statement DataFrame
+            settings: Matching settings dictionary
+            progress_bar: Object with .progress(fraction), e.g. a Streamlit progress bar
+            status_text: Object with .text(message), e.g. a Streamlit status text element
 
-        return candidates
+        Returns:
+            Dictionary with matched/unmatched results
+        """
+        results, _ = self.run(ledger_df, statement_df, settings, WidgetProgressSink(progress_bar, status_text))
+        return results
 
-    def reconcile(self, ledger_df: pd.DataFrame, statement_df: pd.DataFrame,
-                  settings: Dict[str, Any], progress_bar, status_text) -> Dict:
+    def run(self, ledger_df: pd.DataFrame, statement_df: pd.DataFrame,
+            settings: Dict[str, Any], sink: Optional[ProgressSink] = None) -> Tuple[Dict, ReconciliationDiagnostics]:
         """
         Main reconciliation method - mirrors GUI algorithm exactly.
 
+        Headless: progress, status and phase events go to `sink` (a no-op
+        ProgressSink by default), so no UI framework is needed.
+
         Args:
             ledger_df: Ledger DataFrame
             statement_df: Statement DataFrame
             settings: Matching settings dictionary
-            progress_bar: Streamlit progress bar
-            status_text: Streamlit status text element
+            sink: Optional ProgressSink receiving progress/status/events
 
         Returns:
-            Dictionary with matched/unmatched results
+            Tuple of (results dictionary, ReconciliationDiagnostics)
         """
         start_time = time.time()
-
-        # Reset caches and indexes for new reconciliation
-        self.fuzzy_cache = {}
+        self._sink = sink if sink is not None else ProgressSink()
+        self._diagnostics = ReconciliationDiagnostics()
+        phase_start = start_time
+
+        # Reset counters and indexes for new reconciliation. The fuzzy cache is kept:
+        # scores don't depend on the threshold, so reruns of a month reuse them.
+        if self._own_fuzzy_cache is None:
+            self.fuzzy_cache = get_shared_cache(
+                settings.get('fuzzy_cache_path'), settings.get('fuzzy_cache_size', DEFAULT_MAX_ENTRIES)
+            )
+        cache_evictions_start = self.fuzzy_cache.evictions
+        cache_disk_hits_start = self.fuzzy_cache.disk_hits
         self.fuzzy_cache_hits = 0
         self.fuzzy_cache_misses = 0
+        self.fuzzy_batch_pairs = 0
+        self.phase1_decided_by = {}
         self.global_indexes_built = False
-        self.ledger_by_date = {}
-        self.ledger_by_amount = {}
-        self.ledger_by_ref_exact = {}
-        self.ledger_trigram_index = {}
+        self.ledger_date_index = CSRIndex.empty()
+        self.ledger_amount_index = CSRIndex.empty(with_side=True)
+        self.ledger_trigram_index = CSRIndex.empty()
 
         # Validate and clean input data
-        status_text.text("🧹 Validating and cleaning data...")
-        progress_bar.progress(0.02)
-        ledger_df, statement_df = self._validate_and_clean_data(ledger_df, statement_df, settings)
+        self._sink.status("🧹 Validating and cleaning data...")
+        self._sink.progress(0.02)
+        ledger_raw, statement_raw = ledger_df, statement_df
+        report = ParseReport() if settings.get('parse_report') else None
+        self._diagnostics.parse_report = report
+        ledger_df, statement_df = self._validate_and_clean_data(ledger_df, statement_df, settings, report)
+        phase_start = self._mark_phase('validate', phase_start)
 
         # Extract settings
         match_dates = settings.get('match_dates', True)
@@ -339,50 +939,92 @@ class GUIReconciliationEngine:
         date_ledger_cmp = f'_normalized_{date_ledger}' if f'_normalized_{date_ledger}' in ledger.columns else date_ledger
         date_statement_cmp = f'_normalized_{date_statement}' if f'_normalized_{date_statement}' in statement.columns else date_statement
 
+        # Resolved settings, kept with the state so append() matches the same way
+        config = {
+            'match_dates': match_dates, 'match_references': match_references, 'match_amounts': match_amounts,
+            'fuzzy_ref': fuzzy_ref, 'similarity_ref': similarity_ref,
+            'date_ledger': date_ledger_cmp, 'date_statement': date_statement_cmp,
+            'ref_ledger': ref_ledger, 'ref_statement': ref_statement,
+            'amt_ledger_debit': amt_ledger_debit, 'amt_ledger_credit': amt_ledger_credit,
+            'amt_statement': amt_statement,
+            'use_debits_only': use_debits_only, 'use_credits_only': use_credits_only,
+            'use_both_debit_credit': use_both_debit_credit,
+            'tolerances': self._phase1_tolerances(settings),
+        }
+
         # ============================================
         # BUILD GLOBAL INDEXES (one-time optimization)
         # ============================================
-        status_text.text("🔧 Building global indexes...")
-        progress_bar.progress(0.05)
-        self._build_global_indexes(ledger, settings, status_text)
-        progress_bar.progress(0.08)
+        self._sink.status("🔧 Building global indexes...")
+        self._sink.progress(0.05)
+        self._build_global_indexes(ledger, settings)
+        self._sink.progress(0.08)
+        phase_start = self._mark_phase('indexes', phase_start)
+
+        # Row arrays shared by Phase 1, Phase 1.5 and the date-shard workers
+        self._arrays = self._phase_arrays(
+            ledger, statement, date_ledger_cmp, date_statement_cmp, ref_ledger, ref_statement,
+            amt_ledger_debit, amt_ledger_credit, amt_statement
+        )
 
         # ============================================
-        # PHASE 1: REGULAR MATCHING (with indexes)
+        # PHASES 1 + 1.5 PER DATE SHARD (multi-process)
         # ============================================
-        status_text.text("⚡ Phase 1: Regular Matching (Fast Index Mode)...")
-        progress_bar.progress(0.10)
+        parallel_results = None
+        if self._can_partition_by_date(settings, match_dates):
+            self._sink.status("⚡ Phases 1 + 1.5: Date-partitioned matching...")
+            self._sink.progress(0.10)
+            parallel_results = self._parallel_date_phases(
+                ledger, statement, settings,
+                match_amounts, match_references, fuzzy_ref, similarity_ref,
+                use_debits_only, use_credits_only, use_both_debit_credit
+            )
 
-        matched_rows, ledger_matched, unmatched_statement = self._phase1_regular_matching(
-            ledger, statement, settings,
-            match_dates, match_references, match_amounts, fuzzy_ref, similarity_ref,
-            date_ledger_cmp, date_statement_cmp, ref_ledger, ref_statement,
-            amt_ledger_debit, amt_ledger_credit, amt_statement,
-            use_debits_only, use_credits_only, use_both_debit_credit
-        )
+        if parallel_results is not None:
+            (matched_rows, ledger_matched, unmatched_statement,
+             foreign_credits_matches, foreign_matched_stmt, foreign_matched_ledger) = parallel_results
+            phase_start = self._mark_phase('phase1_parallel', phase_start)
+            self._sink.status(f"✅ Regular matches: {len(matched_rows)} | Foreign credits: {len(foreign_credits_matches)}")
+            self._sink.progress(0.55)
+        else:
+            # ============================================
+            # PHASE 1: REGULAR MATCHING (with indexes)
+            # ============================================
+            self._sink.status("⚡ Phase 1: Regular Matching (Fast Index Mode)...")
+            self._sink.progress(0.10)
+
+            matched_rows, ledger_matched, unmatched_statement = self._phase1_regular_matching(
+                ledger, statement, settings,
+                match_dates, match_references, match_amounts, fuzzy_ref, similarity_ref,
+                date_ledger_cmp, date_statement_cmp, ref_ledger, ref_statement,
+                amt_ledger_debit, amt_ledger_credit, amt_statement,
+                use_debits_only, use_credits_only, use_both_debit_credit
+            )
 
-        status_text.text(f"✅ Regular matches: {len(matched_rows)}")
-        progress_bar.progress(0.40)
+            phase_start = self._mark_phase('phase1', phase_start)
+            self._sink.status(f"✅ Regular matches: {len(matched_rows)}")
+            self._sink.progress(0.40)
 
-        # ============================================
-        # PHASE 1.5: FOREIGN CREDITS (>10,000)
-        # ============================================
-        status_text.text("💰 Phase 1.5: Foreign Credits (>10K)...")
+            # ============================================
+            # PHASE 1.5: FOREIGN CREDITS (>10,000)
+            # ============================================
+            self._sink.status("💰 Phase 1.5: Foreign Credits (>10K)...")
 
-        foreign_credits_matches, foreign_matched_stmt, foreign_matched_ledger = self._phase15_foreign_credits(
-            ledger, statement, ledger_matched, unmatched_statement, settings,
-            match_dates, date_ledger_cmp, date_statement_cmp,
-            amt_ledger_debit, amt_ledger_credit, amt_statement,
-            use_debits_only, use_credits_only, use_both_debit_credit
-        )
+            foreign_credits_matches, foreign_matched_stmt, foreign_matched_ledger = self._phase15_foreign_credits(
+                ledger, statement, ledger_matched, unmatched_statement, settings,
+                match_dates, date_ledger_cmp, date_statement_cmp,
+                amt_ledger_debit, amt_ledger_credit, amt_statement,
+                use_debits_only, use_credits_only, use_both_debit_credit
+            )
 
-        status_text.text(f"✅ Foreign credits: {len(foreign_credits_matches)}")
-        progress_bar.progress(0.55)
+            phase_start = self._mark_phase('phase1_5', phase_start)
+            self._sink.status(f"✅ Foreign credits: {len(foreign_credits_matches)}")
+            self._sink.progress(0.55)
 
         # ============================================
         # PHASE 2: SPLIT TRANSACTIONS
         # ============================================
-        status_text.text("🔀 Phase 2: Split Transactions (DP Algorithm)...")
+        self._sink.status("🔀 Phase 2: Split Transactions (DP Algorithm)...")
 
         split_matches = self._phase2_split_transactions(
             ledger, statement, ledger_matched, foreign_matched_ledger,
@@ -390,17 +1032,17 @@ class GUIReconciliationEngine:
             match_dates, match_references, fuzzy_ref, similarity_ref,
             date_ledger_cmp, date_statement_cmp, ref_ledger, ref_statement,
             amt_ledger_debit, amt_ledger_credit, amt_statement,
-            use_debits_only, use_credits_only, use_both_debit_credit,
-            progress_bar, status_text
+            use_debits_only, use_credits_only, use_both_debit_credit
         )
 
-        status_text.text(f"✅ Many-to-one splits: {len(split_matches)}")
-        progress_bar.progress(0.75)
+        phase_start = self._mark_phase('phase2', phase_start)
+        self._sink.status(f"✅ Many-to-one splits: {len(split_matches)}")
+        self._sink.progress(0.75)
 
         # ============================================
         # PHASE 2B: ONE-TO-MANY SPLIT TRANSACTIONS
         # ============================================
-        status_text.text("🔀 Phase 2B: One-to-Many Split Transactions...")
+        self._sink.status("🔀 Phase 2B: One-to-Many Split Transactions...")
 
         # Calculate split matched items
         split_matched_ledger = set()
@@ -416,20 +1058,21 @@ class GUIReconciliationEngine:
             match_dates, match_references, fuzzy_ref, similarity_ref,
             date_ledger_cmp, date_statement_cmp, ref_ledger, ref_statement,
             amt_ledger_debit, amt_ledger_credit, amt_statement,
-            use_debits_only, use_credits_only, use_both_debit_credit,
-            progress_bar, status_text
+            use_debits_only, use_credits_only, use_both_debit_credit
         )
 
+        phase_start = self._mark_phase('phase2b', phase_start)
+
         # Combine all splits
         split_matches.extend(one_to_many_splits)
 
-        status_text.text(f"✅ Total splits: {len(split_matches)} (Many-to-one: {len(split_matches) - len(one_to_many_splits)}, One-to-many: {len(one_to_many_splits)})")
-        progress_bar.progress(0.90)
+        self._sink.status(f"✅ Total splits: {len(split_matches)} (Many-to-one: {len(split_matches) - len(one_to_many_splits)}, One-to-many: {len(one_to_many_splits)})")
+        self._sink.progress(0.90)
 
         # ============================================
         # PROCESS RESULTS
         # ============================================
-        status_text.text("📊 Processing results...")
+        self._sink.status("📊 Processing results...")
 
         results = self._process_results(
             ledger, statement, matched_rows, foreign_credits_matches,
@@ -437,22 +1080,62 @@ class GUIReconciliationEngine:
             unmatched_statement, foreign_matched_stmt
         )
 
-        elapsed = time.time() - start_time
-        progress_bar.progress(1.0)
-        status_text.text(f"✅ Complete! Time: {elapsed:.2f}s | Cache: {self.fuzzy_cache_hits} hits, {self.fuzzy_cache_misses} misses")
-
-        # Show summary
-        with st.expander("⚡ Performance Stats", expanded=False):
-            st.write(f"**Reconciliation Time:** {elapsed:.2f}s")
-            st.write(f"**Regular Matches:** {len(matched_rows)}")
-            st.write(f"**Foreign Credits:** {len(foreign_credits_matches)}")
-            st.write(f"**Split Transactions:** {len(split_matches)}")
-            st.write(f"**Total Matched:** {len(matched_rows) + len(foreign_credits_matches) + len(split_matches)}")
-            st.write(f"**Fuzzy Cache Hits:** {self.fuzzy_cache_hits}")
-            st.write(f"**Fuzzy Cache Misses:** {self.fuzzy_cache_misses}")
-            st.write(f"**Cache Hit Rate:** {(self.fuzzy_cache_hits / max(1, self.fuzzy_cache_hits + self.fuzzy_cache_misses) * 100):.1f}%")
+        phase_start = self._mark_phase('results', phase_start)
 
-        return results
+        # Keep everything append() needs to resume from this run
+        state = ReconciliationState(
+            ledger_raw, statement_raw, ledger, statement, settings, config, self._arrays,
+            {'date': self.ledger_date_index, 'amount': self.ledger_amount_index,
+             'trigram': self.ledger_trigram_index}
+        )
+        state.add_pairs(matched_rows)
+        state.add_pairs(foreign_credits_matches)
+        state.add_splits(split_matches)
+        self.state = state
+
+        return results, self._finish_diagnostics(
+            start_time, len(matched_rows), len(foreign_credits_matches), len(split_matches),
+            cache_evictions_start, cache_disk_hits_start
+        )
+
+    def _finish_diagnostics(self, start_time: float, regular: int, foreign_credits: int, splits: int,
+                            cache_evictions_start: int, cache_disk_hits_start: int) -> ReconciliationDiagnostics:
+        """Flush the fuzzy cache, report completion and fill in the run's diagnostics."""
+        # Persist new scores (no-op without a disk tier)
+        self.fuzzy_cache.flush()
+
+        elapsed = time.time() - start_time
+        self._sink.progress(1.0)
+        self._sink.status(f"✅ Complete! Time: {elapsed:.2f}s | Cache: {self.fuzzy_cache_hits} hits, {self.fuzzy_cache_misses} misses")
+
+        diagnostics = self._diagnostics
+        diagnostics.elapsed_seconds = elapsed
+        diagnostics.match_counts = {
+            'regular': regular,
+            'foreign_credits': foreign_credits,
+            'splits': splits,
+            'total': regular + foreign_credits + splits,
+        }
+        diagnostics.fuzzy_cache_hits = self.fuzzy_cache_hits
+        diagnostics.fuzzy_cache_misses = self.fuzzy_cache_misses
+        diagnostics.fuzzy_cache_evictions = self.fuzzy_cache.evictions - cache_evictions_start
+        diagnostics.fuzzy_cache_disk_hits = self.fuzzy_cache.disk_hits - cache_disk_hits_start
+        diagnostics.fuzzy_cache_entries = len(self.fuzzy_cache)
+        diagnostics.fuzzy_batch_pairs = self.fuzzy_batch_pairs
+        diagnostics.phase1_decided_by = dict(self.phase1_decided_by)
+        diagnostics.index_memory_bytes = self.index_memory_usage()
+        return diagnostics
+
+    def _mark_phase(self, name: str, phase_start: float) -> float:
+        """Record the duration of a phase and return the start time of the next one."""
+        now = time.time()
+        self._diagnostics.phase_seconds[name] = now - phase_start
+        return now
+
+    def _emit(self, level: str, message: str) -> None:
+        """Record a phase event in the diagnostics and forward it to the sink."""
+        self._diagnostics.events.append((level, message))
+        self._sink.event(level, message)
 
     def _get_fuzzy_score_cached(self, ref1: str, ref2: str) -> int:
         """
@@ -460,15 +1143,18 @@ class GUIReconciliationEngine:
 
         Uses best of ratio, token_set_ratio, and partial_ratio to handle
         prefix/suffix differences (e.g., "Cash dep dsr jhb par" vs "JHB Park Cen 4t").
+        Scores live in a bounded LRU FuzzyScoreCache shared across runs
+        (optionally backed by SQLite via settings['fuzzy_cache_path']).
         """
         ref1_lower = str(ref1).lower().strip()
         ref2_lower = str(ref2).lower().strip()
 
         cache_key = (ref1_lower, ref2_lower)
 
-        if cache_key in self.fuzzy_cache:
+        cached = self.fuzzy_cache.get(cache_key)
+        if cached is not None:
             self.fuzzy_cache_hits += 1
-            return self.fuzzy_cache[cache_key]
+            return cached
 
         self.fuzzy_cache_misses += 1
 
@@ -481,17 +1167,23 @@ class GUIReconciliationEngine:
         except (ValueError, TypeError):
             score = 100 if ref1_lower == ref2_lower else 0
 
-        self.fuzzy_cache[cache_key] = score
+        self.fuzzy_cache.put(cache_key, score)
         return score
 
     def _fast_reference_only_matching(self, ledger, statement, ref_ledger, ref_statement,
-                                      fuzzy_ref, similarity_ref):
+                                      fuzzy_ref, similarity_ref, fuzzy_top_k=DEFAULT_FUZZY_TOP_K):
         """
         ULTRA-FAST path for reference-only matching (no dates, no amounts).
 
         Performance: O(n) where n = statement rows
         - Exact match: O(1) hash lookup
-        - Fuzzy match: LIMITED to top K candidates per statement (not all ledger rows!)
+        - Fuzzy match: searches the WHOLE ledger. An IDF-weighted trigram index
+          shortlists the `fuzzy_top_k` closest ledger references of every
+          statement row in one batch; the shortlists are scored in bulk with
+          rapidfuzz cpdist on all cores (score_cutoff = similarity_ref).
+        - A row whose passing shortlist entries were all taken, or that had its
+          exact reference taken, falls back to extractOne over the open ledger
+          references (fuzzy_top_k=0 always does)
 
         This is 10-100x faster than the full matching algorithm when only
         matching by references.
@@ -499,37 +1191,36 @@ class GUIReconciliationEngine:
         import time
         start_time = time.time()
 
-        matched_rows = []
+        match_stmt_pos = []
+        match_ledger_pos = []
+        match_scores = []
         ledger_matched = set()
         unmatched_statement = []
 
         # ======================================
-        # BUILD REFERENCE HASH MAP (O(n))
+        # BUILD REFERENCE CHOICES + HASH MAP (O(n))
         # ======================================
-        # Map: reference_string -> list of (ledger_idx, ledger_row) tuples
-        ledger_by_exact_ref = {}
-        ledger_all_refs = []  # For fuzzy matching fallback
-
+        # Choices are the ledger rows with a usable reference, in ledger order
         print(f"⚡ Building reference index from {len(ledger)} ledger rows...")
-        for ledger_idx, ledger_row in ledger.iterrows():
-            if ref_ledger not in ledger.columns:
-                continue
-
-            ledger_ref = str(ledger_row[ref_ledger]).strip()
-
-            # Skip empty/invalid references
-            if not ledger_ref or ledger_ref == '' or ledger_ref.lower() == 'nan':
-                continue
+        if ref_ledger in ledger.columns:
+            ledger_refs = ledger[ref_ledger].astype(str).str.strip().to_numpy(dtype=object)
+        else:
+            ledger_refs = np.empty(0, dtype=object)
+        choice_pos = np.flatnonzero([bool(r) and r.lower() != 'nan' for r in ledger_refs])
+        choices = ledger_refs[choice_pos]
+        choices_clean = np.array([r.lower() for r in choices], dtype=object)
+        choice_idx = ledger.index[choice_pos]
 
-            # Store for exact matching (case-sensitive first)
-            if ledger_ref not in ledger_by_exact_ref:
-                ledger_by_exact_ref[ledger_ref] = []
-            ledger_by_exact_ref[ledger_ref].append((ledger_idx, ledger_row))
+        # Map: reference_string -> choice numbers (case-sensitive exact match)
+        ledger_by_exact_ref = {}
+        for choice, ledger_ref in enumerate(choices):
+            ledger_by_exact_ref.setdefault(ledger_ref, []).append(choice)
 
-            # Store for fuzzy matching
-            ledger_all_refs.append((ledger_idx, ledger_row, ledger_ref))
+        # Open choices for extractOne: taken ledger rows become None (skipped by rapidfuzz)
+        open_choices = list(choices_clean)
+        choice_taken = np.zeros(len(choices), dtype=bool)
 
-        print(f"⚡ Index built: {len(ledger_by_exact_ref)} unique references, {len(ledger_all_refs)} total entries")
+        print(f"⚡ Index built: {len(ledger_by_exact_ref)} unique references, {len(choices)} total entries")
 
         # ======================================
         # MATCH STATEMENT ROWS (O(n) with O(1) lookups)
@@ -537,88 +1228,84 @@ class GUIReconciliationEngine:
         exact_match_count = 0
         fuzzy_match_count = 0
 
-        MAX_FUZZY_CANDIDATES = 1000  # Limit fuzzy search to first 1000 unmatched ledger rows per statement
-
         print(f"⚡ Matching {len(statement)} statement rows...")
 
-        for stmt_idx, stmt_row in statement.iterrows():
-            if ref_statement not in statement.columns:
-                unmatched_statement.append(stmt_idx)
-                continue
+        if ref_statement in statement.columns:
+            stmt_refs = statement[ref_statement].astype(str).str.strip().to_numpy(dtype=object)
+        else:
+            stmt_refs = np.full(len(statement), '', dtype=object)
+        stmt_ok = np.array([bool(r) and r.lower() != 'nan' for r in stmt_refs], dtype=bool)
 
-            stmt_ref = str(stmt_row[ref_statement]).strip()
+        # Trigram shortlist for rows without an exact key, scored in one batch
+        shortlist = None
+        if fuzzy_ref and fuzzy_top_k and fuzzy_top_k > 0 and len(choices) > 0:
+            shortlist = self._reference_shortlist(stmt_refs, stmt_ok & np.array(
+                [r not in ledger_by_exact_ref for r in stmt_refs], dtype=bool
+            ), choices_clean, similarity_ref, fuzzy_top_k)
 
+        for stmt_pos, (stmt_idx, stmt_ref) in enumerate(zip(statement.index, stmt_refs)):
             # Skip empty references
-            if not stmt_ref or stmt_ref == '' or stmt_ref.lower() == 'nan':
+            if not stmt_ok[stmt_pos]:
                 unmatched_statement.append(stmt_idx)
                 continue
 
-            best_ledger_idx = None
-            best_ledger_row = None
+            best_choice = None
             best_score = -1
 
             # ======================================
             # STEP 1: TRY EXACT MATCH (O(1) hash lookup)
             # ======================================
-            if stmt_ref in ledger_by_exact_ref:
-                # Get all exact matches
-                exact_matches = ledger_by_exact_ref[stmt_ref]
-
+            exact_matches = ledger_by_exact_ref.get(stmt_ref)
+            if exact_matches is not None:
                 # Find first unmatched entry
-                for ledger_idx, ledger_row in exact_matches:
-                    if ledger_idx not in ledger_matched:
-                        best_ledger_idx = ledger_idx
-                        best_ledger_row = ledger_row
+                for choice in exact_matches:
+                    if not choice_taken[choice]:
+                        best_choice = choice
                         best_score = 100
                         exact_match_count += 1
                         break
 
             # ======================================
-            # STEP 2: FUZZY MATCHING (LIMITED - only if no exact match)
+            # STEP 2: FUZZY MATCHING (only if no exact match)
             # ======================================
-            if best_ledger_idx is None and fuzzy_ref:
-                # OPTIMIZATION: Only search through FIRST K unmatched entries
-                # This prevents O(n*m) complexity for large ledgers
-                candidates_checked = 0
-
-                for ledger_idx, ledger_row, ledger_ref in ledger_all_refs:
-                    # Skip already matched
-                    if ledger_idx in ledger_matched:
-                        continue
-
-                    # CRITICAL: Limit fuzzy search to prevent O(n*m) explosion
-                    candidates_checked += 1
-                    if candidates_checked > MAX_FUZZY_CANDIDATES:
-                        break  # Stop after checking K candidates
-
-                    # Use cached fuzzy scoring
-                    ref_score = self._get_fuzzy_score_cached(stmt_ref, ledger_ref)
+            if best_choice is None and fuzzy_ref and len(choices) > 0:
+                exhausted = shortlist is None or exact_matches is not None
+                if not exhausted:
+                    offsets, cand, cand_scores = shortlist
+                    cand = cand[offsets[stmt_pos]:offsets[stmt_pos + 1]]
+                    cand_scores = cand_scores[offsets[stmt_pos]:offsets[stmt_pos + 1]]
+                    open_mask = ~choice_taken[cand]
+                    if open_mask.any():
+                        # Best open score, first in ledger order on ties (cand is sorted)
+                        top = int(np.argmax(cand_scores[open_mask]))
+                        best_choice = int(cand[open_mask][top])
+                        best_score = int(cand_scores[open_mask][top])
+                    else:
+                        # Everything that passed was taken - others may pass further down
+                        exhausted = len(cand) > 0
 
-                    if ref_score >= similarity_ref and ref_score > best_score:
-                        best_score = ref_score
-                        best_ledger_idx = ledger_idx
-                        best_ledger_row = ledger_row
+                if exhausted:
+                    best_choice, best_score = self._best_open_reference(
+                        stmt_ref.lower(), open_choices, choice_taken, similarity_ref)
 
-                if best_ledger_idx is not None:
+                if best_choice is not None:
                     fuzzy_match_count += 1
 
             # ======================================
             # ADD MATCH OR MARK AS UNMATCHED
             # ======================================
-            if best_ledger_idx is not None and best_score >= similarity_ref:
-                matched_row = {
-                    'statement_idx': stmt_idx,
-                    'ledger_idx': best_ledger_idx,
-                    'statement_row': stmt_row,
-                    'ledger_row': best_ledger_row,
-                    'similarity': best_score,
-                    'match_type': 'reference_only'
-                }
-                matched_rows.append(matched_row)
-                ledger_matched.add(best_ledger_idx)
+            if best_choice is not None and best_score >= similarity_ref:
+                match_stmt_pos.append(stmt_pos)
+                match_ledger_pos.append(int(choice_pos[best_choice]))
+                match_scores.append(best_score)
+                ledger_matched.add(choice_idx[best_choice])
+                choice_taken[best_choice] = True
+                open_choices[best_choice] = None
             else:
                 unmatched_statement.append(stmt_idx)
 
+        matched_rows = MatchPairs(match_stmt_pos, match_ledger_pos, match_scores, 'reference_only')
+
         elapsed = time.time() - start_time
         print(f"⚡ FAST REFERENCE-ONLY MATCHING COMPLETE:")
         print(f"   - Total matches: {len(matched_rows)} ({exact_match_count} exact, {fuzzy_match_count} fuzzy)")
@@ -628,6 +1315,67 @@ class GUIReconciliationEngine:
 
         return matched_rows, ledger_matched, unmatched_statement
 
+    def _reference_shortlist(self, stmt_refs, stmt_rows, choices_clean, similarity_ref, top_k):
+        """
+        Trigram top-k ledger choices of the selected statement rows, with fuzzy scores.
+
+        Returns:
+            Tuple (offsets, choices, scores): the passing (>= similarity_ref)
+            shortlisted choices of statement row i are choices[offsets[i]:offsets[i + 1]],
+            in ledger order; rows outside `stmt_rows` get none
+        """
+        rows = np.flatnonzero(stmt_rows)
+        queries = np.array([str(r).lower() for r in stmt_refs[rows]], dtype=object)
+        retriever = NgramRetriever.build(choices_clean)
+        query_offsets, cand, _ = retriever.top_k(queries, top_k, max_postings=REFERENCE_SHORTLIST_MAX_POSTINGS)
+
+        pair_query = np.repeat(np.arange(len(rows)), np.diff(query_offsets))
+        if rf_process is not None:
+            scores = np.empty(len(cand), dtype=np.int32)
+            for chunk in range(0, len(cand), BATCH_FUZZY_CHUNK_PAIRS):
+                sl = slice(chunk, chunk + BATCH_FUZZY_CHUNK_PAIRS)
+                scores[sl] = _max_fuzzy_scores(queries[pair_query[sl]], choices_clean[cand[sl]], similarity_ref)
+            self.fuzzy_batch_pairs += len(cand)
+        else:
+            scores = np.array([self._get_fuzzy_score_cached(queries[q], choices_clean[c])
+                               for q, c in zip(pair_query, cand)], dtype=np.int32)
+
+        # Keep passing pairs, ledger order within each statement row
+        keep = scores >= similarity_ref
+        pair_stmt, cand, scores = rows[pair_query[keep]], cand[keep], scores[keep]
+        order = np.lexsort((cand, pair_stmt))
+        offsets = np.zeros(len(stmt_refs) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pair_stmt, minlength=len(stmt_refs)), out=offsets[1:])
+        return offsets, cand[order], scores[order]
+
+    def _best_open_reference(self, query, open_choices, choice_taken, similarity_ref):
+        """
+        Best open ledger choice for one reference over the whole ledger.
+
+        Uses rapidfuzz extractOne per scorer (taken choices are None); the
+        best of ratio, token_set_ratio and partial_ratio wins, first choice on
+        ties. Returns (choice, score), or (None, -1) below similarity_ref.
+        """
+        best_choice, best_score = None, -1
+        if rf_process is not None:
+            for scorer in (fuzz.ratio, fuzz.token_set_ratio, fuzz.partial_ratio):
+                found = rf_process.extractOne(query, open_choices, scorer=scorer, processor=None,
+                                              score_cutoff=similarity_ref)
+                if found is None:
+                    continue
+                score = int(np.floor(found[1] + 1e-9))
+                if score > best_score or (score == best_score and found[2] < best_choice):
+                    best_choice, best_score = found[2], score
+            return best_choice, best_score
+
+        for choice, ledger_ref in enumerate(open_choices):
+            if choice_taken[choice]:
+                continue
+            score = self._get_fuzzy_score_cached(query, ledger_ref)
+            if score >= similarity_ref and score > best_score:
+                best_choice, best_score = choice, score
+        return best_choice, best_score
+
     def _phase1_regular_matching(self, ledger, statement, settings,
                                  match_dates, match_references, match_amounts, fuzzy_ref, similarity_ref,
                                  date_ledger, date_statement, ref_ledger, ref_statement,
@@ -640,8 +1388,13 @@ class GUIReconciliationEngine:
 
         OPTIMIZATION v2.0:
         - Uses global indexes (built once) instead of rebuilding per phase
-        - Trigram-based fuzzy candidate filtering
+        - IDF-weighted trigram top-k shortlist before fuzzy scoring
         - Fast-path for reference-only matching (10-100x faster)
+
+        OPTIMIZATION v2.1:
+        - Candidates come from a vectorized sort-merge join on (date, side, cents)
+          instead of per-row set intersections over the whole ledger
+        - Matching runs on the row arrays from _phase_arrays (see _phase1_assign)
         """
 
         # ======================================
@@ -650,94 +1403,219 @@ class GUIReconciliationEngine:
         if match_references and not match_dates and not match_amounts:
             return self._fast_reference_only_matching(
                 ledger, statement, ref_ledger, ref_statement,
-                fuzzy_ref, similarity_ref
+                fuzzy_ref, similarity_ref, settings.get('fuzzy_top_k', DEFAULT_FUZZY_TOP_K)
             )
 
-        matched_rows = []
-        ledger_matched = set()
-        unmatched_statement = []
+        arrays = self._arrays
 
         # ======================================
-        # USE GLOBAL INDEXES (already built)
+        # VECTORIZED CANDIDATE JOIN (one pass)
         # ======================================
-        ledger_by_date = self.ledger_by_date
-        ledger_by_amount = self.ledger_by_amount
-        ledger_by_ref = self.ledger_by_ref_exact
+        candidates = self._build_phase1_candidates(
+            arrays, match_dates, match_amounts, use_debits_only, use_credits_only,
+            tolerances=self._phase1_tolerances(settings)
+        )
 
         # ======================================
-        # MATCH EACH STATEMENT ROW
+        # ASSIGN MATCHES (first-come, statement order)
         # ======================================
-        for idx, stmt_row in statement.iterrows():
-            stmt_date = stmt_row[date_statement] if (match_dates and date_statement in statement.columns) else None
-            stmt_ref = str(stmt_row[ref_statement]) if (match_references and ref_statement in statement.columns) else ""
-            
-            # Safely extract amount
-            try:
-                stmt_amt = float(stmt_row[amt_statement]) if (match_amounts and amt_statement in statement.columns) else 0
-            except (TypeError, ValueError):
-                stmt_amt = 0  # Default to 0 if not a valid number
-
-            # Fast filtering using indexes
-            candidate_indices = set(ledger.index)
-
-            # Date filter
-            if match_dates and stmt_date and stmt_date in ledger_by_date:
-                candidate_indices &= set(ledger_by_date[stmt_date])
-            elif match_dates and stmt_date:
-                candidate_indices = set()
-
-            # Amount filter
-            if match_amounts and abs(stmt_amt) in ledger_by_amount:
-                amount_candidates = set()
-                for ledger_idx, amt_type in ledger_by_amount[abs(stmt_amt)]:
-                    if use_debits_only and amt_type == 'debit':
-                        amount_candidates.add(ledger_idx)
-                    elif use_credits_only and amt_type == 'credit':
-                        amount_candidates.add(ledger_idx)
-                    elif use_both_debit_credit:
-                        if stmt_amt >= 0 and amt_type == 'debit':
-                            amount_candidates.add(ledger_idx)
-                        elif stmt_amt < 0 and amt_type == 'credit':
-                            amount_candidates.add(ledger_idx)
-                candidate_indices &= amount_candidates
-            elif match_amounts:
-                candidate_indices = set()
-
-            # Remove already matched
-            candidate_indices -= ledger_matched
-
-            # Get candidate rows
-            if candidate_indices:
-                ledger_candidates = ledger.loc[list(candidate_indices)]
+        stmt_pos, ledger_pos, scores = self._phase1_assign(
+            arrays, candidates, match_references, fuzzy_ref, similarity_ref,
+            batch_fuzzy=settings.get('batch_fuzzy', False),
+            fuzzy_workers=settings.get('fuzzy_workers', -1),
+            fuzzy_top_k=settings.get('fuzzy_top_k', DEFAULT_FUZZY_TOP_K)
+        )
+
+        matched_rows = MatchPairs(stmt_pos, ledger_pos, scores, 'regular')
+        ledger_matched = set(ledger.index[ledger_pos])
+        stmt_matched_mask = np.zeros(len(statement), dtype=bool)
+        stmt_matched_mask[stmt_pos] = True
+        unmatched_statement = list(statement.index[~stmt_matched_mask])
+
+        return matched_rows, ledger_matched, unmatched_statement
+
+    def _phase_arrays(self, ledger, statement, date_ledger, date_statement, ref_ledger, ref_statement,
+                      amt_ledger_debit, amt_ledger_credit, amt_statement) -> Dict[str, Any]:
+        """
+        Extract the per-row arrays Phases 1 and 1.5 work on, in one vectorized pass.
+
+        Dates become int64 days and int64 nanoseconds (NaT -> _NAT_KEY; None when the
+        column is missing), amounts become int64 cents (statement side keeps its sign in
+        stmt_negative) and references become object arrays of strings.
+        """
+        arrays = self._ledger_arrays(ledger, date_ledger, ref_ledger, amt_ledger_debit, amt_ledger_credit)
+        arrays.update(self._statement_arrays(statement, date_statement, ref_statement, amt_statement))
+        return arrays
+
+    def _ledger_arrays(self, ledger, date_ledger, ref_ledger, amt_ledger_debit, amt_ledger_credit) -> Dict[str, Any]:
+        """Ledger half of _phase_arrays (ledger_ns/days, debit/credit cents, refs)."""
+        n_ledger = len(ledger)
+        arrays = {'ledger_ns': None, 'ledger_days': None}
+        if date_ledger in ledger.columns:
+            arrays['ledger_ns'] = _to_ns_keys(ledger[date_ledger])
+            arrays['ledger_days'] = _ns_to_days(arrays['ledger_ns'])
+
+        for key, col in (('ledger_debit_cents', amt_ledger_debit), ('ledger_credit_cents', amt_ledger_credit)):
+            arrays[key] = _to_cents(ledger[col]) if col and col in ledger.columns else np.zeros(n_ledger, dtype=np.int64)
+
+        if ref_ledger in ledger.columns:
+            arrays['ledger_refs'] = ledger[ref_ledger].fillna('').astype(str).to_numpy(dtype=object)
+        else:
+            arrays['ledger_refs'] = np.full(n_ledger, '', dtype=object)
+        return arrays
+
+    def _statement_arrays(self, statement, date_statement, ref_statement, amt_statement) -> Dict[str, Any]:
+        """Statement half of _phase_arrays (stmt_ns/days, cents, sign, refs)."""
+        n_stmt = len(statement)
+        arrays = {'stmt_ns': None, 'stmt_days': None}
+        if date_statement in statement.columns:
+            arrays['stmt_ns'] = _to_ns_keys(statement[date_statement])
+            arrays['stmt_days'] = _ns_to_days(arrays['stmt_ns'])
+
+        if amt_statement in statement.columns:
+            stmt_amounts = pd.to_numeric(statement[amt_statement], errors='coerce').fillna(0).to_numpy(dtype=float)
+        else:
+            stmt_amounts = np.zeros(n_stmt)
+        arrays['stmt_cents'] = _to_cents(stmt_amounts)
+        arrays['stmt_negative'] = stmt_amounts < 0
+
+        if ref_statement in statement.columns:
+            arrays['stmt_refs'] = statement[ref_statement].fillna('').astype(str).to_numpy(dtype=object)
+        else:
+            arrays['stmt_refs'] = np.full(n_stmt, '', dtype=object)
+        return arrays
+
+    def _phase1_assign(self, arrays, candidates, match_references, fuzzy_ref, similarity_ref,
+                       batch_fuzzy=False, fuzzy_workers=-1,
+                       trigram_positions=None,
+                       fuzzy_top_k=DEFAULT_FUZZY_TOP_K) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        First-come assignment of statement rows to their Phase 1 candidates.
+
+        Statement rows are visited in order; each takes the first unmatched exact
+        reference hit in its candidate range, else (with fuzzy matching on) the
+        first candidate sharing an identifier key - an RJ/TX/CSH/ZVC/ECO/INN
+        number, then a phone number - else the best fuzzy score (>= 95 stops
+        early), else - with reference matching off - the first open candidate.
+        How each match was decided is counted in phase1_decided_by.
+        `trigram_positions` maps row positions to the positions the trigram index
+        was built on (date shards use the full-ledger index). Fuzzy scoring only
+        sees the `fuzzy_top_k` open candidates with the highest IDF-weighted
+        trigram overlap (see _ngram_phase1_scores); 0 scores the whole block.
+
+        Returns:
+            Tuple (stmt_pos, ledger_pos, score) of int arrays in statement order
+        """
+        ledger_order = candidates['ledger_order']
+        cand_lo = candidates['lo']
+        cand_hi = candidates['hi']
+
+        ledger_refs = arrays['ledger_refs']
+        if match_references:
+            stmt_refs = arrays['stmt_refs']
+        else:
+            stmt_refs = np.full(len(cand_lo), '', dtype=object)
+        ledger_matched_mask = np.zeros(len(ledger_refs), dtype=bool)
+
+        out_stmt, out_ledger, out_score = [], [], []
+
+        # ======================================
+        # BATCH FUZZY SCORING (optional, multi-core)
+        # ======================================
+        # Scores every candidate pair up front with rapidfuzz; rows whose pairs
+        # were not batch-scored fall back to the cached per-pair path below.
+        batch_start = None
+        batch_scores = None
+        if match_references and fuzzy_ref and batch_fuzzy and rf_process is not None:
+            batch_start, batch_scores = self._batch_score_phase1_candidates(
+                ledger_order, cand_lo, cand_hi, stmt_refs, ledger_refs,
+                similarity_ref, fuzzy_workers
+            )
+            ledger_ref_ok = np.array(
+                [bool(r) and r.lower() != 'nan' and r.strip() != '' for r in ledger_refs], dtype=bool
+            )
+
+        # Identifier keys resolve rows by hash join before any fuzzy work
+        id_codes = _identifier_codes(ledger_refs, stmt_refs) if match_references and fuzzy_ref else {}
+
+        # IDF-weighted trigram overlap of every candidate pair, same layout as the batch scores
+        ngram_start = None
+        ngram_scores = None
+        if match_references and fuzzy_ref and fuzzy_top_k and fuzzy_top_k > 0:
+            ngram_start, ngram_scores = self._ngram_phase1_scores(
+                ledger_order, cand_lo, cand_hi, stmt_refs, trigram_positions
+            )
+
+        for stmt_pos in range(len(cand_lo)):
+            lo = cand_lo[stmt_pos]
+            hi = cand_hi[stmt_pos]
+            if hi > lo:
+                open_mask = ~ledger_matched_mask[ledger_order[lo:hi]]
+                block = ledger_order[lo:hi][open_mask]
             else:
-                ledger_candidates = ledger.iloc[0:0]
+                block = ledger_order[0:0]
+
+            stmt_ref = stmt_refs[stmt_pos]
 
             # Reference matching
             best_score = -1
-            best_ledger_idx = None
-            best_ledger_row = None
+            best_pos = None
+            decided = 'fuzzy'
 
             if match_references and stmt_ref and stmt_ref.lower() != 'nan' and stmt_ref.strip() != '':
-                # Try exact match using index
-                if stmt_ref in ledger_by_ref:
-                    exact_candidates = [idx for idx in ledger_by_ref[stmt_ref] if idx in candidate_indices]
-                    if exact_candidates:
-                        best_ledger_idx = exact_candidates[0]
+                # Try exact match - block is in ledger order, so first hit wins
+                if len(block) > 0:
+                    exact_hits = block[ledger_refs[block] == stmt_ref]
+                    if len(exact_hits) > 0:
+                        best_pos = int(exact_hits[0])
                         best_score = 100
-                        best_ledger_row = ledger.loc[best_ledger_idx]
+                        decided = 'exact'
 
-                # Fuzzy matching fallback - OPTIMIZED with trigram pre-filtering
-                if best_ledger_idx is None and fuzzy_ref and len(ledger_candidates) > 0:
-                    # Get trigram-filtered candidates (5-20x faster than checking all)
-                    trigram_candidates = self._get_fuzzy_candidates_by_trigram(stmt_ref, threshold=0.2)
-                    # Intersect with date/amount filtered candidates
-                    fuzzy_candidate_indices = candidate_indices & trigram_candidates if trigram_candidates else candidate_indices
-
-                    for lidx in fuzzy_candidate_indices:
-                        if lidx not in ledger.index:
+                # Identifier keys (same RJ/CSH/... number or phone number) - exact on the key
+                if best_pos is None and len(block) > 0:
+                    for key_type, (ledger_codes, stmt_codes) in id_codes.items():
+                        code = stmt_codes[stmt_pos]
+                        if code < 0:
                             continue
-                        ledger_row = ledger.loc[lidx]
-                        ledger_ref = str(ledger_row[ref_ledger]) if ref_ledger in ledger.columns else ""
+                        id_hits = block[ledger_codes[block] == code]
+                        if len(id_hits) > 0:
+                            best_pos = int(id_hits[0])
+                            best_score = 100
+                            decided = key_type
+                            break
+
+                # Fuzzy matching fallback - OPTIMIZED with trigram pre-filtering
+                if best_pos is None and fuzzy_ref and len(block) > 0:
+                    # Shortlist: top-k open candidates by weighted trigram overlap (None = whole block)
+                    shortlist = None
+                    if ngram_start is not None and ngram_start[stmt_pos] >= 0:
+                        start = ngram_start[stmt_pos]
+                        shortlist = top_k_mask(ngram_scores[start:start + (hi - lo)][open_mask], fuzzy_top_k)
+                    if batch_start is not None and batch_start[stmt_pos] >= 0:
+                        # Same selection as the loop below, on precomputed scores:
+                        # first score >= max(95, threshold) wins, else first best score
+                        start = batch_start[stmt_pos]
+                        scores = batch_scores[start:start + (hi - lo)][open_mask]
+                        keep = ledger_ref_ok[block]
+                        if shortlist is not None:
+                            keep &= shortlist
+                        scores = np.where(keep, scores, -1)
+                        early = np.flatnonzero(scores >= max(95, similarity_ref))
+                        if len(early) > 0:
+                            best_pos = int(block[early[0]])
+                            best_score = int(scores[early[0]])
+                        elif len(scores) > 0 and scores.max() >= similarity_ref:
+                            top = int(np.argmax(scores))
+                            best_pos = int(block[top])
+                            best_score = int(scores[top])
+                        fuzzy_block = ()
+                    elif shortlist is not None:
+                        fuzzy_block = block[shortlist]
+                    else:
+                        fuzzy_block = block
+
+                    for lpos in fuzzy_block:
+                        ledger_ref = ledger_refs[lpos]
 
                         # Skip empty/invalid ledger references
                         if not ledger_ref or ledger_ref.lower() == 'nan' or ledger_ref.strip() == '':
@@ -747,8 +1625,7 @@ class GUIReconciliationEngine:
 
                         if ref_score >= similarity_ref and ref_score > best_score:
                             best_score = ref_score
-                            best_ledger_idx = lidx
-                            best_ledger_row = ledger_row
+                            best_pos = int(lpos)
 
                             # Early termination: near-perfect match found
                             if best_score >= 95:
@@ -756,31 +1633,219 @@ class GUIReconciliationEngine:
             elif match_references:
                 # LOOPHOLE FIX: If matching references is enabled but statement has no valid reference,
                 # DO NOT match - leave as unmatched. Same amount/date with no reference = no match.
-                pass  # best_ledger_idx stays None, will be added to unmatched_statement
+                pass  # best_pos stays None, row stays unmatched
             else:
                 # Reference matching is disabled entirely - match by date/amount only
-                if len(ledger_candidates) > 0:
-                    best_ledger_idx = ledger_candidates.index[0]
+                if len(block) > 0:
+                    best_pos = int(block[0])
                     best_score = 100
-                    best_ledger_row = ledger_candidates.iloc[0]
+                    decided = 'amount_date'
 
             # Add match if criteria satisfied
             matching_threshold = similarity_ref if match_references else 0
-            if best_ledger_idx is not None and best_score >= matching_threshold:
-                matched_row = {
-                    'statement_idx': idx,
-                    'ledger_idx': best_ledger_idx,
-                    'statement_row': stmt_row,
-                    'ledger_row': best_ledger_row,
-                    'similarity': best_score,
-                    'match_type': 'regular'
-                }
-                matched_rows.append(matched_row)
-                ledger_matched.add(best_ledger_idx)
-            else:
-                unmatched_statement.append(idx)
+            if best_pos is not None and best_score >= matching_threshold:
+                out_stmt.append(stmt_pos)
+                out_ledger.append(best_pos)
+                out_score.append(best_score)
+                ledger_matched_mask[best_pos] = True
+                self.phase1_decided_by[decided] = self.phase1_decided_by.get(decided, 0) + 1
+
+        return (np.array(out_stmt, dtype=np.int64), np.array(out_ledger, dtype=np.int64),
+                np.array(out_score, dtype=np.int64))
+
+    def _ngram_phase1_scores(self, ledger_order, cand_lo, cand_hi, stmt_refs,
+                             trigram_positions=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        IDF-weighted trigram overlap of all Phase 1 candidate pairs, in one batch.
 
-        return matched_rows, ledger_matched, unmatched_statement
+        Same layout as _batch_score_phase1_candidates: scores[start[i]:start[i] +
+        hi[i] - lo[i]] align with ledger_order[lo[i]:hi[i]]. start[i] is -1 for
+        rows that are not shortlisted (references without trigrams, rows past
+        the pair budget), which keeps their whole block for fuzzy scoring.
+        """
+        n_stmt = len(cand_lo)
+        start = np.full(n_stmt, -1, dtype=np.int64)
+        if len(self.ledger_trigram_index) == 0 or n_stmt == 0:
+            return start, np.empty(0, dtype=np.float64)
+
+        retriever = self._get_ngram_retriever()
+        encoded = retriever.encode_queries(stmt_refs)
+        has_grams = np.diff(encoded[0]) > 0
+
+        counts = np.where(has_grams, cand_hi - cand_lo, 0)
+        counts[np.cumsum(counts) > BATCH_FUZZY_MAX_PAIRS] = 0
+        rows = np.flatnonzero(counts > 0)
+        if len(rows) == 0:
+            return start, np.empty(0, dtype=np.float64)
+
+        counts = counts[rows]
+        offsets = np.cumsum(counts) - counts
+        start[rows] = offsets
+        total = int(counts.sum())
+
+        pair_stmt = np.repeat(rows, counts)
+        pair_ledger = ledger_order[np.arange(total) - np.repeat(offsets, counts) + np.repeat(cand_lo[rows], counts)]
+        if trigram_positions is not None:
+            pair_ledger = trigram_positions[pair_ledger]
+        return start, retriever.score_pairs(stmt_refs, pair_stmt, pair_ledger, encoded=encoded)
+
+    def _batch_score_phase1_candidates(self, ledger_order, cand_lo, cand_hi, stmt_refs, ledger_refs,
+                                       similarity_ref, workers=-1):
+        """
+        Score all Phase 1 candidate pairs in bulk with rapidfuzz cpdist.
+
+        Pairs are expanded block by block (every statement row against its whole
+        blocking-key range) and scored with the same max(ratio, token_set_ratio,
+        partial_ratio) semantics as _get_fuzzy_score_cached, using all cores.
+        Scores below similarity_ref come back as 0.
+
+        Returns:
+            Tuple (start, scores): scores[start[i]:start[i] + hi[i] - lo[i]] are the
+            scores for statement row i aligned with ledger_order[lo[i]:hi[i]];
+            start[i] is -1 for rows that were not batch-scored.
+        """
+        n_stmt = len(cand_lo)
+        start = np.full(n_stmt, -1, dtype=np.int64)
+
+        stmt_clean = np.array([str(r).lower().strip() for r in stmt_refs], dtype=object)
+        ledger_clean = np.array([str(r).lower().strip() for r in ledger_refs], dtype=object)
+        stmt_ok = np.array([bool(r) and r != 'nan' for r in stmt_clean], dtype=bool)
+
+        counts = np.where(stmt_ok, cand_hi - cand_lo, 0)
+        # Rows beyond the memory budget keep start = -1 (per-pair fallback)
+        counts[np.cumsum(counts) > BATCH_FUZZY_MAX_PAIRS] = 0
+        rows = np.flatnonzero(counts > 0)
+        if len(rows) == 0:
+            return start, np.empty(0, dtype=np.int32)
+
+        counts = counts[rows]
+        offsets = np.cumsum(counts) - counts
+        start[rows] = offsets
+        total = int(counts.sum())
+
+        # Expand (statement row, ledger position) pairs in block order
+        pair_stmt = np.repeat(rows, counts)
+        pair_ledger = ledger_order[np.arange(total) - np.repeat(offsets, counts) + np.repeat(cand_lo[rows], counts)]
+
+        scores = np.empty(total, dtype=np.int32)
+        for chunk in range(0, total, BATCH_FUZZY_CHUNK_PAIRS):
+            sl = slice(chunk, chunk + BATCH_FUZZY_CHUNK_PAIRS)
+            queries = stmt_clean[pair_stmt[sl]]
+            choices = ledger_clean[pair_ledger[sl]]
+            scores[sl] = _max_fuzzy_scores(queries, choices, similarity_ref, workers)
+
+        self.fuzzy_batch_pairs += total
+        return start, scores
+
+    def _phase1_tolerances(self, settings) -> Dict[str, Any]:
+        """
+        Phase 1 tolerance windows from the settings (all default to exact keys).
+
+        'date_tolerance' is a day count (True from the +/-1 day checkbox means 1),
+        'amount_tolerance' a percentage of the statement amount and
+        'amount_tolerance_cents' an absolute floor in cents.
+        """
+        date_tolerance = settings.get('date_tolerance', 0)
+        return {
+            'date_tolerance_days': int(date_tolerance) if date_tolerance else 0,
+            'amount_tolerance_pct': float(settings.get('amount_tolerance', 0) or 0),
+            'amount_tolerance_cents': int(settings.get('amount_tolerance_cents', 0) or 0),
+            'pair_budget': int(settings.get('banded_pair_budget', BANDED_PAIR_BUDGET)),
+        }
+
+    def _tolerance_windows(self, tolerances, stmt_cents, match_dates, match_amounts) -> Tuple[int, np.ndarray]:
+        """(day tolerance, per-row cents tolerance) for the enabled blocking keys."""
+        tolerances = tolerances or {}
+        day_tolerance = tolerances.get('date_tolerance_days', 0) if match_dates else 0
+        cents_tolerance = np.zeros(len(stmt_cents), dtype=np.int64)
+        if match_amounts:
+            pct = tolerances.get('amount_tolerance_pct', 0.0)
+            cents_tolerance = np.maximum(
+                np.rint(stmt_cents * (pct / 100)).astype(np.int64), tolerances.get('amount_tolerance_cents', 0)
+            )
+        return day_tolerance, cents_tolerance
+
+    def _build_phase1_candidates(self, arrays, match_dates, match_amounts,
+                                 use_debits_only, use_credits_only, tolerances=None) -> Dict[str, np.ndarray]:
+        """
+        Sort-merge join of statement and ledger on the Phase 1 blocking keys.
+
+        Blocking keys are the normalized date (int64 days), the debit/credit side
+        and the absolute amount in integer cents. Ledger rows are expanded into one
+        posting per non-zero side, lexsorted once by (key, ledger position), and each
+        statement row is resolved to a contiguous [lo, hi) range with searchsorted.
+        Keys that are disabled in the settings collapse to a constant.
+
+        With date/amount tolerances (see _phase1_tolerances) the exact join becomes
+        a banded range join (_join_banded) with the closest candidates first.
+
+        Returns:
+            Dict with 'ledger_order' (ledger positions in key order) and per-statement
+            'lo'/'hi' arrays. Candidates for statement row i are ledger_order[lo[i]:hi[i]],
+            already in ledger order so the first unmatched entry is the first-come match.
+        """
+        n_ledger = len(arrays['ledger_refs'])
+        n_stmt = len(arrays['stmt_refs'])
+        stmt_valid = np.ones(n_stmt, dtype=bool)
+
+        # ---- Ledger postings: one per (row, side) with a non-zero amount ----
+        if match_amounts:
+            post_pos, post_side, post_cents = [], [], []
+            for side, key in ((0, 'ledger_debit_cents'), (1, 'ledger_credit_cents')):
+                keep = np.flatnonzero(arrays[key] > 0)
+                post_pos.append(keep)
+                post_side.append(np.full(len(keep), side, dtype=np.int64))
+                post_cents.append(arrays[key][keep])
+            post_pos = np.concatenate(post_pos)
+            post_side = np.concatenate(post_side)
+            post_cents = np.concatenate(post_cents)
+
+            stmt_cents = arrays['stmt_cents']
+            if use_debits_only:
+                stmt_side = np.zeros(n_stmt, dtype=np.int64)
+            elif use_credits_only:
+                stmt_side = np.ones(n_stmt, dtype=np.int64)
+            else:
+                stmt_side = arrays['stmt_negative'].astype(np.int64)
+            stmt_valid &= stmt_cents > 0
+        else:
+            post_pos = np.arange(n_ledger, dtype=np.int64)
+            post_side = np.zeros(n_ledger, dtype=np.int64)
+            post_cents = np.zeros(n_ledger, dtype=np.int64)
+            stmt_side = np.zeros(n_stmt, dtype=np.int64)
+            stmt_cents = np.zeros(n_stmt, dtype=np.int64)
+
+        # ---- Date key (normalized to whole days) ----
+        if match_dates and arrays['stmt_days'] is not None:
+            stmt_days = arrays['stmt_days']
+            stmt_valid &= stmt_days != _NAT_KEY
+            if arrays['ledger_days'] is not None:
+                post_days = arrays['ledger_days'][post_pos]
+                keep = post_days != _NAT_KEY
+                post_pos, post_side, post_cents, post_days = (
+                    post_pos[keep], post_side[keep], post_cents[keep], post_days[keep]
+                )
+            else:
+                # Dated statement rows can never match an undated ledger
+                stmt_valid[:] = False
+                post_days = np.zeros(len(post_pos), dtype=np.int64)
+        else:
+            stmt_days = np.zeros(n_stmt, dtype=np.int64)
+            post_days = np.zeros(len(post_pos), dtype=np.int64)
+
+        day_tolerance, cents_tolerance = self._tolerance_windows(tolerances, stmt_cents, match_dates, match_amounts)
+        if day_tolerance > 0 or cents_tolerance.any():
+            candidates = _join_banded(post_pos, post_days, post_side, post_cents,
+                                      stmt_days, stmt_side, stmt_cents, stmt_valid,
+                                      day_tolerance, cents_tolerance,
+                                      (tolerances or {}).get('pair_budget', BANDED_PAIR_BUDGET))
+            if candidates['trimmed']:
+                logger.warning("Phase 1 tolerance join over its pair budget: %d statement rows kept "
+                               "only their nearest candidates", candidates['trimmed'])
+            return candidates
+
+        return _join_blocking_keys(post_pos, post_days, post_side, post_cents,
+                                   stmt_days, stmt_side, stmt_cents, stmt_valid)
 
     def _phase15_foreign_credits(self, ledger, statement, ledger_matched, unmatched_statement, settings,
                                 match_dates, date_ledger, date_statement,
@@ -788,118 +1853,553 @@ class GUIReconciliationEngine:
                                 use_debits_only, use_credits_only, use_both_debit_credit):
         """
         Phase 1.5: Foreign Credits (>10,000) - Amount/Date only matching.
-        OPTIMIZED: Uses global indexes for O(1) amount lookups instead of O(n*m) nested loops.
+        OPTIMIZED: Uses the global CSR amount index (cents range query) instead of O(n*m) nested loops.
         """
-        foreign_credits_matches = []
-        foreign_matched_stmt = set()
-        foreign_matched_ledger = set()
+        stmt_open = np.flatnonzero(statement.index.isin(unmatched_statement))
+        ledger_taken = ledger.index.isin(ledger_matched)
 
-        # Use views instead of copies
-        remaining_stmt_indices = [idx for idx in unmatched_statement if idx not in foreign_matched_stmt]
+        stmt_pos, ledger_pos, scores = self._phase15_assign(
+            self._arrays, self.ledger_amount_index, stmt_open, ledger_taken,
+            match_dates, use_debits_only, use_credits_only, use_both_debit_credit
+        )
 
-        for stmt_idx in remaining_stmt_indices:
-            stmt_row = statement.loc[stmt_idx]
+        foreign_credits_matches = MatchPairs(stmt_pos, ledger_pos, scores, 'foreign_credits')
+        foreign_matched_stmt = set(statement.index[stmt_pos])
+        foreign_matched_ledger = set(ledger.index[ledger_pos])
 
-            stmt_date = stmt_row[date_statement] if (match_dates and date_statement in statement.columns) else None
-            try:
-                stmt_amt = float(stmt_row[amt_statement]) if amt_statement in statement.columns else 0
-            except (TypeError, ValueError):
-                continue
+        return foreign_credits_matches, foreign_matched_stmt, foreign_matched_ledger
 
-            # Only process amounts > 10,000
-            if abs(stmt_amt) <= 10000:
-                continue
+    def _phase15_assign(self, arrays, amount_index, stmt_open, ledger_taken, match_dates,
+                        use_debits_only, use_credits_only, use_both_debit_credit) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Assign open statement rows above 10,000 to ledger rows with the same cents.
 
-            # Use global amount index for O(1) lookup instead of scanning all ledger rows
-            amt_key = round(abs(stmt_amt), 2)
-            amount_candidates = self.ledger_by_amount.get(amt_key, [])
+        Candidates come from `amount_index` (debits before credits, ledger order).
+        The first open candidate on the right side - and on the same date when
+        matching dates - wins; with both debits and credits in use, the opposite
+        side is tried as a fallback. `ledger_taken` is updated in place.
 
-            if not amount_candidates:
+        Returns:
+            Tuple (stmt_pos, ledger_pos, score) of int arrays in statement order
+        """
+        ledger_ns = arrays['ledger_ns']
+        stmt_ns = arrays['stmt_ns']
+        stmt_cents = arrays['stmt_cents']
+        stmt_negative = arrays['stmt_negative']
+        check_dates = match_dates and ledger_ns is not None and stmt_ns is not None
+        score = 100 if match_dates else 50
+
+        out_stmt, out_ledger = [], []
+
+        # Only process amounts > 10,000
+        for stmt_pos in stmt_open[stmt_cents[stmt_open] > FOREIGN_CREDIT_MIN_CENTS]:
+            cand_start, cand_end = amount_index.span(stmt_cents[stmt_pos])
+            if cand_end == cand_start:
                 continue
 
-            best_score = -1
-            best_ledger_idx = None
-            best_ledger_row = None
+            cand = amount_index.postings[cand_start:cand_end]
+            cand_side = amount_index.side[cand_start:cand_end]
+            usable = ~ledger_taken[cand]
 
-            for ledger_idx, amt_type in amount_candidates:
-                # Skip already matched
-                if ledger_idx in ledger_matched or ledger_idx in foreign_matched_ledger:
-                    continue
+            # Date match
+            if check_dates:
+                usable &= (ledger_ns[cand] == stmt_ns[stmt_pos]) & (stmt_ns[stmt_pos] != _NAT_KEY)
 
-                # Check amount type matches mode
-                if use_debits_only and amt_type != 'debit':
-                    continue
-                if use_credits_only and amt_type != 'credit':
-                    continue
-                if use_both_debit_credit:
-                    if stmt_amt >= 0 and amt_type != 'debit':
-                        continue
-                    elif stmt_amt < 0 and amt_type != 'credit':
-                        continue
+            # Check amount type matches mode
+            if use_debits_only:
+                side_ok = cand_side == 0
+            elif use_credits_only:
+                side_ok = cand_side == 1
+            else:
+                side_ok = cand_side == (1 if stmt_negative[stmt_pos] else 0)
 
-                # Date match
-                date_match = True
-                if match_dates and stmt_date and date_ledger in ledger.columns:
-                    ledger_date = ledger.loc[ledger_idx, date_ledger]
-                    date_match = (stmt_date == ledger_date)
+            hits = np.flatnonzero(usable & side_ok)
 
-                if not date_match:
-                    continue
+            # Fallback: try other amount column if use_both and no match yet
+            if len(hits) == 0 and use_both_debit_credit:
+                hits = np.flatnonzero(usable)
+
+            if len(hits) > 0:
+                ledger_pos = int(cand[hits[0]])
+                out_stmt.append(int(stmt_pos))
+                out_ledger.append(ledger_pos)
+                ledger_taken[ledger_pos] = True
+
+        return (np.array(out_stmt, dtype=np.int64), np.array(out_ledger, dtype=np.int64),
+                np.full(len(out_stmt), score, dtype=np.int64))
+
+    # ============================================
+    # DATE-PARTITIONED MULTI-PROCESS MODE
+    # ============================================
+
+    def _can_partition_by_date(self, settings, match_dates) -> bool:
+        """Phases 1 and 1.5 are independent per day only when both sides are dated (and no date tolerance)."""
+        return (
+            settings.get('parallel_dates', False)
+            and match_dates
+            and self._phase1_tolerances(settings)['date_tolerance_days'] == 0
+            and self._arrays['ledger_ns'] is not None
+            and self._arrays['stmt_ns'] is not None
+        )
 
-                score = 50  # amount matched
-                if match_dates and date_match:
-                    score = 100
+    def _parallel_date_phases(self, ledger, statement, settings,
+                              match_amounts, match_references, fuzzy_ref, similarity_ref,
+                              use_debits_only, use_credits_only, use_both_debit_credit):
+        """
+        Run Phases 1 and 1.5 per date shard in a process pool.
 
-                if score > best_score:
-                    best_score = score
-                    best_ledger_idx = ledger_idx
-                    best_ledger_row = ledger.loc[ledger_idx]
+        With date matching on, a statement row can only match ledger rows of the
+        same day, so each shard (a contiguous window of days) is matched
+        independently. Shard rows are handed to workers as shared-memory NumPy
+        arrays; results are merged back in statement order, which reproduces the
+        sequential first-come assignment exactly.
 
-                    # Early exit on perfect score
-                    if best_score == 100:
-                        break
+        Returns:
+            Same values as _phase1_regular_matching followed by
+            _phase15_foreign_credits, or None when there are fewer than two shards
+        """
+        arrays = self._arrays
+        workers = int(settings.get('parallel_workers') or os.cpu_count() or 1)
+        shard_plan = _plan_date_shards(arrays['ledger_days'], arrays['stmt_days'], max(2, workers * SHARDS_PER_WORKER))
+        ledger_order, stmt_order, bounds = shard_plan
+        if len(bounds) < 2:
+            return None
 
-            # Fallback: try other amount column if use_both and no match yet
-            if best_ledger_idx is None and use_both_debit_credit:
-                # Try opposite type
-                for ledger_idx, amt_type in amount_candidates:
-                    if ledger_idx in ledger_matched or ledger_idx in foreign_matched_ledger:
-                        continue
+        shared = {
+            'ledger_pos': ledger_order,
+            'ledger_days': arrays['ledger_days'][ledger_order],
+            'ledger_ns': arrays['ledger_ns'][ledger_order],
+            'ledger_debit_cents': arrays['ledger_debit_cents'][ledger_order],
+            'ledger_credit_cents': arrays['ledger_credit_cents'][ledger_order],
+            'ledger_refs': _to_fixed_width(arrays['ledger_refs'][ledger_order]),
+            'stmt_pos': stmt_order,
+            'stmt_days': arrays['stmt_days'][stmt_order],
+            'stmt_ns': arrays['stmt_ns'][stmt_order],
+            'stmt_cents': arrays['stmt_cents'][stmt_order],
+            'stmt_negative': arrays['stmt_negative'][stmt_order],
+            'stmt_refs': _to_fixed_width(arrays['stmt_refs'][stmt_order]),
+        }
+        options = {
+            'match_amounts': match_amounts,
+            'match_references': match_references,
+            'fuzzy_ref': fuzzy_ref,
+            'similarity_ref': similarity_ref,
+            'use_debits_only': use_debits_only,
+            'use_credits_only': use_credits_only,
+            'use_both_debit_credit': use_both_debit_credit,
+            'batch_fuzzy': settings.get('batch_fuzzy', False),
+            'fuzzy_top_k': settings.get('fuzzy_top_k', DEFAULT_FUZZY_TOP_K),
+            'tolerances': self._phase1_tolerances(settings),
+        }
 
-                    date_match = True
-                    if match_dates and stmt_date and date_ledger in ledger.columns:
-                        ledger_date = ledger.loc[ledger_idx, date_ledger]
-                        date_match = (stmt_date == ledger_date)
+        self._emit('info', f"⚡ Date-partitioned matching: {len(bounds)} shards on {min(workers, len(bounds))} processes")
 
-                    if date_match:
-                        best_score = 100 if match_dates else 50
-                        best_ledger_idx = ledger_idx
-                        best_ledger_row = ledger.loc[ledger_idx]
-                        break
+        trigram = self.ledger_trigram_index
+        handles, descriptors = _share_arrays(shared)
+        try:
+            trigram_handles, trigram_descriptors = _share_arrays(
+                {'keys': trigram.keys, 'offsets': trigram.offsets, 'postings': trigram.postings}
+            )
+            handles.extend(trigram_handles)
+            tasks = [
+                {'arrays': descriptors, 'trigram_index': trigram_descriptors, 'bounds': b, 'options': options}
+                for b in bounds
+            ]
+            shard_results = []
+            with ProcessPoolExecutor(max_workers=min(workers, len(bounds)),
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                # map() yields in submission order, so the merge is deterministic
+                for done, result in enumerate(pool.map(_match_date_shard, tasks), start=1):
+                    shard_results.append(result)
+                    self._sink.progress(0.10 + 0.45 * done / len(tasks))
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning("Date-partitioned matching failed, running sequentially: %s", e)
+            self._emit('warning', f"⚠️ Date-partitioned matching unavailable ({e}); running sequentially")
+            return None
+        finally:
+            for shm in handles:
+                shm.close()
+                shm.unlink()
+
+        for result in shard_results:
+            self.fuzzy_cache_hits += result['fuzzy_cache_hits']
+            self.fuzzy_cache_misses += result['fuzzy_cache_misses']
+            self.fuzzy_batch_pairs += result['fuzzy_batch_pairs']
+            for decided, count in result['phase1_decided_by'].items():
+                self.phase1_decided_by[decided] = self.phase1_decided_by.get(decided, 0) + count
+
+        merged = {}
+        for phase in ('phase1', 'phase15'):
+            stmt_pos = np.concatenate([r[phase][0] for r in shard_results])
+            ledger_pos = np.concatenate([r[phase][1] for r in shard_results])
+            scores = np.concatenate([r[phase][2] for r in shard_results])
+            order = np.argsort(stmt_pos, kind='stable')
+            merged[phase] = (stmt_pos[order], ledger_pos[order], scores[order])
+
+        stmt_pos, ledger_pos, scores = merged['phase1']
+        matched_rows = MatchPairs(stmt_pos, ledger_pos, scores, 'regular')
+        ledger_matched = set(ledger.index[ledger_pos])
+        stmt_matched_mask = np.zeros(len(statement), dtype=bool)
+        stmt_matched_mask[stmt_pos] = True
+        unmatched_statement = list(statement.index[~stmt_matched_mask])
+
+        stmt_pos, ledger_pos, scores = merged['phase15']
+        foreign_credits_matches = MatchPairs(stmt_pos, ledger_pos, scores, 'foreign_credits')
+        foreign_matched_stmt = set(statement.index[stmt_pos])
+        foreign_matched_ledger = set(ledger.index[ledger_pos])
+
+        return (matched_rows, ledger_matched, unmatched_statement,
+                foreign_credits_matches, foreign_matched_stmt, foreign_matched_ledger)
+
+    def _match_shard(self, arrays, options) -> Dict[str, Any]:
+        """
+        Run Phases 1 and 1.5 on one date shard (called inside a worker process).
 
-            # Require at least amount match
-            if best_ledger_idx is not None and best_score >= 50:
-                foreign_match = {
-                    'statement_idx': stmt_idx,
-                    'ledger_idx': best_ledger_idx,
-                    'statement_row': stmt_row,
-                    'ledger_row': best_ledger_row,
-                    'similarity': best_score,
-                    'match_type': 'foreign_credits'
-                }
-                foreign_credits_matches.append(foreign_match)
-                foreign_matched_stmt.add(stmt_idx)
-                foreign_matched_ledger.add(best_ledger_idx)
+        The amount index is rebuilt over the shard; the trigram index is the
+        full-ledger one, so fuzzy pre-filtering sees the same candidates as a
+        sequential run. Positions in the returned arrays are global (mapped
+        through ledger_pos / stmt_pos of the shard).
+        """
+        self.ledger_amount_index = _build_amount_index(arrays['ledger_debit_cents'], arrays['ledger_credit_cents'])
 
-        return foreign_credits_matches, foreign_matched_stmt, foreign_matched_ledger
+        candidates = self._build_phase1_candidates(
+            arrays, True, options['match_amounts'], options['use_debits_only'], options['use_credits_only'],
+            tolerances=options['tolerances']
+        )
+        stmt_pos, ledger_pos, scores = self._phase1_assign(
+            arrays, candidates, options['match_references'], options['fuzzy_ref'], options['similarity_ref'],
+            batch_fuzzy=options['batch_fuzzy'], fuzzy_workers=1,
+            trigram_positions=arrays['ledger_pos'], fuzzy_top_k=options['fuzzy_top_k']
+        )
+
+        ledger_taken = np.zeros(len(arrays['ledger_refs']), dtype=bool)
+        ledger_taken[ledger_pos] = True
+        stmt_open_mask = np.ones(len(arrays['stmt_refs']), dtype=bool)
+        stmt_open_mask[stmt_pos] = False
+        fc_stmt, fc_ledger, fc_scores = self._phase15_assign(
+            arrays, self.ledger_amount_index, np.flatnonzero(stmt_open_mask), ledger_taken, True,
+            options['use_debits_only'], options['use_credits_only'], options['use_both_debit_credit']
+        )
+
+        to_ledger = arrays['ledger_pos']
+        to_stmt = arrays['stmt_pos']
+        return {
+            'phase1': (to_stmt[stmt_pos], to_ledger[ledger_pos], scores),
+            'phase15': (to_stmt[fc_stmt], to_ledger[fc_ledger], fc_scores),
+            'fuzzy_cache_hits': self.fuzzy_cache_hits,
+            'fuzzy_cache_misses': self.fuzzy_cache_misses,
+            'fuzzy_batch_pairs': self.fuzzy_batch_pairs,
+            'phase1_decided_by': dict(self.phase1_decided_by),
+        }
+
+    # ============================================
+    # INCREMENTAL MODE (append to a finished run)
+    # ============================================
+
+    def append(self, statement_rows: Optional[pd.DataFrame] = None, ledger_rows: Optional[pd.DataFrame] = None,
+               sink: Optional[ProgressSink] = None) -> Tuple[Dict, ReconciliationDiagnostics]:
+        """
+        Match appended rows against the state kept by the last run (self.state).
+
+        The global indexes and row arrays are extended with the new rows only.
+        New statement rows are matched against the still-unmatched ledger, and
+        still-unmatched statement rows are retried only where a new ledger row
+        shares their blocking key (or, for splits, their date). Matched rows
+        are never revisited, so the cost follows the size of the delta.
+
+        Results equal a full run over the concatenated frames as long as the new
+        rows do not compete with earlier rows for the same counterpart (earlier
+        foreign-credit and split matches are kept as they are). Reference-only
+        runs have no blocking keys and fall back to a full run.
+
+        Args:
+            statement_rows: New statement rows (same columns as the original statement)
+            ledger_rows: New ledger rows (same columns as the original ledger)
+            sink: Optional ProgressSink receiving progress/status/events
+
+        Returns:
+            Tuple of (results dictionary for all rows so far, ReconciliationDiagnostics)
+        """
+        state = self.state
+        if state is None:
+            raise RuntimeError("append() needs a completed run() to resume from")
+
+        statement_rows = _continue_labels(
+            state.statement.index, statement_rows if statement_rows is not None else pd.DataFrame())
+        ledger_rows = _continue_labels(
+            state.ledger.index, ledger_rows if ledger_rows is not None else pd.DataFrame())
+
+        if state.reference_only:
+            return self.run(
+                pd.concat([state.ledger_raw, ledger_rows]) if len(ledger_rows) else state.ledger_raw,
+                pd.concat([state.statement_raw, statement_rows]) if len(statement_rows) else state.statement_raw,
+                state.settings, sink
+            )
+
+        start_time = time.time()
+        self._sink = sink if sink is not None else ProgressSink()
+        self._diagnostics = ReconciliationDiagnostics()
+        cache_evictions_start = self.fuzzy_cache.evictions
+        cache_disk_hits_start = self.fuzzy_cache.disk_hits
+        self.fuzzy_cache_hits = 0
+        self.fuzzy_cache_misses = 0
+        self.fuzzy_batch_pairs = 0
+        self.phase1_decided_by = {}
+        settings = state.settings
+        config = state.config
+
+        self._sink.status(f"🧹 Cleaning {len(statement_rows)} statement / {len(ledger_rows)} ledger rows...")
+        self._sink.progress(0.02)
+        report = ParseReport() if settings.get('parse_report') else None
+        self._diagnostics.parse_report = report
+        new_ledger, _ = self._validate_and_clean_data(ledger_rows, pd.DataFrame(), settings, report)
+        _, new_statement = self._validate_and_clean_data(pd.DataFrame(), statement_rows, settings, report)
+        phase_start = self._mark_phase('validate', start_time)
+
+        n_ledger_old, n_stmt_old = len(state.ledger), len(state.statement)
+        self._extend_state(state, new_ledger, new_statement)
+        arrays = self._arrays = state.arrays
+        ledger, statement = state.ledger, state.statement
+        new_ledger_pos = np.arange(n_ledger_old, len(ledger))
+        new_stmt_pos = np.arange(n_stmt_old, len(statement))
+        phase_start = self._mark_phase('indexes', phase_start)
+        self._sink.progress(0.10)
+
+        # ============================================
+        # PHASES 1 + 1.5 ON THE DELTA
+        # ============================================
+        self._sink.status("⚡ Phases 1 + 1.5: Matching appended rows...")
+        stmt_scope = np.union1d(self._reopened_statement_rows(state, new_ledger_pos, n_stmt_old), new_stmt_pos)
+
+        candidates = self._resume_phase1_candidates(arrays, stmt_scope, ~state.ledger_taken, config)
+        local_pos, ledger_pos, scores = self._phase1_assign(
+            {'ledger_refs': arrays['ledger_refs'], 'stmt_refs': arrays['stmt_refs'][stmt_scope]},
+            candidates, config['match_references'], config['fuzzy_ref'], config['similarity_ref'],
+            batch_fuzzy=settings.get('batch_fuzzy', False),
+            fuzzy_workers=settings.get('fuzzy_workers', -1),
+            fuzzy_top_k=settings.get('fuzzy_top_k', DEFAULT_FUZZY_TOP_K)
+        )
+        regular = MatchPairs(stmt_scope[local_pos], ledger_pos, scores, 'regular')
+        state.add_pairs(regular)
+        phase_start = self._mark_phase('phase1', phase_start)
+
+        stmt_view = {
+            'ledger_ns': arrays['ledger_ns'],
+            'stmt_ns': arrays['stmt_ns'][stmt_scope] if arrays['stmt_ns'] is not None else None,
+            'stmt_cents': arrays['stmt_cents'][stmt_scope],
+            'stmt_negative': arrays['stmt_negative'][stmt_scope],
+        }
+        local_pos, ledger_pos, scores = self._phase15_assign(
+            stmt_view, self.ledger_amount_index, np.flatnonzero(~state.stmt_taken[stmt_scope]),
+            state.ledger_taken, config['match_dates'],
+            config['use_debits_only'], config['use_credits_only'], config['use_both_debit_credit']
+        )
+        foreign_credits = MatchPairs(stmt_scope[local_pos], ledger_pos, scores, 'foreign_credits')
+        state.add_pairs(foreign_credits)
+        phase_start = self._mark_phase('phase1_5', phase_start)
+        self._sink.status(f"✅ New regular matches: {len(regular)} | Foreign credits: {len(foreign_credits)}")
+        self._sink.progress(0.55)
+
+        # ============================================
+        # PHASES 2 + 2B ON THE DELTA
+        # ============================================
+        # Splits never cross dates when dates are matched, so only days with new
+        # rows on the other side can produce new splits.
+        split_config = {key: value for key, value in config.items() if key not in ('match_amounts', 'tolerances')}
+        by_day = config['match_dates'] and arrays['ledger_days'] is not None and arrays['stmt_days'] is not None
+
+        self._sink.status("🔀 Phase 2: Split Transactions (DP Algorithm)...")
+        stmt_open = ~state.stmt_taken
+        if by_day:
+            stmt_open &= np.isin(arrays['stmt_days'], arrays['ledger_days'][new_ledger_pos])
+            stmt_open[new_stmt_pos] = ~state.stmt_taken[new_stmt_pos]
+        elif len(new_ledger_pos) == 0:
+            stmt_open[:n_stmt_old] = False
+        split_matches = self._phase2_split_transactions(
+            ledger, statement, set(ledger.index[state.ledger_taken]), set(),
+            list(statement.index[stmt_open]), set(), settings, **split_config
+        )
+        state.add_splits(split_matches)
+        phase_start = self._mark_phase('phase2', phase_start)
+        self._sink.progress(0.75)
+
+        self._sink.status("🔀 Phase 2B: One-to-Many Split Transactions...")
+        ledger_open = ~state.ledger_taken
+        if by_day:
+            ledger_open &= np.isin(arrays['ledger_days'], arrays['stmt_days'][new_stmt_pos])
+            ledger_open[new_ledger_pos] = ~state.ledger_taken[new_ledger_pos]
+        elif len(new_stmt_pos) == 0:
+            ledger_open[:n_ledger_old] = False
+        one_to_many_splits = self._phase2b_one_to_many_splits(
+            ledger, statement, set(ledger.index[~ledger_open]), set(), set(),
+            list(statement.index[~state.stmt_taken]), set(), set(), settings, **split_config
+        )
+        state.add_splits(one_to_many_splits)
+        phase_start = self._mark_phase('phase2b', phase_start)
+        self._sink.status(f"✅ New splits: {len(split_matches) + len(one_to_many_splits)}")
+        self._sink.progress(0.90)
+
+        # ============================================
+        # PROCESS RESULTS (whole state)
+        # ============================================
+        self._sink.status("📊 Processing results...")
+        results = self._process_results(
+            ledger, statement, state.regular, state.foreign_credits, state.split_matches,
+            set(), set(), list(statement.index[~state.stmt_taken]), set()
+        )
+        self._mark_phase('results', phase_start)
+
+        return results, self._finish_diagnostics(
+            start_time, len(state.regular), len(state.foreign_credits), len(state.split_matches),
+            cache_evictions_start, cache_disk_hits_start
+        )
+
+    def _extend_state(self, state: ReconciliationState, new_ledger: pd.DataFrame,
+                      new_statement: pd.DataFrame) -> None:
+        """Append cleaned rows to the state's frames, row arrays, indexes and masks."""
+        config = state.config
+
+        if len(new_ledger):
+            n_old = len(state.ledger)
+            state.ledger = pd.concat([state.ledger, new_ledger])
+            extra = self._ledger_arrays(
+                state.ledger.iloc[n_old:], config['date_ledger'], config['ref_ledger'],
+                config['amt_ledger_debit'], config['amt_ledger_credit']
+            )
+            state.arrays = {**state.arrays, **_concat_row_arrays(
+                {key: value for key, value in state.arrays.items() if key.startswith('ledger_')}, extra)}
+
+            indexes = state.indexes
+            if extra['ledger_days'] is not None:
+                has_date = extra['ledger_days'] != _NAT_KEY
+                indexes['date'] = indexes['date'].extend(
+                    CSRIndex.build(extra['ledger_days'][has_date], np.flatnonzero(has_date)), n_old)
+            indexes['amount'] = indexes['amount'].extend(
+                _build_amount_index(extra['ledger_debit_cents'], extra['ledger_credit_cents']), n_old)
+            if config['ref_ledger'] in state.ledger.columns:
+                indexes['trigram'] = indexes['trigram'].extend(_build_trigram_index(extra['ledger_refs']), n_old)
+            state.ledger_taken = np.concatenate([state.ledger_taken, np.zeros(len(new_ledger), dtype=bool)])
+
+        if len(new_statement):
+            n_old = len(state.statement)
+            state.statement = pd.concat([state.statement, new_statement])
+            extra = self._statement_arrays(
+                state.statement.iloc[n_old:], config['date_statement'], config['ref_statement'],
+                config['amt_statement']
+            )
+            state.arrays = {**state.arrays, **_concat_row_arrays(
+                {key: value for key, value in state.arrays.items() if key.startswith('stmt_')}, extra)}
+            state.stmt_taken = np.concatenate([state.stmt_taken, np.zeros(len(new_statement), dtype=bool)])
+
+        self.ledger_date_index = state.indexes['date']
+        self.ledger_amount_index = state.indexes['amount']
+        self.ledger_trigram_index = state.indexes['trigram']
+        self.global_indexes_built = True
+
+    def _reopened_statement_rows(self, state: ReconciliationState, new_ledger_pos: np.ndarray,
+                                 n_stmt_old: int) -> np.ndarray:
+        """
+        Unmatched earlier statement rows that a new ledger row could match in Phase 1/1.5.
+
+        Ledger rows only ever get taken, so an earlier statement row can only
+        change outcome if a new ledger row falls inside its cents (and day) window.
+        """
+        open_pos = np.flatnonzero(~state.stmt_taken[:n_stmt_old])
+        if len(new_ledger_pos) == 0 or len(open_pos) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        arrays = state.arrays
+        config = state.config
+        stmt_cents = arrays['stmt_cents'][open_pos]
+        day_tolerance, cents_tolerance = self._tolerance_windows(
+            config['tolerances'], stmt_cents, config['match_dates'], config['match_amounts'])
+
+        keep = np.ones(len(open_pos), dtype=bool)
+        if config['match_amounts']:
+            new_cents = np.concatenate([arrays['ledger_debit_cents'][new_ledger_pos],
+                                        arrays['ledger_credit_cents'][new_ledger_pos]])
+            keep &= _has_value_within(stmt_cents, new_cents[new_cents > 0], cents_tolerance)
+        if config['match_dates'] and arrays['stmt_days'] is not None and arrays['ledger_days'] is not None:
+            new_days = arrays['ledger_days'][new_ledger_pos]
+            keep &= _has_value_within(arrays['stmt_days'][open_pos], new_days[new_days != _NAT_KEY], day_tolerance)
+        return open_pos[keep]
+
+    def _resume_phase1_candidates(self, arrays, stmt_positions, ledger_open, config) -> Dict[str, np.ndarray]:
+        """
+        Phase 1 candidate ranges for a few statement rows, read from the global indexes.
+
+        Same candidates and order as _build_phase1_candidates - ledger rows on the
+        statement row's side within its cents and day windows (amount index range
+        query), closest first - restricted to `ledger_open`, without re-joining
+        the whole ledger.
+
+        Returns:
+            Dict with 'ledger_order' and 'lo'/'hi' aligned with stmt_positions
+        """
+        n = len(stmt_positions)
+        ledger_days = arrays['ledger_days']
+        stmt_days = arrays['stmt_days']
+        match_amounts = config['match_amounts']
+        check_dates = config['match_dates'] and stmt_days is not None
+        amount_index = self.ledger_amount_index
+        all_positions = np.arange(len(ledger_open), dtype=np.int64)
+        day_tolerance, cents_tolerance = self._tolerance_windows(
+            config['tolerances'], arrays['stmt_cents'][stmt_positions], config['match_dates'], match_amounts)
+
+        blocks = []
+        bounds = np.zeros(n + 1, dtype=np.int64)
+        for i, stmt_pos in enumerate(stmt_positions):
+            day = stmt_days[stmt_pos] if check_dates else 0
+            if match_amounts:
+                cents = arrays['stmt_cents'][stmt_pos]
+                if cents > 0:
+                    start, end = amount_index.span_range(cents - cents_tolerance[i], cents + cents_tolerance[i])
+                else:
+                    start, end = 0, 0
+                if config['use_debits_only']:
+                    side = 0
+                elif config['use_credits_only']:
+                    side = 1
+                else:
+                    side = int(arrays['stmt_negative'][stmt_pos])
+                on_side = amount_index.side[start:end] == side
+                block = amount_index.postings[start:end][on_side].astype(np.int64)
+                key_pos = np.searchsorted(amount_index.offsets, np.arange(start, end), side='right') - 1
+                cents_gap = np.abs(amount_index.keys[key_pos][on_side] - cents)
+            else:
+                if check_dates and day != _NAT_KEY:
+                    start, end = self.ledger_date_index.span_range(day - day_tolerance, day + day_tolerance)
+                    block = self.ledger_date_index.postings[start:end].astype(np.int64)
+                else:
+                    block = all_positions
+                cents_gap = np.zeros(len(block), dtype=np.int64)
+
+            day_gap = np.zeros(len(block), dtype=np.int64)
+            if check_dates:
+                if ledger_days is None or day == _NAT_KEY:
+                    block = block[:0]
+                    cents_gap = day_gap = cents_gap[:0]
+                else:
+                    block_days = ledger_days[block]
+                    day_gap = np.abs(block_days - day)
+                    keep = (block_days != _NAT_KEY) & (day_gap <= day_tolerance)
+                    block, cents_gap, day_gap = block[keep], cents_gap[keep], day_gap[keep]
+
+            keep = ledger_open[block]
+            block, cents_gap, day_gap = block[keep], cents_gap[keep], day_gap[keep]
+            block = block[np.lexsort((block, cents_gap, day_gap))]
+            blocks.append(block)
+            bounds[i + 1] = bounds[i] + len(block)
+
+        ledger_order = np.concatenate(blocks) if blocks else np.empty(0, dtype=np.int64)
+        return {'ledger_order': ledger_order, 'lo': bounds[:-1], 'hi': bounds[1:]}
 
     def _phase2_split_transactions(self, ledger, statement, ledger_matched, foreign_matched_ledger,
                                    unmatched_statement, foreign_matched_stmt, settings,
                                    match_dates, match_references, fuzzy_ref, similarity_ref,
                                    date_ledger, date_statement, ref_ledger, ref_statement,
                                    amt_ledger_debit, amt_ledger_credit, amt_statement,
-                                   use_debits_only, use_credits_only, use_both_debit_credit,
-                                   progress_bar, status_text):
+                                   use_debits_only, use_credits_only, use_both_debit_credit):
         """
         Phase 2: Split Transaction Detection with Dynamic Programming.
 
@@ -927,29 +2427,30 @@ class GUIReconciliationEngine:
         match_rate = (matched_items / total_items * 100) if total_items > 0 else 0
 
         if match_rate > 90:
-            st.info(f"⚡ Skipped many-to-one split detection - Match rate {match_rate:.1f}% is very high")
-            return split_matches
-
-        # PERFORMANCE: For very large unmatched datasets, skip
-        if len(remaining_statement) > 3000 or len(remaining_ledger) > 3000:
-            st.warning(f"⚠️ Very large unmatched dataset ({len(remaining_ledger)} ledger, {len(remaining_statement)} statement)")
-            st.info(f"⚡ Skipping split detection to prevent performance issues. Use filtering to reduce unmatched items.")
+            self._emit('info', f"⚡ Skipped many-to-one split detection - Match rate {match_rate:.1f}% is very high")
             return split_matches
 
-        # Time-based early termination
-        split_start_time = time.time()
-        SPLIT_TIMEOUT_SECONDS = 30  # Stop after 30 seconds
+        # Work is bounded per block by a subset-sum budget (no row caps or timeouts)
+        work_budget = settings.get('split_work_budget', DEFAULT_WORK_BUDGET)
+        trimmed_blocks = 0
 
         # Info for moderate to large datasets
         if len(remaining_statement) > 500 or len(remaining_ledger) > 1000:
-            st.info(f"⚡ Optimized split detection ({len(remaining_ledger)} ledger, {len(remaining_statement)} statement) - Max 30s timeout")
+            self._emit('info', f"⚡ Optimized split detection ({len(remaining_ledger)} ledger, {len(remaining_statement)} statement) - Per-block work budget {work_budget:,}")
+
+        # Amounts as int64 cents, converted once for the whole phase
+        ledger_debit_cents = _column_cents(remaining_ledger, amt_ledger_debit)
+        ledger_credit_cents = _column_cents(remaining_ledger, amt_ledger_credit)
+        ledger_cents = _ledger_amount_cents(ledger_debit_cents, ledger_credit_cents,
+                                            use_debits_only, use_credits_only).to_dict()
+        stmt_cents = _column_cents(remaining_statement, amt_statement).to_numpy()
 
         # ======================================
         # BUILD SPLIT INDEXES USING VECTORIZATION
         # ======================================
         split_ledger_by_date = {}
-        split_ledger_by_amount_range = {}
         split_ledger_by_reference = {}
+        ledger_ref_upper = {}
 
         # Vectorized date grouping
         if match_dates and date_ledger in remaining_ledger.columns:
@@ -957,6 +2458,11 @@ class GUIReconciliationEngine:
             split_ledger_by_date = {k: list(v) for k, v in date_groups.items()}
 
         # Vectorized reference grouping with word indexing
+        if ref_ledger in remaining_ledger.columns:
+            ledger_ref_upper = dict(zip(
+                remaining_ledger.index, remaining_ledger[ref_ledger].astype(str).str.strip().str.upper()
+            ))
+
         if match_references and ref_ledger in remaining_ledger.columns:
             refs = remaining_ledger[ref_ledger].fillna('').astype(str).str.strip().str.upper()
             for ledger_idx, ref_val in zip(remaining_ledger.index, refs):
@@ -968,52 +2474,21 @@ class GUIReconciliationEngine:
                                 split_ledger_by_reference[word] = set()
                             split_ledger_by_reference[word].add(ledger_idx)
 
-        # Vectorized amount range grouping
-        if amt_ledger_debit in remaining_ledger.columns:
-            debit_amounts = pd.to_numeric(remaining_ledger[amt_ledger_debit], errors='coerce').fillna(0).abs()
-            for ledger_idx, amt in zip(remaining_ledger.index, debit_amounts):
-                if amt > 0:
-                    range_key = int(amt / 1000) * 1000
-                    if range_key not in split_ledger_by_amount_range:
-                        split_ledger_by_amount_range[range_key] = []
-                    split_ledger_by_amount_range[range_key].append(ledger_idx)
-
-        if amt_ledger_credit in remaining_ledger.columns:
-            credit_amounts = pd.to_numeric(remaining_ledger[amt_ledger_credit], errors='coerce').fillna(0).abs()
-            for ledger_idx, amt in zip(remaining_ledger.index, credit_amounts):
-                if amt > 0:
-                    range_key = int(amt / 1000) * 1000
-                    if range_key not in split_ledger_by_amount_range:
-                        split_ledger_by_amount_range[range_key] = []
-                    split_ledger_by_amount_range[range_key].append(ledger_idx)
-
         # Process each unmatched statement for splits
         for stmt_count, (stmt_idx, stmt_row) in enumerate(remaining_statement.iterrows()):
             if stmt_idx in split_matched_stmt:
                 continue
 
-            # TIMEOUT CHECK - Stop after 30 seconds
-            if stmt_count % 20 == 0:
-                elapsed = time.time() - split_start_time
-                if elapsed > SPLIT_TIMEOUT_SECONDS:
-                    st.info(f"⏱️ Split detection timeout ({elapsed:.1f}s) - Found {len(split_matches)} splits so far")
-                    break
-
             # Update progress
             if stmt_count % 50 == 0:
-                progress = 0.55 + (stmt_count / len(remaining_statement)) * 0.30
-                progress_bar.progress(progress)
+                progress = 0.55 + (stmt_count / len(remaining_statement)) * 0.20
+                self._sink.progress(progress)
 
             stmt_date = stmt_row[date_statement] if (match_dates and date_statement in statement.columns) else None
             stmt_ref = str(stmt_row[ref_statement]).strip().upper() if (match_references and ref_statement in statement.columns) else ""
             
-            # Safely extract statement amount
-            try:
-                stmt_amt = float(stmt_row[amt_statement]) if amt_statement in statement.columns else 0
-            except (TypeError, ValueError):
-                stmt_amt = 0
-
-            if abs(stmt_amt) == 0:
+            target_cents = int(stmt_cents[stmt_count])
+            if target_cents == 0:
                 continue
 
             # Find candidates using indexes
@@ -1043,7 +2518,7 @@ class GUIReconciliationEngine:
                 for ledger_idx in word_pre_filter:
                     if ledger_idx not in candidates:
                         continue
-                    ledger_ref = str(remaining_ledger.loc[ledger_idx][ref_ledger]).strip().upper()
+                    ledger_ref = ledger_ref_upper[ledger_idx]
                     score = self._get_fuzzy_score_cached(stmt_ref, ledger_ref)
                     if score >= similarity_ref:
                         ref_candidates.add(ledger_idx)
@@ -1065,8 +2540,7 @@ class GUIReconciliationEngine:
             # STEP 1: Group candidates by their exact reference text
             reference_groups = {}
             for ledger_idx in candidates:
-                ledger_row = remaining_ledger.loc[ledger_idx]
-                ledger_ref = str(ledger_row[ref_ledger]).strip().upper() if ref_ledger in remaining_ledger.columns else ""
+                ledger_ref = ledger_ref_upper.get(ledger_idx, "")
                 
                 # Skip empty/invalid references
                 if not ledger_ref or ledger_ref == '' or ledger_ref == 'NAN':
@@ -1092,44 +2566,24 @@ class GUIReconciliationEngine:
             
             # STEP 3: Try to find split ONLY within best matching reference group
             if best_ref_group and len(best_ref_group) >= 2:
-                # PERFORMANCE: Limit group size to prevent excessive DP computation
-                if len(best_ref_group) > 20:
-                    # Sort by amount (closest to target) and keep top 20
-                    group_with_amounts = []
-                    for idx in best_ref_group:
-                        row = remaining_ledger.loc[idx]
-                        amt = 0
-                        if use_debits_only and amt_ledger_debit in remaining_ledger.columns:
-                            try:
-                                amt = abs(float(row[amt_ledger_debit]))
-                            except (TypeError, ValueError):
-                                pass
-                        elif use_credits_only and amt_ledger_credit in remaining_ledger.columns:
-                            try:
-                                amt = abs(float(row[amt_ledger_credit]))
-                            except (TypeError, ValueError):
-                                pass
-                        group_with_amounts.append((idx, amt))
-                    
-                    # Sort by distance from target amount
-                    group_with_amounts.sort(key=lambda x: abs(x[1] - stmt_amt))
-                    best_ref_group = [idx for idx, _ in group_with_amounts[:20]]
-                
+                # The whole group is searched; the budget bounds the subset-sum work
+                budget = WorkBudget(work_budget)
                 combination = self._find_split_combination_dp(
-                    remaining_ledger.loc[best_ref_group],
-                    stmt_amt, tolerance=0.05,  # 5% tolerance for foreign credits/debits
-                    amt_debit_col=amt_ledger_debit,
-                    amt_credit_col=amt_ledger_credit,
+                    best_ref_group, target_cents,
+                    ledger_debit_cents, ledger_credit_cents,
+                    tolerance=0.05,  # 5% tolerance for foreign credits/debits
                     use_debits_only=use_debits_only,
                     use_credits_only=use_credits_only,
-                    use_both=use_both_debit_credit
+                    use_both=use_both_debit_credit,
+                    budget=budget
                 )
+                trimmed_blocks += budget.exhausted
             
             # NO FALLBACK TO GENERAL CANDIDATES - prevents mismatches
 
             if combination:
                 # STRICT VALIDATION: Calculate total amount from ledger items
-                ledger_total = 0
+                ledger_total_cents = 0
                 ledger_rows = []
                 all_same_reference = True
                 all_same_date = True
@@ -1157,48 +2611,15 @@ class GUIReconciliationEngine:
                         elif ledger_date != first_date:
                             all_same_date = False
                     
-                    # Get amount based on settings
-                    if use_debits_only and amt_ledger_debit in remaining_ledger.columns:
-                        try:
-                            ledger_total += abs(float(ledger_row[amt_ledger_debit]))
-                        except (TypeError, ValueError):
-                            pass
-                    elif use_credits_only and amt_ledger_credit in remaining_ledger.columns:
-                        try:
-                            ledger_total += abs(float(ledger_row[amt_ledger_credit]))
-                        except (TypeError, ValueError):
-                            pass
-                    else:
-                        # Use both - try debit first, then credit
-                        if amt_ledger_debit in remaining_ledger.columns:
-                            try:
-                                amt = float(ledger_row[amt_ledger_debit])
-                                if amt != 0:
-                                    ledger_total += abs(amt)
-                                    continue
-                            except (TypeError, ValueError):
-                                pass
-                        if amt_ledger_credit in remaining_ledger.columns:
-                            try:
-                                amt = float(ledger_row[amt_ledger_credit])
-                                if amt != 0:
-                                    ledger_total += abs(amt)
-                            except (TypeError, ValueError):
-                                pass
-                
-                # VALIDATION 2: Check amounts add up EXACTLY - NO TOLERANCE
-                stmt_amount = abs(float(stmt_amt))
-                amount_difference = abs(ledger_total - stmt_amount)
-                
-                # EXACT MATCH ONLY - amounts must be identical
-                amounts_match = (amount_difference == 0)
-                
+                    # Amount based on settings (cents)
+                    ledger_total_cents += ledger_cents[idx]
+
+                # VALIDATION 2: Check amounts add up EXACTLY - NO TOLERANCE (integer cents)
+                amounts_match = (ledger_total_cents == target_cents)
+
                 # VALIDATION 3: Calculate similarity score
-                try:
-                    similarity = 100 - (amount_difference / stmt_amount * 100) if stmt_amount > 0 else 0
-                    similarity = max(0, min(100, similarity))
-                except (TypeError, ValueError, ZeroDivisionError):
-                    similarity = 0
+                amount_difference = abs(ledger_total_cents - target_cents)
+                similarity = max(0, min(100, 100 - amount_difference / target_cents * 100))
                 
                 # VALIDATION 4: Check if dates match statement date (if date matching enabled)
                 date_matches_statement = True
@@ -1215,8 +2636,8 @@ class GUIReconciliationEngine:
                         'split_type': 'many_to_one',
                         'statement_row': stmt_row,
                         'ledger_rows': ledger_rows,
-                        'total_amount': ledger_total,
-                        'statement_amount': stmt_amount,
+                        'total_amount': ledger_total_cents / 100,
+                        'statement_amount': target_cents / 100,
                         'similarity': similarity,
                         'items_count': len(combination)
                     }
@@ -1224,10 +2645,8 @@ class GUIReconciliationEngine:
                     split_matched_stmt.add(stmt_idx)
                     split_matched_ledger.update(combination)
 
-            # Stop if we have too many splits (performance)
-            if len(split_matches) >= 100:
-                st.info(f"⚡ Found {len(split_matches)} splits - Stopping for performance")
-                break
+        if trimmed_blocks:
+            self._emit('warning', f"⚠️ {trimmed_blocks} split blocks exceeded the work budget - searched the largest {MITM_MAX_ITEMS} items only")
 
         return split_matches
 
@@ -1236,10 +2655,12 @@ class GUIReconciliationEngine:
                                     match_dates, match_references, fuzzy_ref, similarity_ref,
                                     date_ledger, date_statement, ref_ledger, ref_statement,
                                     amt_ledger_debit, amt_ledger_credit, amt_statement,
-                                    use_debits_only, use_credits_only, use_both_debit_credit,
-                                    progress_bar, status_text):
+                                    use_debits_only, use_credits_only, use_both_debit_credit):
         """
         Phase 2B: One-to-Many Split Detection (One Ledger -> Multiple Statement)
+
+        Statement candidates come from date and reference-word indexes built once,
+        so each ledger row only visits statement rows it can actually match.
         """
         one_to_many_matches = []
 
@@ -1260,415 +2681,276 @@ class GUIReconciliationEngine:
         if len(remaining_ledger) < 3 and len(remaining_statement) < 5:
             return one_to_many_matches
 
-        # PERFORMANCE: Skip if too many items (would be slow)
-        if len(remaining_ledger) > 2000 or len(remaining_statement) > 2000:
-            st.info(f"⚡ Skipping one-to-many splits - too many items ({len(remaining_ledger)} ledger, {len(remaining_statement)} statement)")
-            return one_to_many_matches
-
-        one_matched_stmt = set()
-        one_matched_ledger = set()
+        work_budget = settings.get('split_work_budget', DEFAULT_WORK_BUDGET)
+        trimmed_blocks = 0
 
-        # Time-based early termination
-        one_to_many_start_time = time.time()
-        ONE_TO_MANY_TIMEOUT = 20  # 20 seconds max
+        # ======================================
+        # STATEMENT-SIDE INDEXES (built once)
+        # ======================================
+        n_stmt = len(remaining_statement)
+        stmt_taken = np.zeros(n_stmt, dtype=bool)
+        if ref_statement in statement.columns:
+            stmt_refs = remaining_statement[ref_statement].astype(str).str.strip().str.upper().to_numpy()
+        else:
+            stmt_refs = np.full(n_stmt, '', dtype=object)
+        stmt_cents = _column_cents(remaining_statement, amt_statement).to_numpy()
+        ledger_cents = _ledger_amount_cents(
+            _column_cents(remaining_ledger, amt_ledger_debit), _column_cents(remaining_ledger, amt_ledger_credit),
+            use_debits_only, use_credits_only
+        ).to_numpy()
+
+        # Same-date statement positions (NaT never equals a ledger date)
+        check_dates = match_dates and date_ledger in ledger.columns and date_statement in statement.columns
+        stmt_by_date = {}
+        if check_dates:
+            stmt_ns = _to_ns_keys(remaining_statement[date_statement])
+            ledger_ns = _to_ns_keys(remaining_ledger[date_ledger])
+            for day, positions in pd.Series(np.arange(n_stmt)).groupby(stmt_ns).groups.items():
+                if day != _NAT_KEY:
+                    stmt_by_date[day] = np.asarray(positions, dtype=np.int64)
+
+        # Reference words -> statement positions (pre-filter before fuzzy scoring)
+        use_ref_filter = match_references and fuzzy_ref and ref_statement in statement.columns
+        stmt_by_word = {}
+        if use_ref_filter:
+            for pos, ref in enumerate(stmt_refs):
+                if ref:
+                    for word in set(ref.split()):
+                        stmt_by_word.setdefault(word, []).append(pos)
+        all_positions = np.arange(n_stmt, dtype=np.int64)
+        groups_by_date = {}
+        min_ref_score = max(50, similarity_ref * 0.7)  # Lower threshold for splits (70% of normal)
 
         # Process each unmatched ledger for one-to-many splits
         for ledger_count, (ledger_idx, ledger_row) in enumerate(remaining_ledger.iterrows()):
-            if ledger_idx in one_matched_ledger:
-                continue
-
-            # TIMEOUT CHECK
-            if ledger_count % 20 == 0:
-                elapsed = time.time() - one_to_many_start_time
-                if elapsed > ONE_TO_MANY_TIMEOUT:
-                    st.info(f"⏱️ One-to-many split timeout ({elapsed:.1f}s) - Found {len(one_to_many_matches)} splits")
-                    break
-
             # Update progress
             if ledger_count % 50 == 0:
                 progress = 0.75 + (ledger_count / len(remaining_ledger)) * 0.15
-                progress_bar.progress(progress)
+                self._sink.progress(progress)
 
-            ledger_date = ledger_row[date_ledger] if (match_dates and date_ledger in ledger.columns) else None
             ledger_ref = str(ledger_row[ref_ledger]).strip().upper() if (match_references and ref_ledger in ledger.columns) else ""
 
-            # Get ledger amount
-            ledger_amt = 0
-            if use_debits_only and amt_ledger_debit in ledger.columns:
-                try:
-                    ledger_amt = abs(float(ledger_row[amt_ledger_debit]))
-                except (TypeError, ValueError):
-                    pass
-            elif use_credits_only and amt_ledger_credit in ledger.columns:
-                try:
-                    ledger_amt = abs(float(ledger_row[amt_ledger_credit]))
-                except (TypeError, ValueError):
-                    pass
-            else:
-                # Use both
-                if amt_ledger_debit in ledger.columns:
-                    try:
-                        amt = float(ledger_row[amt_ledger_debit])
-                        if amt != 0:
-                            ledger_amt = abs(amt)
-                    except (TypeError, ValueError):
-                        pass
-                if ledger_amt == 0 and amt_ledger_credit in ledger.columns:
-                    try:
-                        amt = float(ledger_row[amt_ledger_credit])
-                        if amt != 0:
-                            ledger_amt = abs(amt)
-                    except (TypeError, ValueError):
-                        pass
-
-            if ledger_amt == 0:
+            target_cents = int(ledger_cents[ledger_count])
+            if target_cents == 0:
                 continue
 
             # PERFORMANCE: Quick reference pre-filter - extract key words
-            ledger_words = set(ledger_ref.split()) if (match_references and fuzzy_ref and ledger_ref) else set()
-                
-            # Get statement candidates
-            candidates = []
-            for stmt_idx, stmt_row in remaining_statement.iterrows():
-                if stmt_idx in one_matched_stmt:
-                    continue
-
-                stmt_date = stmt_row[date_statement] if (match_dates and date_statement in statement.columns) else None
-                stmt_ref = str(stmt_row[ref_statement]).strip().upper() if (match_references and ref_statement in statement.columns) else ""
-
-                # Date check
-                if match_dates and ledger_date and stmt_date:
-                    if ledger_date != stmt_date:
-                        continue
-
-                # PERFORMANCE: Quick word-based pre-filter before fuzzy matching
-                if match_references and fuzzy_ref and ledger_ref and stmt_ref and ledger_words:
-                    stmt_words = set(stmt_ref.split())
-                    # If no common words, skip expensive fuzzy matching
-                    if not ledger_words.intersection(stmt_words):
-                        continue
-                    
-                    # Now do full fuzzy matching
-                    ref_score = self._get_fuzzy_score_cached(ledger_ref, stmt_ref)
-                    # Use lower threshold for splits (70% of normal)
-                    if ref_score < max(50, similarity_ref * 0.7):
-                        continue
+            ledger_words = set(ledger_ref.split()) if (use_ref_filter and ledger_ref) else set()
 
-                candidates.append(stmt_idx)
-
-            if len(candidates) < 2:
-                continue
-
-            # Group candidates by exact reference
-            reference_groups = {}
-            for stmt_idx in candidates:
-                stmt_row = remaining_statement.loc[stmt_idx]
-                stmt_ref = str(stmt_row[ref_statement]).strip().upper() if ref_statement in statement.columns else ""
+            # Date check
+            day = None
+            if check_dates:
+                day = ledger_ns[ledger_count]
+                if day == _NAT_KEY or day not in stmt_by_date:
+                    continue
 
-                if stmt_ref and stmt_ref != '' and stmt_ref != 'NAN':
-                    if stmt_ref not in reference_groups:
-                        reference_groups[stmt_ref] = []
-                    reference_groups[stmt_ref].append(stmt_idx)
+            # Get statement candidates grouped by exact reference (statement order)
+            if ledger_words:
+                hits = set()
+                for word in ledger_words:
+                    hits.update(stmt_by_word.get(word, ()))
+                pool = np.array(sorted(hits), dtype=np.int64)
+                if day is not None:
+                    pool = pool[np.isin(pool, stmt_by_date[day])]
+                pool = pool[~stmt_taken[pool]]
+
+                # Now do full fuzzy matching on rows sharing a word
+                pool = [pos for pos in pool
+                        if self._get_fuzzy_score_cached(ledger_ref, stmt_refs[pos]) >= min_ref_score]
+                reference_groups = self._group_positions_by_reference(pool, stmt_refs)
+            else:
+                # No reference filter: groups depend only on the date, so build them once per date
+                if day not in groups_by_date:
+                    pool = stmt_by_date[day] if day is not None else all_positions
+                    groups_by_date[day] = {
+                        ref: np.array(positions, dtype=np.int64)
+                        for ref, positions in self._group_positions_by_reference(pool, stmt_refs).items()
+                    }
+                reference_groups = {}
+                for ref, positions in groups_by_date[day].items():
+                    open_positions = positions[~stmt_taken[positions]]
+                    if len(open_positions) > 0:
+                        reference_groups[ref] = [int(p) for p in open_positions]
 
             # Find best matching reference group
             best_ref_group = None
             best_ref_score = 0
 
-            for stmt_ref, group_indices in reference_groups.items():
-                if len(group_indices) >= 2:
+            for stmt_ref, group_positions in reference_groups.items():
+                if len(group_positions) >= 2:
                     score = self._get_fuzzy_score_cached(ledger_ref, stmt_ref)
                     if score > best_ref_score:
                         best_ref_score = score
-                        best_ref_group = group_indices
+                        best_ref_group = group_positions
 
             if not best_ref_group or len(best_ref_group) < 2:
                 continue
 
-            # Try to find split within best reference group
-            stmt_subset = remaining_statement.loc[best_ref_group]
+            # Subset-sum over the group - NO tolerance, must match exactly (integer cents)
+            budget = WorkBudget(work_budget)
+            picked = find_subset_sum(stmt_cents[best_ref_group], target_cents, target_cents,
+                                     target=target_cents, max_items=6, budget=budget)
+            trimmed_blocks += budget.exhausted
 
-            # Use DP to find combination - NO tolerance, must match exactly
-            combination = self._find_split_combination_for_statements(
-                stmt_subset, ledger_amt, tolerance=0.0,
-                amt_statement=amt_statement
-            )
+            if picked:
+                positions = [best_ref_group[p] for p in picked]
+                one_to_many_matches.append({
+                    'ledger_idx': ledger_idx,
+                    'statement_indices': [remaining_statement.index[p] for p in positions],
+                    'split_type': 'one_to_many'
+                })
+                stmt_taken[positions] = True
 
-            if combination:
-                # Validate amounts - must be EXACT match (no tolerance on amounts)
-                stmt_total = sum(abs(float(remaining_statement.loc[idx][amt_statement])) for idx in combination)
-                amount_difference = abs(stmt_total - ledger_amt)
-
-                # Only accept exact matches (allowing max 1 cent rounding error)
-                if amount_difference <= 0.01:
-                    one_to_many_matches.append({
-                        'ledger_idx': ledger_idx,
-                        'statement_indices': combination,
-                        'split_type': 'one_to_many'
-                    })
-                    one_matched_ledger.add(ledger_idx)
-                    one_matched_stmt.update(combination)
-
-            # Stop if too many
-            if len(one_to_many_matches) >= 100:
-                st.info(f"⚡ Found {len(one_to_many_matches)} one-to-many splits - Stopping for performance")
-                break
+        if trimmed_blocks:
+            self._emit('warning', f"⚠️ {trimmed_blocks} one-to-many blocks exceeded the work budget - searched the largest {MITM_MAX_ITEMS} items only")
 
         return one_to_many_matches
 
-    def _find_split_combination_for_statements(self, candidates, target_amount, tolerance=0.0, amt_statement=None):
+    def _group_positions_by_reference(self, positions, refs) -> Dict[str, List[int]]:
+        """Group positions by exact (upper-cased) reference, skipping empty/'NAN' references."""
+        groups = {}
+        for pos in positions:
+            ref = refs[pos]
+            if ref and ref != 'NAN':
+                groups.setdefault(ref, []).append(int(pos))
+        return groups
+
+    def _find_split_combination_for_statements(self, candidates, target_cents, tolerance=0.0, amt_statement=None,
+                                               budget=None):
         """
-        DP algorithm for finding statement combinations that sum to ledger amount.
+        Find statement rows whose amounts sum to the ledger amount (integer cents).
         Tolerance should be 0.0 for exact matches - splits must add up exactly!
         """
         if amt_statement not in candidates.columns:
             return None
 
-        target_int = int(abs(target_amount) * 100)
-        min_target = int(target_int * (1 - tolerance))
-        max_target = int(target_int * (1 + tolerance))
+        target_cents = int(target_cents)
+        min_target = int(target_cents * (1 - tolerance))
+        max_target = int(target_cents * (1 + tolerance))
 
-        items = []
-        for idx, row in candidates.iterrows():
-            try:
-                amt = abs(float(row[amt_statement]))
-                if amt > 0:
-                    items.append((int(amt * 100), idx))
-            except (TypeError, ValueError):
-                pass
-
-        if len(items) < 2:
+        cents = _to_cents(candidates[amt_statement])
+        picked = find_subset_sum(cents, min_target, max_target, target=target_cents, max_items=6, budget=budget)
+        if picked is None:
             return None
+        return [candidates.index[p] for p in picked]
 
-        items.sort(key=lambda x: x[0], reverse=True)
-
-        # Try 2-item combinations first
-        for i in range(len(items)):
-            for j in range(i + 1, len(items)):
-                sum_val = items[i][0] + items[j][0]
-                if min_target <= sum_val <= max_target:
-                    return [items[i][1], items[j][1]]
-
-        # DP for 3+ items
-        dp = {0: []}
-        for item_idx, (amt, idx) in enumerate(items):
-            new_dp = {}
-            for current_sum, indices in list(dp.items()):
-                if current_sum not in new_dp:
-                    new_dp[current_sum] = indices[:]
-
-                new_sum = current_sum + amt
-                if new_sum > max_target:
-                    continue
-
-                new_indices = indices + [item_idx]
-                if len(new_indices) > 6:
-                    continue
-
-                if new_sum not in new_dp or len(new_indices) < len(new_dp[new_sum]):
-                    new_dp[new_sum] = new_indices
-
-                    if len(new_indices) >= 2 and min_target <= new_sum <= max_target:
-                        return [items[i][1] for i in new_indices]
-
-            dp = new_dp
-
-        # Check final DP table
-        for sum_val in range(min_target, max_target + 1):
-            if sum_val in dp and len(dp[sum_val]) >= 2:
-                return [items[i][1] for i in dp[sum_val]]
+    def _find_split_combination_dp(self, candidate_idx, target_cents, debit_cents, credit_cents, tolerance=0.02,
+                                   use_debits_only=False, use_credits_only=False, use_both=True,
+                                   budget=None):
+        """
+        FIXED: Subset-sum search for split combinations (see utils/subset_sum.py).
 
-        return None
+        Amounts arrive as int64 cents (debit_cents / credit_cents are indexed by
+        ledger label), so nothing is re-parsed per block.
 
-    def _find_split_combination_dp(self, candidates, target_amount, tolerance=0.02,
-                                   amt_debit_col=None, amt_credit_col=None,
-                                   use_debits_only=False, use_credits_only=False, use_both=True):
-        """
-        FIXED: Dynamic Programming algorithm for finding split combinations.
-        
         Key fixes:
         1. Groups by reference first
         2. Ensures all items are same type (all debits OR all credits, not mixed)
         3. Validates amounts add up exactly
         """
-        target_int = int(abs(target_amount) * 100)  # Convert to cents
-        min_target = int(target_int * (1 - tolerance))
-        max_target = int(target_int * (1 + tolerance))
-
-        # Extract amounts from candidates - SEPARATE debits and credits
-        debit_items = []
-        credit_items = []
-        
-        for idx, row in candidates.iterrows():
-            debit_amt = 0
-            credit_amt = 0
-            
-            if amt_debit_col and amt_debit_col in candidates.columns:
-                try:
-                    debit_amt = abs(float(row[amt_debit_col]))
-                except (TypeError, ValueError):
-                    debit_amt = 0
-            
-            if amt_credit_col and amt_credit_col in candidates.columns:
-                try:
-                    credit_amt = abs(float(row[amt_credit_col]))
-                except (TypeError, ValueError):
-                    credit_amt = 0
-            
-            # Add to appropriate list - NEVER mix debits and credits
-            if debit_amt > 0:
-                debit_items.append((int(debit_amt * 100), idx, 'debit'))
-            if credit_amt > 0:
-                credit_items.append((int(credit_amt * 100), idx, 'credit'))
-
-        # Try to find combination in DEBITS ONLY first
-        result = None
-        if use_debits_only or use_both:
-            if len(debit_items) >= 2:
-                result = self._find_combination_same_type(debit_items, min_target, max_target)
-                if result:
-                    return result
-        
-        # Try to find combination in CREDITS ONLY
-        if use_credits_only or use_both:
-            if len(credit_items) >= 2:
-                result = self._find_combination_same_type(credit_items, min_target, max_target)
-                if result:
-                    return result
-        
+        target_cents = int(target_cents)
+        min_target = int(target_cents * (1 - tolerance))
+        max_target = int(target_cents * (1 + tolerance))
+
+        # Try to find combination in DEBITS ONLY first, then CREDITS ONLY - never mixed
+        for side_cents, enabled in ((debit_cents, use_debits_only or use_both),
+                                    (credit_cents, use_credits_only or use_both)):
+            if not enabled:
+                continue
+            cents = side_cents.loc[candidate_idx].to_numpy(dtype=np.int64)
+            keep = np.flatnonzero(cents > 0)
+            items = [(int(cents[p]), candidate_idx[p]) for p in keep]
+            result = self._find_combination_same_type(items, min_target, max_target, target_cents, budget)
+            if result:
+                return result
+
         return None
-    
-    def _find_combination_same_type(self, items, min_target, max_target):
+
+    def _find_combination_same_type(self, items, min_target, max_target, target=None, budget=None):
         """Find combination from items of SAME TYPE (all debits or all credits)"""
         if len(items) < 2:
             return None
-        
-        # Fast path: Try 2-item greedy first (most splits are 2-item)
-        for i in range(len(items)):
-            for j in range(i + 1, len(items)):
-                sum_int = items[i][0] + items[j][0]
-                if min_target <= sum_int <= max_target:
-                    return [items[i][1], items[j][1]]
-        
-        # DP for 3+ items (up to 6 items max)
-        max_items = 6
-        if len(items) > max_items:
-            items = items[:max_items]
-        
-        dp = {0: []}  # dp[sum] = list of item indices
-        
-        for amt_int, idx, _ in items:
-            new_dp = {}
-            for current_sum, indices in dp.items():
-                new_sum = current_sum + amt_int
-                
-                # Check if we found a valid combination
-                if min_target <= new_sum <= max_target:
-                    return indices + [idx]
-                
-                # Add to DP table if within bounds and not too many items
-                if new_sum <= max_target and len(indices) < max_items - 1:
-                    if new_sum not in new_dp or len(indices) + 1 < len(new_dp[new_sum]):
-                        new_dp[new_sum] = indices + [idx]
-            
-            # Merge new_dp into dp
-            for sum_val, indices in new_dp.items():
-                if sum_val not in dp or len(indices) < len(dp[sum_val]):
-                    dp[sum_val] = indices
-        
-        return None
+
+        values = np.array([item[0] for item in items], dtype=np.int64)
+        picked = find_subset_sum(values, min_target, max_target, target=target, max_items=6, budget=budget)
+        if picked is None:
+            return None
+        return [items[p][1] for p in picked]
 
     def _process_results(self, ledger, statement, matched_rows, foreign_credits_matches,
                         split_matches, ledger_matched, foreign_matched_ledger,
                         unmatched_statement, foreign_matched_stmt):
-        """Process and format results."""
+        """
+        Process and format results.
+
+        The matched frame is assembled column-wise: the position arrays of the
+        one-to-one matches select rows with one take() per side, and the
+        prefixed ledger/statement blocks are concatenated horizontally.
+        """
         # Combine all matches
-        all_matched = []
-
-        # Regular matches
-        for match in matched_rows:
-            match_dict = {
-                'Ledger_Index': match['ledger_idx'],
-                'Statement_Index': match['statement_idx'],
-                'Match_Type': 'Perfect' if match['similarity'] == 100 else 'Fuzzy',
-                'Similarity': match['similarity']
-            }
-            # Add ledger columns
-            for col in ledger.columns:
-                match_dict[f'Ledger_{col}'] = match['ledger_row'][col]
-            # Add statement columns
-            for col in statement.columns:
-                match_dict[f'Statement_{col}'] = match['statement_row'][col]
-            all_matched.append(match_dict)
-
-        # Foreign credits
-        for match in foreign_credits_matches:
-            match_dict = {
-                'Ledger_Index': match['ledger_idx'],
-                'Statement_Index': match['statement_idx'],
-                'Match_Type': 'Foreign_Credit',
-                'Similarity': match['similarity']
-            }
-            for col in ledger.columns:
-                match_dict[f'Ledger_{col}'] = match['ledger_row'][col]
-            for col in statement.columns:
-                match_dict[f'Statement_{col}'] = match['statement_row'][col]
-            all_matched.append(match_dict)
-
-        matched_df = pd.DataFrame(all_matched) if all_matched else pd.DataFrame()
+        pairs = [p for p in (matched_rows, foreign_credits_matches) if len(p) > 0]
+
+        if pairs:
+            stmt_pos = np.concatenate([p.stmt_pos for p in pairs])
+            ledger_pos = np.concatenate([p.ledger_pos for p in pairs])
+            similarity = np.concatenate([p.similarity for p in pairs])
+            match_type = np.concatenate([
+                np.full(len(p), 'Foreign_Credit', dtype=object) if p.match_type == 'foreign_credits'
+                else np.where(p.similarity == 100, 'Perfect', 'Fuzzy').astype(object)
+                for p in pairs
+            ])
+
+            head = pd.DataFrame({
+                'Ledger_Index': ledger.index[ledger_pos],
+                'Statement_Index': statement.index[stmt_pos],
+                'Match_Type': match_type,
+                'Similarity': similarity,
+            })
+            ledger_block = ledger.take(ledger_pos).add_prefix('Ledger_').reset_index(drop=True)
+            statement_block = statement.take(stmt_pos).add_prefix('Statement_').reset_index(drop=True)
+            matched_df = pd.concat([head, ledger_block, statement_block], axis=1)
+        else:
+            matched_df = pd.DataFrame()
 
         # ============================================
         # CALCULATE UNMATCHED - FIXED LOGIC
         # ============================================
-        # Collect ALL matched statement indices from all phases
-        all_matched_stmt_indices = set()
-        
-        # From regular matches (Phase 1)
-        for match in matched_rows:
-            all_matched_stmt_indices.add(match['statement_idx'])
-        
-        # From foreign credits (Phase 1.5)
-        for match in foreign_credits_matches:
-            all_matched_stmt_indices.add(match['statement_idx'])
-        
-        # From split matches (Phase 2 & 2B)
-        if split_matches:
-            for split in split_matches:
-                split_type = split.get('split_type', 'many_to_one')
-                if split_type == 'many_to_one':
-                    all_matched_stmt_indices.add(split['statement_idx'])
-                elif split_type == 'one_to_many':
-                    all_matched_stmt_indices.update(split['statement_indices'])
-        
-        # Collect ALL matched ledger indices from all phases
-        all_matched_ledger_indices = set()
-        all_matched_ledger_indices.update(ledger_matched)
-        all_matched_ledger_indices.update(foreign_matched_ledger)
-        
-        if split_matches:
-            for split in split_matches:
-                split_type = split.get('split_type', 'many_to_one')
-                if split_type == 'many_to_one':
-                    all_matched_ledger_indices.update(split['ledger_indices'])
-                elif split_type == 'one_to_many':
-                    all_matched_ledger_indices.add(split['ledger_idx'])
-        
-        # UNMATCHED LEDGER: All ledger rows NOT in matched set
-        unmatched_ledger_indices = [idx for idx in ledger.index if idx not in all_matched_ledger_indices]
-        unmatched_ledger_df = ledger.loc[unmatched_ledger_indices] if unmatched_ledger_indices else pd.DataFrame()
-
-        # UNMATCHED STATEMENT: All statement rows NOT in matched set
-        unmatched_stmt_indices = [idx for idx in statement.index if idx not in all_matched_stmt_indices]
-        unmatched_statement_df = statement.loc[unmatched_stmt_indices] if unmatched_stmt_indices else pd.DataFrame()
+        # Matched statement rows from all phases (positions from 1 / 1.5, labels from splits)
+        stmt_matched = np.zeros(len(statement), dtype=bool)
+        ledger_matched_mask = np.zeros(len(ledger), dtype=bool)
+        for p in pairs:
+            stmt_matched[p.stmt_pos] = True
+            ledger_matched_mask[p.ledger_pos] = True
+
+        split_stmt_labels = []
+        split_ledger_labels = list(ledger_matched) + list(foreign_matched_ledger)
+        for split in split_matches or ():
+            split_type = split.get('split_type', 'many_to_one')
+            if split_type == 'many_to_one':
+                split_stmt_labels.append(split['statement_idx'])
+                split_ledger_labels.extend(split['ledger_indices'])
+            elif split_type == 'one_to_many':
+                split_stmt_labels.extend(split['statement_indices'])
+                split_ledger_labels.append(split['ledger_idx'])
+
+        stmt_matched |= statement.index.isin(split_stmt_labels)
+        ledger_matched_mask |= ledger.index.isin(split_ledger_labels)
+
+        # UNMATCHED LEDGER / STATEMENT: rows NOT in the matched masks
+        unmatched_ledger_df = ledger[~ledger_matched_mask] if not ledger_matched_mask.all() else pd.DataFrame()
+        unmatched_statement_df = statement[~stmt_matched] if not stmt_matched.all() else pd.DataFrame()
 
         # Clean up: Remove normalized columns and ensure original dates are shown
         # Keep _original_ columns for export but remove _normalized_ columns from display
-        for df in [matched_df, unmatched_ledger_df, unmatched_statement_df]:
-            if not df.empty:
-                # Remove normalized date columns (used only for comparison)
-                normalized_cols = [col for col in df.columns if col.startswith('_normalized_')]
-                if normalized_cols:
-                    df.drop(columns=normalized_cols, inplace=True, errors='ignore')
-        
+        def drop_normalized(df):
+            # Remove normalized date columns (used only for comparison)
+            normalized_cols = [col for col in df.columns if col.startswith('_normalized_')]
+            return df.drop(columns=normalized_cols) if normalized_cols else df
+
+        matched_df = drop_normalized(matched_df)
+        unmatched_ledger_df = drop_normalized(unmatched_ledger_df)
+        unmatched_statement_df = drop_normalized(unmatched_statement_df)
+
         # Calculate statistics for dashboard
         perfect_count = len(matched_df[matched_df['Match_Type'] == 'Perfect']) if len(matched_df) > 0 else 0
         fuzzy_count = len(matched_df[matched_df['Match_Type'] == 'Fuzzy']) if len(matched_df) > 0 else 0
@@ -0,0 +1,116 @@
+"""
+Streamlit Runner for the GUI Reconciliation Engine
+==================================================
+Thin adapter used by the FNB, ABSA, Kazang and Capitec workflows.
+The engine itself is headless; this module supplies the Streamlit
+progress widgets, shows phase events and renders the performance stats.
+"""
+
+import importlib
+import sys
+from typing import Any, Dict
+
+import pandas as pd
+import streamlit as st
+
+
+def _load_engine_module():
+    """Import (and reload, to pick up code changes) the engine module."""
+    try:
+        if 'components.fnb_workflow_gui_engine' in sys.modules:
+            return importlib.reload(sys.modules['components.fnb_workflow_gui_engine'])
+        return importlib.import_module('components.fnb_workflow_gui_engine')
+    except ImportError:
+        if 'fnb_workflow_gui_engine' in sys.modules:
+            return importlib.reload(sys.modules['fnb_workflow_gui_engine'])
+        return importlib.import_module('fnb_workflow_gui_engine')
+
+
+class StreamlitProgressSink:
+    """ProgressSink that drives a Streamlit progress bar and status text."""
+
+    def __init__(self, progress_bar, status_text):
+        self.progress_bar = progress_bar
+        self.status_text = status_text
+
+    def progress(self, fraction: float) -> None:
+        self.progress_bar.progress(min(1.0, max(0.0, fraction)))
+
+    def status(self, message: str) -> None:
+        self.status_text.text(message)
+
+    def event(self, level: str, message: str) -> None:
+        if level == 'warning':
+            st.warning(message)
+        else:
+            st.info(message)
+
+
+def render_performance_stats(diagnostics) -> None:
+    """Show the engine diagnostics in a collapsed expander."""
+    counts = diagnostics.match_counts
+    with st.expander("⚡ Performance Stats", expanded=False):
+        st.write(f"**Reconciliation Time:** {diagnostics.elapsed_seconds:.2f}s")
+        st.write(f"**Regular Matches:** {counts.get('regular', 0)}")
+        st.write(f"**Foreign Credits:** {counts.get('foreign_credits', 0)}")
+        st.write(f"**Split Transactions:** {counts.get('splits', 0)}")
+        st.write(f"**Total Matched:** {counts.get('total', 0)}")
+        st.write(f"**Fuzzy Cache Hits:** {diagnostics.fuzzy_cache_hits}")
+        st.write(f"**Fuzzy Cache Misses:** {diagnostics.fuzzy_cache_misses}")
+        st.write(f"**Cache Hit Rate:** {diagnostics.cache_hit_rate:.1f}%")
+        st.write(f"**Cache Entries:** {diagnostics.fuzzy_cache_entries} "
+                 f"(disk hits: {diagnostics.fuzzy_cache_disk_hits}, evictions: {diagnostics.fuzzy_cache_evictions})")
+        if diagnostics.fuzzy_batch_pairs:
+            st.write(f"**Batch-Scored Pairs:** {diagnostics.fuzzy_batch_pairs}")
+        if diagnostics.phase1_decided_by:
+            st.write("**Phase 1 Decided By:** " + ", ".join(
+                f"{key} {share:.0%}" for key, share in diagnostics.phase1_decision_fractions.items()
+            ))
+        if diagnostics.parse_report is not None:
+            for line in diagnostics.parse_report.summary():
+                st.write(f"**Parsed:** {line}")
+        if diagnostics.phase_seconds:
+            st.write("**Phase Timings:** " + ", ".join(
+                f"{name} {seconds:.2f}s" for name, seconds in diagnostics.phase_seconds.items()
+            ))
+
+
+def _fuzzy_cache_settings() -> Dict[str, Any]:
+    """Fuzzy-cache location/size from the app config (empty if unavailable)."""
+    try:
+        from config.app_config import RECONCILIATION_CONFIG
+    except ImportError:
+        return {}
+    return {
+        key: RECONCILIATION_CONFIG[key]
+        for key in ('fuzzy_cache_path', 'fuzzy_cache_size')
+        if key in RECONCILIATION_CONFIG
+    }
+
+
+def run_gui_reconciliation(ledger: pd.DataFrame, statement: pd.DataFrame,
+                           settings: Dict[str, Any]) -> Dict:
+    """
+    Run GUIReconciliationEngine with Streamlit progress feedback.
+
+    Fuzzy scores are cached across runs and sessions (see utils/fuzzy_cache.py);
+    workflow settings override the app-config cache location.
+
+    Returns:
+        The engine's results dictionary
+    """
+    settings = {**_fuzzy_cache_settings(), **settings}
+    engine_module = _load_engine_module()
+    reconciler = engine_module.GUIReconciliationEngine()
+
+    # Create progress placeholders
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+
+    results, diagnostics = reconciler.run(
+        ledger, statement, settings,
+        StreamlitProgressSink(progress_bar, status_text)
+    )
+
+    render_performance_stats(diagnostics)
+    return results
@@ -31,6 +31,11 @@ RECONCILIATION_CONFIG = {
     'enable_ai': True,
     'max_file_size_mb': 100,
     'supported_file_types': ['xlsx', 'xls', 'csv'],
+    # Fuzzy-score cache shared across runs. In memory by default; a path
+    # (e.g. str(DATA_DIR / 'fuzzy_cache.db')) adds an SQLite tier that stores
+    # reference strings on disk across sessions and users - opt in explicitly.
+    'fuzzy_cache_path': None,
+    'fuzzy_cache_size': 500_000,
 }
 
 # Authentication settings
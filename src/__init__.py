@@ -1,5 +1,5 @@
 """Source package"""
 
-from .reconciliation_engine import ReconciliationEngine
+from .reconciliation_engine import ReconciliationEngine, ResultView
 
-__all__ = ['ReconciliationEngine']
+__all__ = ['ReconciliationEngine', 'ResultView']
@@ -24,10 +24,11 @@ from datetime import datetime
 import threading
 import time
 from typing import Optional, Dict, List, Tuple, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import gc
 import psutil
 
+from settlement_batches import BATCH_KEYS, batch_variance, classify_rows
+
 
 class CorporateSettlementsWorkflowPage(tk.Frame):
     """Professional Corporate Settlements workflow with ultra-fast matching engine"""
@@ -57,9 +58,6 @@ class CorporateSettlementsWorkflowPage(tk.Frame):
         # Performance optimization variables
         self.data_cache = {}
         self.processing_stats = {}
-        self.chunk_size = 10000  # Process in chunks for large files
-        self.use_multiprocessing = True
-        self.max_workers = min(4, psutil.cpu_count())
         
         # UI responsiveness
         self.ui_update_interval = 100  # milliseconds
@@ -746,25 +744,17 @@ class CorporateSettlementsWorkflowPage(tk.Frame):
             
             self._update_ui_safe("Optimizing data structure...", 30)
             
-            # Initialize result batches
-            batches = {
-                'batch_1': [],  # Perfect matches: FD = FC exactly + Same Reference
-                'batch_2': [],  # FD > FC within tolerance/7%
-                'batch_3': [],  # FC > FD within tolerance/7%
-                'batch_4': [],  # Same ref, amount differences >7%
-                'batch_5': []   # Unmatched or different references
-            }
-            
-            # Group by reference with optimized processing
             self._update_ui_safe("Grouping transactions by reference...", 40)
-            ref_groups = df.groupby(ref_col, sort=False)  # Don't sort for speed
-            total_groups = len(ref_groups)
+            matching_start = time.time()
+            codes = self._process_groups(df, ref_col, fd_col, fc_col)
+            matching_time = time.time() - matching_start
+            self.processing_stats.update({
+                'matching_time': matching_time,
+                'matching_rows_per_second': len(df) / matching_time if matching_time > 0 else 0
+            })
             
-            # Process in chunks for better performance and UI responsiveness
-            if total_groups > self.chunk_size and self.use_multiprocessing:
-                self._process_groups_parallel(ref_groups, batches, fd_col, fc_col, total_groups)
-            else:
-                self._process_groups_sequential(ref_groups, batches, fd_col, fc_col, total_groups)
+            self._update_ui_safe("Building batches...", 80)
+            batches = self._build_batches(df, codes, fd_col, fc_col)
             
             # Finalize results
             self._update_ui_safe("Finalizing results...", 90)
@@ -811,77 +801,25 @@ class CorporateSettlementsWorkflowPage(tk.Frame):
         except:
             pass  # Ignore UI update errors
     
-    def _process_groups_parallel(self, ref_groups, batches, fd_col, fc_col, total_groups):
-        """Process reference groups in parallel for large datasets"""
-        self._update_ui_safe("Processing matches (parallel mode)...", 50)
-        
-        # Convert groups to list for parallel processing
-        group_list = [(ref, group) for ref, group in ref_groups]
-        
-        # Process in chunks
-        chunk_size = max(100, len(group_list) // self.max_workers)
-        chunks = [group_list[i:i + chunk_size] for i in range(0, len(group_list), chunk_size)]
-        
-        processed = 0
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_chunk = {
-                executor.submit(self._process_chunk, chunk, fd_col, fc_col): chunk 
-                for chunk in chunks
-            }
-            
-            for future in as_completed(future_to_chunk):
-                try:
-                    chunk_results = future.result()
-                    
-                    # Merge results
-                    for batch_key, transactions in chunk_results.items():
-                        batches[batch_key].extend(transactions)
-                    
-                    processed += len(future_to_chunk[future])
-                    progress = 50 + (processed / len(group_list)) * 35
-                    self._update_ui_safe(f"Processing matches... {processed:,}/{len(group_list):,}", progress)
-                    
-                except Exception as e:
-                    print(f"Chunk processing error: {e}")
-    
-    def _process_groups_sequential(self, ref_groups, batches, fd_col, fc_col, total_groups):
-        """Process reference groups sequentially"""
+    def _process_groups(self, df, ref_col, fd_col, fc_col):
+        """Batch code per row in one vectorized pass over the whole file"""
         self._update_ui_safe("Processing settlement matches...", 50)
-        
-        processed = 0
-        for ref, group in ref_groups:
-            processed += 1
-            
-            # Update progress with rate limiting
-            if processed % max(1, total_groups // 50) == 0:
-                progress = 50 + (processed / total_groups) * 35
-                self._update_ui_safe(f"Processing matches... {processed:,}/{total_groups:,}", progress)
-            
-            if len(group) == 1:
-                # Single transaction - goes to batch 5 (unmatched)
-                batches['batch_5'].extend(group.to_dict('records'))
-            else:
-                # Multiple transactions with same reference
-                self._process_reference_group(group, batches, fd_col, fc_col)
-    
-    def _process_chunk(self, chunk, fd_col, fc_col):
-        """Process a chunk of reference groups"""
-        chunk_batches = {
-            'batch_1': [],
-            'batch_2': [],
-            'batch_3': [],
-            'batch_4': [],
-            'batch_5': []
-        }
-        
-        for ref, group in chunk:
-            if len(group) == 1:
-                chunk_batches['batch_5'].extend(group.to_dict('records'))
-            else:
-                self._process_reference_group(group, chunk_batches, fd_col, fc_col)
-        
-        return chunk_batches
-    
+        # Single-row reference groups go to batch 5
+        multi = df.groupby(ref_col, sort=False)[ref_col].transform('size').to_numpy() > 1
+        return classify_rows(df[fd_col].to_numpy(), df[fc_col].to_numpy(), multi,
+                             self.percentage_threshold, self.tolerance)
+
+    def _build_batches(self, df, codes, fd_col, fc_col):
+        """Batch frames by boolean mask on the batch codes; batches 2-4 carry the variance columns"""
+        difference, percent = batch_variance(df[fd_col].to_numpy(), df[fc_col].to_numpy())
+        with_variance = df.assign(_variance_percent=np.round(percent, 2),
+                                  _variance_amount=np.round(difference, 2))
+        batches = {}
+        for code, batch_key in enumerate(BATCH_KEYS):
+            source = with_variance if batch_key in ('batch_2', 'batch_3', 'batch_4') else df
+            batches[batch_key] = source[codes == code]
+        return batches
+
     def _finalize_reconciliation_ui(self, processing_time, total_transactions, batch_counts):
         """Finalize the reconciliation UI updates"""
         # Update progress and status
@@ -927,63 +865,6 @@ class CorporateSettlementsWorkflowPage(tk.Frame):
         self.master.after(0, lambda: messagebox.showerror("Reconciliation Error", error_msg))
         self.status_var.set("❌ Reconciliation failed")
     
-    def _process_reference_group(self, group, batches, fd_col, fc_col):
-        """Process a group of transactions with the same reference - Professional Logic"""
-        # Convert group to list for easier processing
-        transactions = group.to_dict('records')
-        
-        # BATCH 1: PERFECT MATCHES - Same amounts AND same reference (already grouped by reference)
-        # Look for pairs/groups where FD = FC exactly
-        perfect_matches = []
-        remaining_transactions = []
-        
-        for transaction in transactions:
-            fd_amount = transaction[fd_col]
-            fc_amount = transaction[fc_col]
-            
-            # Batch 1 criteria: FD exactly equals FC AND same reference (already guaranteed by grouping)
-            if abs(fd_amount - fc_amount) < 0.01:  # Use small epsilon for float comparison
-                perfect_matches.append(transaction)
-            else:
-                remaining_transactions.append(transaction)
-        
-        # Add perfect matches to Batch 1
-        batches['batch_1'].extend(perfect_matches)
-        
-        # Process remaining transactions with same reference but different FD/FC amounts
-        for transaction in remaining_transactions:
-            fd_amount = transaction[fd_col]
-            fc_amount = transaction[fc_col]
-            
-            # Calculate difference and percentage (use LARGER amount as denominator for consistency)
-            difference = abs(fd_amount - fc_amount)
-            larger_amount = max(fd_amount, fc_amount)
-            percentage_diff = (difference / larger_amount) * 100 if larger_amount != 0 else 100
-            
-            # Batch 2: FD > FC within threshold (≤7%)
-            if fd_amount > fc_amount:
-                if percentage_diff <= self.percentage_threshold or difference <= self.tolerance:
-                    transaction['_variance_percent'] = round(percentage_diff, 2)
-                    transaction['_variance_amount'] = round(difference, 2)
-                    batches['batch_2'].append(transaction)
-                else:
-                    # Same reference but high difference (>7%)
-                    transaction['_variance_percent'] = round(percentage_diff, 2)
-                    transaction['_variance_amount'] = round(difference, 2)
-                    batches['batch_4'].append(transaction)
-            
-            # Batch 3: FC > FD within threshold (≤7%)
-            elif fc_amount > fd_amount:
-                if percentage_diff <= self.percentage_threshold or difference <= self.tolerance:
-                    transaction['_variance_percent'] = round(percentage_diff, 2)
-                    transaction['_variance_amount'] = round(difference, 2)
-                    batches['batch_3'].append(transaction)
-                else:
-                    # Same reference but high difference (>7%)
-                    transaction['_variance_percent'] = round(percentage_diff, 2)
-                    transaction['_variance_amount'] = round(difference, 2)
-                    batches['batch_4'].append(transaction)
-    
     def _update_results_display(self, batch_counts, total_transactions):
         """Update the results display with batch statistics"""
         # Clear existing content
@@ -1162,40 +1043,24 @@ class CorporateSettlementsWorkflowPage(tk.Frame):
                 columns = list(self.settlement_df.columns) if self.settlement_df is not None else []
                 
                 for batch_key, batch_name in batch_names.items():
-                    batch_transactions = self.matched_results.get(batch_key, [])
+                    batch_df = self.matched_results.get(batch_key, pd.DataFrame())
                     
-                    if batch_transactions:
+                    if len(batch_df):
                         # Add batch header with 3 empty rows separation
                         if combined_data:  # Add separation if not first batch
-                            for _ in range(3):
-                                empty_row = {col: "" for col in columns}
-                                combined_data.append(empty_row)
+                            combined_data.append(pd.DataFrame([{col: "" for col in columns}] * 3, columns=columns))
                         
-                        # Add batch title row
+                        # Add batch title row and an empty row
                         title_row = {col: "" for col in columns}
                         if columns:
                             title_row[columns[0]] = f"=== {batch_name} ==="
-                        combined_data.append(title_row)
+                        combined_data.append(pd.DataFrame([title_row, {col: "" for col in columns}], columns=columns))
                         
-                        # Add empty row
-                        empty_row = {col: "" for col in columns}
-                        combined_data.append(empty_row)
-                        
-                        # Add batch transactions efficiently
-                        combined_data.extend(batch_transactions)
+                        # Add batch transactions as a frame
+                        combined_data.append(batch_df)
                 
                 if combined_data:
-                    # Create DataFrame in chunks for large datasets
-                    if len(combined_data) > 50000:
-                        # Process in chunks to avoid memory issues
-                        chunk_size = 10000
-                        combined_df = pd.concat([
-                            pd.DataFrame(combined_data[i:i + chunk_size]) 
-                            for i in range(0, len(combined_data), chunk_size)
-                        ], ignore_index=True)
-                    else:
-                        combined_df = pd.DataFrame(combined_data)
-                    
+                    combined_df = pd.concat(combined_data, ignore_index=True)
                     combined_df.to_excel(writer, sheet_name='All_Batches', index=False)
                 
                 # Create individual sheets for each batch
@@ -1203,11 +1068,10 @@ class CorporateSettlementsWorkflowPage(tk.Frame):
                 current_progress = 60
                 
                 for batch_key, batch_name in batch_names.items():
-                    batch_transactions = self.matched_results.get(batch_key, [])
-                    if batch_transactions:
+                    batch_df = self.matched_results.get(batch_key, pd.DataFrame())
+                    if len(batch_df):
                         self._update_ui_safe(f"Creating {batch_name} sheet...", current_progress)
                         try:
-                            batch_df = pd.DataFrame(batch_transactions)
                             if not batch_df.empty:
                                 sheet_name = f"Batch_{batch_key[-1]}"
                                 batch_df.to_excel(writer, sheet_name=sheet_name, index=False)
@@ -1311,18 +1175,17 @@ class CorporateSettlementsWorkflowPage(tk.Frame):
             }
             
             exported_files = []
-            total_batches = len([k for k in batch_names.keys() if self.matched_results.get(k)])
+            total_batches = len([k for k in batch_names.keys() if len(self.matched_results.get(k, []))])
             current_batch = 0
             
             for batch_key, batch_name in batch_names.items():
-                batch_transactions = self.matched_results.get(batch_key, [])
-                if batch_transactions:
+                batch_df = self.matched_results.get(batch_key, pd.DataFrame())
+                if len(batch_df):
                     current_batch += 1
                     progress = 20 + (current_batch / total_batches) * 60
                     self._update_ui_safe(f"Exporting {batch_name.replace('_', ' ')}...", progress)
                     
                     try:
-                        batch_df = pd.DataFrame(batch_transactions)
                         if not batch_df.empty:
                             filename = f"Corporate_Settlements_{batch_name}_{timestamp}.csv"
                             file_path = os.path.join(folder_path, filename)
@@ -1433,7 +1296,7 @@ class CorporateSettlementsWorkflowPage(tk.Frame):
             tab_frame = tk.Frame(notebook, bg="#ffffff")
             notebook.add(tab_frame, text=f"{batch_name} ({len(batch_transactions)})")
             
-            if batch_transactions:
+            if len(batch_transactions):
                 # Create treeview for batch data
                 self._create_batch_treeview(tab_frame, batch_transactions, batch_name, color)
             else:
@@ -1457,9 +1320,9 @@ class CorporateSettlementsWorkflowPage(tk.Frame):
         tree_frame = tk.Frame(parent, bg="#ffffff")
         tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
-        # Get columns from first transaction
-        if transactions:
-            columns = list(transactions[0].keys())
+        # Columns of the batch frame
+        if len(transactions):
+            columns = list(transactions.columns)
             
             # Create treeview
             tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=25)
@@ -1480,8 +1343,8 @@ class CorporateSettlementsWorkflowPage(tk.Frame):
             h_scrollbar.pack(side="bottom", fill="x")
             
             # Populate with transaction data
-            for transaction in transactions:
-                values = [str(transaction.get(col, '')) for col in columns]
+            for transaction in transactions.itertuples(index=False):
+                values = [str(value) for value in transaction]
                 tree.insert('', 'end', values=values)
             
             # Status bar for batch
@@ -1537,14 +1400,13 @@ Available Memory: {psutil.virtual_memory().available / (1024**3):.1f}GB"""
             total_transactions = self.processing_stats.get('total_transactions', 0)
             tps = self.processing_stats.get('transactions_per_second', 0)
             memory_reduction = self.processing_stats.get('memory_reduction', 0)
+            matching_rate = self.processing_stats.get('matching_rows_per_second', 0)
             
             stats_info = f"""Processing Time: {processing_time:.3f} seconds
 Total Transactions: {total_transactions:,}
 Throughput: {tps:,.0f} transactions per second
 Memory Optimization: {memory_reduction:.1f}% reduction
-Parallel Processing: {'Enabled' if self.use_multiprocessing else 'Disabled'}
-Max Workers: {self.max_workers}
-Chunk Size: {self.chunk_size:,}"""
+Matching Time: {self.processing_stats.get('matching_time', 0):.3f} seconds ({matching_rate:,.0f} rows/s, one vectorized pass)"""
             
             stats_label = tk.Label(stats_frame, text=stats_info, font=("Consolas", 10), 
                                   bg="#f8f9fc", fg="#374151", justify="left")
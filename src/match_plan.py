@@ -0,0 +1,508 @@
+"""
+Match Plans for the Legacy Reconciliation
+=========================================
+Compiles the Bank-mode `match_cols` / `fuzzy_flags` of
+reconciliation.Reconciliation into a hash-join plan.
+
+Every cell of a match column is typed once (date, number or text) instead of
+calling pd.to_datetime/float() for every statement x cashbook pair. Exact
+columns become join keys, so a statement row only sees the cashbook rows in
+its block; fuzzy columns are scored with rapidfuzz against that block only.
+The tiers and their rules are the same as the old nested loops:
+
+- 100% MATCH: every column matches (dates/numbers compared as values)
+- BALANCED:   exactly one column does not match (one join per left-out column)
+- 85% FUZZY / 60% FUZZY: exact columns equal as text, fuzzy columns >= threshold
+
+Within a tier, statement rows are taken in order and each gets the first
+open cashbook row (in cashbook order) that qualifies.
+
+Typed columns live in a ColumnCache shared with Branch mode (match_branch),
+so each match column is parsed once per Reconciliation.
+"""
+
+import warnings
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+TIERS = ('100% MATCH', 'BALANCED', '85% FUZZY', '60% FUZZY')
+
+# Cell kinds
+TEXT, DATE, NUMBER = 0, 1, 2
+
+# datetime64 NaT as int64
+_NAT_NS = np.iinfo(np.int64).min
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+
+
+def _classify(value) -> Tuple[int, int, float]:
+    """(kind, date ns, number) for one cell value."""
+    if isinstance(value, (bool, np.bool_)):
+        return TEXT, 0, np.nan
+    # Numeric cells are numbers; pd.to_datetime would read them as nanoseconds
+    if _is_number(value):
+        if np.isnan(value):
+            return TEXT, 0, np.nan
+        return NUMBER, 0, float(value)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            parsed = pd.to_datetime(value, errors='coerce')
+        if parsed is not None and not pd.isnull(parsed):
+            return DATE, int(pd.Timestamp(parsed).value), np.nan
+    except Exception:
+        pass
+    try:
+        number = float(value)
+        if not np.isnan(number):
+            return NUMBER, 0, number
+    except Exception:
+        pass
+    return TEXT, 0, np.nan
+
+
+class ColumnSide:
+    """
+    Typed arrays for one column of one frame, each built on first use.
+
+    Attributes:
+        kind: int8 TEXT/DATE/NUMBER per row (one parse per distinct value)
+        ns: Date as int64 nanoseconds (DATE rows)
+        num: Value as float64 (NUMBER rows)
+        key: Typed equality key ('d:<ns>', 'n:<value>' or 't:<text>')
+        dates: datetime64[ns] (NaT where the cell is not a date)
+        cents: int64 amount cents, accepting '(1,234.50)' style values
+        has_amount: Whether the cell parsed as an amount
+        text: str(value).strip().lower() (exact text comparison)
+        lower: str(value).lower() (fuzzy scoring)
+    """
+
+    def __init__(self, values):
+        self.values = pd.Series(values, dtype=object).reset_index(drop=True)
+        self._raw = None
+        self._lower = None
+        self._text = None
+        self._kind = None
+        self._key = None
+        self._cents = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def raw(self) -> pd.Series:
+        if self._raw is None:
+            self._raw = self.values.map(str)
+        return self._raw
+
+    @property
+    def lower(self) -> np.ndarray:
+        if self._lower is None:
+            self._lower = self.raw.str.lower().to_numpy(dtype=object)
+        return self._lower
+
+    @property
+    def text(self) -> np.ndarray:
+        if self._text is None:
+            self._text = self.raw.str.strip().str.lower().to_numpy(dtype=object)
+        return self._text
+
+    def _parse(self) -> None:
+        """Classify each distinct value once and broadcast back to rows."""
+        codes, uniques = pd.factorize(self.values, use_na_sentinel=False)
+        typed = [_classify(v) for v in uniques]
+        kinds = np.array([t[0] for t in typed], dtype=np.int8)
+        ns = np.array([t[1] for t in typed], dtype=np.int64)
+        num = np.array([t[2] for t in typed], dtype=np.float64)
+        codes = np.asarray(codes, dtype=np.int64)
+        self._kind, self._ns, self._num = kinds[codes], ns[codes], num[codes]
+
+    @property
+    def kind(self) -> np.ndarray:
+        if self._kind is None:
+            self._parse()
+        return self._kind
+
+    @property
+    def ns(self) -> np.ndarray:
+        if self._kind is None:
+            self._parse()
+        return self._ns
+
+    @property
+    def num(self) -> np.ndarray:
+        if self._kind is None:
+            self._parse()
+        return self._num
+
+    @property
+    def key(self) -> np.ndarray:
+        if self._key is None:
+            key = np.empty(len(self), dtype=object)
+            is_date = self.kind == DATE
+            is_num = self.kind == NUMBER
+            is_text = self.kind == TEXT
+            key[is_date] = ['d:%d' % v for v in self.ns[is_date]]
+            key[is_num] = ['n:%r' % v for v in self.num[is_num]]
+            key[is_text] = ['t:' + v for v in self.text[is_text]]
+            self._key = key
+        return self._key
+
+    @property
+    def dates(self) -> np.ndarray:
+        return np.where(self.kind == DATE, self.ns, _NAT_NS).astype('datetime64[ns]')
+
+    def _parse_cents(self) -> None:
+        cleaned = (self.raw.str.replace('(', '-', regex=False)
+                   .str.replace(')', '', regex=False)
+                   .str.replace(',', '', regex=False))
+        amounts = pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype=np.float64)
+        # Numeric cells keep their exact value (str() may use exponent notation)
+        amounts = np.where(self.values.map(_is_number).to_numpy(dtype=bool),
+                           self.values.to_numpy(dtype=object), amounts).astype(np.float64)
+        self._has_amount = np.isfinite(amounts)
+        self._cents = np.rint(np.where(self._has_amount, amounts, 0.0) * 100).astype(np.int64)
+
+    @property
+    def cents(self) -> np.ndarray:
+        if self._cents is None:
+            self._parse_cents()
+        return self._cents
+
+    @property
+    def has_amount(self) -> np.ndarray:
+        if self._cents is None:
+            self._parse_cents()
+        return self._has_amount
+
+
+class ColumnCache:
+    """
+    Typed columns of the statement and cashbook frames, prepared once.
+
+    Bank mode (MatchPlan) and Branch mode read the same ColumnSide objects,
+    so each column is parsed at most once per Reconciliation. Column names
+    are matched case- and whitespace-insensitively; a missing column reads
+    as empty strings.
+    """
+
+    def __init__(self, st_data: pd.DataFrame, cb_data: pd.DataFrame):
+        self.frames = {'st': st_data, 'cb': cb_data}
+        self.col_maps = {
+            side: {str(col).strip().lower(): col for col in frame.columns}
+            for side, frame in self.frames.items()
+        }
+        self._sides: Dict[Tuple[str, str], ColumnSide] = {}
+
+    def resolve(self, side: str, column) -> object:
+        """Actual column label for a requested name."""
+        return self.col_maps[side].get(str(column).strip().lower(), column)
+
+    def get(self, side: str, column) -> ColumnSide:
+        """ColumnSide for column of the 'st' or 'cb' frame."""
+        real = self.resolve(side, column)
+        if (side, real) not in self._sides:
+            frame = self.frames[side]
+            values = frame[real] if real in frame.columns else [''] * len(frame)
+            self._sides[(side, real)] = ColumnSide(values)
+        return self._sides[(side, real)]
+
+
+class PlanColumn:
+    """One (statement, cashbook) column pair of the plan."""
+
+    def __init__(self, st: ColumnSide, cb: ColumnSide, fuzzy: bool):
+        self.fuzzy = fuzzy
+        self.st = st
+        self.cb = cb
+
+    def scores(self, i: int, block: np.ndarray) -> np.ndarray:
+        """rapidfuzz ratio of statement row i against the block (0-100)."""
+        return process.cdist([self.st.lower[i]], self.cb.lower[block],
+                             scorer=fuzz.ratio, dtype=np.float64)[0]
+
+    def value_match(self, i: int, block: np.ndarray, strict: bool) -> np.ndarray:
+        """
+        Column match used by 100% MATCH and BALANCED.
+
+        Dates compare as dates and numbers as numbers; anything else compares
+        as text (exact columns) or by ratio >= 85 (fuzzy columns). With
+        `strict`, two dates that differ never match, even if their text is
+        similar.
+        """
+        if not self.fuzzy:
+            return self.cb.key[block] == self.st.key[i]
+        both_dates = (self.st.kind[i] == DATE) & (self.cb.kind[block] == DATE)
+        same_date = both_dates & (self.cb.ns[block] == self.st.ns[i])
+        same_number = ((self.st.kind[i] == NUMBER) & (self.cb.kind[block] == NUMBER)
+                       & (self.cb.num[block] == self.st.num[i]))
+        similar = self.scores(i, block) >= 85
+        if strict:
+            return same_date | (~both_dates & (same_number | similar))
+        return same_date | same_number | similar
+
+    def text_match(self, i: int, block: np.ndarray, threshold: float) -> np.ndarray:
+        """Column match used by the fuzzy tiers (text / ratio only)."""
+        if not self.fuzzy:
+            return self.cb.text[block] == self.st.text[i]
+        return self.scores(i, block) >= threshold
+
+
+def _combine_codes(key_arrays: List[np.ndarray]) -> np.ndarray:
+    """One dense int64 code per row for a tuple of key columns."""
+    if not key_arrays:
+        return None
+    combined = None
+    for keys in key_arrays:
+        codes = pd.factorize(keys)[0].astype(np.int64)
+        if combined is None:
+            combined = codes
+        else:
+            combined = pd.factorize(combined * (int(codes.max()) + 1) + codes)[0].astype(np.int64)
+    return combined
+
+
+class BlockIndex:
+    """
+    Cashbook rows grouped by join key.
+
+    Built over the concatenated statement + cashbook keys so both sides share
+    codes; block(i) is the (cashbook-ordered) rows with statement row i's key.
+    """
+
+    def __init__(self, st_keys: List[np.ndarray], cb_keys: List[np.ndarray], n_st: int, n_cb: int):
+        combined = _combine_codes([np.concatenate([s, c]) for s, c in zip(st_keys, cb_keys)])
+        if combined is None:
+            combined = np.zeros(n_st + n_cb, dtype=np.int64)
+        self.st_code = combined[:n_st]
+        cb_code = combined[n_st:]
+        self.order = np.argsort(cb_code, kind='stable')
+        sorted_codes = cb_code[self.order]
+        n_codes = int(combined.max()) + 1 if len(combined) else 0
+        self.offsets = np.searchsorted(sorted_codes, np.arange(n_codes + 1))
+        # First possibly-open position per block (for check-free tiers)
+        self.cursor = self.offsets[:-1].copy()
+
+    def block(self, i: int) -> np.ndarray:
+        code = self.st_code[i]
+        return self.order[self.offsets[code]:self.offsets[code + 1]]
+
+    def first_open(self, i: int, cb_open: np.ndarray) -> Optional[int]:
+        """First open cashbook row in row i's block, skipping taken rows once."""
+        code = self.st_code[i]
+        pos, end = self.cursor[code], self.offsets[code + 1]
+        while pos < end and not cb_open[self.order[pos]]:
+            pos += 1
+        self.cursor[code] = pos
+        return int(self.order[pos]) if pos < end else None
+
+
+class MatchPlan:
+    """
+    Bank-mode match_cols/fuzzy_flags compiled into hash-join tiers.
+
+    Args:
+        st_data, cb_data: Statement and cashbook frames
+        match_cols: List of (statement column, cashbook column) pairs;
+            names are matched case- and whitespace-insensitively
+        fuzzy_flags: Per pair, whether the column is compared fuzzily
+        cache: ColumnCache to share typed columns with other passes
+    """
+
+    def __init__(self, st_data: pd.DataFrame, cb_data: pd.DataFrame,
+                 match_cols=None, fuzzy_flags=None, cache: Optional[ColumnCache] = None):
+        self.n_st = len(st_data)
+        self.n_cb = len(cb_data)
+        if cache is None:
+            cache = ColumnCache(st_data, cb_data)
+
+        self.columns: List[PlanColumn] = []
+        for i, (st_col, cb_col) in enumerate(match_cols or []):
+            fuzzy = bool(fuzzy_flags[i]) if fuzzy_flags and i < len(fuzzy_flags) else False
+            self.columns.append(PlanColumn(cache.get('st', st_col), cache.get('cb', cb_col), fuzzy))
+
+    def run(self, progress_callback: Optional[Callable] = None) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Assign statement/cashbook pairs tier by tier.
+
+        Returns:
+            Dict tier name -> list of (statement position, cashbook position),
+            plus 'UNMATCHED_ST' / 'UNMATCHED_CB' position arrays
+        """
+        st_open = np.ones(self.n_st, dtype=bool)
+        cb_open = np.ones(self.n_cb, dtype=bool)
+        results = {tier: [] for tier in TIERS}
+        processed = 0
+
+        stages = (
+            ('100% MATCH', lambda: self._match_all(st_open, cb_open)),
+            ('BALANCED', lambda: self._match_balanced(st_open, cb_open)),
+            ('85% FUZZY', lambda: self._match_fuzzy(st_open, cb_open, 85)),
+            ('60% FUZZY', lambda: self._match_fuzzy(st_open, cb_open, 60)),
+        )
+        for tier, stage in stages:
+            visited = int(st_open.sum()) if tier != '100% MATCH' else self.n_st
+            results[tier] = stage()
+            processed += visited
+            if progress_callback:
+                progress_callback(processed, self.n_st)
+
+        results['UNMATCHED_ST'] = np.flatnonzero(st_open)
+        results['UNMATCHED_CB'] = np.flatnonzero(cb_open)
+        return results
+
+    def _take(self, pairs, st_open, cb_open, i, j):
+        pairs.append((int(i), int(j)))
+        st_open[i] = False
+        cb_open[j] = False
+
+    def _assign(self, index: BlockIndex, check, st_open, cb_open) -> List[Tuple[int, int]]:
+        """First qualifying open cashbook row for each open statement row."""
+        pairs = []
+        for i in np.flatnonzero(st_open):
+            if check is None:
+                j = index.first_open(i, cb_open)
+                if j is not None:
+                    self._take(pairs, st_open, cb_open, i, j)
+                continue
+            block = index.block(i)
+            block = block[cb_open[block]]
+            if len(block) == 0:
+                continue
+            ok = np.flatnonzero(check(i, block))
+            if len(ok):
+                self._take(pairs, st_open, cb_open, i, block[ok[0]])
+        return pairs
+
+    def _checks(self, columns: List[PlanColumn], predicate):
+        """Combined block filter over `columns`, or None when there are none."""
+        if not columns:
+            return None
+
+        def check(i, block):
+            ok = np.ones(len(block), dtype=bool)
+            for col in columns:
+                idx = np.flatnonzero(ok)
+                if len(idx) == 0:
+                    break
+                ok[idx] = predicate(col, i, block[idx])
+            return ok
+        return check
+
+    def _match_all(self, st_open, cb_open):
+        exact = [c for c in self.columns if not c.fuzzy]
+        fuzzy = [c for c in self.columns if c.fuzzy]
+        index = BlockIndex([c.st.key for c in exact], [c.cb.key for c in exact], self.n_st, self.n_cb)
+        check = self._checks(fuzzy, lambda col, i, block: col.value_match(i, block, strict=True))
+        return self._assign(index, check, st_open, cb_open)
+
+    def _match_balanced(self, st_open, cb_open):
+        """Exactly one column mismatches: one join per left-out column."""
+        if len(self.columns) < 2:
+            return []
+
+        plans = []
+        for left_out, column in enumerate(self.columns):
+            others = [c for k, c in enumerate(self.columns) if k != left_out]
+            exact = [c for c in others if not c.fuzzy]
+            fuzzy = [c for c in others if c.fuzzy]
+            index = BlockIndex([c.st.key for c in exact], [c.cb.key for c in exact], self.n_st, self.n_cb)
+            plans.append((index, fuzzy, column))
+
+        pairs = []
+        for i in np.flatnonzero(st_open):
+            best = None
+            for index, fuzzy, column in plans:
+                block = index.block(i)
+                block = block[cb_open[block]]
+                if best is not None:
+                    block = block[block < best]
+                if len(block) == 0:
+                    continue
+                ok = ~column.value_match(i, block, strict=False)
+                for col in fuzzy:
+                    idx = np.flatnonzero(ok)
+                    if len(idx) == 0:
+                        break
+                    ok[idx] = col.value_match(i, block[idx], strict=False)
+                ok = np.flatnonzero(ok)
+                if len(ok):
+                    best = int(block[ok[0]])
+            if best is not None:
+                self._take(pairs, st_open, cb_open, i, best)
+        return pairs
+
+    def _match_fuzzy(self, st_open, cb_open, threshold: float):
+        exact = [c for c in self.columns if not c.fuzzy]
+        fuzzy = [c for c in self.columns if c.fuzzy]
+        if not fuzzy:
+            return []
+        index = BlockIndex([c.st.text for c in exact], [c.cb.text for c in exact], self.n_st, self.n_cb)
+        check = self._checks(fuzzy, lambda col, i, block: col.text_match(i, block, threshold))
+        return self._assign(index, check, st_open, cb_open)
+
+
+def match_branch(cache: ColumnCache, amount_col, received_col, paid_col, date_pair, ref_pair,
+                 tolerance_cents: int = 1, min_score: float = 90) -> Tuple[List[Tuple[int, int]], int]:
+    """
+    Branch-mode pairing over typed columns.
+
+    Candidates share a date; the cashbook amount must equal the statement
+    Received amount (amount >= 0) or Paid amount (amount < 0) within
+    tolerance_cents. References are then scored pair by pair (cpdist over the
+    aligned candidates, no N x N matrix) and pairs scoring >= min_score are
+    taken one-to-one in statement, then cashbook order.
+
+    Args:
+        cache: ColumnCache over the statement ('st') and cashbook ('cb') frames
+        amount_col: Cashbook amount column
+        received_col, paid_col: Statement Received / Paid columns
+        date_pair, ref_pair: (cashbook column, statement column)
+
+    Returns:
+        Tuple (pairs, candidates): (statement position, cashbook position)
+        pairs and the number of date/amount candidates scored
+    """
+    cb_amount = cache.get('cb', amount_col)
+    st_received = cache.get('st', received_col)
+    st_paid = cache.get('st', paid_col)
+    cb_date, st_date = cache.get('cb', date_pair[0]), cache.get('st', date_pair[1])
+    cb_ref, st_ref = cache.get('cb', ref_pair[0]), cache.get('st', ref_pair[1])
+
+    # Same-date candidates in statement, then cashbook order (undated rows pair with each other)
+    joined = pd.merge(
+        pd.DataFrame({'st': np.arange(len(st_date)), 'day': st_date.dates.view(np.int64)}),
+        pd.DataFrame({'cb': np.arange(len(cb_date)), 'day': cb_date.dates.view(np.int64)}),
+        on='day'
+    ).sort_values(['st', 'cb'], kind='stable')
+    st_pos = joined['st'].to_numpy(dtype=np.int64)
+    cb_pos = joined['cb'].to_numpy(dtype=np.int64)
+
+    amount = cb_amount.cents[cb_pos]
+    valid = cb_amount.has_amount[cb_pos]
+    received_ok = st_received.has_amount[st_pos] & (np.abs(amount - st_received.cents[st_pos]) <= tolerance_cents)
+    paid_ok = st_paid.has_amount[st_pos] & (np.abs(amount - st_paid.cents[st_pos]) <= tolerance_cents)
+    keep = valid & (((amount >= 0) & received_ok) | ((amount < 0) & paid_ok))
+    st_pos, cb_pos = st_pos[keep], cb_pos[keep]
+    if len(st_pos) == 0:
+        return [], 0
+
+    scores = process.cpdist(st_ref.lower[st_pos], cb_ref.lower[cb_pos],
+                            scorer=fuzz.ratio, score_cutoff=min_score, dtype=np.float64)
+
+    pairs = []
+    st_open = np.ones(len(st_date), dtype=bool)
+    cb_open = np.ones(len(cb_date), dtype=bool)
+    for k in np.flatnonzero(scores >= min_score):
+        i, j = st_pos[k], cb_pos[k]
+        if st_open[i] and cb_open[j]:
+            pairs.append((int(i), int(j)))
+            st_open[i] = False
+            cb_open[j] = False
+    return pairs, len(st_pos)
@@ -9,12 +9,146 @@ import pandas as pd
 import numpy as np
 from rapidfuzz import fuzz, process
 from datetime import datetime, timedelta
-from typing import Callable, Optional, Dict, Any, List
+from typing import Callable, Optional, Dict, Any, List, Iterator, Mapping
 from collections import defaultdict
 import logging
 
+from utils.extraction import ReferenceExtractor
+from utils.parsers import amount_cents, parse_amounts, parse_dates
+from utils.subset_sum import MITM_MAX_ITEMS, WorkBudget, find_subset_sum
+
 logger = logging.getLogger(__name__)
 
+# Day key for missing dates (datetime64 NaT as int64)
+_NAT_DAY = np.iinfo(np.int64).min
+
+# Per-target subset-sum budget for balanced matching (operation units, see utils/subset_sum.py)
+SPLIT_WORK_BUDGET = 5_000_000
+
+
+class MatchPairList:
+    """
+    Matches of one category as parallel ledger/statement position lists.
+
+    Matching only records row positions and scores; row data is materialized
+    later by ResultView. Iterating yields one small dict per match
+    ({'ledger_idx', 'statement_idx', 'match_score'[, 'split_indices', 'split_side']}).
+    Split matches keep the positions of all their parts in split_indices;
+    split_side says which side ('ledger' or 'statement') those parts are on.
+    """
+
+    def __init__(self):
+        self.ledger_idx: List[int] = []
+        self.statement_idx: List[int] = []
+        self.scores: List[float] = []
+        self.split_indices: List[Optional[List[int]]] = []
+        self.split_side: List[Optional[str]] = []
+
+    def append(self, ledger_idx: int, statement_idx: int, score: float,
+               split_indices: Optional[List[int]] = None, split_side: str = 'ledger') -> None:
+        self.ledger_idx.append(int(ledger_idx))
+        self.statement_idx.append(int(statement_idx))
+        self.scores.append(float(score))
+        self.split_indices.append(split_indices)
+        self.split_side.append(split_side if split_indices is not None else None)
+
+    def __len__(self) -> int:
+        return len(self.ledger_idx)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for ledger_idx, stmt_idx, score, split, side in zip(
+            self.ledger_idx, self.statement_idx, self.scores, self.split_indices, self.split_side
+        ):
+            match = {'ledger_idx': ledger_idx, 'statement_idx': stmt_idx, 'match_score': score}
+            if split is not None:
+                match['split_indices'] = split
+                match['split_side'] = side
+            yield match
+
+    def arrays(self):
+        """(ledger positions, statement positions, scores) as NumPy arrays."""
+        return (np.asarray(self.ledger_idx, dtype=np.int64),
+                np.asarray(self.statement_idx, dtype=np.int64),
+                np.asarray(self.scores, dtype=np.float64))
+
+
+class ResultView(Mapping):
+    """
+    Read-only results of a ReconciliationEngine run.
+
+    Behaves like the old results dictionary. Counts, match_rate and timestamp
+    are plain values; the 'perfect_matches', 'fuzzy_matches', 'balanced' and
+    'unmatched' DataFrames are built on first access (vectorized take/add_prefix
+    over the engine frames) and cached, so a UI or export only pays for the
+    frames it actually reads.
+    """
+
+    FRAME_KEYS = ('perfect_matches', 'fuzzy_matches', 'balanced', 'unmatched')
+
+    def __init__(self, ledger_df: pd.DataFrame, statement_df: pd.DataFrame,
+                 matches: Dict[str, MatchPairList], unmatched_ledger: np.ndarray,
+                 unmatched_statement: np.ndarray, summary: Dict[str, Any]):
+        self._ledger_df = ledger_df
+        self._statement_df = statement_df
+        self._matches = matches
+        self._unmatched_ledger = unmatched_ledger
+        self._unmatched_statement = unmatched_statement
+        self._summary = summary
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._summary:
+            return self._summary[key]
+        if key not in self.FRAME_KEYS:
+            raise KeyError(key)
+        if key not in self._frames:
+            if key == 'unmatched':
+                self._frames[key] = self._unmatched_frame()
+            else:
+                self._frames[key] = self._matches_frame(self._matches[key])
+        return self._frames[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.FRAME_KEYS
+        yield from self._summary
+
+    def __len__(self) -> int:
+        return len(self.FRAME_KEYS) + len(self._summary)
+
+    @staticmethod
+    def _public_columns(df: pd.DataFrame) -> List:
+        """Columns without the engine's internal '_' prefix."""
+        return [c for c in df.columns if not str(c).startswith('_')]
+
+    def _matches_frame(self, matches: MatchPairList) -> pd.DataFrame:
+        """Ledger_*/Statement_* columns side by side plus Match_Score."""
+        if len(matches) == 0:
+            return pd.DataFrame()
+
+        ledger_pos, stmt_pos, scores = matches.arrays()
+        ledger = self._ledger_df[self._public_columns(self._ledger_df)].take(ledger_pos)
+        statement = self._statement_df[self._public_columns(self._statement_df)].take(stmt_pos)
+
+        frame = pd.concat([
+            ledger.add_prefix('Ledger_').reset_index(drop=True),
+            statement.add_prefix('Statement_').reset_index(drop=True),
+        ], axis=1)
+        frame['Match_Score'] = scores
+        return frame
+
+    def _unmatched_frame(self) -> pd.DataFrame:
+        """Unmatched ledger rows then statement rows, tagged with Source."""
+        parts = []
+        if len(self._unmatched_ledger):
+            parts.append(self._ledger_df[self._public_columns(self._ledger_df)]
+                         .take(self._unmatched_ledger).assign(Source='Ledger'))
+        if len(self._unmatched_statement):
+            parts.append(self._statement_df[self._public_columns(self._statement_df)]
+                         .take(self._unmatched_statement).assign(Source='Statement'))
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, ignore_index=True)
+
 
 class ReconciliationEngine:
     """
@@ -34,7 +168,10 @@ class ReconciliationEngine:
         fuzzy_threshold: int = 85,
         date_tolerance: int = 3,
         amount_tolerance: float = 0.1,
-        enable_ai: bool = True
+        enable_ai: bool = True,
+        max_split_items: int = 4,
+        split_work_budget: int = SPLIT_WORK_BUDGET,
+        unblocked_splits: bool = False
     ):
         self.ledger_df = ledger_df.copy().reset_index(drop=True)
         self.statement_df = statement_df.copy().reset_index(drop=True)
@@ -50,13 +187,22 @@ class ReconciliationEngine:
         self.date_tolerance = date_tolerance
         self.amount_tolerance = amount_tolerance
         self.enable_ai = enable_ai
-
-        # Results storage
-        self.perfect_matches = []
-        self.fuzzy_matches = []
-        self.balanced_matches = []
-        self.unmatched_ledger = []
-        self.unmatched_statement = []
+        self.max_split_items = max_split_items
+        self.split_work_budget = split_work_budget
+        # Allow splits of 3+ parts from the whole date block (not only same-reference rows)
+        self.unblocked_splits = unblocked_splits
+
+        # Balanced-match blocks whose subset search was trimmed by the work budget
+        self.split_blocks_trimmed = 0
+        # One-to-one matches per deciding key: exact, ref_id, phone, fuzzy
+        self.decided_by = {}
+
+        # Results storage (row positions only; ResultView materializes rows)
+        self.perfect_matches = MatchPairList()
+        self.fuzzy_matches = MatchPairList()
+        self.balanced_matches = MatchPairList()
+        self.unmatched_ledger = np.empty(0, dtype=np.int64)
+        self.unmatched_statement = np.empty(0, dtype=np.int64)
 
         self.matched_ledger_indices = set()
         self.matched_statement_indices = set()
@@ -66,13 +212,15 @@ class ReconciliationEngine:
 
     def _preprocess_data(self):
         """Preprocess data for efficient matching using vectorized operations."""
-        # Convert amounts to float using vectorized operations
-        self.ledger_df['_amount'] = self.ledger_df[self.ledger_amount_col].apply(self._parse_amount)
-        self.statement_df['_amount'] = self.statement_df[self.statement_amount_col].apply(self._parse_amount)
+        # Convert amounts to float using vectorized operations (see utils/parsers.py)
+        self.ledger_df['_amount'] = parse_amounts(self.ledger_df[self.ledger_amount_col], self.ledger_amount_col)
+        self.statement_df['_amount'] = parse_amounts(self.statement_df[self.statement_amount_col],
+                                                     self.statement_amount_col)
 
-        # Convert dates
-        self.ledger_df['_date'] = pd.to_datetime(self.ledger_df[self.ledger_date_col], errors='coerce')
-        self.statement_df['_date'] = pd.to_datetime(self.statement_df[self.statement_date_col], errors='coerce')
+        # Convert dates (format sniffed once per column)
+        self.ledger_df['_date'] = parse_dates(self.ledger_df[self.ledger_date_col], self.ledger_date_col)
+        self.statement_df['_date'] = parse_dates(self.statement_df[self.statement_date_col],
+                                                 self.statement_date_col)
 
         # Normalize references
         self.ledger_df['_ref'] = (
@@ -82,48 +230,71 @@ class ReconciliationEngine:
             self.statement_df[self.statement_ref_col].astype(str).str.lower().str.strip()
         )
 
-        # Round amounts for hash key generation (2 decimal places)
-        self.ledger_df['_amt_key'] = self.ledger_df['_amount'].round(2)
-        self.statement_df['_amt_key'] = self.statement_df['_amount'].round(2)
+        # Amounts as signed int64 cents: the only float -> integer conversion;
+        # hash keys, tolerance windows and subset sums all work on these
+        self.ledger_df['_cents'] = amount_cents(self.ledger_df['_amount'], self.ledger_amount_col)
+        self.statement_df['_cents'] = amount_cents(self.statement_df['_amount'], self.statement_amount_col)
+
+        # Identifiers embedded in references (RJ/TX/CSH/... numbers, phones) as blocking keys
+        self._ledger_ids = ReferenceExtractor.identifier_keys(self.ledger_df[self.ledger_ref_col])
+        self._stmt_ids = ReferenceExtractor.identifier_keys(self.statement_df[self.statement_ref_col])
 
         # Build hash maps for O(1) lookups
         self._build_indices()
 
     def _build_indices(self):
         """Build hash-map indices for fast lookups."""
-        # Statement index by (reference, rounded_amount) -> list of indices
+        self._ledger_cents = self.ledger_df['_cents'].to_numpy(dtype=np.int64)
+        self._stmt_cents = self.statement_df['_cents'].to_numpy(dtype=np.int64)
+
+        # Statement index by (reference, cents) -> list of indices
         self._stmt_ref_amt_index = defaultdict(list)
-        # Statement index by rounded_amount -> list of indices
-        self._stmt_amt_index = defaultdict(list)
         # Statement reference list for fuzzy matching
         self._stmt_ref_to_indices = defaultdict(list)
 
-        for idx in range(len(self.statement_df)):
-            ref = self.statement_df.at[idx, '_ref']
-            amt_key = self.statement_df.at[idx, '_amt_key']
-            self._stmt_ref_amt_index[(ref, amt_key)].append(idx)
-            self._stmt_amt_index[amt_key].append(idx)
+        for idx, (ref, cents) in enumerate(zip(self.statement_df['_ref'].to_numpy(dtype=object),
+                                               self._stmt_cents.tolist())):
+            self._stmt_ref_amt_index[(ref, cents)].append(idx)
             self._stmt_ref_to_indices[ref].append(idx)
 
+        # Statement identifier key -> list of indices, per key type
+        self._stmt_id_index = {}
+        for key_type in self._stmt_ids.columns:
+            id_index = defaultdict(list)
+            for idx, key in enumerate(self._stmt_ids[key_type].tolist()):
+                if key:
+                    id_index[key].append(idx)
+            self._stmt_id_index[key_type] = id_index
+
+        # Statement cents sorted + position map: a tolerance window is one
+        # searchsorted slice of _stmt_cents_order
+        self._stmt_cents_order = np.argsort(self._stmt_cents, kind='stable')
+        self._stmt_cents_sorted = self._stmt_cents[self._stmt_cents_order]
+
+        # Dates as int64 days (NaT -> _NAT_DAY) for vectorized tolerance checks
+        self._ledger_days = self._to_days(self.ledger_df['_date'])
+        self._stmt_days = self._to_days(self.statement_df['_date'])
+
+        # Matched statement rows as a bitmap (kept in sync with matched_statement_indices)
+        self._stmt_matched = np.zeros(len(self.statement_df), dtype=bool)
+
         logger.info(
             f"Built indices: {len(self._stmt_ref_amt_index)} ref+amt combos, "
-            f"{len(self._stmt_amt_index)} unique amounts, "
+            f"{len(np.unique(self._stmt_cents))} unique amounts, "
             f"{len(self._stmt_ref_to_indices)} unique refs"
         )
 
+    @staticmethod
+    def _to_days(dates: pd.Series) -> np.ndarray:
+        """Datetime series as int64 days since epoch (NaT -> _NAT_DAY)."""
+        dates = pd.to_datetime(dates, errors='coerce')
+        days = dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+        days[dates.isna().to_numpy()] = _NAT_DAY
+        return days
+
     def _parse_amount(self, value) -> float:
-        """Parse amount value to float."""
-        if pd.isna(value):
-            return 0.0
-        try:
-            val_str = str(value).strip()
-            val_str = val_str.replace('$', '').replace('€', '').replace('£', '').replace('R', '')
-            val_str = val_str.replace(',', '').replace(' ', '')
-            if val_str.startswith('(') and val_str.endswith(')'):
-                val_str = '-' + val_str[1:-1]
-            return float(val_str)
-        except (ValueError, TypeError):
-            return 0.0
+        """Parse a single amount value to float (0.0 if blank or unparseable)."""
+        return float(parse_amounts(pd.Series([value], dtype=object)).iloc[0])
 
     def reconcile(self, progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
         """
@@ -144,7 +315,8 @@ class ReconciliationEngine:
             processed = len(self.matched_ledger_indices)
             progress_callback(processed, total_items)
 
-        # Step 2: Fuzzy matches using indexed search O(n·k)
+        # Step 2: Identifier matches by hash join, then fuzzy matches using indexed search O(n·k)
+        self._find_identifier_matches()
         self._find_fuzzy_matches()
         if progress_callback:
             processed = len(self.matched_ledger_indices)
@@ -166,296 +338,396 @@ class ReconciliationEngine:
             f"{len(self.unmatched_ledger)} unmatched ledger, "
             f"{len(self.unmatched_statement)} unmatched statement"
         )
+        decided = sum(self.decided_by.values())
+        if decided:
+            logger.info("Decided by: " + ", ".join(
+                f"{key} {count / decided:.0%}" for key, count in self.decided_by.items()
+            ))
 
         return self._generate_results()
 
     def _find_perfect_matches(self):
         """Find perfect matches using hash-map indexing - O(n) complexity."""
-        ledger_refs = self.ledger_df['_ref'].values
-        ledger_amts = self.ledger_df['_amt_key'].values
-        ledger_dates = self.ledger_df['_date'].values
+        ledger_refs = self.ledger_df['_ref'].to_numpy(dtype=object)
+        ledger_cents = self._ledger_cents.tolist()
+        ledger_days = self._ledger_days.tolist()
 
         for ledger_idx in range(len(self.ledger_df)):
             if ledger_idx in self.matched_ledger_indices:
                 continue
 
-            ref = ledger_refs[ledger_idx]
-            amt_key = ledger_amts[ledger_idx]
-            ledger_date = ledger_dates[ledger_idx]
+            ledger_day = ledger_days[ledger_idx]
 
-            # O(1) lookup by (reference, amount)
-            candidates = self._stmt_ref_amt_index.get((ref, amt_key), [])
+            # O(1) lookup by (reference, cents) - the key is the exact amount check
+            candidates = self._stmt_ref_amt_index.get((ledger_refs[ledger_idx], ledger_cents[ledger_idx]), [])
 
             for stmt_idx in candidates:
-                if stmt_idx in self.matched_statement_indices:
+                if self._stmt_matched[stmt_idx]:
                     continue
 
-                stmt_date = self.statement_df.at[stmt_idx, '_date']
-
-                # Check date tolerance
-                if pd.notna(ledger_date) and pd.notna(stmt_date):
-                    date_diff = abs((pd.Timestamp(ledger_date) - pd.Timestamp(stmt_date)).days)
-                    if date_diff > self.date_tolerance:
-                        continue
-
-                # Exact amount check
-                ledger_amount = self.ledger_df.at[ledger_idx, '_amount']
-                stmt_amount = self.statement_df.at[stmt_idx, '_amount']
-                if abs(ledger_amount - stmt_amount) >= 0.01:
+                # Check date tolerance (a missing date on either side is allowed)
+                stmt_day = self._stmt_days[stmt_idx]
+                if ledger_day != _NAT_DAY and stmt_day != _NAT_DAY and abs(ledger_day - stmt_day) > self.date_tolerance:
                     continue
 
                 # Match found
-                self.perfect_matches.append({
-                    'ledger_idx': ledger_idx,
-                    'statement_idx': stmt_idx,
-                    'ledger_row': self.ledger_df.iloc[ledger_idx].to_dict(),
-                    'statement_row': self.statement_df.iloc[stmt_idx].to_dict(),
-                    'match_score': 100.0
-                })
+                self.perfect_matches.append(ledger_idx, stmt_idx, 100.0)
                 self.matched_ledger_indices.add(ledger_idx)
                 self.matched_statement_indices.add(stmt_idx)
+                self._stmt_matched[stmt_idx] = True
+                self._count_decision('exact')
                 break
 
+    def _count_decision(self, key_type: str):
+        self.decided_by[key_type] = self.decided_by.get(key_type, 0) + 1
+
+    def _tolerance_cents(self, cents: np.ndarray) -> np.ndarray:
+        """Amount tolerance in whole cents (at least 1) for each amount."""
+        return np.maximum(np.floor(np.abs(cents) * (self.amount_tolerance / 100) + 1e-9).astype(np.int64), 1)
+
+    def _find_identifier_matches(self):
+        """
+        Resolve rows sharing an embedded identifier by hash join - O(n).
+
+        A ledger row whose reference carries a ref id (RJ/TX/CSH/...) or phone
+        number matches the first open statement row with the same key inside
+        the fuzzy amount and date tolerances, scored 100 and stored with the
+        fuzzy matches. Key types are tried in IDENTIFIER_KEYS order.
+        """
+        ledger_cents = self._ledger_cents
+        ledger_days = self._ledger_days.tolist()
+        tolerance_cents = self._tolerance_cents(ledger_cents)
+
+        for key_type, id_index in self._stmt_id_index.items():
+            if not id_index:
+                continue
+            ledger_keys = self._ledger_ids[key_type].tolist()
+
+            for ledger_idx, key in enumerate(ledger_keys):
+                if not key or ledger_idx in self.matched_ledger_indices:
+                    continue
+
+                ledger_day = ledger_days[ledger_idx]
+                for stmt_idx in id_index.get(key, []):
+                    if self._stmt_matched[stmt_idx]:
+                        continue
+                    if abs(self._stmt_cents[stmt_idx] - ledger_cents[ledger_idx]) > tolerance_cents[ledger_idx]:
+                        continue
+                    stmt_day = self._stmt_days[stmt_idx]
+                    if ledger_day != _NAT_DAY and stmt_day != _NAT_DAY and abs(ledger_day - stmt_day) > self.date_tolerance:
+                        continue
+
+                    self.fuzzy_matches.append(ledger_idx, stmt_idx, 100.0)
+                    self.matched_ledger_indices.add(ledger_idx)
+                    self.matched_statement_indices.add(stmt_idx)
+                    self._stmt_matched[stmt_idx] = True
+                    self._count_decision(key_type)
+                    break
+
     def _find_fuzzy_matches(self):
-        """Find fuzzy matches using indexed amount lookup + rapidfuzz batch matching."""
-        # Get unmatched statement references for fuzzy search
-        unmatched_stmt_indices = [
-            i for i in range(len(self.statement_df))
-            if i not in self.matched_statement_indices
-        ]
-
-        if not unmatched_stmt_indices:
+        """
+        Find fuzzy matches using a cents range query + rapidfuzz scoring.
+
+        Each ledger row's amount tolerance window is one searchsorted slice over
+        the sorted statement cents (cost independent of the window width), open
+        rows are kept through the matched bitmap, and the date tolerance is a
+        vectorized day-difference check.
+        """
+        if len(self.statement_df) == 0 or self._stmt_matched.all():
             return
 
-        # Build reference list for unmatched statements
-        stmt_refs = {
-            i: self.statement_df.at[i, '_ref'] for i in unmatched_stmt_indices
-        }
-        stmt_ref_list = list(stmt_refs.values())
-        stmt_idx_list = list(stmt_refs.keys())
+        stmt_refs = self.statement_df['_ref'].to_numpy(dtype=object)
+        ledger_refs = self.ledger_df['_ref'].to_numpy(dtype=object)
+        ledger_cents = self._ledger_cents
+        ledger_days = self._ledger_days
 
-        if not stmt_ref_list:
-            return
+        # Tolerance windows for every ledger row (whole cents, at least 1)
+        tolerance_cents = self._tolerance_cents(ledger_cents)
+        window_lo = np.searchsorted(self._stmt_cents_sorted, ledger_cents - tolerance_cents, side='left')
+        window_hi = np.searchsorted(self._stmt_cents_sorted, ledger_cents + tolerance_cents, side='right')
 
         for ledger_idx in range(len(self.ledger_df)):
             if ledger_idx in self.matched_ledger_indices:
                 continue
 
-            ledger_amount = self.ledger_df.at[ledger_idx, '_amount']
-            ledger_date = self.ledger_df.at[ledger_idx, '_date']
-            ledger_ref = self.ledger_df.at[ledger_idx, '_ref']
-
+            ledger_ref = ledger_refs[ledger_idx]
             if not ledger_ref or ledger_ref in ('nan', '', 'none'):
                 continue
 
-            # Find candidates by amount tolerance first (narrows search space)
-            amt_key = round(ledger_amount, 2)
-            amount_candidates = set()
-
-            # Check nearby amount buckets for tolerance
-            tolerance_range = max(abs(ledger_amount * self.amount_tolerance / 100), 0.01)
-            for delta in np.arange(-tolerance_range, tolerance_range + 0.01, 0.01):
-                check_key = round(amt_key + delta, 2)
-                for si in self._stmt_amt_index.get(check_key, []):
-                    if si not in self.matched_statement_indices:
-                        amount_candidates.add(si)
-
-            if not amount_candidates:
+            # Amount window, minus already-matched statement rows
+            candidates = self._stmt_cents_order[window_lo[ledger_idx]:window_hi[ledger_idx]]
+            candidates = np.sort(candidates[~self._stmt_matched[candidates]])
+            if len(candidates) == 0:
                 continue
 
-            # Filter by date tolerance
-            date_candidates = []
-            for si in amount_candidates:
-                stmt_date = self.statement_df.at[si, '_date']
-                if pd.notna(ledger_date) and pd.notna(stmt_date):
-                    date_diff = abs((pd.Timestamp(ledger_date) - pd.Timestamp(stmt_date)).days)
-                    if date_diff <= self.date_tolerance:
-                        date_candidates.append(si)
-                else:
-                    date_candidates.append(si)  # Allow if dates missing
-
-            if not date_candidates:
+            # Date tolerance (rows with a missing date on either side are allowed)
+            ledger_day = ledger_days[ledger_idx]
+            if ledger_day != _NAT_DAY:
+                cand_days = self._stmt_days[candidates]
+                dated = cand_days != _NAT_DAY
+                near = np.abs(np.where(dated, cand_days, ledger_day) - ledger_day) <= self.date_tolerance
+                candidates = candidates[near]
+            if len(candidates) == 0:
                 continue
 
-            # Fuzzy match against date+amount filtered candidates
-            best_score = 0
-            best_idx = None
-
-            for si in date_candidates:
-                stmt_ref = self.statement_df.at[si, '_ref']
-                score = fuzz.ratio(ledger_ref, stmt_ref)
-                if score >= self.fuzzy_threshold and score > best_score:
-                    best_score = score
-                    best_idx = si
-
-            if best_idx is not None:
-                self.fuzzy_matches.append({
-                    'ledger_idx': ledger_idx,
-                    'statement_idx': best_idx,
-                    'ledger_row': self.ledger_df.iloc[ledger_idx].to_dict(),
-                    'statement_row': self.statement_df.iloc[best_idx].to_dict(),
-                    'match_score': best_score
-                })
+            # Fuzzy match against date+amount filtered candidates (first best score wins)
+            scores = process.cdist([ledger_ref], stmt_refs[candidates], scorer=fuzz.ratio, dtype=np.float64)[0]
+            top = int(np.argmax(scores))
+            best_score = float(scores[top])
+
+            if best_score >= self.fuzzy_threshold and best_score > 0:
+                best_idx = int(candidates[top])
+                self.fuzzy_matches.append(ledger_idx, best_idx, best_score)
                 self.matched_ledger_indices.add(ledger_idx)
                 self.matched_statement_indices.add(best_idx)
-
-                # Remove from fuzzy search pool
-                if best_idx in stmt_refs:
-                    idx_pos = stmt_idx_list.index(best_idx)
-                    stmt_ref_list[idx_pos] = None  # Mark as used
+                self._stmt_matched[best_idx] = True
+                self._count_decision('fuzzy')
 
     def _find_balanced_matches(self):
         """
-        Find balanced/split matches where multiple transactions on one side
-        sum to a single transaction on the other side.
+        Find balanced/split matches: 2..max_split_items rows on one side that
+        sum exactly to a single row on the other side.
+
+        Both directions are searched, many ledger -> one statement first, then
+        one ledger -> many statement. See _search_splits for the blocking.
         """
-        # Get unmatched items
-        unmatched_ledger_indices = [
-            i for i in range(len(self.ledger_df))
-            if i not in self.matched_ledger_indices
-        ]
-        unmatched_stmt_indices = [
-            i for i in range(len(self.statement_df))
-            if i not in self.matched_statement_indices
-        ]
-
-        if not unmatched_ledger_indices or not unmatched_stmt_indices:
+        ledger_open = np.ones(len(self.ledger_df), dtype=bool)
+        ledger_open[list(self.matched_ledger_indices)] = False
+        stmt_open = ~self._stmt_matched
+        if not ledger_open.any() or not stmt_open.any():
             return
 
-        # Build amount lookup for unmatched statements
-        stmt_amounts = {
-            i: self.statement_df.at[i, '_amount']
-            for i in unmatched_stmt_indices
-        }
+        ledger_cents = self._ledger_cents
+        ledger_days = self._ledger_days
+        ledger_refs = self.ledger_df['_ref'].to_numpy(dtype=object)
+        stmt_refs = self.statement_df['_ref'].to_numpy(dtype=object)
+        ledger_ids = self._ledger_ids.to_numpy(dtype=object)
+        stmt_ids = self._stmt_ids.to_numpy(dtype=object)
+
+        for stmt_idx, parts in self._search_splits(
+            self._stmt_cents, self._stmt_days, stmt_refs, stmt_ids, stmt_open,
+            ledger_cents, ledger_days, ledger_refs, ledger_ids, ledger_open
+        ):
+            self.balanced_matches.append(parts[0], stmt_idx, 90.0, split_indices=parts)
+
+        for ledger_idx, parts in self._search_splits(
+            ledger_cents, ledger_days, ledger_refs, ledger_ids, ledger_open,
+            self._stmt_cents, self._stmt_days, stmt_refs, stmt_ids, stmt_open
+        ):
+            self.balanced_matches.append(ledger_idx, parts[0], 90.0,
+                                         split_indices=parts, split_side='statement')
 
-        # Try to find pairs of ledger items that sum to a single statement item
-        ledger_amounts = {
-            i: self.ledger_df.at[i, '_amount']
-            for i in unmatched_ledger_indices
-        }
+        # Apply matched
+        for m in self.balanced_matches:
+            if m['split_side'] == 'statement':
+                ledger_rows, stmt_rows = [m['ledger_idx']], m['split_indices']
+            else:
+                ledger_rows, stmt_rows = m['split_indices'], [m['statement_idx']]
+            self.matched_ledger_indices.update(ledger_rows)
+            self.matched_statement_indices.update(stmt_rows)
+            self._stmt_matched[stmt_rows] = True
+
+        if self.split_blocks_trimmed:
+            logger.info(f"Balanced matching: {self.split_blocks_trimmed} blocks trimmed by the work budget")
+
+    def _search_splits(self, target_cents: np.ndarray, target_days: np.ndarray,
+                       target_refs: np.ndarray, target_ids: np.ndarray, target_open: np.ndarray,
+                       part_cents: np.ndarray, part_days: np.ndarray,
+                       part_refs: np.ndarray, part_ids: np.ndarray, part_open: np.ndarray) -> List[tuple]:
+        """
+        Greedy split search for one direction (parts sum to a target row).
 
-        # Index unmatched ledger by rounded amount for fast pair finding
-        ledger_by_amt = defaultdict(list)
-        for idx, amt in ledger_amounts.items():
-            ledger_by_amt[round(amt, 2)].append(idx)
+        Open targets are taken in row order. Candidates are open parts of the
+        same sign inside the target's date window (date tolerance; undated
+        targets only see undated parts), searched in tiers:
 
-        # For each unmatched statement, check if any 2 ledger items sum to it
-        matched_in_round = set()
-        for stmt_idx, stmt_amt in stmt_amounts.items():
-            if stmt_idx in matched_in_round:
-                continue
-            if abs(stmt_amt) < 0.01:
-                continue
+        1. Same reference or a shared identifier key (ref_id/phone, see
+           ReferenceExtractor.identifier_keys), up to max_split_items parts.
+           Looked up in a (key, day) hash map built once per direction.
+        2. Targets without key hits only: references similar to the target's
+           (ratio >= fuzzy_threshold) in the date window, while the tier fits
+           the exact search (MITM_MAX_ITEMS rows)
+        3. The whole date window: pairs only, found through a per-day cents
+           lookup of each part's complement; with unblocked_splits up to
+           max_split_items parts by subset search over the window
+
+        Tiers 1-2 run for all targets before any target falls back to tier 3.
+
+        Tier 1-2 and unblocked searches use find_subset_sum (sorted complement
+        search for pairs, meet-in-the-middle or bitset DP above that) under a
+        per-target WorkBudget, so the result does not depend on timing.
 
-            # Check all pairs (limited to avoid O(n²) blowup)
-            found = False
-            remaining_ledger = [
-                i for i in unmatched_ledger_indices
-                if i not in self.matched_ledger_indices and i not in matched_in_round
-            ]
-
-            for i, li in enumerate(remaining_ledger[:200]):  # Cap at 200 to avoid combinatorial explosion
-                needed = round(stmt_amt - ledger_amounts[li], 2)
-                # Look up complementary amount
-                for lj in ledger_by_amt.get(needed, []):
-                    if lj != li and lj not in self.matched_ledger_indices and lj not in matched_in_round:
-                        # Verify exact sum
-                        if abs(ledger_amounts[li] + ledger_amounts[lj] - stmt_amt) < 0.01:
-                            self.balanced_matches.append({
-                                'ledger_idx': li,
-                                'statement_idx': stmt_idx,
-                                'ledger_row': self.ledger_df.iloc[li].to_dict(),
-                                'statement_row': self.statement_df.iloc[stmt_idx].to_dict(),
-                                'match_score': 90.0,
-                                'split_indices': [li, lj]
-                            })
-                            matched_in_round.add(li)
-                            matched_in_round.add(lj)
-                            matched_in_round.add(stmt_idx)
-                            found = True
-                            break
-                if found:
+        Rows are cleared from target_open/part_open as they are taken.
+
+        Returns:
+            List of (target position, sorted part positions)
+        """
+        found = []
+        if self.max_split_items < 2 or not target_open.any() or part_open.sum() < 2:
+            return found
+
+        by_day = np.argsort(part_days, kind='stable')
+        sorted_days = part_days[by_day]
+        undated = target_days == _NAT_DAY
+        days = np.where(undated, 0, target_days)
+        window_lo = np.searchsorted(sorted_days, np.where(undated, _NAT_DAY, days - self.date_tolerance), side='left')
+        window_hi = np.searchsorted(sorted_days, np.where(undated, _NAT_DAY, days + self.date_tolerance), side='right')
+        key_rows = self._split_key_index(part_refs, part_ids, part_days)
+        windows = {}
+
+        def window_days(t):
+            if undated[t]:
+                return [_NAT_DAY]
+            return range(int(days[t]) - self.date_tolerance, int(days[t]) + self.date_tolerance + 1)
+
+        def date_window(t):
+            # Parts of the target's date window sorted by cents, built once per day
+            day = _NAT_DAY if undated[t] else int(days[t])
+            if day not in windows:
+                rows = np.sort(by_day[window_lo[t]:window_hi[t]])
+                rows = rows[np.argsort(part_cents[rows], kind='stable')]
+                windows[day] = (part_cents[rows], rows)
+            return windows[day]
+
+        def take(t, parts):
+            found.append((int(t), parts))
+            target_open[t] = False
+            part_open[parts] = False
+
+        def search(t, tier, max_items):
+            tier = tier[part_open[tier] & (np.sign(part_cents[tier]) == np.sign(target_cents[t]))]
+            if len(tier) < 2:
+                return
+            target = abs(int(target_cents[t]))
+            budget = WorkBudget(self.split_work_budget)
+            picked = find_subset_sum(np.abs(part_cents[tier]), target, target,
+                                     max_items=max_items, budget=budget)
+            self.split_blocks_trimmed += budget.exhausted
+            if picked is not None:
+                take(t, [int(tier[p]) for p in picked])
+
+        targets = np.flatnonzero(target_open & (target_cents != 0))
+        exact_rows = {}
+        for t in targets:
+            keys = self._split_keys(target_refs[t], target_ids[t])
+            hits = [key_rows[(key, day)] for key in keys for day in window_days(t) if (key, day) in key_rows]
+            exact = np.unique(np.concatenate(hits)) if hits else np.empty(0, dtype=np.int64)
+            exact_rows[t] = exact[np.sign(part_cents[exact]) == np.sign(target_cents[t])]
+
+        # Fuzzy scoring only for targets that miss the keys: one cdist per date window
+        misses = defaultdict(list)
+        for t in targets:
+            if len(exact_rows[t]) < 2 and self._has_ref(target_refs[t]):
+                misses[_NAT_DAY if undated[t] else int(days[t])].append(t)
+        similar_rows = {}
+        for group in misses.values():
+            _, rows = date_window(group[0])
+            scores = process.cdist(list(target_refs[group]), part_refs[rows], scorer=fuzz.ratio,
+                                   dtype=np.float64, score_cutoff=self.fuzzy_threshold, workers=-1)
+            for t, row_scores in zip(group, scores):
+                similar_rows[t] = rows[row_scores >= self.fuzzy_threshold]
+
+        # Tiers 1-2 for every target first, so the whole-window fallback
+        # cannot take parts that belong to a same-reference split
+        for t in targets:
+            exact = exact_rows[t]
+            if len(exact) >= 2:
+                search(t, exact, self.max_split_items)
+            elif t in similar_rows:
+                similar = np.union1d(similar_rows[t], exact)
+                similar = similar[part_open[similar] & (np.sign(part_cents[similar]) == np.sign(target_cents[t]))]
+                exact = exact[part_open[exact]]
+                if max(len(exact), 1) < len(similar) <= MITM_MAX_ITEMS:
+                    search(t, similar, self.max_split_items)
+
+        if self.unblocked_splits and self.max_split_items > 2:
+            for t in np.flatnonzero(target_open & (target_cents != 0)):
+                search(t, np.sort(date_window(t)[1]), self.max_split_items)
+            return found
+
+        # Tier 3, pairs: each part's complement looked up in the cents-sorted
+        # window (only the smaller half of each pair needs a lookup)
+        for t in np.flatnonzero(target_open & (target_cents != 0)):
+            target = int(target_cents[t])
+            cents, rows = date_window(t)
+            usable = part_open[rows] & (np.sign(cents) == np.sign(target))
+            if usable.sum() < 2:
+                continue
+            smaller = np.flatnonzero(usable & (2 * np.abs(cents) <= abs(target)))
+            complement = target - cents[smaller]
+            # Complements descend; searching them reversed keeps the keys ascending
+            lo = np.searchsorted(cents, complement[::-1])[::-1]
+            hit = lo < len(cents)
+            hit[hit] = cents[lo[hit]] == complement[hit]
+            for i in np.flatnonzero(hit):
+                first = int(rows[smaller[i]])
+                hi = np.searchsorted(cents, complement[i], side='right')
+                partners = rows[lo[i]:hi]
+                partners = partners[part_open[partners] & (partners != first)]
+                if len(partners):
+                    take(t, sorted((first, int(partners[0]))))
                     break
 
-        # Apply matched
-        for m in self.balanced_matches:
-            for li in m.get('split_indices', [m['ledger_idx']]):
-                self.matched_ledger_indices.add(li)
-            self.matched_statement_indices.add(m['statement_idx'])
+        return found
+
+    @staticmethod
+    def _has_ref(ref) -> bool:
+        """True for a usable (non-empty, not missing) normalized reference."""
+        return bool(ref) and ref not in ('nan', 'none')
+
+    def _split_keys(self, ref, ids) -> List[tuple]:
+        """Blocking keys of one row: its reference and its identifier keys."""
+        keys = [('ref', ref)] if self._has_ref(ref) else []
+        keys += [(key_col, key) for key_col, key in enumerate(ids) if key]
+        return keys
+
+    def _split_key_index(self, refs: np.ndarray, ids: np.ndarray, days: np.ndarray) -> Dict[tuple, np.ndarray]:
+        """
+        Rows per (blocking key, day), see _split_keys.
+
+        Returns:
+            Dict {(key, day): row positions}
+        """
+        index = defaultdict(list)
+        for row, (ref, row_ids, day) in enumerate(zip(refs, ids, days.tolist())):
+            for key in self._split_keys(ref, row_ids):
+                index[(key, day)].append(row)
+        return {key: np.asarray(rows, dtype=np.int64) for key, rows in index.items()}
 
     def _collect_unmatched(self):
-        """Collect all unmatched transactions."""
-        for idx in range(len(self.ledger_df)):
-            if idx not in self.matched_ledger_indices:
-                self.unmatched_ledger.append({
-                    'idx': idx,
-                    'row': self.ledger_df.iloc[idx].to_dict()
-                })
-
-        for idx in range(len(self.statement_df)):
-            if idx not in self.matched_statement_indices:
-                self.unmatched_statement.append({
-                    'idx': idx,
-                    'row': self.statement_df.iloc[idx].to_dict()
-                })
-
-    def _generate_results(self) -> Dict[str, Any]:
-        """Generate final results dictionary."""
+        """Collect positions of all unmatched transactions."""
+        ledger_matched = np.zeros(len(self.ledger_df), dtype=bool)
+        ledger_matched[list(self.matched_ledger_indices)] = True
+        self.unmatched_ledger = np.flatnonzero(~ledger_matched)
+        self.unmatched_statement = np.flatnonzero(~self._stmt_matched)
+
+    def _generate_results(self) -> ResultView:
+        """
+        Generate the final results.
+
+        Returns:
+            ResultView with the counts filled in; match/unmatched DataFrames are
+            built when first read
+        """
         total_ledger = len(self.ledger_df)
         total_statement = len(self.statement_df)
         total_matched = len(self.perfect_matches) + len(self.fuzzy_matches) + len(self.balanced_matches)
 
         match_rate = (total_matched / max(total_ledger, total_statement)) * 100 if total_ledger > 0 else 0
 
-        perfect_matches_df = self._create_matches_dataframe(self.perfect_matches)
-        fuzzy_matches_df = self._create_matches_dataframe(self.fuzzy_matches)
-        balanced_df = self._create_matches_dataframe(self.balanced_matches)
-        unmatched_df = self._create_unmatched_dataframe()
-
-        return {
-            'perfect_matches': perfect_matches_df,
-            'fuzzy_matches': fuzzy_matches_df,
-            'balanced': balanced_df,
-            'unmatched': unmatched_df,
+        summary = {
             'perfect_match_count': len(self.perfect_matches),
             'fuzzy_match_count': len(self.fuzzy_matches),
             'balanced_count': len(self.balanced_matches),
             'unmatched_count': len(self.unmatched_ledger) + len(self.unmatched_statement),
             'match_rate': match_rate,
+            'decided_by': dict(self.decided_by),
             'timestamp': datetime.now()
         }
-
-    def _create_matches_dataframe(self, matches_list):
-        """Create DataFrame from matches list."""
-        if not matches_list:
-            return pd.DataFrame()
-
-        records = []
-        for match in matches_list:
-            record = {}
-            for key, value in match['ledger_row'].items():
-                if not key.startswith('_'):  # Skip internal columns
-                    record[f'Ledger_{key}'] = value
-            for key, value in match['statement_row'].items():
-                if not key.startswith('_'):
-                    record[f'Statement_{key}'] = value
-            record['Match_Score'] = match['match_score']
-            records.append(record)
-
-        return pd.DataFrame(records)
-
-    def _create_unmatched_dataframe(self):
-        """Create DataFrame for unmatched transactions."""
-        records = []
-
-        for item in self.unmatched_ledger:
-            record = {k: v for k, v in item['row'].items() if not k.startswith('_')}
-            record['Source'] = 'Ledger'
-            records.append(record)
-
-        for item in self.unmatched_statement:
-            record = {k: v for k, v in item['row'].items() if not k.startswith('_')}
-            record['Source'] = 'Statement'
-            records.append(record)
-
-        return pd.DataFrame(records) if records else pd.DataFrame()
+        matches = {
+            'perfect_matches': self.perfect_matches,
+            'fuzzy_matches': self.fuzzy_matches,
+            'balanced': self.balanced_matches,
+        }
+        return ResultView(self.ledger_df, self.statement_df, matches,
+                          self.unmatched_ledger, self.unmatched_statement, summary)
@@ -0,0 +1,71 @@
+"""
+Settlement Batch Classification
+===============================
+Batch assignment for the Corporate Settlements workflow as integer codes.
+
+A row's batch depends only on its own FD/FC amounts and on whether its
+reference group has more than one row:
+
+- batch_1: FD equals FC (to the cent)
+- batch_2: FD > FC, within the percentage threshold or the absolute tolerance
+- batch_3: FC > FD, within the same limits
+- batch_4: same reference, difference over both limits
+- batch_5: single-row reference group
+
+The percentage is the difference over the larger of FD and FC (100% when
+that is zero).
+
+    codes = classify_rows(fd, fc, multi, 7.0, 0.5)
+    batch_2_rows = np.flatnonzero(codes == BATCH_KEYS.index('batch_2'))
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+BATCH_KEYS = ('batch_1', 'batch_2', 'batch_3', 'batch_4', 'batch_5')
+
+# FD and FC closer than this count as equal (batch_1)
+EQUAL_EPSILON = 0.01
+
+
+def batch_variance(fd: np.ndarray, fc: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Absolute and percentage FD/FC difference per row.
+
+    Returns:
+        Tuple (difference, percent) as float64 arrays
+    """
+    fd = np.asarray(fd, dtype=np.float64)
+    fc = np.asarray(fc, dtype=np.float64)
+    difference = np.abs(fd - fc)
+    larger = np.maximum(fd, fc)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent = np.where(larger != 0, difference / larger * 100, 100.0)
+    return difference, percent
+
+
+def classify_rows(fd: np.ndarray, fc: np.ndarray, multi: np.ndarray,
+                  percentage_threshold: float, tolerance: float) -> np.ndarray:
+    """
+    Batch code per row (an index into BATCH_KEYS).
+
+    Args:
+        fd, fc: Foreign debit/credit amounts
+        multi: True where the row's reference group has more than one row
+        percentage_threshold: Largest percentage difference for batches 2/3
+        tolerance: Largest absolute difference for batches 2/3 (either limit
+            is enough)
+
+    Returns:
+        int8 array of batch codes
+    """
+    fd = np.asarray(fd, dtype=np.float64)
+    fc = np.asarray(fc, dtype=np.float64)
+    difference, percent = batch_variance(fd, fc)
+    within = (percent <= percentage_threshold) | (difference <= tolerance)
+
+    # First matching condition wins; FC > FD within the limits is the default
+    conditions = [~np.asarray(multi, dtype=bool), difference < EQUAL_EPSILON, ~within, fd > fc]
+    return np.select(conditions, [4, 0, 3, 1], default=2).astype(np.int8)
+
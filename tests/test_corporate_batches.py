@@ -0,0 +1,77 @@
+"""
+Tests for corporate batch frame construction and the integrity check.
+"""
+
+import numpy as np
+import pandas as pd
+from components.corporate_workflow import CorporateWorkflow
+
+
+class TestBatchFrames:
+    """Batches are built and checked from row positions."""
+
+    def _df(self):
+        return pd.DataFrame({
+            '_debit_cents': np.array([100, 0, 250, 0], dtype=np.int64),
+            '_credit_cents': np.array([0, 100, 0, 250], dtype=np.int64),
+            'Ref': ['A', 'A', 'B', 'B'],
+        }, index=[10, 11, 12, 13])
+
+    def test_frame_keeps_pair_order_and_dtypes(self):
+        df = self._df()
+        frame = CorporateWorkflow._batch_frame(df, np.array([2, 3, 0, 1]))
+        assert list(frame.index) == [12, 13, 10, 11]
+        assert frame['_debit_cents'].dtype == np.int64
+        assert CorporateWorkflow._batch_frame(df, np.empty(0, dtype=np.int64)).empty
+
+    def test_integrity_from_positions(self):
+        df = self._df()
+        debit, credit = df['_debit_cents'].to_numpy(), df['_credit_cents'].to_numpy()
+        integrity = CorporateWorkflow._batch_integrity(
+            {'batch2': np.array([0, 1]), 'batch6': np.array([2, 3])}, debit, credit)
+        assert integrity == {'output_rows': 4, 'debit_cents': 350, 'credit_cents': 350, 'repeated_rows': 0}
+
+        repeated = CorporateWorkflow._batch_integrity(
+            {'batch2': np.array([0, 1]), 'batch6': np.array([1, 2, 3])}, debit, credit)
+        assert repeated['output_rows'] == 5
+        assert repeated['repeated_rows'] == 1
+        assert repeated['credit_cents'] == 450
+
+
+class TestCorrectingJournals:
+    """Batch 1 pairs correcting entries with the journals they correct."""
+
+    def test_first_unmatched_partner_in_row_order(self):
+        references = pd.Series(['RJ1', 'RJ2', 'CORRECTING J00123', 'RJ3', 'CORRECTING J123', 'CORRECTING J123'])
+        journals = pd.Series(['123', '0123.0', '900', '124', '901', '902'])
+        positions = CorporateWorkflow._pair_correcting_journals(references, journals)
+        # Third correction of J123 finds no partner left
+        assert list(positions) == [0, 2, 1, 4]
+
+    def test_matches_sequential_lookup(self):
+        rng = np.random.default_rng(11)
+        n = 400
+        journals = pd.Series(rng.integers(1, 60, n).astype(str))
+        references = pd.Series([f'CORRECTING J{int(j):05d}' if rng.random() < 0.3 else f'RJ{i}'
+                                for i, j in enumerate(rng.integers(1, 60, n))])
+        # Correcting entries carry journals no other entry refers to
+        is_correcting = references.str.startswith('CORRECTING').to_numpy()
+        journals[is_correcting] = [str(1000 + i) for i in range(int(is_correcting.sum()))]
+
+        lookup = {}
+        for pos, journal in enumerate(journals):
+            lookup.setdefault(journal.lstrip('0') or '0', []).append(pos)
+        expected, used = [], set()
+        for pos in np.flatnonzero(is_correcting):
+            key = references[pos][len('CORRECTING J'):].lstrip('0') or '0'
+            for partner in lookup.get(key, []):
+                if partner != pos and partner not in used:
+                    expected += [partner, pos]
+                    used.update((partner, pos))
+                    break
+
+        assert list(CorporateWorkflow._pair_correcting_journals(references, journals)) == expected
+
+    def test_no_correcting_entries(self):
+        positions = CorporateWorkflow._pair_correcting_journals(pd.Series(['RJ1']), pd.Series(['1']))
+        assert len(positions) == 0
@@ -0,0 +1,81 @@
+"""
+Tests for the CSR index structures used by the reconciliation engines.
+"""
+
+import pytest
+import numpy as np
+from utils.csr_index import CSRIndex, encode_trigrams
+
+
+class TestCSRIndex:
+    """Test CSRIndex build and range queries."""
+
+    def test_lookup_groups_postings_by_key(self):
+        index = CSRIndex.build([30, 10, 30, 20], [0, 1, 2, 3])
+        assert list(index.keys) == [10, 20, 30]
+        assert list(index.lookup(30)) == [0, 2]
+        assert list(index.lookup(10)) == [1]
+        assert len(index.lookup(99)) == 0
+
+    def test_postings_are_int32(self):
+        index = CSRIndex.build([1, 2], [5, 6])
+        assert index.postings.dtype == np.int32
+
+    def test_side_orders_debits_first(self):
+        index = CSRIndex.build([500, 500, 500], [0, 1, 2], side=[1, 0, 0])
+        start, end = index.span(500)
+        assert list(index.postings[start:end]) == [1, 2, 0]
+        assert list(index.side[start:end]) == [0, 0, 1]
+        assert index.side.dtype == np.uint8
+
+    def test_unique_drops_repeated_pairs(self):
+        index = CSRIndex.build([7, 7, 7], [3, 3, 4], unique=True)
+        assert list(index.lookup(7)) == [3, 4]
+
+    def test_span_range(self):
+        index = CSRIndex.build([100, 101, 102, 200], [0, 1, 2, 3])
+        start, end = index.span_range(99, 101)
+        assert sorted(index.postings[start:end]) == [0, 1]
+        assert index.span_range(150, 190) == (3, 3)
+
+    def test_gather(self):
+        index = CSRIndex.build([1, 2, 2, 3], [0, 1, 2, 3])
+        assert sorted(index.gather([2, 3, 42])) == [1, 2, 3]
+        assert len(index.gather([])) == 0
+
+    def test_nbytes(self):
+        index = CSRIndex.build(np.arange(1000), np.arange(1000), side=np.zeros(1000))
+        assert index.nbytes == 1000 * 8 + 1001 * 8 + 1000 * 4 + 1000
+
+    def test_empty(self):
+        index = CSRIndex.empty(with_side=True)
+        assert len(index) == 0
+        assert index.span(5) == (0, 0)
+        assert len(index.gather([1, 2])) == 0
+
+    def test_extend_shifts_appended_postings(self):
+        base = CSRIndex.build([500, 700], [0, 1], side=[1, 0])
+        extra = CSRIndex.build([500, 900], [0, 1], side=[0, 0])
+        index = base.extend(extra, offset=2)
+
+        start, end = index.span(500)
+        assert list(index.postings[start:end]) == [2, 0]
+        assert list(index.side[start:end]) == [0, 1]
+        assert list(index.lookup(900)) == [3]
+        assert list(index.lookup(700)) == [1]
+
+
+class TestEncodeTrigrams:
+    """Test vectorized trigram encoding."""
+
+    def test_matches_python_trigrams(self):
+        strings = ['cash dep jhb', 'ab', '', 'xéyz', 'aaaa']
+        rows, codes = encode_trigrams(strings)
+
+        for i, s in enumerate(strings):
+            expected = {(ord(s[j]) << 42) | (ord(s[j + 1]) << 21) | ord(s[j + 2]) for j in range(len(s) - 2)}
+            assert set(codes[rows == i]) == expected
+
+    def test_short_strings_yield_nothing(self):
+        rows, codes = encode_trigrams(['a', 'ab'])
+        assert len(rows) == 0 and len(codes) == 0
@@ -14,7 +14,11 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from components.fnb_workflow_gui_engine import GUIReconciliationEngine
+from components.fnb_workflow_gui_engine import (
+    GUIReconciliationEngine, ProgressSink, ReconciliationDiagnostics,
+)
+from utils.fuzzy_cache import FuzzyScoreCache
+from utils.ngram_retrieval import NgramRetriever
 
 
 class MockProgress:
@@ -178,11 +182,41 @@ class TestFuzzyCaching:
             {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'J Smith', 'Amount': 100.0},
             {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'J Doe', 'Amount': 200.0},
         ])
-        engine = GUIReconciliationEngine()
+        engine = GUIReconciliationEngine(fuzzy_cache=FuzzyScoreCache())
         engine.reconcile(ledger, statement, get_settings(), MockProgress(), MockStatus())
 
         assert engine.fuzzy_cache_misses > 0
 
+    def test_rerun_with_new_threshold_hits_cache(self):
+        """Scores are kept across runs, so a threshold change costs no new scoring."""
+        ledger = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': f'Cash dep branch {i}', 'Debit': 100.0, 'Credit': 0}
+            for i in range(5)
+        ])
+        statement = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': f'CASH DEP BR {i}', 'Amount': 100.0}
+            for i in range(5)
+        ])
+        engine = GUIReconciliationEngine(fuzzy_cache=FuzzyScoreCache())
+        _, first = engine.run(ledger, statement, get_settings())
+        _, second = engine.run(ledger, statement, {**get_settings(), 'similarity_ref': 70})
+
+        assert first.fuzzy_cache_misses > 0
+        assert second.fuzzy_cache_misses == 0
+        assert second.fuzzy_cache_hits > 0
+
+    def test_disk_tier_survives_new_process_cache(self, tmp_path):
+        ledger = pd.DataFrame([{'Date': pd.Timestamp('2025-01-15'), 'Reference': 'John Smith', 'Debit': 100.0, 'Credit': 0}])
+        statement = pd.DataFrame([{'Date': pd.Timestamp('2025-01-15'), 'Reference': 'J Smith', 'Amount': 100.0}])
+        db_path = str(tmp_path / 'scores.db')
+
+        GUIReconciliationEngine(fuzzy_cache=FuzzyScoreCache(db_path=db_path)).run(ledger, statement, get_settings())
+        _, diagnostics = GUIReconciliationEngine(fuzzy_cache=FuzzyScoreCache(db_path=db_path)).run(
+            ledger, statement, get_settings())
+
+        assert diagnostics.fuzzy_cache_misses == 0
+        assert diagnostics.fuzzy_cache_disk_hits > 0
+
     def test_cache_hit_rate_reasonable(self):
         ledger, statement = make_test_data(50, 50, match_pct=0.5)
         engine = GUIReconciliationEngine()
@@ -210,3 +244,542 @@ class TestNoUnnecessaryCopies:
         # Original DataFrames should have same shape (columns may be added by _validate)
         assert len(ledger) == orig_ledger_len
         assert len(statement) == orig_statement_len
+
+
+class TestPhase1CandidateJoin:
+    """Test the vectorized (date, side, cents) candidate join used by Phase 1."""
+
+    def test_side_respected(self):
+        """Positive statement amounts block against debits, negative against credits."""
+        ledger = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'A', 'Debit': 0, 'Credit': 100.0},
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'A', 'Debit': 100.0, 'Credit': 0},
+        ])
+        statement = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'A', 'Amount': 100.0},
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'A', 'Amount': -100.0},
+        ])
+        engine = GUIReconciliationEngine()
+        results = engine.reconcile(ledger, statement, get_settings(), MockProgress(), MockStatus())
+
+        matched = results['matched'].sort_values('Statement_Index')
+        assert list(matched['Ledger_Index']) == [1, 0]
+
+    def test_first_come_assignment(self):
+        """Duplicate keys are consumed in ledger order by statement order."""
+        ledger = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'DUP', 'Debit': 50.0, 'Credit': 0}
+            for _ in range(3)
+        ])
+        statement = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'DUP', 'Amount': 50.0}
+            for _ in range(2)
+        ])
+        engine = GUIReconciliationEngine()
+        results = engine.reconcile(ledger, statement, get_settings(), MockProgress(), MockStatus())
+
+        assert list(results['matched']['Ledger_Index']) == [0, 1]
+        assert list(results['unmatched_ledger'].index) == [2]
+
+    def test_date_and_cents_blocking(self):
+        """Different dates or cents never become candidates."""
+        ledger, statement = make_test_data(20, 20, match_pct=1.0)
+        engine = GUIReconciliationEngine()
+        ledger, statement = engine._validate_and_clean_data(ledger, statement, get_settings())
+        arrays = engine._phase_arrays(
+            ledger, statement, '_normalized_Date', '_normalized_Date', 'Reference', 'Reference',
+            'Debit', 'Credit', 'Amount'
+        )
+        cands = engine._build_phase1_candidates(arrays, True, True, False, False)
+        sizes = cands['hi'] - cands['lo']
+        assert (sizes == 1).all()
+        assert list(cands['ledger_order'][cands['lo']]) == list(range(20))
+
+
+class TestToleranceJoin:
+    """Date/amount tolerance windows use the banded range join."""
+
+    def test_shifted_value_dates_match_with_tolerance(self):
+        ledger, statement = make_test_data(40, 40, match_pct=1.0)
+        statement['Date'] = statement['Date'] + pd.Timedelta(days=1)
+
+        exact, _ = GUIReconciliationEngine().run(ledger, statement, get_settings())
+        tolerant, _ = GUIReconciliationEngine().run(ledger, statement, {**get_settings(), 'date_tolerance': True})
+
+        assert exact['perfect_match_count'] == 0
+        assert tolerant['perfect_match_count'] == 40
+
+    def test_closest_date_wins(self):
+        ledger = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-17'), 'Reference': 'PAY', 'Debit': 75.0, 'Credit': 0},
+            {'Date': pd.Timestamp('2025-01-16'), 'Reference': 'PAY', 'Debit': 75.0, 'Credit': 0},
+        ])
+        statement = pd.DataFrame([{'Date': pd.Timestamp('2025-01-15'), 'Reference': 'PAY', 'Amount': 75.0}])
+        results, _ = GUIReconciliationEngine().run(ledger, statement, {**get_settings(), 'date_tolerance': 2})
+        assert list(results['matched']['Ledger_Index']) == [1]
+
+    def test_amount_window_in_cents(self):
+        ledger = pd.DataFrame([{'Date': pd.Timestamp('2025-01-15'), 'Reference': 'FEE', 'Debit': 100.0, 'Credit': 0}])
+        statement = pd.DataFrame([{'Date': pd.Timestamp('2025-01-15'), 'Reference': 'FEE', 'Amount': 100.03}])
+
+        exact, _ = GUIReconciliationEngine().run(ledger, statement, get_settings())
+        tolerant, _ = GUIReconciliationEngine().run(ledger, statement, {**get_settings(), 'amount_tolerance_cents': 5})
+        assert exact['total_matched'] == 0
+        assert tolerant['total_matched'] == 1
+
+    def test_banded_join_matches_brute_force(self):
+        from components.fnb_workflow_gui_engine import _join_banded
+        rng = np.random.default_rng(3)
+        post_pos = np.arange(300)
+        post_days = rng.integers(0, 10, 300)
+        post_side = rng.integers(0, 2, 300)
+        post_cents = rng.integers(100, 200, 300)
+        stmt_days = rng.integers(0, 10, 50)
+        stmt_side = rng.integers(0, 2, 50)
+        stmt_cents = rng.integers(100, 200, 50)
+        valid = np.ones(50, dtype=bool)
+
+        for day_tolerance, cents_tolerance in ((2, 3), (2, 0), (0, 3)):
+            cands = _join_banded(post_pos, post_days, post_side, post_cents,
+                                 stmt_days, stmt_side, stmt_cents, valid, day_tolerance, cents_tolerance)
+            assert cands['trimmed'] == 0
+            for i in range(50):
+                day_gap = np.abs(post_days - stmt_days[i])
+                cents_gap = np.abs(post_cents - stmt_cents[i])
+                hits = np.flatnonzero((post_side == stmt_side[i]) & (day_gap <= day_tolerance)
+                                      & (cents_gap <= cents_tolerance))
+                expected = hits[np.lexsort((hits, cents_gap[hits], day_gap[hits]))]
+                assert list(cands['ledger_order'][cands['lo'][i]:cands['hi'][i]]) == list(expected)
+
+    def test_common_amount_expands_only_day_window(self):
+        from components.fnb_workflow_gui_engine import _join_banded
+        # One amount everywhere, dates spread over a year: only the +/- 1 day
+        # neighbours are expanded, not every same-amount posting
+        n = 5000
+        post_days = np.arange(n) % 365
+        stmt_days = np.arange(n) % 365
+        same = np.zeros(n, dtype=np.int64)
+        cents = np.full(n, 10000)
+        cands = _join_banded(np.arange(n), post_days, same, cents,
+                             stmt_days, same, cents, np.ones(n, dtype=bool), 1, 0)
+        widths = cands['hi'] - cands['lo']
+        assert widths.max() <= 3 * (n // 365 + 1)
+        first = cands['ledger_order'][cands['lo'][0]:cands['hi'][0]]
+        assert set(post_days[first]) == {0, 1}
+        assert post_days[first[0]] == 0
+
+    def test_pair_budget_keeps_nearest_candidates(self):
+        from components.fnb_workflow_gui_engine import _join_banded
+        n = 200
+        days = np.arange(n) // 10
+        zeros = np.zeros(n, dtype=np.int64)
+        cents = np.full(n, 500)
+        cands = _join_banded(np.arange(n), days, zeros, cents,
+                             days, zeros, cents, np.ones(n, dtype=bool), 5, 0, pair_budget=1000)
+        widths = cands['hi'] - cands['lo']
+        assert widths.sum() <= 1000
+        assert cands['trimmed'] > 0
+        for i in range(n):
+            kept = cands['ledger_order'][cands['lo'][i]:cands['hi'][i]]
+            assert len(kept) > 0
+            assert np.abs(days[kept] - days[i]).min() == 0
+
+
+class TestBatchFuzzyScoring:
+    """Batch (cpdist) scoring must pick the same matches as per-pair scoring."""
+
+    def _fuzzy_data(self, n=60):
+        ledger = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': f'Cash dep jhb branch {i:03d}',
+             'Debit': 100.0 + (i % 5), 'Credit': 0}
+            for i in range(n)
+        ])
+        statement = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': f'CASH DEP JHB BR {i:03d}', 'Amount': 100.0 + (i % 5)}
+            for i in range(n)
+        ])
+        return ledger, statement
+
+    def test_batch_matches_sequential(self):
+        ledger, statement = self._fuzzy_data()
+
+        sequential = GUIReconciliationEngine().reconcile(
+            ledger, statement, get_settings(), MockProgress(), MockStatus())
+        batch_engine = GUIReconciliationEngine()
+        batch = batch_engine.reconcile(
+            ledger, statement, {**get_settings(), 'batch_fuzzy': True}, MockProgress(), MockStatus())
+
+        assert batch_engine.fuzzy_batch_pairs > 0
+        cols = ['Statement_Index', 'Ledger_Index', 'Similarity']
+        pd.testing.assert_frame_equal(
+            sequential['matched'][cols].reset_index(drop=True),
+            batch['matched'][cols].reset_index(drop=True),
+        )
+
+    def test_batch_scores_match_cached_scorer(self):
+        engine = GUIReconciliationEngine()
+        stmt_refs = np.array(['Cash dep dsr jhb par', 'J Smith'], dtype=object)
+        ledger_refs = np.array(['JHB Park Cen 4t', 'John Smith', 'Other'], dtype=object)
+        start, scores = engine._batch_score_phase1_candidates(
+            np.arange(3), np.array([0, 0]), np.array([3, 3]), stmt_refs, ledger_refs, 0)
+
+        for i, stmt_ref in enumerate(stmt_refs):
+            expected = [engine._get_fuzzy_score_cached(stmt_ref, r) for r in ledger_refs]
+            assert list(scores[start[i]:start[i] + 3]) == expected
+
+
+class TestNgramShortlist:
+    """Top-k trigram shortlisting must keep the matches of the exhaustive scan."""
+
+    def test_recall_against_exhaustive_scan(self):
+        rng = np.random.default_rng(7)
+        names = ['SMITH', 'NKOSI', 'PATEL', 'VAN WYK']
+        ledger = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-15'),
+             'Reference': f'Cash dep jhb branch {rng.integers(0, 99999):05d} {names[i % 4]}',
+             'Debit': 100.0 + (i % 2), 'Credit': 0}
+            for i in range(300)
+        ])
+        picked = rng.permutation(300)[:150]
+        statement = pd.DataFrame({
+            'Date': ledger['Date'].iloc[picked].to_numpy(),
+            'Reference': ledger['Reference'].iloc[picked].str.upper().str.replace('BRANCH', 'BR').to_numpy(),
+            'Amount': ledger['Debit'].iloc[picked].to_numpy(),
+        })
+        settings = {**get_settings(), 'similarity_ref': 80}
+
+        exhaustive = GUIReconciliationEngine(fuzzy_cache=FuzzyScoreCache()).reconcile(
+            ledger, statement, {**settings, 'fuzzy_top_k': 0}, MockProgress(), MockStatus())
+        shortlisted = GUIReconciliationEngine(fuzzy_cache=FuzzyScoreCache()).reconcile(
+            ledger, statement, {**settings, 'fuzzy_top_k': 5}, MockProgress(), MockStatus())
+
+        cols = ['Statement_Index', 'Ledger_Index']
+        expected = set(map(tuple, exhaustive['matched'][cols].to_numpy()))
+        found = set(map(tuple, shortlisted['matched'][cols].to_numpy()))
+        assert len(expected) == 150
+        assert len(found & expected) / len(expected) >= 0.99
+
+    def test_shortlist_scores_follow_candidate_layout(self):
+        engine = GUIReconciliationEngine()
+        engine.ledger_trigram_index = NgramRetriever.build(['john smith', 'jane doe', 'ab']).index
+        start, scores = engine._ngram_phase1_scores(
+            np.arange(3), np.array([0, 0]), np.array([3, 3]), np.array(['J Smith', 'xy'], dtype=object))
+
+        assert list(start) == [0, -1]
+        assert scores[0] > 0 and scores[1] == 0 and scores[2] == 0
+
+
+class TestReferenceOnlyFastPath:
+    """Reference-only matching searches the whole ledger, not its first rows."""
+
+    def _settings(self, **extra):
+        return {**get_settings(), 'match_dates': False, 'match_amounts': False, 'similarity_ref': 85, **extra}
+
+    def _data(self, n=1500):
+        ledger = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': f'Payment acme supplier {i:05d}', 'Debit': 1.0, 'Credit': 0}
+            for i in range(n)
+        ])
+        statement = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'PAYMENT ACME SUPPLIER 01400', 'Amount': 1.0},
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'Payment acme supplier 00007', 'Amount': 1.0},
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'Payment acme supplier 00007', 'Amount': 1.0},
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'zzzz', 'Amount': 1.0},
+        ])
+        return ledger, statement
+
+    def test_matches_beyond_first_thousand_rows(self):
+        ledger, statement = self._data()
+        results = GUIReconciliationEngine().reconcile(
+            ledger, statement, self._settings(), MockProgress(), MockStatus())
+
+        pairs = results['matched'][['Statement_Index', 'Ledger_Index', 'Similarity']].to_numpy().tolist()
+        assert pairs[0] == [0, 1400, 100]
+        # Second copy of an exact reference falls back to the best open fuzzy match
+        assert [p[:2] for p in pairs[1:]] == [[1, 7], [2, 0]]
+        assert len(results['unmatched_statement']) == 1
+
+    def test_shortlist_agrees_with_exhaustive_search(self):
+        ledger, statement = self._data(300)
+        statement['Reference'] = ['PAYMENT ACME SUPPL 00140', 'Paymnt acme supplier 00007',
+                                  'payment acme supplier 00007', 'zzzz']
+        cols = ['Statement_Index', 'Ledger_Index', 'Similarity']
+        shortlisted = GUIReconciliationEngine().reconcile(
+            ledger, statement, self._settings(), MockProgress(), MockStatus())
+        exhaustive = GUIReconciliationEngine().reconcile(
+            ledger, statement, self._settings(fuzzy_top_k=0), MockProgress(), MockStatus())
+        pd.testing.assert_frame_equal(shortlisted['matched'][cols].reset_index(drop=True),
+                                      exhaustive['matched'][cols].reset_index(drop=True))
+
+
+class TestIdentifierBlocking:
+    """Rows sharing an embedded identifier are matched before fuzzy scoring."""
+
+    def test_identifier_decides_dissimilar_references(self):
+        ledger = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'Deposit CSH891089488 Jenet', 'Debit': 250.0, 'Credit': 0},
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'Airtime 0821234567', 'Debit': 30.0, 'Credit': 0},
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'Cash dep jhb branch 001', 'Debit': 90.0, 'Credit': 0},
+        ])
+        statement = pd.DataFrame([
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'csh-891089488', 'Amount': 250.0},
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'MTN 0821234567 PREPAID', 'Amount': 30.0},
+            {'Date': pd.Timestamp('2025-01-15'), 'Reference': 'CASH DEP JHB BRANCH 001', 'Amount': 90.0},
+        ])
+
+        engine = GUIReconciliationEngine()
+        results = engine.reconcile(ledger, statement, get_settings(), MockProgress(), MockStatus())
+
+        pairs = set(map(tuple, results['matched'][['Statement_Index', 'Ledger_Index']].to_numpy()))
+        assert pairs == {(0, 0), (1, 1), (2, 2)}
+        assert engine.phase1_decided_by == {'ref_id': 1, 'phone': 1, 'fuzzy': 1}
+        assert engine._diagnostics.phase1_decision_fractions['ref_id'] == pytest.approx(1 / 3)
+
+
+class TestDatePartitionedMode:
+    """Date-sharded multi-process Phases 1/1.5 must reproduce the sequential run."""
+
+    def _multi_day_data(self, n=400, days=12):
+        rng = np.random.default_rng(7)
+        base = pd.Timestamp('2025-01-01')
+        ledger_rows = []
+        for i in range(n):
+            amt = float(rng.choice([50.0, 120.5, 15000.0, 9999.99, 250.0]))
+            ledger_rows.append({
+                'Date': base + pd.Timedelta(days=int(rng.integers(0, days))),
+                'Reference': f'Cash dep branch {int(rng.integers(0, 40)):03d}',
+                'Debit': amt if i % 3 else 0,
+                'Credit': 0 if i % 3 else amt,
+            })
+        ledger = pd.DataFrame(ledger_rows)
+        picks = rng.choice(n, size=n // 2, replace=False)
+        statement = ledger.iloc[picks].copy()
+        statement['Amount'] = np.where(statement['Debit'] > 0, statement['Debit'], -statement['Credit'])
+        statement['Reference'] = statement['Reference'].str.upper().str.replace('BRANCH', 'BR')
+        statement.loc[statement.index[::7], 'Reference'] = 'unrelated'
+        statement.loc[statement.index[::11], 'Date'] = pd.NaT
+        statement = statement[['Date', 'Reference', 'Amount']].reset_index(drop=True)
+        return ledger, statement
+
+    def test_shards_match_sequential(self):
+        ledger, statement = self._multi_day_data()
+        cols = ['Statement_Index', 'Ledger_Index', 'Similarity']
+
+        sequential, _ = GUIReconciliationEngine().run(ledger, statement, get_settings())
+        parallel, diagnostics = GUIReconciliationEngine().run(
+            ledger, statement, {**get_settings(), 'parallel_dates': True, 'parallel_workers': 2})
+
+        assert 'phase1_parallel' in diagnostics.phase_seconds
+        assert parallel['foreign_credits_count'] > 0
+        pd.testing.assert_frame_equal(
+            sequential['matched'][cols].reset_index(drop=True),
+            parallel['matched'][cols].reset_index(drop=True),
+        )
+        assert sequential['total_matched'] == parallel['total_matched']
+
+    def test_single_day_falls_back_to_sequential(self):
+        ledger, statement = make_test_data(30, 30)
+        _, diagnostics = GUIReconciliationEngine().run(
+            ledger, statement, {**get_settings(), 'parallel_dates': True, 'parallel_workers': 2})
+        assert 'phase1' in diagnostics.phase_seconds
+
+    def test_shard_plan_keeps_days_whole(self):
+        from components.fnb_workflow_gui_engine import _plan_date_shards
+        ledger_days = np.array([3, 1, 1, 2, 3, 3, np.iinfo(np.int64).min])
+        stmt_days = np.array([1, 3, 2, 3])
+        ledger_order, stmt_order, bounds = _plan_date_shards(ledger_days, stmt_days, 3)
+
+        assert 6 not in ledger_order
+        for ledger_lo, ledger_hi, stmt_lo, stmt_hi in bounds:
+            shard_days = set(ledger_days[ledger_order[ledger_lo:ledger_hi]])
+            assert set(stmt_days[stmt_order[stmt_lo:stmt_hi]]) <= shard_days
+        covered = [d for b in bounds for d in ledger_days[ledger_order[b[0]:b[1]]]]
+        assert sorted(covered) == [1, 1, 2, 3, 3, 3]
+
+
+class TestSplitDetectionWithoutCaps:
+    """Split phases run on large unmatched sets and compare amounts in cents."""
+
+    def _with_splits(self, n):
+        ledger, statement = make_test_data(n, n, match_pct=0.0)
+        date = pd.Timestamp('2025-01-15')
+        ledger = pd.concat([ledger, pd.DataFrame([
+            {'Date': date, 'Reference': 'SPLIT PAY', 'Debit': 0.1, 'Credit': 0},
+            {'Date': date, 'Reference': 'SPLIT PAY', 'Debit': 0.2, 'Credit': 0},
+            {'Date': date, 'Reference': 'BULK DEP', 'Debit': 900.0, 'Credit': 0},
+        ])], ignore_index=True)
+        statement = pd.concat([statement, pd.DataFrame([
+            {'Date': date, 'Reference': 'SPLIT PAY', 'Amount': 0.3},
+            {'Date': date, 'Reference': 'BULK DEP', 'Amount': 400.0},
+            {'Date': date, 'Reference': 'BULK DEP', 'Amount': 500.0},
+        ])], ignore_index=True)
+        return ledger, statement
+
+    def test_splits_found_above_old_row_caps(self):
+        ledger, statement = self._with_splits(3001)
+        results, _ = GUIReconciliationEngine().run(ledger, statement, get_settings())
+
+        splits = {s['split_type']: s for s in results['split_matches']}
+        assert set(splits) == {'many_to_one', 'one_to_many'}
+        assert sorted(splits['many_to_one']['ledger_indices']) == [3001, 3002]
+        assert sorted(splits['one_to_many']['statement_indices']) == [3002, 3003]
+
+
+class TestColumnarResults:
+    """The matched frame is assembled from index-pair arrays."""
+
+    def test_matched_frame_layout(self):
+        ledger, statement = make_test_data(40, 40, match_pct=0.5)
+        results, _ = GUIReconciliationEngine().run(ledger, statement, get_settings())
+        matched = results['matched']
+
+        assert list(matched.columns[:4]) == ['Ledger_Index', 'Statement_Index', 'Match_Type', 'Similarity']
+        assert {'Ledger_Reference', 'Ledger_Debit', 'Statement_Reference', 'Statement_Amount'} <= set(matched.columns)
+        assert (matched['Ledger_Reference'] == ledger.loc[matched['Ledger_Index'], 'Reference'].values).all()
+        assert (matched['Statement_Amount'] == statement.loc[matched['Statement_Index'], 'Amount'].values).all()
+        assert list(matched.index) == list(range(len(matched)))
+
+    def test_phase1_keeps_position_arrays(self):
+        from components.fnb_workflow_gui_engine import MatchPairs
+        ledger, statement = make_test_data(10, 10, match_pct=1.0)
+        engine = GUIReconciliationEngine()
+        ledger, statement = engine._validate_and_clean_data(ledger, statement, get_settings())
+        engine._arrays = engine._phase_arrays(
+            ledger, statement, '_normalized_Date', '_normalized_Date', 'Reference', 'Reference',
+            'Debit', 'Credit', 'Amount'
+        )
+        engine._build_global_indexes(ledger, get_settings())
+        pairs, _, _ = engine._phase1_regular_matching(
+            ledger, statement, get_settings(), True, True, True, True, 85,
+            '_normalized_Date', '_normalized_Date', 'Reference', 'Reference', 'Debit', 'Credit', 'Amount',
+            False, False, True
+        )
+        assert isinstance(pairs, MatchPairs)
+        assert list(pairs.stmt_pos) == list(range(10))
+        assert list(pairs.ledger_pos) == list(range(10))
+
+
+class TestIncrementalAppend:
+    """append() on a finished run gives the same result as a full run over all rows."""
+
+    COLS = ['Statement_Index', 'Ledger_Index', 'Similarity', 'Match_Type']
+
+    def _matched(self, results):
+        matched = results['matched']
+        if len(matched) == 0:
+            return []
+        return sorted(map(tuple, matched[self.COLS].values.tolist()))
+
+    def _assert_same(self, full, incremental):
+        assert self._matched(full) == self._matched(incremental)
+        assert list(full['unmatched_ledger'].index) == list(incremental['unmatched_ledger'].index)
+        assert list(full['unmatched_statement'].index) == list(incremental['unmatched_statement'].index)
+        assert full['split_count'] == incremental['split_count']
+
+    def test_appended_statement_rows(self):
+        ledger, statement = TestDatePartitionedMode()._multi_day_data()
+        full, _ = GUIReconciliationEngine().run(ledger, statement, get_settings())
+
+        engine = GUIReconciliationEngine()
+        engine.run(ledger, statement.iloc[:130], get_settings())
+        incremental, diagnostics = engine.append(statement.iloc[130:].reset_index(drop=True))
+
+        self._assert_same(full, incremental)
+        assert diagnostics.match_counts['total'] == len(full['matched']) + full['split_count']
+
+    def test_appended_ledger_rows(self):
+        ledger, statement = make_test_data(200, 200)
+        full, _ = GUIReconciliationEngine().run(ledger, statement, get_settings())
+
+        engine = GUIReconciliationEngine()
+        engine.run(ledger.iloc[:120], statement, get_settings())
+        incremental, _ = engine.append(ledger_rows=ledger.iloc[120:].reset_index(drop=True))
+
+        self._assert_same(full, incremental)
+
+    def test_splits_in_appended_rows(self):
+        ledger, statement = TestSplitDetectionWithoutCaps()._with_splits(50)
+        full, _ = GUIReconciliationEngine().run(ledger, statement, get_settings())
+
+        engine = GUIReconciliationEngine()
+        engine.run(ledger.iloc[:51], statement.iloc[:50], get_settings())
+        incremental, _ = engine.append(statement.iloc[50:], ledger.iloc[51:])
+
+        assert incremental['split_count'] == 2
+        self._assert_same(full, incremental)
+
+    def test_appended_rows_with_tolerance(self):
+        ledger, statement = make_test_data(120, 120)
+        statement['Date'] = statement['Date'] + pd.Timedelta(days=1)
+        settings = {**get_settings(), 'date_tolerance': 1, 'amount_tolerance_cents': 2}
+        full, _ = GUIReconciliationEngine().run(ledger, statement, settings)
+
+        engine = GUIReconciliationEngine()
+        engine.run(ledger.iloc[:60], statement.iloc[:90], settings)
+        incremental, _ = engine.append(statement.iloc[90:], ledger.iloc[60:])
+
+        assert full['perfect_match_count'] > 0
+        self._assert_same(full, incremental)
+
+    def test_append_needs_a_run(self):
+        with pytest.raises(RuntimeError):
+            GUIReconciliationEngine().append(make_test_data(5, 5)[1])
+
+    def test_custom_labels_must_be_new(self):
+        ledger, statement = make_test_data(10, 10)
+        statement.index = [f'S{i}' for i in range(10)]
+        engine = GUIReconciliationEngine()
+        engine.run(ledger, statement.iloc[:5], get_settings())
+
+        with pytest.raises(ValueError):
+            engine.append(statement.iloc[3:])
+        results, _ = engine.append(statement.iloc[5:])
+        assert set(results['matched']['Statement_Index']) == set(statement.index[:7])
+
+
+class RecordingSink(ProgressSink):
+    def __init__(self):
+        self.fractions = []
+        self.messages = []
+        self.events = []
+
+    def progress(self, fraction):
+        self.fractions.append(fraction)
+
+    def status(self, message):
+        self.messages.append(message)
+
+    def event(self, level, message):
+        self.events.append((level, message))
+
+
+class TestHeadlessRun:
+    """The engine runs without any UI objects and reports through a ProgressSink."""
+
+    def test_run_without_sink(self):
+        ledger, statement = make_test_data(30, 30)
+        results, diagnostics = GUIReconciliationEngine().run(ledger, statement, get_settings())
+
+        assert isinstance(diagnostics, ReconciliationDiagnostics)
+        assert results['total_matched'] == diagnostics.match_counts['regular'] + diagnostics.match_counts['foreign_credits']
+        assert diagnostics.elapsed_seconds >= 0
+        assert {'validate', 'indexes', 'phase1', 'phase1_5', 'phase2', 'phase2b', 'results'} <= set(diagnostics.phase_seconds)
+
+    def test_sink_receives_progress_and_events(self):
+        # Large unmatched sets -> the split phase reports its work budget
+        ledger, statement = make_test_data(3001, 3001, match_pct=0.0)
+        sink = RecordingSink()
+        _, diagnostics = GUIReconciliationEngine().run(ledger, statement, get_settings(), sink)
+
+        assert sink.fractions[-1] == 1.0
+        assert sink.fractions == sorted(sink.fractions)
+        assert any('Complete' in m for m in sink.messages)
+        assert sink.events == diagnostics.events
+        assert any(level == 'info' and 'work budget' in message for level, message in sink.events)
+
+    def test_diagnostics_to_dict(self):
+        ledger, statement = make_test_data(10, 10)
+        _, diagnostics = GUIReconciliationEngine().run(ledger, statement, get_settings())
+        data = diagnostics.to_dict()
+        assert data['match_counts']['total'] == diagnostics.match_counts['total']
+        assert set(data['index_memory_bytes']) == {'date', 'amount', 'trigram'}
@@ -379,3 +379,17 @@ class TestConvenienceFunctions:
 
     def test_extract_from_description_function(self):
         assert extract_from_description("ABSA BANK Thenjiwe") == "Thenjiwe"
+
+
+class TestIdentifierKeys:
+    """Test the vectorized identifier blocking keys."""
+
+    def test_ref_id_and_phone(self):
+        keys = ReferenceExtractor.identifier_keys(['Ref csh-891089488 (Jenet 6452843846)', 'RJ58822828410'])
+        assert keys['ref_id'].tolist() == ['CSH891089488', 'RJ58822828410']
+        assert keys['phone'].tolist() == ['6452843846', '']
+
+    def test_missing_keys_are_blank(self):
+        keys = ReferenceExtractor.identifier_keys(['ABSA BANK Thenjiwe', None, ''])
+        assert keys['ref_id'].tolist() == ['', '', '']
+        assert keys['phone'].tolist() == ['', '', '']
@@ -0,0 +1,61 @@
+"""
+Tests for the bounded, optionally disk-backed fuzzy-score cache.
+"""
+
+import pytest
+from utils.fuzzy_cache import FuzzyScoreCache, get_shared_cache
+
+
+class TestFuzzyScoreCache:
+    def test_hit_and_miss_counters(self):
+        cache = FuzzyScoreCache()
+        assert cache.get(('a', 'b')) is None
+        cache.put(('a', 'b'), 90)
+        assert cache.get(('a', 'b')) == 90
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_zero_score_is_a_hit(self):
+        cache = FuzzyScoreCache()
+        cache.put(('a', 'z'), 0)
+        assert cache.get(('a', 'z')) == 0
+        assert cache.hits == 1
+
+    def test_lru_eviction(self):
+        cache = FuzzyScoreCache(max_entries=2)
+        cache.put(('a', '1'), 1)
+        cache.put(('a', '2'), 2)
+        cache.get(('a', '1'))  # refresh -> ('a', '2') is now least recent
+        cache.put(('a', '3'), 3)
+
+        assert len(cache) == 2
+        assert cache.evictions == 1
+        assert ('a', '2') not in cache
+        assert ('a', '1') in cache
+
+    def test_disk_tier_round_trip(self, tmp_path):
+        db_path = str(tmp_path / 'cache.db')
+        cache = FuzzyScoreCache(db_path=db_path)
+        cache.put(('cash dep', 'cash deposit'), 88)
+        cache.close()
+
+        reopened = FuzzyScoreCache(db_path=db_path)
+        assert reopened.get(('cash dep', 'cash deposit')) == 88
+        assert reopened.disk_hits == 1
+        assert len(reopened) == 1
+
+    def test_evicted_entries_come_back_from_disk(self, tmp_path):
+        cache = FuzzyScoreCache(max_entries=1, db_path=str(tmp_path / 'cache.db'))
+        cache.put(('a', '1'), 10)
+        cache.put(('a', '2'), 20)
+        cache.flush()
+
+        assert cache.get(('a', '1')) == 10
+        assert cache.disk_hits == 1
+
+    def test_shared_cache_is_reused(self):
+        assert get_shared_cache(max_entries=123) is get_shared_cache(max_entries=123)
+
+    def test_stats(self):
+        cache = FuzzyScoreCache()
+        cache.put(('x', 'y'), 50)
+        assert cache.stats() == {'entries': 1, 'hits': 0, 'misses': 0, 'evictions': 0, 'disk_hits': 0}
@@ -0,0 +1,148 @@
+"""
+Tests for the Bank-mode match plan of the legacy reconciliation.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from src.match_plan import MatchPlan, ColumnCache, ColumnSide, match_branch, DATE, NUMBER, TEXT
+
+
+class TestColumnSide:
+    """Test per-cell typing of match columns."""
+
+    def test_kinds(self):
+        side = ColumnSide(['2024-01-05', '100.50', 'INV001', 250.0, np.nan])
+        assert list(side.kind) == [DATE, NUMBER, TEXT, NUMBER, TEXT]
+
+    def test_date_formats_share_a_key(self):
+        side = ColumnSide(['2024-01-05', pd.Timestamp('2024-01-05'), '20240105'])
+        assert len(set(side.key)) == 1
+
+    def test_numbers_are_not_nanosecond_dates(self):
+        side = ColumnSide([100.0, 100.4])
+        assert side.key[0] != side.key[1]
+
+    def test_cents(self):
+        side = ColumnSide(['(1,234.50)', '99.99', 12.345, None, 'abc'])
+        assert list(side.cents[:3]) == [-123450, 9999, 1234]
+        assert list(side.has_amount) == [True, True, True, False, False]
+
+    def test_dates_array(self):
+        side = ColumnSide(['2024-01-05', 'INV1'])
+        assert side.dates.dtype == np.dtype('datetime64[ns]')
+        assert side.dates[0] == np.datetime64('2024-01-05')
+        assert np.isnat(side.dates[1])
+
+
+class TestColumnCache:
+    """Test the typed-column cache shared by Bank and Branch mode."""
+
+    def test_columns_prepared_once(self):
+        st = pd.DataFrame({'Ref ': ['A']})
+        cb = pd.DataFrame({'Ref': ['A']})
+        cache = ColumnCache(st, cb)
+        assert cache.get('st', 'ref') is cache.get('st', 'REF ')
+        assert cache.get('st', 'ref') is not cache.get('cb', 'ref')
+
+        plan = MatchPlan(st, cb, [('ref', 'ref')], cache=cache)
+        assert plan.columns[0].st is cache.get('st', 'Ref ')
+
+    def test_missing_column_reads_empty(self):
+        cache = ColumnCache(pd.DataFrame({'A': [1, 2]}), pd.DataFrame({'B': [3]}))
+        assert list(cache.get('st', 'Nope').text) == ['', '']
+
+
+class TestMatchPlan:
+    """Test the tier assignment of MatchPlan."""
+
+    def test_exact_and_fuzzy_columns(self):
+        st = pd.DataFrame({'Date': ['2024-01-01', '2024-01-02'], 'Amount': ['100.00', '50.00'],
+                           'Ref': ['ACME LTD', 'BETA CO']})
+        cb = pd.DataFrame({'Date': ['2024-01-02', '01/01/2024'], 'Amount': [50.0, 100.0],
+                           'Ref': ['BETA COMPANY', 'ACME LTD.']})
+        plan = MatchPlan(st, cb, [('Date', 'Date'), ('Amount', 'Amount'), ('Ref', 'Ref')],
+                         [False, False, True])
+        pairs = plan.run()
+
+        assert pairs['100% MATCH'] == [(0, 1)]
+        # Reference ratio is below 85, so only two of three columns match
+        assert pairs['BALANCED'] == [(1, 0)]
+        assert len(pairs['UNMATCHED_ST']) == 0 and len(pairs['UNMATCHED_CB']) == 0
+
+    def test_first_open_cashbook_row_wins(self):
+        st = pd.DataFrame({'Amount': ['10', '10', '10']})
+        cb = pd.DataFrame({'Amount': ['10', '20', '10.0']})
+        pairs = MatchPlan(st, cb, [('Amount', 'Amount')]).run()
+
+        assert pairs['100% MATCH'] == [(0, 0), (1, 2)]
+        assert list(pairs['UNMATCHED_ST']) == [2]
+        assert list(pairs['UNMATCHED_CB']) == [1]
+
+    def test_balanced_needs_exactly_one_mismatch(self):
+        st = pd.DataFrame({'A': ['x'], 'B': ['y'], 'C': ['z']})
+        cb = pd.DataFrame({'A': ['x', 'x'], 'B': ['q', 'y'], 'C': ['q', 'q']})
+        pairs = MatchPlan(st, cb, [('A', 'A'), ('B', 'B'), ('C', 'C')]).run()
+        assert pairs['BALANCED'] == [(0, 1)]
+
+    def test_fuzzy_tiers(self):
+        st = pd.DataFrame({'Branch': ['JHB', 'CPT'], 'Ref': ['PAYMENT ACME', 'DEPOSIT 1234']})
+        cb = pd.DataFrame({'Branch': ['jhb ', 'CPT'], 'Ref': ['PAYMNT ACME', 'DEP 1234']})
+        plan = MatchPlan(st, cb, [('Branch', 'Branch'), ('Ref', 'Ref')], [False, True])
+        pairs = plan.run()
+
+        assert pairs['100% MATCH'] == [(0, 0)]
+        # 'DEPOSIT 1234' vs 'DEP 1234' scores 80: BALANCED (branch only) comes first
+        assert pairs['BALANCED'] == [(1, 1)]
+
+    def test_sixty_percent_tier(self):
+        st = pd.DataFrame({'Ref': ['DEPOSIT 1234']})
+        cb = pd.DataFrame({'Ref': ['DEP 12345']})
+        pairs = MatchPlan(st, cb, [('Ref', 'Ref')], [True]).run()
+        assert pairs['60% FUZZY'] == [(0, 0)]
+
+    def test_column_names_are_case_insensitive(self):
+        st = pd.DataFrame({'Reference ': ['A1']})
+        cb = pd.DataFrame({'REFERENCE': ['a1']})
+        pairs = MatchPlan(st, cb, [('reference', 'reference')]).run()
+        assert pairs['100% MATCH'] == [(0, 0)]
+
+    def test_progress_reported_per_tier(self):
+        st = pd.DataFrame({'Ref': ['A', 'B']})
+        cb = pd.DataFrame({'Ref': ['A']})
+        calls = []
+        MatchPlan(st, cb, [('Ref', 'Ref')]).run(lambda done, total: calls.append((done, total)))
+        assert calls == [(2, 2), (3, 2), (4, 2), (5, 2)]
+
+
+class TestBranchMatching:
+    """Test Branch-mode pairing on typed columns."""
+
+    def _frames(self):
+        cb = pd.DataFrame({
+            'Amount': ['100.00', '(50.00)', '1,000.00', '100.00'],
+            'Date': ['2024-01-01', '2024-01-01', '2024-01-02', '2024-01-01'],
+            'Ref': ['ACME', 'BETA', 'GAMMA', 'ACME'],
+        })
+        st = pd.DataFrame({
+            'Received': [100.0, None, 1000.0],
+            'Paid': [None, -50.0, None],
+            'Date': ['2024-01-01', '2024-01-01', '2024-01-02'],
+            'Ref': ['acme', 'beta', 'delta'],
+        })
+        return st, cb
+
+    def test_received_and_paid_amounts(self):
+        st, cb = self._frames()
+        pairs, candidates = match_branch(ColumnCache(st, cb), 'Amount', 'Received', 'Paid',
+                                         ('Date', 'Date'), ('Ref', 'Ref'))
+        # Row 2 has the right date and amount but its reference scores below 90
+        assert pairs == [(0, 0), (1, 1)]
+        assert candidates == 4
+
+    def test_pairs_are_scored_individually(self):
+        st, cb = self._frames()
+        st.loc[0, 'Ref'] = 'zzzz'
+        pairs, _ = match_branch(ColumnCache(st, cb), 'Amount', 'Received', 'Paid',
+                                ('Date', 'Date'), ('Ref', 'Ref'))
+        assert pairs == [(1, 1)]
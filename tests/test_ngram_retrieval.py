@@ -0,0 +1,80 @@
+"""
+Tests for IDF-weighted trigram candidate retrieval.
+"""
+
+import math
+import pytest
+import numpy as np
+from utils.ngram_retrieval import NgramRetriever, top_k_mask
+
+
+REFS = ['csh dep jhb 1234', 'csh dep jhb 9876', 'csh dep cpt 1234', 'eft payment acme', 'acme eft pay', 'ab', '']
+
+
+def _trigrams(s):
+    s = s.strip().lower()
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def _cosine(query, ref, docs):
+    """Reference IDF cosine computed with Python sets."""
+    n_docs = sum(1 for d in docs if d)
+    idf = lambda g: math.log((n_docs + 1) / (sum(g in d for d in docs) + 1)) + 1
+    a, b = _trigrams(query), _trigrams(ref)
+    if not a or not b:
+        return 0.0
+    shared = sum(idf(g) ** 2 for g in a & b)
+    return shared / math.sqrt(sum(idf(g) ** 2 for g in a) * sum(idf(g) ** 2 for g in b))
+
+
+class TestNgramRetriever:
+    """Test IDF weighting, pair scoring and batched top-k."""
+
+    def test_score_pairs_matches_python_cosine(self):
+        retriever = NgramRetriever.build(REFS)
+        docs = [_trigrams(r) for r in REFS]
+        query = 'CSH DEP JHB 1234'
+        scores = retriever.score_pairs([query], np.zeros(len(REFS), dtype=int), np.arange(len(REFS)))
+        expected = [_cosine(query, r, docs) for r in REFS]
+        assert np.allclose(scores, expected)
+        assert scores[0] == pytest.approx(1.0)
+
+    def test_common_trigrams_weigh_less(self):
+        retriever = NgramRetriever.build(REFS)
+        scores = retriever.score_pairs(['csh dep xyz 1234'], [0, 0], [1, 2])
+        # Sharing the rare '1234' beats sharing only the common 'csh dep'
+        assert scores[1] > scores[0]
+
+    def test_top_k_batched(self):
+        retriever = NgramRetriever.build(REFS)
+        offsets, rows, scores = retriever.top_k(['csh dep jhb 1234', 'acme payment', 'zz'], k=2)
+
+        assert list(offsets) == [0, 2, 4, 4]
+        assert list(rows[:2]) == [0, 1]
+        assert set(rows[2:4]) == {3, 4}
+        assert np.all(np.diff(scores[:2]) <= 0)
+
+    def test_top_k_matches_pair_scores(self):
+        retriever = NgramRetriever.build(REFS)
+        offsets, rows, scores = retriever.top_k(['dep jhb 9876'], k=10)
+        expected = retriever.score_pairs(['dep jhb 9876'], np.zeros(len(rows), dtype=int), rows)
+        assert np.allclose(scores, expected)
+
+    def test_top_k_posting_budget_keeps_rare_grams(self):
+        retriever = NgramRetriever.build(REFS)
+        offsets, rows, scores = retriever.top_k(['csh dep jhb 9876'], k=3, max_postings=1)
+        # Only the rarest trigram is expanded: the one row holding it comes back
+        assert list(rows) == [1]
+        assert 0 < scores[0] < 1
+
+    def test_queries_without_trigrams(self):
+        retriever = NgramRetriever.build(REFS)
+        offsets, key_ids, norms = retriever.encode_queries(['ab', ''])
+        assert list(offsets) == [0, 0, 0]
+        assert list(norms) == [0, 0]
+        assert list(retriever.score_pairs(['ab'], [0], [0])) == [0.0]
+
+    def test_top_k_mask(self):
+        mask = top_k_mask(np.array([0.1, 0.0, 0.5, 0.5, 0.2]), 2)
+        assert list(mask) == [False, False, True, True, False]
+        assert list(top_k_mask(np.array([0.0, 0.3]), 5)) == [False, True]
@@ -0,0 +1,99 @@
+"""
+Tests for group-parallel debit/credit pair matching.
+"""
+
+import numpy as np
+from utils.pair_matching import match_pairs_by_group
+
+
+PASSES = [
+    ('exact', [(0, 0)]),
+    ('fd', [(100, None)]),
+    ('fc', [(None, -100)]),
+    ('rate', [(1, 99), (-99, -1)]),
+]
+
+
+def _sequential(groups, debit, credit, passes):
+    """Row-by-row greedy with the same rules, for comparison."""
+    is_debit = (groups >= 0) & (debit > 0)
+    is_credit = (groups >= 0) & ~is_debit & (credit > 0)
+    amount = np.where(is_debit, debit, credit)
+    used = np.zeros(len(groups), dtype=bool)
+    result = {}
+    for name, windows in passes:
+        pairs = []
+        for lo, hi in windows:
+            lo = -np.inf if lo is None else lo
+            hi = np.inf if hi is None else hi
+            for g in np.unique(groups[groups >= 0]):
+                key = lambda i: (amount[i], i)
+                debits = sorted(np.flatnonzero(is_debit & (groups == g) & ~used), key=key)
+                credits = sorted(np.flatnonzero(is_credit & (groups == g) & ~used), key=key)
+                for d in debits:
+                    for c in credits:
+                        if not used[c] and lo <= amount[d] - amount[c] <= hi:
+                            used[c] = used[d] = True
+                            pairs.append((d, c))
+                            break
+        pairs.sort()
+        result[name] = ([d for d, _ in pairs], [c for _, c in pairs])
+    return result
+
+
+class TestMatchPairsByGroup:
+    """Test pass priority, one-to-one pairing and agreement with the greedy loop."""
+
+    def test_batches_in_priority_order(self):
+        groups = np.array([0, 0, 1, 1, 2, 2, 3])
+        debit = np.array([10000, 0, 5000, 0, 2050, 0, 700])
+        credit = np.array([0, 10000, 0, 4800, 0, 2000, 0])
+        pairs = match_pairs_by_group(groups, debit, credit, PASSES)
+
+        assert [list(pairs['exact'][0]), list(pairs['exact'][1])] == [[0], [1]]
+        assert [list(pairs['fd'][0]), list(pairs['fd'][1])] == [[2], [3]]
+        assert len(pairs['fc'][0]) == 0
+        assert [list(pairs['rate'][0]), list(pairs['rate'][1])] == [[4], [5]]
+
+    def test_exact_pass_runs_before_commission(self):
+        # Row by row, debit 0 would take credit 2 as commission before debit 1 saw it
+        groups = np.zeros(4, dtype=int)
+        debit = np.array([20000, 10000, 0, 0])
+        credit = np.array([0, 0, 10000, 5000])
+        pairs = match_pairs_by_group(groups, debit, credit, PASSES)
+        assert list(zip(*pairs['exact'])) == [(1, 2)]
+        assert list(zip(*pairs['fd'])) == [(0, 3)]
+
+    def test_excluded_rows_and_groups_stay_apart(self):
+        groups = np.array([0, 1, -1, 0])
+        debit = np.array([100, 0, 100, 0])
+        credit = np.array([0, 100, 0, 0])
+        pairs = match_pairs_by_group(groups, debit, credit, PASSES)
+        assert all(len(d) == 0 for d, _ in pairs.values())
+
+    def test_matches_sequential_greedy(self):
+        rng = np.random.default_rng(3)
+        for _ in range(200):
+            n = int(rng.integers(1, 40))
+            groups = rng.integers(-1, int(rng.integers(1, 5)), n)
+            debit = np.where(rng.random(n) < 0.5, rng.integers(0, 600, n), 0)
+            credit = np.where(debit == 0, rng.integers(0, 600, n), 0)
+
+            pairs = match_pairs_by_group(groups, debit, credit, PASSES)
+            expected = _sequential(groups, debit, credit, PASSES)
+            for name, (debit_rows, credit_rows) in pairs.items():
+                assert list(debit_rows) == expected[name][0]
+                assert list(credit_rows) == expected[name][1]
+
+    def test_one_to_one(self):
+        rng = np.random.default_rng(5)
+        groups = rng.integers(0, 50, 5000)
+        debit = np.where(rng.random(5000) < 0.5, rng.integers(1, 100000, 5000), 0)
+        credit = np.where(debit == 0, rng.integers(1, 100000, 5000), 0)
+        pairs = match_pairs_by_group(groups, debit, credit, PASSES)
+
+        used = np.concatenate([np.concatenate(p) for p in pairs.values()])
+        assert len(used) == len(np.unique(used))
+        for debit_rows, credit_rows in pairs.values():
+            assert np.array_equal(groups[debit_rows], groups[credit_rows])
+            assert (debit[debit_rows] > 0).all() and (credit[credit_rows] > 0).all()
@@ -0,0 +1,121 @@
+"""
+Tests for the shared amount and date parsers.
+"""
+
+import warnings
+
+import pytest
+import numpy as np
+import pandas as pd
+from utils.parsers import ParseReport, amount_cents, date_days, parse_amounts, parse_dates, sniff_date_format
+
+
+class TestParseAmounts:
+    """Test vectorized amount parsing."""
+
+    def test_numeric_column_passes_through(self):
+        result = parse_amounts(pd.Series([1.5, -2, np.nan]))
+        assert result.tolist() == [1.5, -2.0, 0.0]
+        assert result.dtype == np.float64
+
+    def test_excel_paste_formats(self):
+        values = ['R 1,234.50', '(500.00)', '250-', '$ 1 000', "1'234.5", '-75']
+        assert parse_amounts(pd.Series(values)).tolist() == [1234.5, -500.0, -250.0, 1000.0, 1234.5, -75.0]
+
+    def test_accounting_negative_with_minus(self):
+        assert parse_amounts(pd.Series(['(-100)'])).tolist() == [-100.0]
+
+    def test_blank_and_unparseable(self):
+        result = parse_amounts(pd.Series(['', None, 'abc', '-']), fill_value=None)
+        assert result.isna().all()
+        assert parse_amounts(pd.Series(['', 'abc'])).tolist() == [0.0, 0.0]
+
+    def test_keeps_index(self):
+        result = parse_amounts(pd.Series(['1', '2,000'], index=[10, 20]))
+        assert list(result.index) == [10, 20]
+
+    def test_amount_cents(self):
+        cents = amount_cents(pd.Series(['0.10', '0.20', '1,000.01']))
+        assert cents.dtype == np.int64
+        assert cents.tolist() == [10, 20, 100001]
+
+    def test_thousand_separators_skip_cleanup(self):
+        report = ParseReport()
+        result = parse_amounts(pd.Series(['1,234.50', '-2,000', '1,000,000']), report=report)
+        assert result.tolist() == [1234.5, -2000.0, 1000000.0]
+        assert report.columns['Amount']['failed'] == 0
+
+    def test_non_finite_and_overflowing_amounts_fail(self):
+        report = ParseReport()
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            cents = amount_cents(pd.Series(['inf', '1e30', '-inf', '12.34']), report=report)
+        assert cents.tolist() == [0, 0, 0, 1234]
+        assert report.columns['Amount']['failed'] == 3
+        assert report.columns['Amount']['parsed'] == 1
+
+
+class TestParseDates:
+    """Test date format sniffing and parsing."""
+
+    def test_sniffs_single_format(self):
+        text = pd.Series(['2024-01-15', '2024-02-03', '2024-12-31'])
+        assert sniff_date_format(text) == '%Y-%m-%d'
+
+    def test_dayfirst_column(self):
+        dates = parse_dates(pd.Series(['01/02/2024', '25/02/2024']), dayfirst=True)
+        assert dates.tolist() == [pd.Timestamp('2024-02-01'), pd.Timestamp('2024-02-25')]
+
+    def test_sniffing_resolves_ambiguous_rows(self):
+        # 13/02 is only valid day-first, so 01/02 is read the same way
+        dates = parse_dates(pd.Series(['13/02/2024', '01/02/2024']))
+        assert dates.tolist() == [pd.Timestamp('2024-02-13'), pd.Timestamp('2024-02-01')]
+
+    def test_mixed_formats_fall_back(self):
+        dates = parse_dates(pd.Series(['2024-01-15', '2024-01-16', '15 Jan 2024']))
+        assert dates.notna().all()
+        assert dates.iloc[2] == pd.Timestamp('2024-01-15')
+
+    def test_numbers(self):
+        dates = parse_dates(pd.Series([20240115, 45306]))
+        assert dates.tolist() == [pd.Timestamp('2024-01-15'), pd.Timestamp('2024-01-15')]
+
+    def test_timestamps_and_datetime_columns(self):
+        stamps = pd.Series([pd.Timestamp('2024-03-01'), None], dtype=object)
+        assert parse_dates(stamps).iloc[0] == pd.Timestamp('2024-03-01')
+        column = pd.Series(pd.to_datetime(['2024-03-01']))
+        assert parse_dates(column).iloc[0] == pd.Timestamp('2024-03-01')
+
+    def test_blank_and_invalid_are_nat(self):
+        dates = parse_dates(pd.Series(['', None, 'not a date']))
+        assert dates.isna().all()
+
+    def test_date_days(self):
+        days = date_days(pd.Series(['2024-01-15 13:45']))
+        assert days.dtype == np.dtype('datetime64[D]')
+        assert days[0] == np.datetime64('2024-01-15')
+
+
+class TestParseReport:
+    """Test opt-in parse statistics."""
+
+    def test_records_columns(self):
+        report = ParseReport()
+        parse_amounts(pd.Series(['1', 'R 2', 'bad', '']), 'Amount', report=report)
+        parse_dates(pd.Series(['2024-01-01', 'nope']), 'Date', report=report)
+
+        amount = report.columns['Amount']
+        assert amount['kind'] == 'amount'
+        assert (amount['parsed'], amount['blank'], amount['cleaned'], amount['failed']) == (2, 1, 2, 1)
+        assert amount['failed_examples'] == ['bad']
+
+        date = report.columns['Date']
+        assert date['format'] == '%Y-%m-%d'
+        assert date['failed'] == 1
+        assert report.failed == 2
+
+    def test_summary_and_frame(self):
+        report = ParseReport()
+        parse_amounts(pd.Series(['x']), 'Debit', report=report)
+        assert report.summary()[0].startswith('Debit (amount): 0/1 parsed')
+        assert list(report.to_frame()['column']) == ['Debit']
@@ -224,3 +224,302 @@ class TestAmountParsing:
         assert engine._parse_amount(None) == 0.0
         assert engine._parse_amount(float('nan')) == 0.0
         assert engine._parse_amount('') == 0.0
+
+    def test_amounts_stored_as_cents(self):
+        """Float drift (0.1 + 0.2) still keys to the same cents."""
+        ledger = pd.DataFrame({'Date': ['2024-01-01'], 'Ref': ['X'], 'Amt': [0.1 + 0.2]})
+        statement = pd.DataFrame({'Date': ['2024-01-01'], 'Ref': ['X'], 'Amt': ['0.30']})
+        engine = ReconciliationEngine(ledger, statement, 'Amt', 'Amt', 'Date', 'Date', 'Ref', 'Ref')
+
+        assert engine.ledger_df['_cents'].dtype == np.int64
+        assert engine._ledger_cents.tolist() == engine._stmt_cents.tolist() == [30]
+        assert engine.reconcile()['perfect_match_count'] == 1
+
+
+class TestFuzzyAmountWindow:
+    """Fuzzy candidates come from a sorted-cents range query."""
+
+    def _engine(self, ledger, statement, **kwargs):
+        return ReconciliationEngine(
+            ledger, statement, 'Debit', 'Amount', 'Date', 'Date', 'Reference', 'Reference',
+            fuzzy_threshold=70, enable_ai=False, **kwargs
+        )
+
+    def test_large_amounts_within_tolerance(self):
+        """A R1,000,000 line (R1,000 window at 0.1%) resolves in one slice."""
+        ledger = pd.DataFrame({
+            'Date': ['2024-01-01'] * 200,
+            'Reference': [f'TRANSFER {i:04d}' for i in range(200)],
+            'Debit': [1_000_000.0 + i for i in range(200)],
+        })
+        statement = ledger.rename(columns={'Debit': 'Amount'})
+        statement['Reference'] = statement['Reference'].str.replace('TRANSFER', 'TRF')
+        statement['Amount'] = statement['Amount'] + 500.0
+
+        engine = self._engine(ledger, statement)
+        engine.reconcile()
+
+        assert len(engine.fuzzy_matches) == 200
+        assert all(m['ledger_idx'] == m['statement_idx'] for m in engine.fuzzy_matches)
+
+    def test_matched_rows_leave_the_window(self):
+        ledger = pd.DataFrame({
+            'Date': ['2024-01-01', '2024-01-01'],
+            'Reference': ['PAYMENT ABC', 'PAYMENT ABD'],
+            'Debit': [100.0, 100.0],
+        })
+        statement = pd.DataFrame({'Date': ['2024-01-02'], 'Reference': ['PAYMENT ABX'], 'Amount': [100.05]})
+
+        engine = self._engine(ledger, statement)
+        engine.reconcile()
+
+        assert [(m['ledger_idx'], m['statement_idx']) for m in engine.fuzzy_matches] == [(0, 0)]
+        assert engine._stmt_matched.all()
+
+    def test_outside_date_tolerance(self):
+        ledger = pd.DataFrame({'Date': ['2024-01-01'], 'Reference': ['PAYMENT ABC'], 'Debit': [100.0]})
+        statement = pd.DataFrame({'Date': ['2024-01-09'], 'Reference': ['PAYMENT ABX'], 'Amount': [100.0]})
+
+        engine = self._engine(ledger, statement, date_tolerance=3)
+        engine.reconcile()
+        assert len(engine.fuzzy_matches) == 0
+
+
+class TestIdentifierMatching:
+    """Rows sharing an embedded identifier are joined before fuzzy scoring."""
+
+    def test_identifier_hash_join(self):
+        ledger = pd.DataFrame({
+            'Date': ['2024-01-01', '2024-01-01', '2024-01-01'],
+            'Reference': ['Deposit CSH891089488 Jenet', 'Airtime 0821234567', 'PAYMENT ABC'],
+            'Debit': [250.0, 30.0, 75.0],
+        })
+        statement = pd.DataFrame({
+            'Date': ['2024-01-02', '2024-01-02', '2024-01-02'],
+            'Reference': ['csh-891089488', 'MTN 0821234567 PREPAID', 'PAYMENT ABX'],
+            'Amount': [250.0, 30.0, 75.0],
+        })
+        engine = ReconciliationEngine(ledger, statement, 'Debit', 'Amount', 'Date', 'Date',
+                                      'Reference', 'Reference', fuzzy_threshold=70, enable_ai=False)
+        results = engine.reconcile()
+
+        assert [(m['ledger_idx'], m['statement_idx'], m['match_score']) for m in engine.fuzzy_matches][:2] == [
+            (0, 0, 100.0), (1, 1, 100.0)]
+        assert results['decided_by'] == {'ref_id': 1, 'phone': 1, 'fuzzy': 1}
+
+    def test_identifier_respects_amount_tolerance(self):
+        ledger = pd.DataFrame({'Date': ['2024-01-01'], 'Reference': ['CSH891089488'], 'Debit': [250.0]})
+        statement = pd.DataFrame({'Date': ['2024-01-01'], 'Reference': ['CSH891089488 x'], 'Amount': [300.0]})
+        engine = ReconciliationEngine(ledger, statement, 'Debit', 'Amount', 'Date', 'Date',
+                                      'Reference', 'Reference', enable_ai=False)
+        assert engine.reconcile()['decided_by'] == {}
+
+
+class TestResultView:
+    """Test lazy materialization of the result frames."""
+
+    def _reconcile(self):
+        ledger = pd.DataFrame({
+            'Date': ['2024-01-01', '2024-01-02', '2024-01-03'],
+            'Reference': ['TXN001', 'PAYMENT ABC', 'ORPHAN'],
+            'Debit': [100.0, 250.0, 75.0],
+        })
+        statement = pd.DataFrame({
+            'Date': ['2024-01-01', '2024-01-02', '2024-01-05'],
+            'Reference': ['TXN001', 'PAYMENT ABX', 'BANK FEE'],
+            'Amount': [100.0, 250.0, 12.5],
+        })
+        engine = ReconciliationEngine(
+            ledger_df=ledger, statement_df=statement,
+            ledger_amount_col='Debit', statement_amount_col='Amount',
+            ledger_date_col='Date', statement_date_col='Date',
+            ledger_ref_col='Reference', statement_ref_col='Reference',
+        )
+        return engine.reconcile()
+
+    def test_frames_built_on_first_access(self):
+        results = self._reconcile()
+        assert results._frames == {}
+        assert results['perfect_match_count'] == 1
+        assert results._frames == {}
+
+        perfect = results['perfect_matches']
+        assert results['perfect_matches'] is perfect
+        assert list(results._frames) == ['perfect_matches']
+
+    def test_match_frame_layout(self):
+        results = self._reconcile()
+        fuzzy = results['fuzzy_matches']
+
+        assert list(fuzzy.columns) == [
+            'Ledger_Date', 'Ledger_Reference', 'Ledger_Debit',
+            'Statement_Date', 'Statement_Reference', 'Statement_Amount', 'Match_Score',
+        ]
+        assert fuzzy.iloc[0]['Ledger_Reference'] == 'PAYMENT ABC'
+        assert fuzzy.iloc[0]['Statement_Reference'] == 'PAYMENT ABX'
+        assert fuzzy.iloc[0]['Match_Score'] >= 85
+
+    def test_unmatched_frame_tags_source(self):
+        results = self._reconcile()
+        unmatched = results['unmatched']
+
+        assert list(unmatched['Source']) == ['Ledger', 'Statement']
+        assert list(unmatched['Reference']) == ['ORPHAN', 'BANK FEE']
+        assert not any(str(c).startswith('_') for c in unmatched.columns)
+
+    def test_behaves_like_results_dict(self):
+        results = self._reconcile()
+        assert results.get('balanced', pd.DataFrame()).empty
+        assert results.get('missing') is None
+        assert set(dict(results)) >= {'perfect_matches', 'unmatched', 'match_rate', 'timestamp'}
+
+
+class TestBalancedMatching:
+    """Test k-way split matching in both directions."""
+
+    def _engine(self, ledger, statement, **kwargs):
+        return ReconciliationEngine(
+            ledger, statement, 'Debit', 'Amount', 'Date', 'Date', 'Reference', 'Reference', **kwargs
+        )
+
+    def test_three_ledger_rows_to_one_statement(self):
+        ledger = pd.DataFrame({
+            'Date': ['2024-01-02'] * 3,
+            'Reference': ['INV 1', 'INV 2', 'INV 3'],
+            'Debit': [100.0, 250.5, 49.5],
+        })
+        statement = pd.DataFrame({'Date': ['2024-01-03'], 'Reference': ['BULK PAYMENT'], 'Amount': [400.0]})
+
+        engine = self._engine(ledger, statement, unblocked_splits=True)
+        results = engine.reconcile()
+
+        assert results['balanced_count'] == 1
+        match = next(iter(engine.balanced_matches))
+        assert match['split_side'] == 'ledger'
+        assert match['split_indices'] == [0, 1, 2]
+        assert results['unmatched_count'] == 0
+
+    def test_one_ledger_row_to_many_statement_rows(self):
+        ledger = pd.DataFrame({'Date': ['2024-01-02'], 'Reference': ['SALARY RUN'], 'Debit': [900.0]})
+        statement = pd.DataFrame({
+            'Date': ['2024-01-02'] * 3,
+            'Reference': ['EMP A', 'EMP B', 'EMP C'],
+            'Amount': [300.0, 450.0, 150.0],
+        })
+
+        engine = self._engine(ledger, statement, unblocked_splits=True)
+        engine.reconcile()
+
+        match = next(iter(engine.balanced_matches))
+        assert match['split_side'] == 'statement'
+        assert match['split_indices'] == [0, 1, 2]
+        assert engine._stmt_matched.all()
+
+    def test_split_beyond_first_200_ledger_rows(self):
+        ledger = pd.DataFrame({
+            'Date': ['2024-01-02'] * 302,
+            'Reference': [f'ROW {i}' for i in range(302)],
+            'Debit': [1.0 + i * 1000 for i in range(300)] + [123.45, 76.55],
+        })
+        statement = pd.DataFrame({'Date': ['2024-01-02'], 'Reference': ['DEPOSIT'], 'Amount': [200.0]})
+
+        engine = self._engine(ledger, statement)
+        engine.reconcile()
+
+        assert [m['split_indices'] for m in engine.balanced_matches] == [[300, 301]]
+
+    def test_pair_complement_across_window_days(self):
+        ledger = pd.DataFrame({
+            'Date': ['2024-01-02', '2024-01-02', '2024-01-04'],
+            'Reference': ['A', 'B', 'C'],
+            'Debit': [50.0, 150.0, 50.0],
+        })
+        statement = pd.DataFrame({'Date': ['2024-01-03'], 'Reference': ['X'], 'Amount': [100.0]})
+
+        engine = self._engine(ledger, statement, date_tolerance=1)
+        engine.reconcile()
+        assert [m['split_indices'] for m in engine.balanced_matches] == [[0, 2]]
+
+        # A part is never its own complement
+        engine = self._engine(ledger.iloc[:2], statement, date_tolerance=1)
+        engine.reconcile()
+        assert len(engine.balanced_matches) == 0
+
+    def test_parts_outside_date_window_ignored(self):
+        ledger = pd.DataFrame({
+            'Date': ['2024-01-02', '2024-02-20'],
+            'Reference': ['INV 1', 'INV 2'],
+            'Debit': [60.0, 40.0],
+        })
+        statement = pd.DataFrame({'Date': ['2024-01-02'], 'Reference': ['PAYMENT'], 'Amount': [100.0]})
+
+        engine = self._engine(ledger, statement, date_tolerance=3)
+        engine.reconcile()
+        assert len(engine.balanced_matches) == 0
+
+    def test_similar_references_searched_first(self):
+        ledger = pd.DataFrame({
+            'Date': ['2024-01-02'] * 4,
+            'Reference': ['OTHER', 'ACME LTD', 'MISC', 'ACME LTD'],
+            'Debit': [30.0, 40.0, 70.0, 60.0],
+        })
+        statement = pd.DataFrame({'Date': ['2024-01-02'], 'Reference': ['ACME LTD'], 'Amount': [100.0]})
+
+        engine = self._engine(ledger, statement)
+        engine.reconcile()
+        assert [m['split_indices'] for m in engine.balanced_matches] == [[1, 3]]
+
+    def test_max_split_items_limit(self):
+        ledger = pd.DataFrame({
+            'Date': ['2024-01-02'] * 4,
+            'Reference': ['A', 'B', 'C', 'D'],
+            'Debit': [10.0, 20.0, 30.0, 40.0],
+        })
+        statement = pd.DataFrame({'Date': ['2024-01-02'], 'Reference': ['X'], 'Amount': [100.0]})
+
+        assert len(self._engine(ledger, statement, max_split_items=3, unblocked_splits=True).reconcile()['balanced']) == 0
+        assert self._engine(ledger, statement, max_split_items=4, unblocked_splits=True).reconcile()['balanced_count'] == 1
+
+    def test_unrelated_multi_part_splits_need_opt_in(self):
+        ledger = pd.DataFrame({
+            'Date': ['2024-01-02'] * 3,
+            'Reference': ['INV 1', 'INV 2', 'INV 3'],
+            'Debit': [100.0, 250.5, 49.5],
+        })
+        statement = pd.DataFrame({'Date': ['2024-01-03'], 'Reference': ['BULK PAYMENT'], 'Amount': [400.0]})
+
+        assert self._engine(ledger, statement).reconcile()['balanced_count'] == 0
+
+    def test_shared_identifier_blocks_split(self):
+        ledger = pd.DataFrame({
+            'Date': ['2024-01-02'] * 3,
+            'Reference': ['Part RJ12345678', 'Other RJ12345678', 'Rest RJ12345678'],
+            'Debit': [100.0, 250.5, 49.5],
+        })
+        statement = pd.DataFrame({'Date': ['2024-01-03'], 'Reference': ['Deposit rj12345678'], 'Amount': [400.0]})
+
+        engine = self._engine(ledger, statement)
+        assert engine.reconcile()['balanced_count'] == 1
+        assert next(iter(engine.balanced_matches))['split_indices'] == [0, 1, 2]
+
+    def test_sequential_references_among_unrelated_rows(self):
+        rng = np.random.default_rng(5)
+        ledger_rows = [{'Date': '2024-01-02', 'Reference': f'LEDGER ITEM {i}',
+                        'Debit': float(rng.integers(100, 500000)) / 100} for i in range(400)]
+        stmt_rows = [{'Date': '2024-01-02', 'Reference': f'STATEMENT LINE {i}',
+                      'Amount': float(rng.integers(100, 500000)) / 100} for i in range(100)]
+        planted = {}
+        for k in range(20):
+            ref = f'PAYMENT BATCH {900000 + k}'
+            parts = rng.integers(1000, 200000, 3)
+            planted[len(stmt_rows)] = list(range(len(ledger_rows), len(ledger_rows) + 3))
+            ledger_rows += [{'Date': '2024-01-02', 'Reference': ref, 'Debit': float(c) / 100} for c in parts]
+            stmt_rows.append({'Date': '2024-01-03', 'Reference': ref, 'Amount': float(parts.sum()) / 100})
+
+        engine = self._engine(pd.DataFrame(ledger_rows), pd.DataFrame(stmt_rows))
+        engine.reconcile()
+
+        found = {m['statement_idx']: m['split_indices'] for m in engine.balanced_matches
+                 if m['split_side'] == 'ledger'}
+        assert {s: found.get(s) for s in planted} == planted
+        assert not any(len(parts) > 2 for s, parts in found.items() if s not in planted)
@@ -0,0 +1,70 @@
+"""
+Tests for settlement batch classification.
+"""
+
+import time
+
+import numpy as np
+
+from src.settlement_batches import BATCH_KEYS, batch_variance, classify_rows
+
+
+def _sequential(fd, fc, multi, threshold, tolerance):
+    """Row-by-row rules of the settlement workflow, for comparison."""
+    codes = []
+    for fd_amount, fc_amount, is_multi in zip(fd.tolist(), fc.tolist(), multi):
+        difference = abs(fd_amount - fc_amount)
+        larger = max(fd_amount, fc_amount)
+        percent = (difference / larger) * 100 if larger != 0 else 100
+        within = percent <= threshold or difference <= tolerance
+        if not is_multi:
+            codes.append('batch_5')
+        elif difference < 0.01:
+            codes.append('batch_1')
+        elif not within:
+            codes.append('batch_4')
+        else:
+            codes.append('batch_2' if fd_amount > fc_amount else 'batch_3')
+    return [BATCH_KEYS.index(code) for code in codes]
+
+
+def _random_rows(n, seed=3):
+    rng = np.random.default_rng(seed)
+    fd = np.round(rng.uniform(0, 1000, n), 2)
+    fc = np.where(rng.random(n) < 0.3, fd, np.round(fd * rng.uniform(0.8, 1.2, n), 2))
+    fc[rng.random(n) < 0.05] = 0
+    group_ids = rng.integers(0, n // 2, n)
+    return fd, fc, group_ids
+
+
+class TestClassifyRows:
+    """Batch codes follow the 7%-threshold rules."""
+
+    def test_rules(self):
+        fd = np.array([100.0, 100.0, 94.0, 100.0, 0.0, 50.0, 100.0])
+        fc = np.array([100.0, 95.0, 100.0, 50.0, 0.3, 0.0, 100.0])
+        multi = np.array([True, True, True, True, True, True, False])
+        codes = classify_rows(fd, fc, multi, 7.0, 0.5)
+        assert [BATCH_KEYS[c] for c in codes] == [
+            'batch_1', 'batch_2', 'batch_3', 'batch_4', 'batch_3', 'batch_4', 'batch_5']
+
+    def test_variance(self):
+        difference, percent = batch_variance(np.array([100.0, 0.0]), np.array([90.0, 0.0]))
+        assert np.allclose(difference, [10.0, 0.0])
+        assert np.allclose(percent, [10.0, 100.0])
+
+    def test_matches_sequential_rules(self):
+        fd, fc, group_ids = _random_rows(3000)
+        multi = np.bincount(group_ids)[group_ids] > 1
+        codes = classify_rows(fd, fc, multi, 7.0, 0.5)
+        assert codes.tolist() == _sequential(fd, fc, multi, 7.0, 0.5)
+
+    def test_million_rows_in_one_pass(self):
+        fd, fc, group_ids = _random_rows(1_000_000)
+        multi = np.bincount(group_ids)[group_ids] > 1
+        start = time.time()
+        codes = classify_rows(fd, fc, multi, 7.0, 0.5)
+        elapsed = time.time() - start
+        assert len(codes) == 1_000_000
+        assert elapsed < 1.0, f"Classification took {elapsed:.2f}s (should be < 1s)"
+
@@ -0,0 +1,98 @@
+"""
+Tests for the integer-cents subset-sum kernels used by split detection.
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+from utils.subset_sum import (
+    WorkBudget, find_pair, find_subset_bitset, find_subset_mitm, find_subset_sum, to_cents,
+)
+
+
+def brute_force(values, min_target, max_target, target, max_items=6):
+    """(size, distance to target) of the best subset, or None."""
+    for size in range(2, max_items + 1):
+        diffs = [
+            abs(int(values[list(combo)].sum()) - target)
+            for combo in itertools.combinations(range(len(values)), size)
+            if min_target <= int(values[list(combo)].sum()) <= max_target
+        ]
+        if diffs:
+            return size, min(diffs)
+    return None
+
+
+class TestToCents:
+    def test_rounds_instead_of_truncating(self):
+        # int(0.29 * 100) == 28
+        assert list(to_cents([0.29, -1.005, 10.1])) == [29, 100, 1010]
+
+
+class TestFindPair:
+    def test_exact_pair(self):
+        assert find_pair(np.array([500, 120, 380, 700]), 500, 500) == [1, 2]
+
+    def test_closest_to_target_within_range(self):
+        values = np.array([100, 205, 300, 96])
+        assert find_pair(values, 390, 410, 400) == [0, 2]
+
+    def test_no_pair(self):
+        assert find_pair(np.array([1, 2, 4]), 10, 10) is None
+
+    def test_item_not_reused(self):
+        assert find_pair(np.array([50, 7]), 100, 100) is None
+
+
+class TestFindSubsetSum:
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            values = rng.integers(1, 60, size=int(rng.integers(2, 12)))
+            lo = int(rng.integers(20, 150))
+            hi = lo + int(rng.integers(0, 3))
+            target = (lo + hi) // 2
+            expected = brute_force(values, lo, hi, target)
+            picked = find_subset_sum(values, lo, hi, target)
+            if expected is None:
+                assert picked is None
+            else:
+                total = int(values[picked].sum())
+                assert (len(picked), abs(total - target)) == expected
+                assert len(set(picked)) == len(picked)
+
+    @pytest.mark.parametrize('kernel', [find_subset_mitm, find_subset_bitset])
+    def test_three_plus_kernels_agree(self, kernel):
+        values = np.array([1250, 999, 4001, 330, 75, 2500, 620])
+        picked = kernel(values, 5330, 5330)
+        assert int(values[picked].sum()) == 5330
+        assert 3 <= len(picked) <= 6
+
+    def test_fewest_items_preferred(self):
+        values = np.array([100, 200, 300, 600, 400])
+        assert find_subset_sum(values, 500, 500) in ([1, 2], [0, 4])
+        # A single item is never a split
+        assert find_subset_sum(values, 600, 600) == [1, 4]
+        assert find_subset_sum(np.array([100, 200, 300, 600]), 600, 600) == [0, 1, 2]
+
+    def test_large_block_uses_bitset(self):
+        values = np.arange(1, 61, dtype=np.int64) * 10 + 1
+        picked = find_subset_sum(values, 1503, 1503, min_items=3)
+        assert len(picked) == 3
+        assert int(values[picked].sum()) == 1503
+
+    def test_budget_exhaustion_is_deterministic(self):
+        rng = np.random.default_rng(3)
+        values = rng.integers(1_000, 2_000_000, size=200)
+        target = int(values[:3].sum())
+        results = []
+        for _ in range(2):
+            budget = WorkBudget(1_000)
+            results.append(find_subset_sum(values, target, target, min_items=3, budget=budget))
+            assert budget.exhausted
+        assert results[0] == results[1]
+
+    def test_ignores_non_positive_and_oversized_values(self):
+        values = np.array([0, -5, 400, 600, 10_000])
+        assert find_subset_sum(values, 1000, 1000) == [2, 3]
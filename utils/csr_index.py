@@ -0,0 +1,177 @@
+"""
+Compact CSR Index Structures
+============================
+Array-backed inverted indexes for the reconciliation engines.
+
+A CSRIndex stores a sorted int64 key array, an offsets array and an int32
+posting list (row positions), optionally with a uint8 side flag per posting.
+Postings for keys[i] live in postings[offsets[i]:offsets[i + 1]], so lookups
+are searchsorted range queries and the whole index is a handful of NumPy
+arrays instead of dicts of Python lists/sets.
+"""
+
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+# Rows per chunk when encoding trigrams (bounds the padded code-point matrix)
+TRIGRAM_CHUNK_ROWS = 1024
+
+
+class CSRIndex:
+    """
+    Immutable key -> postings index in compressed sparse row layout.
+
+    Attributes:
+        keys: Sorted unique int64 keys
+        offsets: int64 array of len(keys) + 1 boundaries into postings
+        postings: int32 row positions, grouped by key
+        side: Optional uint8 flag per posting (0 = debit, 1 = credit)
+    """
+
+    def __init__(self, keys: np.ndarray, offsets: np.ndarray, postings: np.ndarray,
+                 side: Optional[np.ndarray] = None):
+        self.keys = keys
+        self.offsets = offsets
+        self.postings = postings
+        self.side = side
+
+    @classmethod
+    def build(cls, keys, postings, side=None, unique: bool = False) -> 'CSRIndex':
+        """
+        Build an index from parallel (key, posting[, side]) arrays.
+
+        Within a key, postings are ordered by side and then by position, so
+        callers see debits before credits and rows in their original order.
+
+        Args:
+            keys: int64 key per posting
+            postings: Row position per posting
+            side: Optional side flag per posting
+            unique: Drop repeated (key, posting) pairs (e.g. repeated trigrams)
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        postings = np.asarray(postings, dtype=np.int64)
+        if side is not None:
+            side = np.asarray(side, dtype=np.uint8)
+            order = np.lexsort((postings, side, keys))
+        else:
+            order = np.lexsort((postings, keys))
+
+        keys = keys[order]
+        postings = postings[order]
+        if side is not None:
+            side = side[order]
+
+        if unique and len(keys) > 1:
+            keep = np.ones(len(keys), dtype=bool)
+            keep[1:] = (keys[1:] != keys[:-1]) | (postings[1:] != postings[:-1])
+            keys, postings = keys[keep], postings[keep]
+            if side is not None:
+                side = side[keep]
+
+        unique_keys, starts = np.unique(keys, return_index=True)
+        offsets = np.append(starts, len(keys)).astype(np.int64)
+        return cls(unique_keys, offsets, postings.astype(np.int32), side)
+
+    @classmethod
+    def empty(cls, with_side: bool = False) -> 'CSRIndex':
+        """An index with no keys."""
+        side = np.empty(0, dtype=np.uint8) if with_side else None
+        return cls(np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64),
+                   np.empty(0, dtype=np.int32), side)
+
+    def extend(self, other: 'CSRIndex', offset: int = 0) -> 'CSRIndex':
+        """
+        A new index holding these postings plus other's, shifted by `offset`.
+
+        Used when rows are appended: `other` is built over the new rows only
+        and `offset` is the number of rows already indexed.
+        """
+        keys = np.concatenate([np.repeat(self.keys, np.diff(self.offsets)),
+                               np.repeat(other.keys, np.diff(other.offsets))])
+        postings = np.concatenate([self.postings.astype(np.int64), other.postings.astype(np.int64) + offset])
+        side = None
+        if self.side is not None and other.side is not None:
+            side = np.concatenate([self.side, other.side])
+        return CSRIndex.build(keys, postings, side)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def num_postings(self) -> int:
+        return len(self.postings)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory footprint of the index arrays in bytes."""
+        total = self.keys.nbytes + self.offsets.nbytes + self.postings.nbytes
+        if self.side is not None:
+            total += self.side.nbytes
+        return total
+
+    def span(self, key) -> Tuple[int, int]:
+        """(start, end) of the postings for an exact key; (0, 0) if absent."""
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and self.keys[i] == key:
+            return int(self.offsets[i]), int(self.offsets[i + 1])
+        return 0, 0
+
+    def span_range(self, low_key, high_key) -> Tuple[int, int]:
+        """(start, end) of the postings for all keys in [low_key, high_key]."""
+        lo = int(np.searchsorted(self.keys, low_key, side='left'))
+        hi = int(np.searchsorted(self.keys, high_key, side='right'))
+        return int(self.offsets[lo]), int(self.offsets[max(lo, hi)])
+
+    def lookup(self, key) -> np.ndarray:
+        """Postings for an exact key (empty array if absent)."""
+        start, end = self.span(key)
+        return self.postings[start:end]
+
+    def gather(self, keys) -> np.ndarray:
+        """Concatenated postings for every key in `keys` that is present."""
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(keys) == 0 or len(self.keys) == 0:
+            return np.empty(0, dtype=np.int32)
+        pos = np.searchsorted(self.keys, keys)
+        found = pos < len(self.keys)
+        found[found] = self.keys[pos[found]] == keys[found]
+        pos = pos[found]
+        if len(pos) == 0:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate([self.postings[self.offsets[i]:self.offsets[i + 1]] for i in pos])
+
+
+def encode_trigrams(strings: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encode every character trigram of every string as an int64 code.
+
+    Each trigram packs its three code points into 21-bit fields, so codes are
+    exact (no hashing collisions). Strings shorter than 3 characters yield none.
+
+    Returns:
+        Tuple (rows, codes): the source string position and code of each trigram
+    """
+    strings = np.asarray(list(strings), dtype=object)
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=len(strings))
+    candidates = np.flatnonzero(lengths >= 3)
+    if len(candidates) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # Sort by length so each chunk pads to a similar width
+    candidates = candidates[np.argsort(lengths[candidates], kind='stable')]
+
+    rows_out, codes_out = [], []
+    for start in range(0, len(candidates), TRIGRAM_CHUNK_ROWS):
+        chunk = candidates[start:start + TRIGRAM_CHUNK_ROWS]
+        width = int(lengths[chunk].max())
+        points = (np.array(strings[chunk].tolist(), dtype=f'<U{width}')
+                  .view(np.uint32).reshape(len(chunk), width).astype(np.int64))
+        codes = (points[:, :-2] << 42) | (points[:, 1:-1] << 21) | points[:, 2:]
+        valid = np.arange(width - 2) < (lengths[chunk] - 2)[:, None]
+        r, c = np.nonzero(valid)
+        rows_out.append(chunk[r])
+        codes_out.append(codes[r, c])
+
+    return np.concatenate(rows_out), np.concatenate(codes_out)
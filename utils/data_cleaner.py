@@ -5,8 +5,11 @@ Robust data cleaning functions to handle Excel paste issues and data type conver
 """
 
 import pandas as pd
-import numpy as np
-import re
+
+try:
+    from utils.parsers import ParseReport, parse_amounts
+except ImportError:
+    from parsers import ParseReport, parse_amounts  # type: ignore
 
 
 def clean_amount_column(series: pd.Series, column_name: str = "Amount") -> pd.Series:
@@ -25,61 +28,16 @@ def clean_amount_column(series: pd.Series, column_name: str = "Amount") -> pd.Se
 
     Returns:
         pandas Series with properly converted numeric values
+
+    Parsing is vectorized in utils/parsers.py (shared with the engines).
     """
-    def parse_amount(val):
-        """Parse a single amount value"""
-        # Handle None, NaN, or empty
-        if pd.isna(val) or val == '' or val is None:
-            return 0.0
-
-        # Convert to string for processing
-        val_str = str(val).strip()
-
-        # If already numeric, try direct conversion
-        if isinstance(val, (int, float, np.integer, np.floating)):
-            return float(val)
-
-        # Remove common currency symbols
-        val_str = re.sub(r'[$€£¥₹R₦₨฿₩₪₫]', '', val_str)
-
-        # Remove thousand separators (commas, spaces, apostrophes)
-        val_str = val_str.replace(',', '').replace(' ', '').replace("'", '')
-
-        # Handle accounting format for negatives: (1234.56) -> -1234.56
-        is_negative = False
-        if val_str.startswith('(') and val_str.endswith(')'):
-            is_negative = True
-            val_str = val_str[1:-1]
-
-        # Handle negative signs at end (some formats)
-        if val_str.endswith('-'):
-            is_negative = True
-            val_str = val_str[:-1]
-
-        # Remove any remaining non-numeric characters except decimal point and minus
-        val_str = re.sub(r'[^\d.\-]', '', val_str)
-
-        # Handle multiple decimal points (keep only the last one)
-        parts = val_str.split('.')
-        if len(parts) > 2:
-            # Multiple decimals - keep last one as decimal separator
-            val_str = ''.join(parts[:-1]) + '.' + parts[-1]
-
-        # Try to convert to float
-        try:
-            amount = float(val_str) if val_str else 0.0
-            return -abs(amount) if is_negative else amount
-        except (ValueError, TypeError):
-            # If still can't convert, return 0 and log warning
-            print(f"Warning: Could not convert '{val}' to numeric in column '{column_name}'. Using 0.0")
-            return 0.0
-
-    # Apply the parsing function
-    cleaned = series.apply(parse_amount)
-
-    # Verify we have numeric data
-    if not pd.api.types.is_numeric_dtype(cleaned):
-        cleaned = pd.to_numeric(cleaned, errors='coerce').fillna(0.0)
+    report = ParseReport()
+    cleaned = parse_amounts(series, column_name, fill_value=0.0, report=report)
+
+    stats = report.columns[column_name]
+    if stats['failed']:
+        print(f"Warning: Could not convert {stats['failed']} value(s) to numeric in column "
+              f"'{column_name}' (e.g. {stats['failed_examples'][:3]}). Using 0.0")
 
     return cleaned
 
@@ -8,6 +8,8 @@ Ensures consistent extraction across FNB, ABSA, Kazang, Corporate, and Bidvest.
 import re
 from typing import Tuple, List, Optional
 
+import pandas as pd
+
 
 class ReferenceExtractor:
     """
@@ -335,6 +337,31 @@ class ReferenceExtractor:
 
         return ''
 
+    # Canonical identifier blocking keys: key type -> pattern (first match per reference)
+    IDENTIFIER_KEYS = {
+        'ref_id': ALL_PATTERNS,
+        'phone': r'(?<![A-Za-z\d])(\d{10})(?!\d)',
+    }
+
+    @classmethod
+    def identifier_keys(cls, values) -> pd.DataFrame:
+        """
+        Canonical identifiers embedded in references, one column per key type (vectorized).
+
+        'ref_id' is the prefix upper-cased plus digits (dash dropped), 'phone' a
+        10-digit number not glued to a reference prefix. Missing keys are ''.
+
+        Examples:
+            >>> ReferenceExtractor.identifier_keys(['Ref csh-891089488 (Jenet 6452843846)']).iloc[0].tolist()
+            ['CSH891089488', '6452843846']
+        """
+        text = pd.Series(values, dtype=object).fillna('').astype(str)
+        keys = pd.DataFrame(index=text.index)
+        ref = text.str.extract(cls.IDENTIFIER_KEYS['ref_id'], flags=re.IGNORECASE)
+        keys['ref_id'] = (ref[0].str.upper() + ref[1]).fillna('')
+        keys['phone'] = text.str.extract(cls.IDENTIFIER_KEYS['phone'])[0].fillna('')
+        return keys
+
 
 # =============================================
 # CONVENIENCE FUNCTIONS
@@ -0,0 +1,180 @@
+"""
+Bounded Fuzzy-Score Cache
+=========================
+LRU cache for reference similarity scores, shared by every engine run in
+the process, with an optional SQLite tier so scores survive restarts.
+
+Keys are the normalized (lower-cased, stripped) reference pair. Scores do
+not depend on the similarity threshold, so re-running a month with a
+different threshold reuses every score computed before.
+"""
+
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Entries kept in memory per cache
+DEFAULT_MAX_ENTRIES = 500_000
+
+# Pending disk writes flushed per executemany batch
+DISK_FLUSH_BATCH = 10_000
+
+# Bump when the scoring function changes so stale on-disk scores are ignored
+SCORER_VERSION = 'max_ratio_tokenset_partial_v1'
+
+
+class FuzzyScoreCache:
+    """
+    Thread-safe LRU map of (ref1, ref2) -> int score with optional SQLite backing.
+
+    Memory misses fall through to the disk tier (if configured); new scores are
+    buffered and written in batches by flush(). Metrics: hits, misses,
+    evictions and disk_hits.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, db_path: Optional[str] = None):
+        self.max_entries = max(1, int(max_entries))
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+
+        if db_path:
+            self._open_disk(db_path)
+
+    def _open_disk(self, db_path: str) -> None:
+        """Open (or create) the SQLite tier; on failure the cache stays memory-only."""
+        try:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS fuzzy_scores (
+                    scorer TEXT NOT NULL,
+                    ref1 TEXT NOT NULL,
+                    ref2 TEXT NOT NULL,
+                    score INTEGER NOT NULL,
+                    PRIMARY KEY (scorer, ref1, ref2)
+                ) WITHOUT ROWID
+            ''')
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Fuzzy cache disk tier unavailable (%s): %s", db_path, e)
+            self._conn = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: Tuple[str, str]) -> Optional[int]:
+        """Cached score for a normalized pair, or None (counted as a miss)."""
+        with self._lock:
+            score = self._entries.get(key)
+            if score is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return score
+
+            if self._conn is not None:
+                score = self._pending.get(key)
+                if score is None:
+                    row = self._conn.execute(
+                        'SELECT score FROM fuzzy_scores WHERE scorer = ? AND ref1 = ? AND ref2 = ?',
+                        (SCORER_VERSION, key[0], key[1])
+                    ).fetchone()
+                    score = row[0] if row else None
+                if score is not None:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._insert(key, score)
+                    return score
+
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple[str, str], score: int) -> None:
+        """Store a newly computed score (queued for the disk tier if configured)."""
+        with self._lock:
+            self._insert(key, score)
+            if self._conn is not None:
+                self._pending[key] = score
+                if len(self._pending) >= DISK_FLUSH_BATCH:
+                    self._flush_locked()
+
+    def _insert(self, key: Tuple[str, str], score: int) -> None:
+        self._entries[key] = score
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def flush(self) -> None:
+        """Write pending scores to the disk tier."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._conn is None or not self._pending:
+            return
+        try:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO fuzzy_scores (scorer, ref1, ref2, score) VALUES (?, ?, ?, ?)',
+                ((SCORER_VERSION, a, b, score) for (a, b), score in self._pending.items())
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Fuzzy cache flush failed: %s", e)
+        self._pending.clear()
+
+    def clear(self) -> None:
+        """Drop the in-memory entries (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'disk_hits': self.disk_hits,
+        }
+
+
+# One cache per (db_path, max_entries) per process, shared across runs and sessions
+_shared_caches = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache(db_path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES) -> FuzzyScoreCache:
+    """Process-wide FuzzyScoreCache for the given disk path (None = memory only)."""
+    key = (str(db_path) if db_path else None, int(max_entries))
+    with _shared_lock:
+        cache = _shared_caches.get(key)
+        if cache is None:
+            cache = FuzzyScoreCache(max_entries=max_entries, db_path=key[0])
+            _shared_caches[key] = cache
+        return cache
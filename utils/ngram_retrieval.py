@@ -0,0 +1,242 @@
+"""
+IDF-Weighted Character N-gram Retrieval
+=======================================
+Top-k candidate retrieval for reference strings, used to pick the few rows
+worth fuzzy scoring.
+
+References are bags of character trigrams (see csr_index.encode_trigrams).
+Each trigram is weighted by its smoothed inverse document frequency, so
+grams found in almost every row ("csh", "dep", "jhb") count for little and
+rare ones (account numbers, names) dominate. Two references score the
+cosine of their binary IDF vectors: 1.0 for identical trigram sets, 0.0 when
+they share none.
+
+NgramRetriever works on an existing trigram CSRIndex (trigram -> rows); the
+row-major view needed for pair scoring is derived from it once. Everything
+is batched: score_pairs scores any list of (query, row) pairs and top_k
+retrieves the best rows for many queries at once.
+"""
+
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+try:
+    from utils.csr_index import CSRIndex, encode_trigrams
+except ImportError:
+    from csr_index import CSRIndex, encode_trigrams  # type: ignore
+
+# Query trigrams expanded per chunk (bounds temporary memory)
+RETRIEVAL_CHUNK_GRAMS = 4_000_000
+
+
+def top_k_mask(weights: np.ndarray, k: int) -> np.ndarray:
+    """Mask of the k highest positive weights (ties go to the earlier position)."""
+    weights = np.asarray(weights)
+    positive = np.flatnonzero(weights > 0)
+    mask = np.zeros(len(weights), dtype=bool)
+    if len(positive) > k:
+        positive = positive[np.argsort(-weights[positive], kind='stable')[:k]]
+    mask[positive] = True
+    return mask
+
+
+class NgramRetriever:
+    """
+    IDF-weighted trigram similarity over the rows of a trigram CSRIndex.
+
+    Attributes:
+        index: Trigram code -> row positions (postings unique per row)
+        n_docs: Rows with at least one trigram (the IDF document count)
+        idf: float64 weight per index key
+        row_norm: float64 L2 norm of each row's IDF vector (0 for rows without trigrams)
+    """
+
+    def __init__(self, index: CSRIndex, n_rows: Optional[int] = None):
+        self.index = index
+        postings = index.postings.astype(np.int64)
+        doc_freq = np.diff(index.offsets)
+        key_ids = np.repeat(np.arange(len(index.keys), dtype=np.int64), doc_freq)
+
+        if n_rows is None:
+            n_rows = int(postings.max()) + 1 if len(postings) else 0
+        self.n_rows = n_rows
+        self.n_docs = len(np.unique(postings))
+
+        self.idf = np.log((self.n_docs + 1) / (doc_freq + 1)) + 1.0
+        self._missing_idf = np.log(self.n_docs + 1) + 1.0
+        self.row_norm = np.sqrt(np.bincount(postings, weights=self.idf[key_ids] ** 2, minlength=n_rows))
+
+        # Row-major membership keys: row * n_keys + key id, sorted
+        self._n_keys = max(1, len(index.keys))
+        self._row_keys = np.sort(postings * self._n_keys + key_ids)
+
+    @classmethod
+    def build(cls, strings: Iterable[str]) -> 'NgramRetriever':
+        """Retriever over `strings` (lower-cased, stripped); row i is strings[i]."""
+        strings = [str(s).strip().lower() for s in strings]
+        rows, codes = encode_trigrams(strings)
+        return cls(CSRIndex.build(codes, rows, unique=True), n_rows=len(strings))
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held on top of the trigram index."""
+        return self.idf.nbytes + self.row_norm.nbytes + self._row_keys.nbytes
+
+    def encode_queries(self, queries) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Indexed trigrams of every query, grouped by query.
+
+        Returns:
+            Tuple (offsets, key_ids, norms): key ids of query i are
+            key_ids[offsets[i]:offsets[i + 1]]; norms are the query IDF norms
+            (trigrams absent from the index count with the highest weight;
+            0 for queries shorter than 3 characters)
+        """
+        queries = [str(q).strip().lower() for q in queries]
+        n_queries = len(queries)
+        rows, codes = encode_trigrams(queries)
+        if len(codes) > 0:
+            order = np.lexsort((codes, rows))
+            rows, codes = rows[order], codes[order]
+            keep = np.ones(len(codes), dtype=bool)
+            keep[1:] = (rows[1:] != rows[:-1]) | (codes[1:] != codes[:-1])
+            rows, codes = rows[keep], codes[keep]
+
+        pos = np.searchsorted(self.index.keys, codes)
+        found = pos < len(self.index.keys)
+        found[found] = self.index.keys[pos[found]] == codes[found]
+
+        weights = np.full(len(codes), self._missing_idf)
+        weights[found] = self.idf[pos[found]]
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_queries))
+
+        rows, key_ids = rows[found], pos[found].astype(np.int64)
+        offsets = np.zeros(n_queries + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_queries), out=offsets[1:])
+        return offsets, key_ids, norms
+
+    def score_pairs(self, queries, pair_query, pair_row, encoded=None) -> np.ndarray:
+        """
+        Weighted overlap (IDF cosine) of queries[pair_query[i]] and row pair_row[i].
+
+        Args:
+            queries: Query strings
+            pair_query: Query position per pair
+            pair_row: Indexed row position per pair
+            encoded: Optional result of encode_queries(queries), to reuse
+
+        Returns:
+            float64 score per pair in [0, 1]
+        """
+        pair_query = np.asarray(pair_query, dtype=np.int64)
+        pair_row = np.asarray(pair_row, dtype=np.int64)
+        offsets, key_ids, norms = encoded if encoded is not None else self.encode_queries(queries)
+        scores = np.zeros(len(pair_query), dtype=np.float64)
+        if len(pair_query) == 0 or len(self._row_keys) == 0:
+            return scores
+
+        lengths = np.diff(offsets)[pair_query]
+        bounds = np.cumsum(lengths)
+        start = 0
+        while start < len(pair_query):
+            # Largest run of pairs whose expansion fits the chunk budget (at least one pair)
+            done = int(bounds[start - 1]) if start else 0
+            end = max(start + 1, int(np.searchsorted(bounds, done + RETRIEVAL_CHUNK_GRAMS, side='right')))
+            counts = lengths[start:end]
+            total = int(counts.sum())
+            if total:
+                local = np.repeat(np.arange(end - start), counts)
+                first = np.repeat(offsets[pair_query[start:end]] - (np.cumsum(counts) - counts), counts)
+                grams = key_ids[first + np.arange(total)]
+                member = pair_row[start:end][local] * self._n_keys + grams
+
+                hit = np.searchsorted(self._row_keys, member)
+                hit[hit == len(self._row_keys)] = 0
+                hit = self._row_keys[hit] == member
+                scores[start:end] = np.bincount(local[hit], weights=self.idf[grams[hit]] ** 2,
+                                                minlength=end - start)
+            start = end
+
+        row_norm = np.zeros(len(pair_row), dtype=np.float64)
+        inside = pair_row < len(self.row_norm)
+        row_norm[inside] = self.row_norm[pair_row[inside]]
+        denom = norms[pair_query] * row_norm
+        return np.divide(scores, denom, out=np.zeros_like(scores), where=denom > 0)
+
+    def top_k(self, queries, k: int,
+              max_postings: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The k best indexed rows for every query, all queries in one batch.
+
+        Rows sharing no trigram with a query are never returned.
+
+        Args:
+            queries: Query strings
+            k: Rows kept per query
+            max_postings: Optional posting budget per query. Trigrams are then
+                expanded rarest first while they fit the budget (the rarest one
+                always), so grams found in most rows of a large index are
+                skipped; scores become the overlap on the expanded grams only
+
+        Returns:
+            Tuple (offsets, rows, scores): results for query i are
+            rows[offsets[i]:offsets[i + 1]], best first (ties by row position)
+        """
+        offsets, key_ids, norms = self.encode_queries(queries)
+        n_queries = len(offsets) - 1
+        n_rows = max(1, self.n_rows)
+        doc_freq = np.diff(self.index.offsets)
+        postings = self.index.postings.astype(np.int64)
+        gram_query = np.repeat(np.arange(n_queries, dtype=np.int64), np.diff(offsets))
+
+        if max_postings is not None and len(key_ids) > 0:
+            # Rarest first within each query; keep grams while the budget lasts
+            order = np.lexsort((doc_freq[key_ids], gram_query))
+            key_ids, gram_query = key_ids[order], gram_query[order]
+            spent = np.cumsum(doc_freq[key_ids])
+            spent -= np.repeat(np.concatenate(([0], spent))[offsets[:-1]], np.diff(offsets))
+            keep = spent <= max_postings
+            keep[offsets[:-1][np.diff(offsets) > 0]] = True
+            key_ids, gram_query = key_ids[keep], gram_query[keep]
+            offsets = np.zeros(n_queries + 1, dtype=np.int64)
+            np.cumsum(np.bincount(gram_query, minlength=n_queries), out=offsets[1:])
+
+        # Whole queries per chunk, so each query's scores are complete
+        expanded = np.cumsum(np.bincount(gram_query, weights=doc_freq[key_ids], minlength=n_queries))
+
+        out_query, out_row, out_score = [], [], []
+        first_query = 0
+        while first_query < n_queries:
+            done = expanded[first_query - 1] if first_query else 0
+            last_query = max(first_query + 1,
+                             int(np.searchsorted(expanded, done + RETRIEVAL_CHUNK_GRAMS, side='right')))
+            grams = key_ids[offsets[first_query]:offsets[last_query]]
+            counts = doc_freq[grams]
+            total = int(counts.sum())
+            if total:
+                first = np.repeat(self.index.offsets[grams] - (np.cumsum(counts) - counts), counts)
+                rows = postings[first + np.arange(total)]
+                query = np.repeat(gram_query[offsets[first_query]:offsets[last_query]], counts)
+                weight = np.repeat(self.idf[grams] ** 2, counts)
+
+                pair, inverse = np.unique(query * n_rows + rows, return_inverse=True)
+                pair_query, pair_row = pair // n_rows, pair % n_rows
+                score = np.bincount(inverse.ravel(), weights=weight) / (norms[pair_query] * self.row_norm[pair_row])
+
+                # Best first within each query (pairs arrive sorted by query, row;
+                # scores are in [0, 1], so one stable sort on query - score/2 does it)
+                order = np.argsort(pair_query - score / 2, kind='stable')
+                pair_query, pair_row, score = pair_query[order], pair_row[order], score[order]
+                keep = np.arange(len(pair_query)) - np.searchsorted(pair_query, pair_query, side='left') < k
+                out_query.append(pair_query[keep])
+                out_row.append(pair_row[keep])
+                out_score.append(score[keep])
+            first_query = last_query
+
+        query = np.concatenate(out_query) if out_query else np.empty(0, dtype=np.int64)
+        result_offsets = np.zeros(n_queries + 1, dtype=np.int64)
+        np.cumsum(np.bincount(query, minlength=n_queries), out=result_offsets[1:])
+        rows = np.concatenate(out_row) if out_row else np.empty(0, dtype=np.int64)
+        scores = np.concatenate(out_score) if out_score else np.empty(0, dtype=np.float64)
+        return result_offsets, rows, scores
@@ -0,0 +1,152 @@
+"""
+Group-Parallel Debit/Credit Pair Matching
+=========================================
+One-to-one pairing of debit rows with credit rows that share a group key
+(e.g. a settlement reference), for every group at once.
+
+A pass pairs debits and credits whose difference (debit - credit, in cents)
+falls inside a window [lo, hi]. Rows are lexsorted once by (group, side,
+amount); inside a group the credits acceptable for a debit then form a
+contiguous run of the sorted credits, and the runs of increasing debits
+move monotonically to the right. For such intervals the greedy "each debit,
+smallest first, takes the smallest open credit in its run" is a maximum
+matching, and it has a closed form: with q_i the credit taken by the i-th
+debit of a group, q_i = min(max(L_i, q_{i-1} + 1), H_i) (a debit fails when
+q_i == q_{i-1}). Shifted by i this is a chain of clamps, and clamps compose
+into clamps, so the whole chain is a prefix scan done in log2(group size)
+vectorized doubling steps - no Python loop over groups or rows.
+
+    passes = [('exact', [(0, 0)]), ('over', [(100, None)])]
+    pairs = match_pairs_by_group(groups, debit_cents, credit_cents, passes)
+    debit_rows, credit_rows = pairs['exact']
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Stand-in for an open window bound (far outside any amount in cents)
+_UNBOUNDED = 2 ** 62
+
+
+def _greedy_interval_assign(group_start: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """
+    Greedy assignment of sorted debits to credit slots [lo, hi] (inclusive).
+
+    Args:
+        group_start: Position of the first debit of each debit's group
+        lo, hi: Candidate slot range per debit, nondecreasing inside a group,
+            lo <= hi
+
+    Returns:
+        int64 slot per debit, -1 where the debit gets none
+    """
+    n = len(lo)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    rank = np.arange(n, dtype=np.int64) - group_start
+
+    # r_i = q_i - i = clamp(r_{i-1}, lo_i - i, hi_i - i); prefix-compose the clamps
+    low = lo - rank
+    high = hi - rank
+    step = 1
+    while step <= int(rank.max()):
+        inner = np.flatnonzero(rank >= step)
+        prev = inner - step
+        new_low = np.clip(low[prev], low[inner], high[inner])
+        new_high = np.clip(high[prev], low[inner], high[inner])
+        low[inner] = new_low
+        high[inner] = new_high
+        step *= 2
+
+    slot = low + rank
+    taken = np.ones(n, dtype=bool)
+    taken[1:] = (rank[1:] == 0) | (slot[1:] > slot[:-1])
+    return np.where(taken, slot, -1)
+
+
+def match_pairs_by_group(groups: np.ndarray, debit_cents: np.ndarray, credit_cents: np.ndarray,
+                         passes: Sequence[Tuple[str, Sequence[Tuple[Optional[int], Optional[int]]]]]
+                         ) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Pair debit and credit rows of the same group, pass by pass.
+
+    A row is a debit when debit_cents > 0, otherwise a credit when
+    credit_cents > 0; rows with a negative group code take no part. Passes
+    run in order and every row is paired at most once overall; inside a
+    pass, windows run in order. Within a window the smallest open debit of a
+    group takes the smallest open credit whose difference fits, ties by row
+    position.
+
+    Args:
+        groups: int group code per row (-1 = excluded)
+        debit_cents, credit_cents: int64 amounts per row
+        passes: (name, windows) in priority order; a window is (lo, hi)
+            bounds on debit - credit, inclusive, None for unbounded
+
+    Returns:
+        name -> (debit rows, credit rows): paired row positions, ordered by
+        debit row
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    debit_cents = np.asarray(debit_cents, dtype=np.int64)
+    credit_cents = np.asarray(credit_cents, dtype=np.int64)
+
+    is_debit = (groups >= 0) & (debit_cents > 0)
+    is_credit = (groups >= 0) & ~is_debit & (credit_cents > 0)
+    amount = np.where(is_debit, debit_cents, credit_cents)
+
+    # One lexsort by (group, side, amount, position); each side keeps that order
+    rows = np.flatnonzero(is_debit | is_credit)
+    rows = rows[np.lexsort((rows, amount[rows], is_credit[rows], groups[rows]))]
+    debits = rows[is_debit[rows]]
+    credits = rows[is_credit[rows]]
+
+    # Credits as (group, amount rank) keys for segmented range lookups
+    levels = np.unique(amount[credits])
+    width = len(levels) + 1
+    credit_key = groups[credits] * width + np.searchsorted(levels, amount[credits])
+
+    debit_open = np.ones(len(debits), dtype=bool)
+    credit_open = np.ones(len(credits), dtype=bool)
+    results = {}
+    for name, windows in passes:
+        found_debit: List[np.ndarray] = []
+        found_credit: List[np.ndarray] = []
+        for lo, hi in windows:
+            lo = -_UNBOUNDED if lo is None else int(lo)
+            hi = _UNBOUNDED if hi is None else int(hi)
+            d = np.flatnonzero(debit_open)
+            c = np.flatnonzero(credit_open)
+            if len(d) == 0 or len(c) == 0 or lo > hi:
+                continue
+            d_rows = debits[d]
+            d_group = groups[d_rows] * width
+            keys = credit_key[c]
+
+            # Open credits with debit - hi <= credit <= debit - lo: run [first, last]
+            first = np.searchsorted(keys, d_group + np.searchsorted(levels, amount[d_rows] - hi, side='left'))
+            last = np.searchsorted(keys, d_group + np.searchsorted(levels, amount[d_rows] - lo, side='right')) - 1
+            usable = first <= last
+            if not usable.any():
+                continue
+            d, first, last = d[usable], first[usable], last[usable]
+
+            d_groups = groups[debits[d]]
+            starts = np.ones(len(d), dtype=bool)
+            starts[1:] = d_groups[1:] != d_groups[:-1]
+            group_start = np.maximum.accumulate(np.where(starts, np.arange(len(d)), 0))
+
+            slot = _greedy_interval_assign(group_start, first, last)
+            hit = slot >= 0
+            d, slot = d[hit], c[slot[hit]]
+            debit_open[d] = False
+            credit_open[slot] = False
+            found_debit.append(debits[d])
+            found_credit.append(credits[slot])
+
+        pair_debit = np.concatenate(found_debit) if found_debit else np.empty(0, dtype=np.int64)
+        pair_credit = np.concatenate(found_credit) if found_credit else np.empty(0, dtype=np.int64)
+        order = np.argsort(pair_debit, kind='stable')
+        results[name] = (pair_debit[order], pair_credit[order])
+    return results
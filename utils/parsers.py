@@ -0,0 +1,327 @@
+"""
+Shared Amount and Date Parsing
+==============================
+Vectorized parsing of amount and date columns for every reconciliation
+engine and workflow.
+
+Amounts: a fast pd.to_numeric pass, a comma-stripped retry, then the
+Excel-paste cleanup (currency symbols, thousand separators, accounting
+negatives, trailing minus) only for the rows both passes rejected. Results are float64 (or int64 cents).
+
+Dates: the format is sniffed on a sample of the column, then the whole
+column is parsed in one pd.to_datetime(format=...) pass; only rows that do
+not fit that format fall back to per-value parsing. Excel serial numbers and
+YYYYMMDD integers are recognised. Results are datetime64[ns] (or [D] days).
+
+Pass a ParseReport to record per-column counts, the chosen date format and
+examples of values that could not be parsed.
+"""
+
+import warnings
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+# Values sampled for date-format sniffing
+DATE_SAMPLE_SIZE = 200
+
+# Excel serial day numbers accepted as dates (1954-10-03 .. 2119-01-08)
+EXCEL_SERIAL_RANGE = (20000, 80000)
+EXCEL_EPOCH = '1899-12-30'
+
+# Formats tried besides the ones guessed from the sample (ABSA exports use YYYYMMDD)
+EXTRA_DATE_FORMATS = ('%Y%m%d',)
+
+CURRENCY_PATTERN = r'[$€£¥₹R₦₨฿₩₪₫]'
+
+# Failed values kept as examples per column in a ParseReport
+REPORT_EXAMPLES = 5
+
+
+class ParseReport:
+    """
+    Per-column parse statistics (opt-in).
+
+    Each entry of `columns` is a dict with kind ('amount' / 'date'), rows,
+    blank, parsed, cleaned (amounts needing cleanup) or fallback (dates not
+    matching the sniffed format), failed, format and failed_examples.
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, Dict] = {}
+
+    def add(self, column: str, **stats) -> None:
+        self.columns[column] = stats
+
+    @property
+    def failed(self) -> int:
+        """Total values that could not be parsed."""
+        return sum(stats.get('failed', 0) for stats in self.columns.values())
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per column (for display)."""
+        return pd.DataFrame([{'column': name, **stats} for name, stats in self.columns.items()])
+
+    def summary(self) -> List[str]:
+        """Human-readable lines, one per column."""
+        lines = []
+        for name, stats in self.columns.items():
+            line = f"{name} ({stats['kind']}): {stats['parsed']}/{stats['rows']} parsed"
+            if stats.get('format'):
+                line += f", format {stats['format']}"
+            if stats.get('failed'):
+                line += f", {stats['failed']} failed (e.g. {stats['failed_examples'][:3]})"
+            lines.append(line)
+        return lines
+
+
+def _blank_mask(series: pd.Series) -> np.ndarray:
+    """NaN/None cells and empty or whitespace-only strings."""
+    blank = series.isna().to_numpy()
+    text = series[~blank].astype(str).str.strip()
+    blank[~blank] = (text == '').to_numpy() | (text.str.lower() == 'nan').to_numpy()
+    return blank
+
+
+# Characters skipped around an accounting negative: currency symbols and separators
+_AMOUNT_NOISE = CURRENCY_PATTERN[:-1] + r",\s']"
+
+# One pass of the Excel-paste cleanup: drop everything but digits, '.' and '-',
+# every decimal point but the last, and a trailing minus
+_AMOUNT_CLEANUP = rf'[^\d.\-]|\.(?=.*\.)|-(?={_AMOUNT_NOISE}*$)'
+
+# Accounting negative: the amount in parentheses, with noise around it
+_AMOUNT_PARENS = rf'^({_AMOUNT_NOISE}*)\((.*)\)({_AMOUNT_NOISE}*)$'
+
+# Largest magnitude that fits int64 cents
+_CENTS_LIMIT = float(2 ** 63)
+
+
+def _clean_amount_text(text: pd.Series) -> pd.DataFrame:
+    """
+    Excel-paste cleanup of amount strings.
+
+    Returns a frame with the cleaned numeric text and a negative flag
+    ('(1,234.56)' and '1234.56-' are negative).
+    """
+    text = text.astype(str)
+    parens = text.str.match(_AMOUNT_PARENS).to_numpy(dtype=bool)
+    if parens.any():
+        text[parens] = text[parens].str.replace(_AMOUNT_PARENS, r'\1\2\3', regex=True)
+    trailing = text.str.match(rf'.*-{_AMOUNT_NOISE}*$').to_numpy(dtype=bool)
+    text = text.str.replace(_AMOUNT_CLEANUP, '', regex=True)
+    return pd.DataFrame({'text': text, 'negative': parens | trailing}, index=text.index)
+
+
+def parse_amounts(series, column_name: str = 'Amount', fill_value: Optional[float] = 0.0,
+                  report: Optional[ParseReport] = None) -> pd.Series:
+    """
+    Parse an amount column to float64.
+
+    Numeric columns pass straight through pd.to_numeric. For text columns
+    every row first goes through pd.to_numeric, rows it rejects are retried
+    with thousand-separator commas dropped, and only what is still left is
+    cleaned (currency symbols, separators, accounting negatives) and parsed
+    again. Infinite values count as unparseable.
+
+    Args:
+        series: Amount values
+        column_name: Name used in the report
+        fill_value: Value for blank and unparseable cells (None keeps NaN)
+        report: Optional ParseReport to record statistics in
+
+    Returns:
+        float64 Series aligned with `series`
+    """
+    series = pd.Series(series)
+    blank = _blank_mask(series)
+    amounts = pd.to_numeric(series, errors='coerce').astype(np.float64)
+    amounts[blank | np.isinf(amounts.to_numpy())] = np.nan
+
+    retry = amounts.isna().to_numpy() & ~blank
+    cleaned_rows = int(retry.sum())
+    if cleaned_rows:
+        # Cheap pass first: '1,234.50' only needs its commas dropped
+        commas = series[retry].astype(str).str.replace(',', '', regex=False)
+        amounts[retry] = pd.to_numeric(commas, errors='coerce').to_numpy(dtype=np.float64)
+        retry &= amounts.isna().to_numpy()
+
+    if retry.any():
+        cleaned = _clean_amount_text(series[retry])
+        values = pd.to_numeric(cleaned['text'], errors='coerce')
+        values = values.where(~cleaned['negative'], -values.abs())
+        amounts[retry] = values.to_numpy(dtype=np.float64)
+        # Placeholders without letters or digits count as blank (e.g. '-', 'R')
+        empty = np.flatnonzero(retry)[(cleaned['text'] == '').to_numpy()]
+        placeholder = ~series.iloc[empty].astype(str).str.replace(CURRENCY_PATTERN, '', regex=True) \
+            .str.contains(r'[^\W_]', regex=True).to_numpy(dtype=bool)
+        blank[empty[placeholder]] = True
+    amounts[np.isinf(amounts.to_numpy())] = np.nan
+
+    failed = amounts.isna().to_numpy() & ~blank
+    if report is not None:
+        report.add(
+            column_name, kind='amount', rows=len(series), blank=int(blank.sum()),
+            parsed=int(len(series) - blank.sum() - failed.sum()), cleaned=cleaned_rows,
+            failed=int(failed.sum()), format=None,
+            failed_examples=series[failed].astype(str).head(REPORT_EXAMPLES).tolist(),
+        )
+    if fill_value is not None:
+        amounts = amounts.fillna(fill_value)
+    return amounts
+
+
+def amount_cents(series, column_name: str = 'Amount', report: Optional[ParseReport] = None) -> np.ndarray:
+    """
+    Parsed amounts as int64 cents.
+
+    Blank and unparseable cells are 0, and so are amounts too large for
+    int64 cents (counted as failed in the report).
+    """
+    amounts = parse_amounts(series, column_name, fill_value=0.0, report=report).to_numpy(dtype=np.float64)
+    overflow = np.abs(amounts * 100) >= _CENTS_LIMIT
+    if overflow.any():
+        amounts = np.where(overflow, 0.0, amounts)
+        if report is not None:
+            stats = report.columns[column_name]
+            stats['parsed'] -= int(overflow.sum())
+            stats['failed'] += int(overflow.sum())
+            examples = pd.Series(series)[overflow].astype(str).tolist()
+            stats['failed_examples'] = (stats['failed_examples'] + examples)[:REPORT_EXAMPLES]
+    return np.rint(amounts * 100).astype(np.int64)
+
+
+def _sample(values: pd.Series, size: int) -> pd.Series:
+    """Up to `size` values spread evenly over the column (deterministic)."""
+    if len(values) <= size:
+        return values
+    step = len(values) / size
+    return values.iloc[(np.arange(size) * step).astype(np.int64)]
+
+
+def sniff_date_format(text: pd.Series, dayfirst: bool = False,
+                      sample_size: int = DATE_SAMPLE_SIZE) -> Optional[str]:
+    """
+    Best strftime format for a column of date strings, judged on a sample.
+
+    Candidates are the formats pandas guesses for the sampled values plus
+    EXTRA_DATE_FORMATS; the one parsing the most sampled values wins (ties go
+    to the first guessed, i.e. what pandas itself would infer).
+    """
+    sample = _sample(text, sample_size)
+    if len(sample) == 0:
+        return None
+
+    candidates = []
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for value in sample.drop_duplicates().head(20):
+            fmt = guess_datetime_format(value, dayfirst=dayfirst)
+            if fmt and fmt not in candidates:
+                candidates.append(fmt)
+    candidates += [fmt for fmt in EXTRA_DATE_FORMATS if fmt not in candidates]
+
+    best, best_count = None, 0
+    for fmt in candidates:
+        count = int(pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum())
+        if count > best_count:
+            best, best_count = fmt, count
+    return best
+
+
+def _numeric_dates(numbers: pd.Series) -> pd.Series:
+    """Dates from numbers: YYYYMMDD integers or Excel serial days."""
+    out = pd.Series(pd.NaT, index=numbers.index, dtype='datetime64[ns]')
+    integral = numbers.notna() & (numbers == np.floor(numbers))
+
+    yyyymmdd = integral & (numbers >= 19000101) & (numbers <= 21001231)
+    if yyyymmdd.any():
+        out[yyyymmdd] = pd.to_datetime(numbers[yyyymmdd].astype(np.int64).astype(str),
+                                       format='%Y%m%d', errors='coerce')
+
+    low, high = EXCEL_SERIAL_RANGE
+    serial = numbers.notna() & (numbers >= low) & (numbers <= high)
+    if serial.any():
+        out[serial] = pd.to_datetime(numbers[serial], unit='D', origin=EXCEL_EPOCH)
+    return out
+
+
+def parse_dates(series, column_name: str = 'Date', dayfirst: bool = False,
+                sample_size: int = DATE_SAMPLE_SIZE, report: Optional[ParseReport] = None) -> pd.Series:
+    """
+    Parse a date column to datetime64[ns].
+
+    Datetime columns pass through. Numbers are read as YYYYMMDD or Excel
+    serial days. Strings get one pd.to_datetime pass with the format sniffed
+    from a sample; rows that do not fit it are parsed value by value.
+
+    Args:
+        series: Date values
+        column_name: Name used in the report
+        dayfirst: Prefer day-first readings of ambiguous dates (01/02/2024)
+        sample_size: Values sampled for format sniffing
+        report: Optional ParseReport to record statistics in
+
+    Returns:
+        datetime64[ns] Series aligned with `series` (NaT where unparseable)
+    """
+    series = pd.Series(series)
+    fmt = None
+    fallback_rows = 0
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        dates = pd.to_datetime(series)
+        if getattr(dates.dt, 'tz', None) is not None:
+            dates = dates.dt.tz_localize(None)
+        blank = series.isna().to_numpy()
+    else:
+        blank = _blank_mask(series)
+        dates = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+
+        is_stamp = np.zeros(len(series), dtype=bool)
+        if pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'empty', 'integer',
+                                                                 'floating', 'mixed-integer-float'):
+            is_stamp = series.map(lambda v: hasattr(v, 'year')).to_numpy(dtype=bool) & ~blank
+        if is_stamp.any():
+            dates[is_stamp] = pd.to_datetime(series[is_stamp], errors='coerce')
+
+        numbers = pd.to_numeric(series.where(~blank & ~is_stamp), errors='coerce')
+        is_number = numbers.notna().to_numpy()
+        if is_number.any():
+            dates[is_number] = _numeric_dates(numbers[is_number])
+
+        is_text = ~blank & ~is_stamp & ~is_number
+        if is_text.any():
+            text = series[is_text].astype(str).str.strip()
+            fmt = sniff_date_format(text, dayfirst=dayfirst, sample_size=sample_size)
+            parsed = (pd.to_datetime(text, format=fmt, errors='coerce') if fmt
+                      else pd.Series(pd.NaT, index=text.index, dtype='datetime64[ns]'))
+            rest = parsed.isna().to_numpy()
+            fallback_rows = int(rest.sum())
+            if fallback_rows:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    parsed[rest] = pd.to_datetime(text[rest], errors='coerce', format='mixed',
+                                                  dayfirst=dayfirst)
+            dates[is_text] = parsed.to_numpy(dtype='datetime64[ns]')
+
+    failed = dates.isna().to_numpy() & ~blank
+    if report is not None:
+        report.add(
+            column_name, kind='date', rows=len(series), blank=int(blank.sum()),
+            parsed=int(len(series) - blank.sum() - failed.sum()), fallback=fallback_rows,
+            failed=int(failed.sum()), format=fmt,
+            failed_examples=series[failed].astype(str).head(REPORT_EXAMPLES).tolist(),
+        )
+    return dates
+
+
+def date_days(series, **kwargs) -> np.ndarray:
+    """Parsed dates as a datetime64[D] array (NaT where unparseable)."""
+    return parse_dates(series, **kwargs).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
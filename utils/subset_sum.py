@@ -0,0 +1,299 @@
+"""
+Subset-Sum Kernels for Split Detection
+======================================
+Integer-cents subset-sum search used by the split phases of the
+reconciliation engines.
+
+Amounts are int64 cents. Every search returns positions into the input
+array and prefers the fewest items, then the sum closest to the target:
+
+- Pairs: sorted complement search (vectorized two-pointer)
+- 3..max_items, small blocks: meet-in-the-middle over subset sums
+- 3..max_items, large blocks: NumPy bitset DP over reachable sums
+
+Work is bounded by a WorkBudget (abstract operation units) instead of a
+wall-clock timeout, so results are deterministic for a given input.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+# Blocks up to this many items use meet-in-the-middle (2^15 subsets per half)
+MITM_MAX_ITEMS = 30
+
+# Default per-block budget in operation units (roughly one unit per array cell touched)
+DEFAULT_WORK_BUDGET = 50_000_000
+
+
+class WorkBudget:
+    """
+    Operation budget for one block of subset-sum work.
+
+    Kernels charge their estimated cost before running; when a stage does not
+    fit, the search degrades to a trimmed block instead of stopping on time.
+    """
+
+    def __init__(self, limit: int = DEFAULT_WORK_BUDGET):
+        self.limit = limit
+        self.used = 0
+        self.exhausted = False
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used)
+
+    def charge(self, units: int) -> bool:
+        """Spend `units` if they fit; otherwise mark the budget exhausted."""
+        if units > self.remaining:
+            self.exhausted = True
+            return False
+        self.used += units
+        return True
+
+
+def to_cents(amounts) -> np.ndarray:
+    """Absolute amounts as int64 cents (rounded, not truncated)."""
+    amounts = np.asarray(amounts, dtype=float)
+    return np.rint(np.abs(np.nan_to_num(amounts)) * 100).astype(np.int64)
+
+
+def find_pair(values: np.ndarray, min_target: int, max_target: int,
+              target: Optional[int] = None) -> Optional[List[int]]:
+    """
+    Two items whose sum lies in [min_target, max_target], closest to target.
+
+    Values are sorted once; for every item the closest complement among the
+    items after it is found with searchsorted (a vectorized two-pointer pass).
+
+    Returns:
+        Sorted [i, j] positions into values, or None
+    """
+    values = np.asarray(values, dtype=np.int64)
+    k = len(values)
+    if k < 2:
+        return None
+    if target is None:
+        target = (min_target + max_target) // 2
+
+    order = np.argsort(values, kind='stable')
+    sv = values[order]
+    first = np.arange(k - 1)
+
+    # Closest partner for sv[i] within sv[i + 1:] is at pos or pos - 1
+    pos = np.maximum(np.searchsorted(sv, target - sv[first]), first + 1)
+    best_diff = None
+    best_pair = None
+    for cand in (pos - 1, pos):
+        ok = (cand > first) & (cand < k)
+        i = first[ok]
+        j = cand[ok]
+        sums = sv[i] + sv[j]
+        in_range = (sums >= min_target) & (sums <= max_target)
+        if not in_range.any():
+            continue
+        i, j, sums = i[in_range], j[in_range], sums[in_range]
+        top = int(np.argmin(np.abs(sums - target)))
+        diff = abs(int(sums[top]) - target)
+        if best_diff is None or diff < best_diff:
+            best_diff = diff
+            best_pair = (int(i[top]), int(j[top]))
+
+    if best_pair is None:
+        return None
+    return sorted(int(order[p]) for p in best_pair)
+
+
+def _half_subsets(values: np.ndarray, max_items: int):
+    """
+    All subsets of a small array: (masks, sums, sizes), sizes <= max_items.
+
+    Sums and sizes are built by doubling (subset mask m + 2^b adds values[b]),
+    which is O(2^n) instead of materializing an O(2^n * n) bit matrix.
+    """
+    sums = np.zeros(1, dtype=np.int64)
+    sizes = np.zeros(1, dtype=np.int64)
+    for v in values:
+        sums = np.concatenate([sums, sums + v])
+        sizes = np.concatenate([sizes, sizes + 1])
+    masks = np.arange(len(sums), dtype=np.int64)
+    keep = sizes <= max_items
+    return masks[keep], sums[keep], sizes[keep]
+
+
+def _mask_positions(mask: int, offset: int) -> List[int]:
+    return [offset + b for b in range(mask.bit_length()) if (mask >> b) & 1]
+
+
+def find_subset_mitm(values: np.ndarray, min_target: int, max_target: int,
+                     target: Optional[int] = None, min_items: int = 3,
+                     max_items: int = 6) -> Optional[List[int]]:
+    """
+    Meet-in-the-middle subset search for blocks of up to MITM_MAX_ITEMS values.
+
+    Subset sums of each half are enumerated with bit masks; for each size
+    split the closest complementary sum is found with one searchsorted.
+
+    Returns:
+        Sorted positions into values, or None
+    """
+    values = np.asarray(values, dtype=np.int64)
+    n = len(values)
+    if n < min_items:
+        return None
+    if target is None:
+        target = (min_target + max_target) // 2
+
+    h = n // 2
+    a_masks, a_sums, a_sizes = _half_subsets(values[:h], max_items)
+    b_masks, b_sums, b_sizes = _half_subsets(values[h:], max_items)
+    keep = a_sums <= max_target
+    a_masks, a_sums, a_sizes = a_masks[keep], a_sums[keep], a_sizes[keep]
+    keep = b_sums <= max_target
+    b_masks, b_sums, b_sizes = b_masks[keep], b_sums[keep], b_sizes[keep]
+
+    # B halves grouped by size, each sorted by sum
+    b_by_size = {}
+    for size in np.unique(b_sizes):
+        sel = np.flatnonzero(b_sizes == size)
+        sel = sel[np.argsort(b_sums[sel], kind='stable')]
+        b_by_size[int(size)] = (b_masks[sel], b_sums[sel])
+
+    for total in range(min_items, max_items + 1):
+        best = None
+        for a_size in range(0, total + 1):
+            b_size = total - a_size
+            if b_size not in b_by_size:
+                continue
+            sel = a_sizes == a_size
+            if not sel.any():
+                continue
+            am, asum = a_masks[sel], a_sums[sel]
+            bm, bsum = b_by_size[b_size]
+
+            pos = np.searchsorted(bsum, target - asum)
+            for cand in (pos - 1, pos):
+                ok = (cand >= 0) & (cand < len(bsum))
+                if not ok.any():
+                    continue
+                sums = asum[ok] + bsum[cand[ok]]
+                in_range = (sums >= min_target) & (sums <= max_target)
+                if not in_range.any():
+                    continue
+                rows = np.flatnonzero(ok)[in_range]
+                diffs = np.abs(sums[in_range] - target)
+                top = int(np.argmin(diffs))
+                diff = int(diffs[top])
+                if best is None or diff < best[0]:
+                    best = (diff, int(am[rows[top]]), int(bm[cand[rows[top]]]))
+        if best is not None:
+            return sorted(_mask_positions(best[1], 0) + _mask_positions(best[2], h))
+    return None
+
+
+def find_subset_bitset(values: np.ndarray, min_target: int, max_target: int,
+                       target: Optional[int] = None, min_items: int = 3,
+                       max_items: int = 6) -> Optional[List[int]]:
+    """
+    Bitset DP over reachable sums for blocks too large for meet-in-the-middle.
+
+    reach[c, s] says whether sum s is reachable with exactly c items; each item
+    is a shifted OR per count layer. first[c, s] stores the item that first
+    reached the state, so a subset is recovered by walking back through it.
+    Memory and time are O(max_items * max_target) per item.
+
+    Returns:
+        Sorted positions into values, or None
+    """
+    values = np.asarray(values, dtype=np.int64)
+    if len(values) < min_items or max_target <= 0:
+        return None
+    if target is None:
+        target = (min_target + max_target) // 2
+
+    width = int(max_target) + 1
+    reach = np.zeros((max_items + 1, width), dtype=bool)
+    reach[0, 0] = True
+    first = np.full((max_items + 1, width), -1, dtype=np.int32)
+
+    for t, v in enumerate(values):
+        v = int(v)
+        if v <= 0 or v > max_target:
+            continue
+        # Counts descend so an item is used at most once
+        for c in range(max_items, 0, -1):
+            newly = reach[c - 1, :width - v] & ~reach[c, v:]
+            if newly.any():
+                first[c, v:][newly] = t
+                reach[c, v:] |= newly
+
+    for c in range(min_items, max_items + 1):
+        sums = np.flatnonzero(reach[c, min_target:max_target + 1]) + min_target
+        if len(sums) == 0:
+            continue
+        s = int(sums[np.argmin(np.abs(sums - target))])
+        picked = []
+        while c > 0:
+            t = int(first[c, s])
+            picked.append(t)
+            s -= int(values[t])
+            c -= 1
+        return sorted(picked)
+    return None
+
+
+def find_subset_sum(values, min_target: int, max_target: int, target: Optional[int] = None,
+                    min_items: int = 2, max_items: int = 6,
+                    budget: Optional[WorkBudget] = None) -> Optional[List[int]]:
+    """
+    Find a subset of 2..max_items values summing into [min_target, max_target].
+
+    Fewer items win; among equal sizes the sum closest to target wins. Pairs
+    use the sorted complement search, larger subsets meet-in-the-middle for
+    blocks up to MITM_MAX_ITEMS and the bitset DP above that. When the DP does
+    not fit the budget, the block is trimmed to the MITM_MAX_ITEMS largest
+    usable values and searched with meet-in-the-middle (budget.exhausted is set).
+
+    Args:
+        values: int64 cents (non-positive values are never used)
+        min_target, max_target: Inclusive sum range in cents
+        target: Preferred sum (default: middle of the range)
+        min_items, max_items: Subset size range
+        budget: WorkBudget for this block (default: DEFAULT_WORK_BUDGET)
+
+    Returns:
+        Sorted positions into values, or None
+    """
+    values = np.asarray(values, dtype=np.int64)
+    if budget is None:
+        budget = WorkBudget()
+    if target is None:
+        target = (min_target + max_target) // 2
+
+    usable = np.flatnonzero((values > 0) & (values <= max_target))
+    if len(usable) < max(2, min_items):
+        return None
+    block = values[usable]
+
+    if min_items <= 2:
+        budget.charge(len(block) * 2)
+        pair = find_pair(block, min_target, max_target, target)
+        if pair is not None:
+            return [int(usable[p]) for p in pair]
+    if max_items < 3:
+        return None
+
+    min_items = max(3, min_items)
+    if len(block) <= MITM_MAX_ITEMS:
+        picked = find_subset_mitm(block, min_target, max_target, target, min_items, max_items)
+    elif budget.charge(len(block) * max_items * (int(max_target) + 1)):
+        picked = find_subset_bitset(block, min_target, max_target, target, min_items, max_items)
+    else:
+        # Deterministic degradation: keep the largest values (fewest items reach the target)
+        keep = np.sort(np.argsort(-block, kind='stable')[:MITM_MAX_ITEMS])
+        picked = find_subset_mitm(block[keep], min_target, max_target, target, min_items, max_items)
+        picked = None if picked is None else [int(keep[p]) for p in picked]
+
+    if picked is None:
+        return None
+    return [int(usable[p]) for p in picked]